@@ -20,26 +20,32 @@ With some sample provider:
 - Import ontology on SQLite or Postgres
 - and expose the data via Flask or AWS Lambda
 """
+from typing import Any
+
 from .datatypes import Quantity, Coordinate, Uri, Bin, MARKER, NA, \
     REMOVE, Ref, XStr
-from .dumper import dump, dump_scalar
+from .columnar_grid import ColumnarGrid
+from .compact_entity import CompactEntity, entity_layout
+from .dumper import dump, dump_scalar, dump_iter, dump_to
 from .grid import Grid
-from .grid_filter import parse_filter, parse_hs_datetime_format
 from .metadata import MetadataObject
 from .ops import *
 from .parser import parse, parse_scalar, MODE_HAYSON, MODE_JSON, MODE_TRIO, MODE_ZINC, MODE_CSV, \
-    suffix_to_mode, mode_to_suffix
+    suffix_to_mode, mode_to_suffix, ENGINE_FAST, ENGINE_PYPARSING, iter_zinc_rows
 from .pintutil import unit_reg
 from .providers import HaystackInterface
 from .type import HaystackType, Entity
 from .version import Version, VER_2_0, VER_3_0, LATEST_VER
 
-__all__ = ['Grid', 'dump', 'parse', 'dump_scalar', 'parse_scalar', 'parse_filter',
+__all__ = ['Grid', 'ColumnarGrid', 'CompactEntity', 'entity_layout',
+           'dump', 'parse', 'dump_scalar', 'parse_scalar', 'parse_filter',
+           'dump_iter', 'dump_to',
            'MetadataObject', 'unit_reg', 'zoneinfo',
            'HaystackType', 'Entity',
            'Coordinate', 'Uri', 'Bin', 'XStr', 'Quantity', 'MARKER', 'NA', 'REMOVE', 'Ref',
            'MODE', 'MODE_JSON', 'MODE_HAYSON', 'MODE_ZINC', 'MODE_TRIO', 'MODE_CSV',
            'suffix_to_mode', 'mode_to_suffix',
+           'ENGINE_FAST', 'ENGINE_PYPARSING', 'iter_zinc_rows',
            'parse_hs_datetime_format',
            'VER_2_0', 'VER_3_0', 'LATEST_VER', 'Version',
 
@@ -58,27 +64,46 @@ __all__ = ['Grid', 'dump', 'parse', 'dump_scalar', 'parse_scalar', 'parse_filter
            "invoke_action",
            ]
 
+# The filter functions, imported at the first use (the grammars use pyparsing)
+_GRID_FILTER_FUNCTIONS = frozenset(("parse_filter", "parse_hs_datetime_format"))
+
+
+def __getattr__(name: str) -> Any:
+    if name in _GRID_FILTER_FUNCTIONS:
+        from . import grid_filter  # pylint: disable=import-outside-toplevel
+        return getattr(grid_filter, name)
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
+
+
 __pdoc__ = {
+    "columnar_filter": False,
+    "columnar_grid": False,
+    "compact_entity": False,
     "csvdumper": False,
     "csvparser": False,
     "datatypes": False,
     "dumper": False,
     "filter_ast": False,
+    "filter_fastparser": False,
     "grid": False,
     "grid_diff": False,
     "grid_filter": False,
+    "grid_index": False,
     "jsondumper": False,
     "jsonparser": False,
     "metadata": False,
     "ops": False,
+    "parallelparser": False,
     "parser": False,
     "pintutil": False,
+    "snapshot": False,
     "sortabledict": False,
     "triodumper": False,
     "trioparser": False,
     "version": False,
     "zincdumper": False,
     "zincparser": False,
+    "zinc_fastparser": False,
     "zoneinfo": False,
 }
 __author__ = 'Engie Digital, VRT Systems'
@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+# Columnar filter
+# See the accompanying LICENSE file.
+# (C) 2021 Engie Digital
+#
+# vim: set ts=4 sts=4 et tw=78 sw=4 si:
+
+"""
+Evaluate a filter on the columns of a `ColumnarGrid`, without building the entities.
+
+Each node of the `FilterAST` produces a mask: an `int` with one byte by entity (`1` if the
+entity is selected). The masks are combined with `&` and `|`, and the bytes are computed
+from the arrays of the columns:
+
+- the presence of a tag,
+- the comparison of the values of the dictionary used by the entities with the constant,
+  then the selection of the codes,
+- the comparison of numbers, and `Quantity` after the conversion of the constant to the
+  unit of the column,
+- the comparison of each value of the other columns (dates, ...).
+
+The other nodes (paths with `->`) are evaluated on the entities.
+"""
+from itertools import compress, repeat
+from typing import Optional, Iterator, Any
+
+from .columnar_grid import ColumnarGrid, _DictColumn, _NumberColumn, _Column
+from .datatypes import Quantity
+from .filter_ast import FilterNode, FilterUnary, FilterBinary, FilterPath
+from .grid_filter import parse_filter, _compile_node, _COMPARATORS
+
+_NOT_ZERO = bytes([0]) + bytes([1]) * 255
+
+
+def _to_mask(flags: bytes) -> int:
+    return int.from_bytes(flags, 'little')
+
+
+def _has_mask(column: _Column) -> int:
+    if isinstance(column, _DictColumn):
+        if column.codes.typecode == 'B':
+            return _to_mask(column.codes.tobytes().translate(_NOT_ZERO))
+        return _to_mask(bytes(map(bool, column.codes)))
+    if isinstance(column, _NumberColumn):
+        return _to_mask(column.present)
+    return _to_mask(bytes(value is not None for value in column.values))
+
+
+def _compare_mask(column: _Column, operator_name: str, value: Any) -> int:
+    """Return the mask of `entity[tag] <operator> value`.
+
+    Raises:
+        An exception if the values can not be compared
+    """
+    compare = _COMPARATORS[operator_name]
+    if isinstance(column, _DictColumn):
+        # Compare each value of the dictionary used by an entity, then select the codes.
+        # The values of the deleted or updated entities stay in the dictionary.
+        codes = column.codes.tobytes() if column.codes.typecode == 'B' else column.codes
+        selected_codes = bytearray(len(column.values))
+        for code in set(codes) - {0}:
+            selected_codes[code] = bool(compare(column.values[code], value))
+        if column.codes.typecode == 'B':
+            table = bytes(selected_codes) + bytes(256 - len(selected_codes))
+            return _to_mask(column.codes.tobytes().translate(table))
+        return _to_mask(bytes(map(selected_codes.__getitem__, column.codes)))
+
+    if isinstance(column, _NumberColumn):
+        number = None
+        if column.unit is None and value.__class__ in (int, float):
+            number = value
+        elif column.unit is not None and isinstance(value, Quantity):
+            number = value.m if value.symbol == column.unit \
+                else value.to(Quantity(1.0, column.unit).units).m
+        if number is not None:
+            return _to_mask(bytes(map(compare, column.numbers, repeat(number)))) \
+                   & _to_mask(column.present)
+        column_values: Iterator[Any] = (column.get(position) for position in range(len(column)))
+    else:
+        column_values = iter(column.values)
+    return _to_mask(bytes(column_value is not None and bool(compare(column_value, value))
+                          for column_value in column_values))
+
+
+def _column_mask(node: FilterNode, grid: ColumnarGrid, all_mask: int) -> Optional[int]:
+    """Return the mask of a node with one tag, or `None` if the node must be evaluated
+    on the entities."""
+    if isinstance(node, FilterUnary):
+        paths = node.right.paths  # type: ignore
+        if len(paths) != 1:
+            return None
+        column = grid._columns.get(paths[0])  # pylint: disable=protected-access
+        has_mask = 0 if column is None else _has_mask(column)
+        return has_mask if node.operator == "has" else all_mask ^ has_mask
+
+    assert isinstance(node, FilterBinary) and isinstance(node.left, FilterPath)
+    if len(node.left.paths) != 1 or isinstance(node.right, FilterNode):
+        return None
+    column = grid._columns.get(node.left.paths[0])  # pylint: disable=protected-access
+    if column is None:
+        return 0
+    try:
+        return _compare_mask(column, node.operator, node.right)
+    except Exception:  # pylint: disable=broad-except
+        # Incompatible values or units: the entities are compared like in a `Grid`
+        return None
+
+
+def _row_mask(node: FilterNode, grid: ColumnarGrid, within: int) -> int:
+    """Evaluate a node on the entities selected by `within`."""
+    function = _compile_node(node)
+    size = len(grid)
+    rows = grid._rows  # pylint: disable=protected-access
+    flags = bytearray(size)
+    for position in compress(range(size), within.to_bytes(size, 'little')):
+        flags[position] = bool(function(grid, rows[position]))
+    return _to_mask(flags)
+
+
+def _mask(node: FilterNode, grid: ColumnarGrid, within: int, all_mask: int) -> int:
+    """
+    Return the mask of a node, for the entities selected by `within`.
+    Like the `and` and `or` operators, the right node is evaluated only on the entities
+    where the result is not known.
+    """
+    if isinstance(node, FilterBinary) and node.operator in ("and", "or"):
+        left = _mask(node.left, grid, within, all_mask)
+        if node.operator == "and":
+            return left & _mask(node.right, grid, within & left, all_mask)
+        return left | _mask(node.right, grid, within & (all_mask ^ left), all_mask)
+    mask = _column_mask(node, grid, all_mask)
+    if mask is None:
+        return _row_mask(node, grid, within)
+    return mask & within
+
+
+def filter_mask(grid_filter: str, grid: ColumnarGrid) -> bytes:
+    """
+    Evaluate a filter on a columnar grid.
+
+    Args:
+        grid_filter: The request filter
+        grid: The grid
+    Returns:
+        One byte by entity, `1` if the entity is selected
+    """
+    size = len(grid)
+    all_mask = _to_mask(b'\x01' * size)
+    mask = _mask(parse_filter(grid_filter).head, grid, all_mask, all_mask)  # type: ignore
+    return mask.to_bytes(size, 'little')
@@ -0,0 +1,412 @@
+# -*- coding: utf-8 -*-
+# Columnar Grid
+# See the accompanying LICENSE file.
+# (C) 2021 Engie Digital
+#
+# vim: set ts=4 sts=4 et tw=78 sw=4 si:
+
+"""
+A grid with the values saved by column, to reduce the memory of huge ontologies.
+
+Each tag is saved in a column, with an array of values for all the entities:
+
+- the `Ref`, `str`, `bool` and marker values are saved with a dictionary encoding:
+  an array of integer codes, and the list of distinct values,
+- the `float` and `Quantity` (with a `float` magnitude and the same unit for all the column)
+  are saved in an array of `float`,
+- the other values are saved in a list.
+
+The entities are built only when they are read. An update of an entity must be saved
+with `grid[i] = entity`.
+"""
+import copy
+from array import array
+from collections.abc import MutableSequence  # pylint: disable=no-name-in-module
+from itertools import compress, islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Union, Tuple
+
+from .datatypes import Quantity, Ref, _MarkerType, _NAType, _RemoveType
+from .grid import Grid
+from .grid_index import PositionIndex
+from .type import Entity
+
+_DICT_TYPES = frozenset((str, bool, Ref, _MarkerType, _NAType, _RemoveType))
+# Over this number of values, a dictionary column with more values than half of the
+# entities is converted to a list
+_MAX_DICT_VALUES = 256
+# The type of codes for the size of the dictionary
+_CODE_TYPES = ((0x100, 'B'), (0x10000, 'H'))
+
+
+def _dict_key(value: Any) -> Tuple[Any, ...]:
+    """The key of a value in a dictionary column. The display value of a `Ref` is saved."""
+    if value.__class__ is Ref:
+        return Ref, value.name, value.value
+    return value.__class__, value
+
+
+class _DictColumn:
+    """A column with a dictionary encoding. The code `0` is an absent value.
+    The size of the codes grows with the size of the dictionary."""
+
+    __slots__ = "codes", "values", "_lookup"
+
+    def __init__(self):
+        self.codes = array('B')
+        self.values: List[Any] = [None]
+        self._lookup: Dict[Tuple[Any, ...], int] = {}
+
+    @staticmethod
+    def accept(value: Any) -> bool:
+        return value.__class__ in _DICT_TYPES
+
+    def _code(self, value: Any) -> int:
+        if value is None:
+            return 0
+        key = _dict_key(value)
+        code = self._lookup.get(key)
+        if code is None:
+            code = self._lookup[key] = len(self.values)
+            self.values.append(value)
+            for max_code, typecode in _CODE_TYPES:
+                if code < max_code:
+                    break
+            else:
+                typecode = 'I'
+            if typecode != self.codes.typecode:
+                self.codes = array(typecode, self.codes)
+        return code
+
+    def is_too_large(self) -> bool:
+        return len(self.values) > _MAX_DICT_VALUES and len(self.values) > len(self.codes) // 2
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def get(self, position: int) -> Any:
+        return self.values[self.codes[position]]
+
+    def set(self, position: int, value: Any) -> None:
+        code = self._code(value)  # May change the array of codes
+        self.codes[position] = code
+
+    def insert(self, position: int, value: Any) -> None:
+        code = self._code(value)
+        self.codes.insert(position, code)
+
+    def pad(self, size: int) -> None:
+        self.codes.extend(array(self.codes.typecode, [0]) * (size - len(self.codes)))
+
+    def delete(self, position: int) -> None:
+        del self.codes[position]
+
+
+class _NumberColumn:
+    """A column of `float`, or `Quantity` with the same unit."""
+
+    __slots__ = "numbers", "present", "unit"
+
+    def __init__(self, unit: Optional[str]):
+        self.numbers = array('d')
+        self.present = bytearray()
+        self.unit = unit
+
+    @staticmethod
+    def unit_of(value: Any) -> Tuple[bool, Optional[str]]:
+        """Return `True` and the unit, if the value can be saved in a column of numbers."""
+        if value.__class__ is float:
+            return True, None
+        if value.__class__ is Quantity and value.m.__class__ is float and value.symbol:
+            return True, value.symbol
+        return False, None
+
+    def accept(self, value: Any) -> bool:
+        return self.unit_of(value) == (True, self.unit)
+
+    def __len__(self) -> int:
+        return len(self.present)
+
+    def get(self, position: int) -> Any:
+        if not self.present[position]:
+            return None
+        if self.unit is None:
+            return self.numbers[position]
+        return Quantity(self.numbers[position], self.unit)
+
+    def _number(self, value: Any) -> float:
+        return 0.0 if value is None else (value if self.unit is None else value.m)
+
+    def set(self, position: int, value: Any) -> None:
+        self.numbers[position] = self._number(value)
+        self.present[position] = value is not None
+
+    def insert(self, position: int, value: Any) -> None:
+        self.numbers.insert(position, self._number(value))
+        self.present.insert(position, value is not None)
+
+    def pad(self, size: int) -> None:
+        missing = size - len(self.present)
+        self.numbers.extend(array('d', [0.0]) * missing)
+        self.present.extend(bytes(missing))
+
+    def delete(self, position: int) -> None:
+        del self.numbers[position]
+        del self.present[position]
+
+
+class _ObjectColumn:
+    """A column with the values in a list."""
+
+    __slots__ = ("values",)
+
+    def __init__(self, values: Optional[List[Any]] = None):
+        self.values = values if values is not None else []
+
+    @staticmethod
+    def accept(_: Any) -> bool:
+        return True
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def get(self, position: int) -> Any:
+        return self.values[position]
+
+    def set(self, position: int, value: Any) -> None:
+        self.values[position] = value
+
+    def insert(self, position: int, value: Any) -> None:
+        self.values.insert(position, value)
+
+    def pad(self, size: int) -> None:
+        self.values.extend([None] * (size - len(self.values)))
+
+    def delete(self, position: int) -> None:
+        del self.values[position]
+
+
+_Column = Union[_DictColumn, _NumberColumn, _ObjectColumn]
+
+
+def _new_column(value: Any) -> _Column:
+    if _DictColumn.accept(value):
+        return _DictColumn()
+    is_number, unit = _NumberColumn.unit_of(value)
+    if is_number:
+        return _NumberColumn(unit)
+    return _ObjectColumn()
+
+
+class _ColumnarRows(MutableSequence):
+    """The entities of a `ColumnarGrid`, built when they are read.
+
+    A column may be shorter than the grid: the missing positions are absent values.
+    """
+
+    __slots__ = ("_grid",)
+
+    def __init__(self, grid: 'ColumnarGrid'):
+        self._grid = grid
+
+    def _check_position(self, position: int) -> int:
+        size = self._grid._size  # pylint: disable=protected-access
+        if position < 0:
+            position += size
+        if not 0 <= position < size:
+            raise IndexError('list index out of range')
+        return position
+
+    def __len__(self) -> int:
+        return self._grid._size  # pylint: disable=protected-access
+
+    def __getitem__(self, position: Union[int, slice]) -> Any:  # type: ignore
+        if isinstance(position, slice):
+            return [self[i] for i in range(*position.indices(len(self)))]
+        position = self._check_position(position)
+        entity = {}
+        for tag, column in self._grid._columns.items():  # pylint: disable=protected-access
+            if position < len(column):
+                value = column.get(position)
+                if value is not None:
+                    entity[tag] = value
+        return entity
+
+    def __iter__(self) -> Iterator[Entity]:
+        for position in range(len(self)):
+            yield self[position]
+
+    def __setitem__(self, position: Union[int, slice], entity: Any) -> None:  # type: ignore
+        if isinstance(position, slice):
+            rows = list(self)
+            rows[position] = entity
+            self._grid._set_rows(rows)  # pylint: disable=protected-access
+            return
+        position = self._check_position(position)
+        for column in self._grid._columns.values():  # pylint: disable=protected-access
+            if position < len(column):
+                column.set(position, None)
+        self._set_values(position, entity)
+
+    def __delitem__(self, position: Union[int, slice]) -> None:  # type: ignore
+        if isinstance(position, slice):
+            rows = list(self)
+            del rows[position]
+            self._grid._set_rows(rows)  # pylint: disable=protected-access
+            return
+        position = self._check_position(position)
+        grid = self._grid
+        for column in grid._columns.values():  # pylint: disable=protected-access
+            if position < len(column):
+                column.delete(position)
+        grid._size -= 1  # pylint: disable=protected-access
+
+    def insert(self, position: int, entity: Entity) -> None:
+        grid = self._grid
+        size = grid._size  # pylint: disable=protected-access
+        position = min(max(position + size, 0) if position < 0 else position, size)
+        for column in grid._columns.values():  # pylint: disable=protected-access
+            if position < len(column):
+                column.insert(position, None)
+        grid._size += 1  # pylint: disable=protected-access
+        self._set_values(position, entity)
+
+    def _set_values(self, position: int, entity: Entity) -> None:
+        """Save the values of an entity, at a position without values."""
+        grid = self._grid
+        for tag, value in entity.items():
+            if value is None:
+                continue
+            column = grid._column_for(tag, value)  # pylint: disable=protected-access
+            if position < len(column):
+                column.set(position, value)
+            else:
+                column.pad(position)
+                column.insert(position, value)
+
+
+class ColumnarGrid(Grid):
+    """A `Grid` saving the values by column, with a dictionary encoding.
+
+    The API is the same as `Grid`, but the entities are built when they are read. Update an
+    entity with `grid[i] = entity` or `grid[ref] = entity`, not directly. A tag with a `None`
+    value is absent.
+
+    Args:
+        version: The haystack version (See VERSION_...)
+        metadata: A dictionary with the metadata associated with the grid.
+        columns: A list of columns, or a dictionary with columns name and corresponding metadata
+    """
+
+    __slots__ = "_columns", "_size", "_rows"
+
+    @property  # type: ignore
+    def _row(self) -> _ColumnarRows:  # type: ignore
+        return self._rows
+
+    @_row.setter
+    def _row(self, rows: Iterable[Entity]) -> None:
+        self._set_rows(rows)
+
+    def _set_rows(self, rows: Iterable[Entity]) -> None:
+        rows = list(rows)  # The rows may be the current view
+        self._columns: Dict[str, _Column] = {}
+        self._size = 0
+        self._rows = _ColumnarRows(self)
+        for row in rows:
+            self._rows.insert(self._size, row)
+        self._index = None
+
+    def _column_for(self, tag: str, value: Any) -> _Column:
+        """Return the column of a tag, able to save the value."""
+        column = self._columns.get(tag)
+        if column is None:
+            column = self._columns[tag] = _new_column(value)
+        elif value is not None and not column.accept(value) \
+                or column.__class__ is _DictColumn and column.is_too_large():  # type: ignore
+            column = self._columns[tag] = _ObjectColumn([column.get(i) for i in range(len(column))])
+        return column
+
+    @classmethod
+    def from_grid(cls, grid: Grid) -> 'ColumnarGrid':
+        """Convert a grid.
+
+        Args:
+            grid: The grid to convert
+        Returns:
+            A new `ColumnarGrid` with the same metadata, columns and entities
+        """
+        columnar_grid = cls(version=grid.version, metadata=grid.metadata, columns=grid.column)
+        return columnar_grid.extend(grid)
+
+    def to_grid(self) -> Grid:
+        """Convert to a `Grid`, with all the entities in memory.
+
+        Returns:
+            A new grid with the same metadata, columns and entities
+        """
+        grid = Grid(version=self.version, metadata=self.metadata, columns=self.column)
+        return grid.extend(self._rows)
+
+    def __iter__(self) -> Iterator[Entity]:
+        return iter(self._rows)
+
+    def reindex(self) -> 'Grid':
+        column = self._columns.get("id")
+        size = 0 if column is None else len(column)  # The last entities may have no id
+        self._index = PositionIndex(column.get(position) if position < size else None  # type: ignore
+                                    for position in range(self._size))
+        self._tag_index = None
+        self._ref_graph = None
+        return self
+
+    def extend(self, values: Iterable[Entity]) -> 'ColumnarGrid':  # type: ignore
+        for value in values:
+            self.insert(len(self), value)
+        return self
+
+    def filter(self, grid_filter: str, limit: int = 0) -> Grid:
+        """Return a filter version of this grid.
+
+        The filter is evaluated on the columns, and only the selected entities are built.
+
+        Args:
+            grid_filter: The filter expression (see specification)
+            limit: The maximum number of result
+        Returns:
+            A new `Grid` with only the selected entities.
+        """
+        assert limit >= 0
+        if grid_filter is None or grid_filter.strip() == '':
+            return super().filter(grid_filter, limit)
+        from .columnar_filter import filter_mask  # pylint: disable=import-outside-toplevel
+        result = Grid(version=self.version, metadata=self.metadata, columns=self.column)
+        positions = compress(range(self._size), filter_mask(grid_filter, self))
+        rows = self._rows
+        result._row = [rows[position] for position in islice(positions, limit or None)]
+        return result
+
+    def copy(self) -> 'ColumnarGrid':
+        """ Create a copy of current grid.
+
+        Returns:
+            A copy of the current grid.
+        """
+        return copy.deepcopy(self)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return {"version": self._version, "version_given": self._version_given,
+                "metadata": self.metadata, "column": self.column,
+                "columns": self._columns, "size": self._size}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self._version = state["version"]
+        self._version_given = state["version_given"]
+        self.metadata = state["metadata"]
+        self.column = state["column"]
+        self._columns = state["columns"]
+        self._size = state["size"]
+        self._rows = _ColumnarRows(self)
+        self._index = None
+        self._tag_index = None
+        self._indexed = False
+        self._ref_graph = None
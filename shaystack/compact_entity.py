@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+# Compact entity
+# See the accompanying LICENSE file.
+# (C) 2021 Engie Digital
+#
+# vim: set ts=4 sts=4 et tw=78 sw=4 si:
+
+"""
+A compact representation of the entities of a grid, with the same tags.
+
+A `dict` saves a hash table with the keys for each entity. A `CompactEntity` saves only the
+values, in the slots of a class shared by all the entities with the same tags (the layout,
+see `entity_layout()`). An absent tag is an empty slot. A tag not in the layout is saved in
+a `dict` with the other tags.
+
+With two tags (`ts` and `val`), an entity uses 56 bytes, instead of 184 for a `dict`.
+In return, reading a tag is about two times slower than with a `dict`.
+The parsers use this representation with `compact=True`, for the entities with at least
+half of the columns (see `compact_entity()`).
+"""
+from collections.abc import MutableMapping
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Iterator, Mapping, Optional, Sequence, Tuple, Type
+
+from .type import Entity
+
+# The maximum number of layouts in the cache
+MAX_LAYOUTS = 1024
+
+
+class CompactEntity(MutableMapping):
+    """An entity saving the values in the slots of its layout.
+
+    Use `entity_layout()` to get the class of the entities with some tags. Like a `dict`,
+    the entity can be read and updated. A `CompactEntity` is equal to a `dict` with the same
+    tags and values.
+
+    Args:
+        entity: The initial tags and values
+    """
+
+    __slots__ = ("_extra",)
+
+    # The tags of the layout, and the slot of each tag
+    _tags: Tuple[str, ...] = ()
+    _cells: Dict[str, Any] = {}
+
+    def __init__(self, entity: Optional[Mapping[str, Any]] = None):
+        self._extra: Optional[Dict[str, Any]] = None
+        if entity:
+            self.update(entity)
+
+    @classmethod
+    def from_values(cls, values: Sequence[Any]) -> 'CompactEntity':
+        """Create an entity with the values of all the tags of the layout.
+
+        Args:
+            values: The values, in the order of the tags. `None` for an absent tag.
+        Returns:
+            The new entity
+        """
+        entity = cls.__new__(cls)
+        entity._extra = None  # pylint: disable=protected-access
+        for cell, value in zip(cls._cells.values(), values):
+            if value is not None:
+                cell.__set__(entity, value)
+        return entity
+
+    def __getitem__(self, key: str) -> Any:
+        cell = self._cells.get(key)
+        if cell is not None:
+            try:
+                return cell.__get__(self)
+            except AttributeError:
+                raise KeyError(key) from None
+        if self._extra is None:
+            raise KeyError(key)
+        return self._extra[key]
+
+    def get(self, key: str, default: Any = None) -> Any:
+        cell = self._cells.get(key)
+        if cell is not None:
+            try:
+                return cell.__get__(self)
+            except AttributeError:
+                return default
+        if self._extra is None:
+            return default
+        return self._extra.get(key, default)
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        cell = self._cells.get(key)
+        if cell is not None:
+            cell.__set__(self, value)
+            return
+        if self._extra is None:
+            self._extra = {}
+        self._extra[key] = value
+
+    def __delitem__(self, key: str) -> None:
+        cell = self._cells.get(key)
+        if cell is not None:
+            try:
+                cell.__delete__(self)
+                return
+            except AttributeError:
+                raise KeyError(key) from None
+        if self._extra is None:
+            raise KeyError(key)
+        del self._extra[key]
+
+    def __contains__(self, key: object) -> bool:
+        cell = self._cells.get(key)  # type: ignore
+        if cell is not None:
+            return hasattr(self, cell.__name__)
+        return self._extra is not None and key in self._extra
+
+    def __iter__(self) -> Iterator[str]:
+        for tag, cell in self._cells.items():
+            if hasattr(self, cell.__name__):
+                yield tag
+        if self._extra:
+            yield from self._extra
+
+    def __len__(self) -> int:
+        size = sum(hasattr(self, cell.__name__) for cell in self._cells.values())
+        return size + len(self._extra) if self._extra else size
+
+    def copy(self) -> 'CompactEntity':
+        """Return a shallow copy, with the same layout."""
+        a_copy = self.__class__.__new__(self.__class__)
+        for cell in self._cells.values():
+            try:
+                cell.__set__(a_copy, cell.__get__(self))
+            except AttributeError:
+                pass
+        a_copy._extra = dict(self._extra) if self._extra else None  # pylint: disable=protected-access
+        return a_copy
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        return _rebuild, (self._tags, dict(self))
+
+    def __repr__(self) -> str:
+        return 'CompactEntity(%r)' % dict(self)
+
+
+def _rebuild(tags: Tuple[str, ...], entity: Dict[str, Any]) -> CompactEntity:
+    return entity_layout(tags)(entity)
+
+
+@lru_cache(maxsize=MAX_LAYOUTS)
+def _layout(tags: Tuple[str, ...]) -> Type[CompactEntity]:
+    slots = tuple('_%d' % position for position in range(len(tags)))
+    layout = type('CompactEntity', (CompactEntity,), {'__slots__': slots, '_tags': tags})
+    layout._cells = {tag: layout.__dict__[slot]  # pylint: disable=protected-access
+                     for tag, slot in zip(tags, slots)}
+    return layout
+
+
+def entity_layout(tags: Iterable[str]) -> Type[CompactEntity]:
+    """Return the class of the compact entities with some tags.
+
+    The same class is shared by all the entities with the same tags (in the same order).
+
+    Args:
+        tags: The tags (usually, the columns of a grid)
+    Returns:
+        A subclass of `CompactEntity`
+    """
+    return _layout(tuple(tags))
+
+
+def compact_entity(entity: Entity, layout: Type[CompactEntity]) -> Entity:
+    """Return a compact copy of an entity, if it uses at least half of the tags of the layout.
+
+    Args:
+        entity: The entity
+        layout: The layout (see `entity_layout()`)
+    Returns:
+        A `CompactEntity`, or the entity if it is smaller as a `dict`
+    """
+    if len(entity) * 2 < len(layout._tags):  # pylint: disable=protected-access
+        return entity
+    return layout(entity)
+
+
+def compact_entities(entities: Iterable[Entity], tags: Iterable[str]) -> Iterator[Entity]:
+    """Convert the entities with at least half of the tags to `CompactEntity`.
+
+    Args:
+        entities: The entities
+        tags: The tags of the layout (usually, the columns of the grid)
+    Returns:
+        The entities, with a shared layout
+    """
+    layout = entity_layout(tags)
+    return (compact_entity(entity, layout) for entity in entities)
@@ -12,12 +12,13 @@ from __future__ import unicode_literals
 
 import datetime
 import functools
-from typing import AnyStr, List, Any, Match
+from typing import AnyStr, List, Any, Match, Dict, Callable, Iterator
 
 from .datatypes import Quantity, Coordinate, Ref, Bin, Uri, \
-    MARKER, NA, REMOVE, XStr
+    XStr, _MarkerType, _NAType, _RemoveType
 from .grid import Grid
 from .sortabledict import SortableDict
+from .tools import find_encoder
 from .type import Entity
 from .version import LATEST_VER, VER_3_0, Version
 from .zincdumper import dump_grid as zinc_dump_grid
@@ -54,15 +55,26 @@ def _dump_column(col: str) -> str:
 
 
 def _dump_rows(csv_result: List[str], grid: Grid) -> None:
-    list(map(functools.partial(_dump_row, csv_result, grid), grid))
+    csv_result.extend(map(_row_dumper(grid), grid))
 
 
-def _dump_row(csv_result: List[str], grid: Grid, row: Entity) -> None:
-    row_in_csv = [dump_scalar(row.get(c), version=grid.version) + "," for c in grid.column.keys()]
-    row_in_csv[-1] = row_in_csv[-1][:-1] + '\n'
-    if len(row_in_csv) == 1 and row_in_csv[0] == '\n':
-        row_in_csv[0] = ",\n"
-    csv_result.extend(row_in_csv)
+def _row_dumper(grid: Grid) -> Callable[[Entity], str]:
+    """Return a function to dump the rows of a grid, specialized for its columns and its version."""
+    columns = tuple(grid.column.keys())
+    version = grid.version
+    encoders = _ENCODERS
+
+    def _dump_row(row: Entity) -> str:
+        cells = []
+        for column in columns:
+            value = row.get(column)
+            encoder = encoders.get(type(value))
+            cells.append(encoder(value, version) if encoder else dump_scalar(value, version))
+        line = ','.join(cells)
+        # A row with only an empty cell
+        return line + '\n' if line else ',\n'
+
+    return _dump_row
 
 
 def _dump_id(id_str: str) -> str:
@@ -131,6 +143,43 @@ def _dump_date_time(date_time: datetime.datetime) -> str:
     return '%s' % (date_time.isoformat())  # Note: Excel can not parse the date time with tz_name
 
 
+def _dump_na(_: Any, version: Version) -> str:
+    if version < VER_3_0:
+        raise ValueError('Project Haystack version %s '
+                         'does not support NA'
+                         % version)
+    return 'NA'
+
+
+def _dump_zinc(scalar: Any, version: Version) -> str:
+    return '"' + _str_csv_escape(zinc_dump_scalar(scalar, version=version)) + '"'
+
+
+# The encoder of each type. The subclasses are added at the first use (see `find_encoder()`).
+_ENCODERS: Dict[type, Callable[[Any, Version], str]] = {
+    type(None): lambda _, __: '',
+    _NAType: _dump_na,
+    _MarkerType: lambda _, __: '\u2713',
+    _RemoveType: lambda _, __: 'R',
+    bool: lambda value, _: _dump_bool(value),
+    Ref: lambda value, _: _dump_ref(value),
+    Bin: lambda value, _: _dump_bin(value),
+    XStr: lambda value, _: _dump_xstr(value),
+    Uri: lambda value, _: _dump_uri(value),
+    str: lambda value, _: _dump_str(value),
+    datetime.datetime: lambda value, _: _dump_date_time(value),
+    datetime.time: lambda value, _: _dump_time(value),
+    datetime.date: lambda value, _: _dump_date(value),
+    Coordinate: lambda value, _: _dump_coord(value),
+    Quantity: lambda value, _: _dump_quantity(value),
+    float: lambda value, _: _dump_decimal(value),
+    int: lambda value, _: _dump_decimal(value),
+    list: _dump_zinc,
+    dict: _dump_zinc,
+    Grid: lambda value, _: '"' + _str_csv_escape("<<" + zinc_dump_grid(value) + ">>") + '"',
+}
+
+
 def dump_scalar(scalar: Any, version: Version = LATEST_VER) -> str:
     """
     Dump scala to CSV.
@@ -138,49 +187,10 @@ def dump_scalar(scalar: Any, version: Version = LATEST_VER) -> str:
         scalar: The scalar value
         version: The haystack version
     """
-    if scalar is None:
-        return ''
-    if scalar is NA:
-        if version < VER_3_0:
-            raise ValueError('Project Haystack version %s '
-                             'does not support NA'
-                             % version)
-        return 'NA'
-    if scalar is MARKER:
-        return '\u2713'
-    if scalar is REMOVE:
-        return 'R'
-    if isinstance(scalar, bool):
-        return _dump_bool(scalar)
-    if isinstance(scalar, Ref):
-        return _dump_ref(scalar)
-    if isinstance(scalar, Bin):
-        return _dump_bin(scalar)
-    if isinstance(scalar, XStr):
-        return _dump_xstr(scalar)
-    if isinstance(scalar, Uri):
-        return _dump_uri(scalar)
-    if isinstance(scalar, str):
-        return _dump_str(scalar)
-    if isinstance(scalar, datetime.datetime):
-        return _dump_date_time(scalar)
-    if isinstance(scalar, datetime.time):
-        return _dump_time(scalar)
-    if isinstance(scalar, datetime.date):
-        return _dump_date(scalar)
-    if isinstance(scalar, Coordinate):
-        return _dump_coord(scalar)
-    if isinstance(scalar, Quantity):
-        return _dump_quantity(scalar)
-    if isinstance(scalar, (float, int)):
-        return _dump_decimal(scalar)
-    if isinstance(scalar, list):
-        return '"' + _str_csv_escape(zinc_dump_scalar(scalar, version=version)) + '"'
-    if isinstance(scalar, dict):
-        return '"' + _str_csv_escape(zinc_dump_scalar(scalar, version=version)) + '"'
-    if isinstance(scalar, Grid):
-        return '"' + _str_csv_escape("<<" + zinc_dump_grid(scalar) + ">>") + '"'
-    return '"' + _str_csv_escape(zinc_dump_scalar(scalar)) + '"'
+    encoder = _ENCODERS.get(type(scalar)) or find_encoder(_ENCODERS, type(scalar))
+    if encoder is None:
+        return '"' + _str_csv_escape(zinc_dump_scalar(scalar)) + '"'
+    return encoder(scalar, version)
 
 
 def dump_grid(grid: Grid) -> AnyStr:
@@ -197,3 +207,17 @@ def dump_grid(grid: Grid) -> AnyStr:
     _dump_columns(csv_result, grid.column)
     _dump_rows(csv_result, grid)
     return ''.join(csv_result)  # type: ignore
+
+
+def dump_grid_iter(grid: Grid) -> Iterator[str]:
+    """Dump a single grid to its CSV representation, line by line.
+
+    Args:
+        grid: The grid to dump
+    Returns:
+        The lines of the CSV string, with the end of line
+    """
+    header: List[str] = []
+    _dump_columns(header, grid.column)
+    yield ''.join(header)
+    yield from map(_row_dumper(grid), grid)
@@ -12,7 +12,8 @@ from csv import reader
 from io import StringIO
 from typing import Any
 
-from .datatypes import MARKER, Ref
+from .compact_entity import entity_layout, compact_entity
+from .datatypes import MARKER, intern_ref
 from .grid import Grid
 from .version import VER_3_0, Version, LATEST_VER
 from .zincparser import parse_scalar as zinc_parse_scalar, ZincParseException
@@ -20,11 +21,12 @@ from .zincparser import parse_scalar as zinc_parse_scalar, ZincParseException
 _EMPTY = "<empty>"
 
 
-def parse_grid(grid_str: str) -> Grid:
+def parse_grid(grid_str: str, compact: bool = False) -> Grid:
     """
     Parse a CSV string to create a new Grid.
     Args:
         grid_str: String to parse
+        compact: `True` to save the entities with most of the columns as `CompactEntity`
     Returns:
         The corresponding Grid
     """
@@ -35,7 +37,8 @@ def parse_grid(grid_str: str) -> Grid:
     csv_reader = reader(StringIO(grid_str))
     i = iter(csv_reader)
     headers = next(i)
-    grid = Grid(version=version, columns=((x, {}) for x in headers))
+    layout = entity_layout(headers) if compact else None
+    rows = []
     for row in i:
         a_map = {}
         for idx, val in enumerate(row):
@@ -45,8 +48,8 @@ def parse_grid(grid_str: str) -> Grid:
                     raise ZincParseException('Failed to parse scalar: %s' % value, grid_str, 1, 1)
                 if value is not None:
                     a_map[headers[idx]] = value
-        grid.append(a_map)
-    return grid
+        rows.append(compact_entity(a_map, layout) if layout is not None else a_map)
+    return Grid.from_rows(version, None, ((x, {}) for x in headers), rows)
 
 
 def parse_scalar(scalar: str, version: Version = LATEST_VER) -> Any:
@@ -67,7 +70,7 @@ def parse_scalar(scalar: str, version: Version = LATEST_VER) -> Any:
     if scalar == 'false':
         return False
     if scalar[0] == '@':
-        return Ref(*scalar[1:].split(' ', 1))
+        return intern_ref(*scalar[1:].split(' ', 1))
     try:
         return zinc_parse_scalar(scalar, version)  # Date, Time, ... ?
     except ZincParseException:
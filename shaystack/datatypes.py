@@ -14,9 +14,11 @@ See https://www.project-haystack.org/doc/TagModel#tagKinds
 import base64
 import binascii
 import re
-from typing import Optional, NewType
+import weakref
+from threading import Lock
+from typing import Optional, NewType, Tuple, Any
 
-from .pintutil import unit_reg, _to_pint_unit
+from .pintutil import unit_reg, _to_pint_unit, _pint_units
 
 MODE = NewType('Mode', str)  # type: ignore
 """
@@ -28,6 +30,10 @@ MODE_JSON: MODE = MODE('application/json')
 MODE_HAYSON: MODE = MODE('application/hayson')
 MODE_CSV: MODE = MODE('text/csv')
 
+# Engines of the Zinc parser
+ENGINE_PYPARSING = "pyparsing"
+ENGINE_FAST = "fast"
+
 
 # Update the unit when create a pint.Quantity
 class Quantity(unit_reg.Quantity):
@@ -43,11 +49,26 @@ class Quantity(unit_reg.Quantity):
     """
 
     def __new__(cls, value, units=None):
+        if units.__class__ is str and units and value.__class__ in (float, int):
+            # The parsers create a lot of quantities: the unit is parsed once for each symbol,
+            # and the attributes initialized by pint (0.17) are set without the checks of the
+            # generic constructor.
+            new_quantity = object.__new__(Quantity)
+            new_quantity._magnitude = value  # pylint: disable=attribute-defined-outside-init
+            new_quantity._units = _pint_units(units)  # pylint: disable=attribute-defined-outside-init
+            new_quantity._Quantity__used = False  # pylint: disable=attribute-defined-outside-init
+            new_quantity._Quantity__handling = None  # pylint: disable=attribute-defined-outside-init
+            new_quantity.symbol = units
+            return new_quantity
         new_quantity = unit_reg.Quantity.__new__(Quantity, value,
                                                  _to_pint_unit(units) if units else None)
         new_quantity.symbol = units
         return new_quantity
 
+    def __reduce__(self):
+        # The default pint implementation use the application registry, without the haystack units
+        return Quantity, (self.m, self.symbol)
+
 
 class Coordinate:
     """A 2D co-ordinate in degrees latitude and longitude.
@@ -167,6 +188,10 @@ class _Singleton:
         # A singleton return himself
         return self
 
+    def __reduce__(self) -> str:
+        # Unpickle with the global name of the singleton (`MARKER`, `NA` or `REMOVE`)
+        return repr(self)
+
     def __hash__(self) -> int:
         return hash(self.__class__)
 
@@ -201,21 +226,37 @@ class _RemoveType(_Singleton):
 REMOVE = _RemoveType()
 
 
+_REF_NAME_RE = re.compile("^[a-zA-Z0-9_:\\-.~]+$")
+
+
 class Ref:
     """A reference to an object in Project Haystack.
+
+    A reference is immutable: the parsers share the references with the same name and value
+    (see `intern_ref()`).
         Args:
             name: the uniq id
             value: the comment to describe the reference
     """
 
-    __slots__ = "name", "value"
+    __slots__ = "name", "value", "__weakref__"
 
     def __init__(self, name: str, value: Optional[str] = None):
         if name.startswith("@"):
             name = name[1:]
-        assert isinstance(name, str) and re.match("^[a-zA-Z0-9_:\\-.~]+$", name)
-        self.name = name
-        self.value = value
+        assert isinstance(name, str) and _REF_NAME_RE.match(name)
+        object.__setattr__(self, "name", name)
+        object.__setattr__(self, "value", value)
+
+    def __setattr__(self, key: str, value: Any) -> None:
+        raise AttributeError("Ref is immutable")
+
+    def __delattr__(self, key: str) -> None:
+        raise AttributeError("Ref is immutable")
+
+    def __reduce__(self):
+        # The unpickled references are shared too (with the parallel parser, for example)
+        return intern_ref, (self.name, self.value)
 
     @property
     def has_value(self):
@@ -257,3 +298,29 @@ class Ref:
 
     def __hash__(self) -> int:
         return hash(self.name)
+
+
+# The shared references, by name and value
+_refs: 'weakref.WeakValueDictionary[Tuple[str, Optional[str]], Ref]' = weakref.WeakValueDictionary()
+_refs_lock = Lock()
+
+
+def intern_ref(name: str, value: Optional[str] = None) -> Ref:
+    """Return the shared reference with a name and a value.
+
+    The name of a new reference is validated only once. The table keeps only the references
+    in use.
+
+    Args:
+        name: the uniq id
+        value: the comment to describe the reference
+    Returns:
+        The reference
+    """
+    key = (name, value)
+    ref = _refs.get(key)
+    if ref is None:
+        new_ref = Ref(name, value)
+        with _refs_lock:
+            ref = _refs.setdefault(key, new_ref)
+    return ref
@@ -9,22 +9,40 @@
 """
 Generic dumper of `Grid`. The mode can be `MODE_ZINC`, `MODE_JSON` or `MODE_CSV`
 """
-from typing import Any, Optional
+import importlib
+from types import ModuleType
+from typing import Any, Optional, Iterator, Iterable, BinaryIO
 
-from .csvdumper import dump_grid as dump_csv_grid, \
-    dump_scalar as dump_csv_scalar
 from .datatypes import MODE_TRIO
 from .grid import Grid
-from .haysondumper import dump_grid as dump_hayson_grid, \
-    dump_scalar as dump_hayson_scalar
-from .jsondumper import dump_grid as dump_json_grid, \
-    dump_scalar as dump_json_scalar
 from .parser import MODE_ZINC, MODE_HAYSON, MODE_JSON, MODE_CSV, MODE
-from .triodumper import dump_grid as dump_trio_grid, \
-    dump_scalar as dump_trio_scalar
 from .version import LATEST_VER, Version
-from .zincdumper import dump_grid as dump_zinc_grid, \
-    dump_scalar as dump_zinc_scalar
+
+# The dumper of each mode. The modules are imported only when a grid is dumped with this mode.
+_mode_to_dumper = {MODE_ZINC: "zincdumper",
+                   MODE_HAYSON: "haysondumper",
+                   MODE_JSON: "jsondumper",
+                   MODE_TRIO: "triodumper",
+                   MODE_CSV: "csvdumper"
+                   }
+
+# The size of the chunks of `dump_iter()`
+CHUNK_SIZE = 64 * 1024
+
+
+def _dumper(mode: MODE) -> ModuleType:
+    """Import the dumper of a mode.
+
+    Args:
+        mode: The haystack mode (`MODE_...`)
+    Returns:
+        The dumper module, with `dump_grid()` and `dump_scalar()`
+    Raises:
+        NotImplementedError if the mode is unknown
+    """
+    if mode not in _mode_to_dumper:
+        raise NotImplementedError('Format not implemented: %s' % mode)
+    return importlib.import_module("." + _mode_to_dumper[mode], __package__)
 
 
 def dump(grid: Grid, mode: MODE = MODE_ZINC) -> str:
@@ -34,17 +52,61 @@ def dump(grid: Grid, mode: MODE = MODE_ZINC) -> str:
         grid: The grid to dump.
         mode: The format. Must be MODE_ZINC, MODE_CSV or MODE_JSON
     """
-    if mode == MODE_ZINC:
-        return dump_zinc_grid(grid)
-    if mode == MODE_TRIO:
-        return dump_trio_grid(grid)
-    if mode == MODE_JSON:
-        return dump_json_grid(grid)
-    if mode == MODE_HAYSON:
-        return dump_hayson_grid(grid)
-    if mode == MODE_CSV:
-        return dump_csv_grid(grid)
-    raise NotImplementedError('Format not implemented: %s' % mode)
+    return _dumper(mode).dump_grid(grid)
+
+
+def _chunks(parts: Iterable[str], chunk_size: int) -> Iterator[bytes]:
+    """Encode the parts of a string in UTF-8, in chunks of `chunk_size` bytes (except the last one)."""
+    pending = b''
+    buffer = []
+    size = 0
+    for part in parts:
+        buffer.append(part)
+        size += len(part)
+        if size >= chunk_size:
+            data = pending + ''.join(buffer).encode('utf-8')
+            end = len(data) - len(data) % chunk_size
+            for start in range(0, end, chunk_size):
+                yield data[start:start + chunk_size]
+            pending = data[end:]
+            buffer = []
+            size = len(pending)
+    data = pending + ''.join(buffer).encode('utf-8')
+    for start in range(0, len(data), chunk_size):
+        yield data[start:start + chunk_size]
+
+
+def dump_iter(grid: Grid, mode: MODE = MODE_ZINC, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    Dump a single grid in the specified over-the-wire format, in chunks of UTF-8 bytes.
+    The grid is never dumped in one string, so the memory stays bounded for a huge grid.
+    The concatenation of the chunks is `dump(grid, mode).encode('utf-8')`.
+    Args:
+        grid: The grid to dump.
+        mode: The format. Must be MODE_ZINC, MODE_CSV, MODE_JSON, MODE_HAYSON or MODE_TRIO
+        chunk_size: The size of the chunks, in bytes. Only the last chunk can be smaller.
+    Returns:
+        An iterator of the chunks
+    """
+    return _chunks(_dumper(mode).dump_grid_iter(grid), chunk_size)
+
+
+def dump_to(grid: Grid, file: BinaryIO, mode: MODE = MODE_ZINC, chunk_size: int = CHUNK_SIZE) -> int:
+    """
+    Dump a single grid in the specified over-the-wire format, in a binary file or a socket file.
+    Args:
+        grid: The grid to dump.
+        file: The destination, opened in binary mode
+        mode: The format. Must be MODE_ZINC, MODE_CSV, MODE_JSON, MODE_HAYSON or MODE_TRIO
+        chunk_size: The size of each write, in bytes
+    Returns:
+        The number of bytes written
+    """
+    size = 0
+    for chunk in dump_iter(grid, mode, chunk_size):
+        file.write(chunk)
+        size += len(chunk)
+    return size
 
 
 def dump_scalar(scalar: Any, mode: MODE = MODE_ZINC, version: Version = LATEST_VER) -> Optional[str]:
@@ -55,14 +117,4 @@ def dump_scalar(scalar: Any, mode: MODE = MODE_ZINC, version: Version = LATEST_V
         mode: The format. Must be MODE_ZINC, MODE_CSV or MODE_JSON
         version: The Haystack version to apply
     """
-    if mode == MODE_ZINC:
-        return dump_zinc_scalar(scalar, version=version)
-    if mode == MODE_TRIO:
-        return dump_trio_scalar(scalar, version=version)
-    if mode == MODE_JSON:
-        return dump_json_scalar(scalar, version=version)
-    if mode == MODE_HAYSON:
-        return dump_hayson_scalar(scalar, version=version)
-    if mode == MODE_CSV:
-        return dump_csv_scalar(scalar, version=version)
-    raise NotImplementedError('Format not implemented: %s' % mode)
+    return _dumper(mode).dump_scalar(scalar, version=version)
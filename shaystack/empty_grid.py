@@ -50,7 +50,7 @@ class _ImmuableGrid(Grid):
     def extend(self, values: Iterable[Entity]) -> 'Grid':  # type: ignore
         raise NotImplementedError("Read only grid")
 
-    def sort(self, tag: str) -> 'Grid':
+    def sort(self, keys: Union[str, List[str]], reverse: bool = False, missing: str = 'last') -> 'Grid':
         raise NotImplementedError("Read only grid")
 
     def purge(self) -> 'Grid':
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+# Filter hand-written parser.
+# See the accompanying LICENSE file.
+# (C) 2021 Engie Digital
+#
+# vim: set ts=4 sts=4 et tw=78 sw=4 si:
+
+"""
+Hand-written, recursive-descent parser for the filter syntax
+(https://project-haystack.org/doc/docHaystack/Filters).
+
+It produces the same `FilterAST` as the pyparsing grammar `hs_filter`, without lock.
+The values are parsed with the `ZincScanner`.
+"""
+import re
+from typing import Tuple, List
+
+from pyparsing import ParseException
+
+from .filter_ast import FilterAST, FilterNode, FilterPath, FilterBinary, FilterUnary
+from .version import VER_3_0
+from .zinc_fastparser import ZincScanner, ZincSyntaxError
+
+_ID_RE = re.compile(r'[a-z_][a-zA-Z0-9_]*')
+_CMP_OP_RE = re.compile(r'==|!=|<=|>=|<|>')
+_WS_RE = re.compile(r'[ \t]*')
+_ID_CHARS = frozenset('abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_')
+_BOOLS = (('true', True), ('false', False))  # Extension to accept T or F
+
+
+class _FilterParser:
+    """A recursive-descent parser on a filter text.
+
+    Each `_parse_...` method start at a position in the text, and return the node and
+    the position just after the node.
+    """
+    __slots__ = ("text", "_scanner")
+
+    def __init__(self, text: str):
+        self.text = text
+        self._scanner = ZincScanner(text, VER_3_0)
+
+    def _skip_ws(self, pos: int) -> int:
+        return _WS_RE.match(self.text, pos).end()  # type: ignore
+
+    def _keyword(self, keyword: str, pos: int) -> int:
+        """Return the position after the keyword, or -1 if it's not present."""
+        text = self.text
+        end = pos + len(keyword)
+        if text.startswith(keyword, pos) and text[end:end + 1] not in _ID_CHARS:
+            return end
+        return -1
+
+    def parse(self) -> FilterAST:
+        node, pos = self._parse_or(self._skip_ws(0))
+        if pos != len(self.text):
+            raise ParseException(self.text, pos, "Expected end of text")
+        return FilterAST(node)
+
+    def _parse_or(self, pos: int) -> Tuple[FilterNode, int]:
+        node, pos = self._parse_and(pos)
+        while True:
+            end = self._keyword('or', pos)
+            if end < 0:
+                return node, pos
+            right, pos = self._parse_and(self._skip_ws(end))
+            node = FilterBinary('or', node, right)
+
+    def _parse_and(self, pos: int) -> Tuple[FilterNode, int]:
+        node, pos = self._parse_term(pos)
+        while True:
+            end = self._keyword('and', pos)
+            if end < 0:
+                return node, pos
+            right, pos = self._parse_term(self._skip_ws(end))
+            node = FilterBinary('and', node, right)
+
+    def _parse_term(self, pos: int) -> Tuple[FilterNode, int]:
+        text = self.text
+        if text.startswith('(', pos):
+            node, pos = self._parse_or(self._skip_ws(pos + 1))
+            if not text.startswith(')', pos):
+                raise ParseException(text, pos, "Expected ')'")
+            return node, self._skip_ws(pos + 1)
+
+        end = self._keyword('not', pos)
+        if end >= 0:
+            start = self._skip_ws(end)
+            if _ID_RE.match(text, start):
+                path, pos = self._parse_path(start)
+                return FilterUnary('not', path), pos
+            # `not` is the name of a tag
+
+        path, pos = self._parse_path(pos)
+        match = _CMP_OP_RE.match(text, pos)
+        if not match:
+            return FilterUnary('has', path), pos
+        value, pos = self._parse_value(self._skip_ws(match.end()))
+        return FilterBinary(match.group(), path, value), pos
+
+    def _parse_path(self, pos: int) -> Tuple[FilterPath, int]:
+        text = self.text
+        paths: List[str] = []
+        while True:
+            match = _ID_RE.match(text, pos)
+            if not match:
+                raise ParseException(text, pos, "Expected id")
+            paths.append(match.group())
+            pos = self._skip_ws(match.end())
+            if not text.startswith('->', pos):
+                return FilterPath(paths), pos
+            pos = self._skip_ws(pos + 2)
+
+    def _parse_value(self, pos: int) -> Tuple[FilterNode, int]:
+        for keyword, value in _BOOLS:
+            end = self._keyword(keyword, pos)
+            if end >= 0:
+                return value, self._skip_ws(end)  # type: ignore
+        try:
+            value, pos = self._scanner.parse_scalar(pos)
+        except ZincSyntaxError as syntax_error:
+            raise ParseException(self.text, syntax_error.pos, syntax_error.message) from syntax_error
+        return value, self._skip_ws(pos)
+
+
+def parse_filter(grid_filter: str) -> FilterAST:
+    """Parse a filter, without pyparsing.
+
+    Args:
+        grid_filter: A filter request
+    Returns:
+        A `FilterAST`
+    Raises:
+        `pyparsing.ParseException` if the filter does not conform
+    """
+    if '\t' in grid_filter:
+        # Like pyparsing, the tabulations are expanded before parsing
+        grid_filter = grid_filter.expandtabs()
+    return _FilterParser(grid_filter).parse()
@@ -13,15 +13,19 @@ It's like a list of dict.
 
 import copy
 import datetime
+import heapq
 import logging
 import numbers
 import re
 from collections.abc import MutableSequence, Sequence  # pylint: disable=no-name-in-module
-from typing import Union, Iterable, Any, Optional, KeysView, Tuple, List, cast, Dict
+from itertools import chain
+from typing import Union, Iterable, Any, Optional, KeysView, Tuple, List, cast, Dict, FrozenSet
 
 import pytz
 
-from .datatypes import NA, Quantity, Coordinate, Ref
+from .compact_entity import CompactEntity
+from .datatypes import NA, Quantity, Coordinate, Ref, _NAType
+from .grid_index import PositionIndex, TagIndex, RefGraph
 from .metadata import MetadataObject
 from .sortabledict import SortableDict
 from .type import Entity
@@ -29,6 +33,9 @@ from .version import Version, VER_3_0
 
 log = logging.getLogger("ping.Provider")
 
+# The classes of the entities
+_ENTITY_TYPES = (dict, CompactEntity)
+
 
 # noinspection PyArgumentList
 class Grid(MutableSequence):  # pytlint: disable=too-many-ancestors
@@ -49,6 +56,9 @@ class Grid(MutableSequence):  # pytlint: disable=too-many-ancestors
     - Replace an entity with `id`: `grid[Ref("abc")] = new_entity`
     - Replace a group of entities: `grid[2:3] = [new_entity1,new_entity2]`
     - Delete an entity with `id`: `del grid[Ref("abc")]`
+    - Filter the entities: `grid.filter("site and geoCity == 'Paris'")`. After a call to
+      `tag_index()`, an inverted index of tags selects the entities
+    - Copy a grid: `grid.copy()`. Only the mutable values of the entities are deep-copied
 
     Args:
         version: The haystack version (See VERSION_...)
@@ -56,7 +66,8 @@ class Grid(MutableSequence):  # pytlint: disable=too-many-ancestors
         columns: A list of columns, or a dictionary with columns name and corresponding metadata
     """
 
-    __slots__ = "_version", "_version_given", "metadata", "column", "_row", "_index"
+    __slots__ = ("_version", "_version_given", "metadata", "column", "_row", "_index",
+                 "_tag_index", "_indexed", "_ref_graph")
 
     def __init__(self,
                  version: Union[str, Version, None] = None,
@@ -82,8 +93,15 @@ class Grid(MutableSequence):  # pytlint: disable=too-many-ancestors
         # Rows
         self._row: List[Entity] = []
 
-        # Internal index
-        self._index: Optional[Dict[Ref, Entity]] = None
+        # Internal index: the position of the entities, by id
+        self._index: Optional[PositionIndex] = None
+
+        # Inverted index of tags, used by the filters after a call to `tag_index()`
+        self._tag_index: Optional[TagIndex] = None
+        self._indexed = False
+
+        # Graph of references, built with the first indexed `->` filter after an update
+        self._ref_graph: Optional[RefGraph] = None
 
         if metadata is not None:
             self.metadata.update(metadata.items())
@@ -118,6 +136,14 @@ class Grid(MutableSequence):  # pytlint: disable=too-many-ancestors
         if isinstance(version_1, numbers.Number) and isinstance(version_2, numbers.Number):
             # noinspection PyUnresolvedReferences
             return abs(version_1 - version_2) < 0.000001  # type: ignore
+        if isinstance(version_1, _ENTITY_TYPES) and isinstance(version_2, _ENTITY_TYPES):
+            for key, val in version_1.items():
+                if not Grid._approx_check(val, version_2.get(key, None)):
+                    return False
+            for key, val in version_2.items():
+                if key not in version_1 and not Grid._approx_check(version_1.get(key, None), val):
+                    return False
+            return True
         # pylint: disable=C0123
         if type(version_1) != type(version_2) and \
                 not (isinstance(version_1, str) and isinstance(version_2, str)):
@@ -135,16 +161,41 @@ class Grid(MutableSequence):  # pytlint: disable=too-many-ancestors
         if isinstance(version_1, Coordinate) and isinstance(version_2, Coordinate):
             return Grid._approx_check(version_1.latitude, version_2.latitude) and \
                    Grid._approx_check(version_1.longitude, version_2.longitude)
-        if isinstance(version_1, dict) and isinstance(version_2, dict):
-            for key, val in version_1.items():
-                if not Grid._approx_check(val, version_2.get(key, None)):
-                    return False
-            for key, val in version_2.items():
-                if key not in version_1 and not Grid._approx_check(version_1.get(key, None), val):
-                    return False
-            return True
         return version_1 == version_2
 
+    @staticmethod
+    def _approx_key(entity: Entity) -> FrozenSet[Tuple[str, Any]]:
+        """
+        Return a key of an entity, to find the entities approximately identical
+        (see `_approx_check()`). The values are rounded, so two values near the limit of
+        the rounding can have different keys.
+
+        Args:
+            entity: The entity
+        Returns:
+            The same key for most of the entities approximately identical
+        """
+        key = []
+        for tag, value in entity.items():
+            if value is None:
+                continue  # Like a missing tag
+            if isinstance(value, numbers.Real):
+                value = round(value, 5)  # type: ignore
+            elif isinstance(value, datetime.datetime):
+                value = value.replace(tzinfo=None, microsecond=0)
+            elif isinstance(value, datetime.time):
+                value = value.replace(microsecond=0)
+            elif isinstance(value, Quantity):
+                value = round(value.m, 5)
+            elif isinstance(value, Coordinate):
+                value = (round(value.latitude, 5), round(value.longitude, 5))
+            elif isinstance(value, str):
+                value = str(value)
+            elif value.__hash__ is None or isinstance(value, dict):
+                value = value.__class__
+            key.append((tag, value))
+        return frozenset(key)
+
     def __eq__(self, other: 'Grid') -> bool:  # type: ignore
         """
         Campare two grid with tolerance.
@@ -175,26 +226,42 @@ class Grid(MutableSequence):  # pytlint: disable=too-many-ancestors
         if len(self) != len(other):
             return False
 
-        pending_right_row = [id(row) for row in other if 'id' not in row]
+        # The rows without id, by approximate key
+        pending_right_row: Dict[FrozenSet[Tuple[str, Any]], List[Entity]] = {}
+        for right in other._row:
+            if 'id' not in right:
+                pending_right_row.setdefault(Grid._approx_key(right), []).append(right)
         for left in self._row:
             # Search record in other with same values
-            find = False
             if 'id' in left:
-                if left['id'] in other and self._approx_check(left, other[left['id']]):  # type: ignore
-                    find = True
-            else:
-                for right in other._row:
-                    if id(right) not in pending_right_row:
-                        continue
-                    if self._approx_check(left, right):
-                        find = True
-                        pending_right_row.remove(id(right))
-                        break
-            if not find:
+                if not (left['id'] in other and
+                        self._approx_check(left, other[left['id']])):  # type: ignore
+                    return False
+            elif not Grid._pop_approx_row(pending_right_row, left):
                 return False
 
         return True
 
+    @staticmethod
+    def _pop_approx_row(rows_by_key: Dict[FrozenSet[Tuple[str, Any]], List[Entity]],
+                        entity: Entity) -> bool:
+        """Remove a row approximately identical to `entity`.
+
+        Args:
+            rows_by_key: The rows, by approximate key
+            entity: The entity to find
+        Returns:
+            `True` if a row was found
+        """
+        same_key_rows = rows_by_key.get(Grid._approx_key(entity), [])
+        # With a value near the limit of the rounding, the row can have an other key
+        for rows in chain((same_key_rows,), rows_by_key.values()):
+            for i, row in enumerate(rows):
+                if Grid._approx_check(entity, row):
+                    del rows[i]
+                    return True
+        return False
+
     def __sub__(self, other: 'Grid') -> 'Grid':
         """Calculate the difference between two grid. The result is a grid with
         only the attributs to update (change value, delete, etc) If a row with
@@ -289,9 +356,7 @@ class Grid(MutableSequence):  # pytlint: disable=too-many-ancestors
             result._index = None
             return result
         assert isinstance(key, Ref), "The 'key' must be a Ref or int"
-        if not self._index:
-            self.reindex()
-        return cast(Entity, self._index[key])  # type: ignore
+        return cast(Entity, self._row[self._position(key)])
 
     def __contains__(self, key: Union[int, Ref]) -> bool:  # type: ignore
         """Return an entity with the corresponding id.
@@ -304,7 +369,7 @@ class Grid(MutableSequence):  # pytlint: disable=too-many-ancestors
         """
         if isinstance(key, int):
             return 0 <= key < len(self._row)
-        if not self._index:
+        if self._index is None:
             self.reindex()
         return key in self._index  # type: ignore
 
@@ -322,38 +387,46 @@ class Grid(MutableSequence):  # pytlint: disable=too-many-ancestors
         Returns:
             `self`
         """
-        if isinstance(value, dict):
+        if isinstance(value, _ENTITY_TYPES):
             for val in value.values():
                 self._detect_or_validate(val)
+        self._ref_graph = None
         if isinstance(index, int):
-            if not isinstance(value, dict):
+            if not isinstance(value, _ENTITY_TYPES):
                 raise TypeError('value must be a dict')
-            if "id" in self._row[index]:
-                self._index.pop(self._row[index]['id'], None)  # type: ignore
-            self._row[index] = value
-            if "id" in value:
-                self._index[value["id"]] = value  # type: ignore
+            if not -len(self._row) <= index < len(self._row):
+                raise IndexError('grid assignment index out of range')
+            self._replace(index % len(self._row), value)
         elif isinstance(index, slice):
-            if isinstance(value, dict):
+            if isinstance(value, _ENTITY_TYPES):
                 raise TypeError('value must be iterable, not a dict')
-            self._index = None
-            self._row[index] = value
+            value = list(value)
             for row in value:
                 for val in row.values():
                     self._detect_or_validate(val)
+            positions = range(*index.indices(len(self._row)))
+            if len(positions) == len(value):
+                for position, row in zip(positions, value):
+                    self._replace(position, row)
+            else:
+                self._index = None
+                self._tag_index = None
+                self._row[index] = value
         else:
-            if not isinstance(value, dict):
+            if not isinstance(value, _ENTITY_TYPES):
                 raise TypeError('value must be a dict')
-            if not self._index:
-                self.reindex()
-            idx = list.index(self._row, self._index[index])  # type: ignore
-            if "id" in self._row[idx]:
-                self._index.pop(self._row[idx]['id'], None)  # type: ignore
-            self._row[idx] = value
-            if "id" in value:
-                self._index[value["id"]] = value  # type: ignore
+            self._replace(self._position(index), value)
         return self
 
+    def _replace(self, position: int, value: Entity) -> None:
+        """Replace the entity at a position, and update the indexes."""
+        old_value = self._row[position]
+        self._row[position] = value
+        if self._index is not None:
+            self._index.replace(position, old_value, value)
+        if self._tag_index is not None:
+            self._tag_index.replace(position, old_value, value)
+
     def __delitem__(self, key: Union[int, Ref]) -> Optional[Entity]:  # type: ignore
         """Delete the row at index.
 
@@ -367,6 +440,8 @@ class Grid(MutableSequence):  # pytlint: disable=too-many-ancestors
     def clear(self):
         self._row = []
         self._index = None
+        self._tag_index = None
+        self._ref_graph = None
 
     @property
     def version(self) -> Version:  # pragma: no cover
@@ -388,9 +463,12 @@ class Grid(MutableSequence):  # pytlint: disable=too-many-ancestors
         Returns:
             The entity with the id == index or the default value
         """
-        if not self._index:
+        if self._index is None:
             self.reindex()
-        return cast(Entity, self._index.get(index, default))  # type: ignore
+        position = self._index.position(index)  # type: ignore
+        if position is None:
+            return default  # type: ignore
+        return cast(Entity, self._row[position])
 
     def keys(self) -> KeysView[Ref]:
         """ Return the list of ids of entities with `id`
@@ -398,7 +476,7 @@ class Grid(MutableSequence):  # pytlint: disable=too-many-ancestors
         Returns:
              The list of ids of entities with `id`
         """
-        if not self._index:
+        if self._index is None:
             self.reindex()
         return self._index.keys()  # type: ignore
 
@@ -411,25 +489,50 @@ class Grid(MutableSequence):  # pytlint: disable=too-many-ancestors
             *index: A list of index (position or reference)
         """
         ret_value = None
+        self._ref_graph = None
         for key in sorted(index, reverse=True):  # Remove index at the end
             if isinstance(key, int):
                 if not 0 <= key < len(self._row):
                     ret_value = None
                 else:
-                    if "id" in self._row[key] and self._index:
-                        del self._index[self._row[key]['id']]  # type: ignore
-                    ret_value = self._row[key]
-                    del self._row[key]
+                    ret_value = self._pop_position(key)
             else:
-                if not self._index:
+                if self._index is None:
                     self.reindex()
-                if key not in self._index:  # type: ignore
-                    ret_value = None
-                else:
-                    self._row.remove(self._index[key])  # type: ignore
-                    ret_value = self._index.pop(key)  # type: ignore
+                position = self._index.position(key)  # type: ignore
+                ret_value = None if position is None else self._pop_position(position)
         return cast(Optional[Entity], ret_value)
 
+    def _pop_position(self, position: int) -> Entity:
+        """Remove the entity at a position, and update the indexes."""
+        entity = self._row[position]
+        if self._index is not None:
+            self._index.remove(position, entity)
+        self._pop_tag_index(position)
+        del self._row[position]
+        return entity
+
+    def _position(self, key: Ref) -> int:
+        """Return the position of the entity with the id `key`.
+
+        Raises:
+            KeyError if the id is not found
+        """
+        if self._index is None:
+            self.reindex()
+        position = self._index.position(key)  # type: ignore
+        if position is None:
+            raise KeyError(key)
+        return position
+
+    def _pop_tag_index(self, position: int) -> None:
+        """Update the tag index before removing the entity at `position`."""
+        if self._tag_index is not None:
+            if position == len(self._row) - 1:
+                self._tag_index.pop(self._row[position])
+            else:
+                self._tag_index = None  # The next positions change
+
     def insert(self, index: int, value: Entity) -> 'Grid':  # type: ignore
         """Insert a new entity before the index position.
 
@@ -439,27 +542,33 @@ class Grid(MutableSequence):  # pytlint: disable=too-many-ancestors
         Returns
             `self`
         """
-        if not isinstance(value, dict):
+        if not isinstance(value, _ENTITY_TYPES):
             raise TypeError('value must be a dict')
         for val in value.values():
             self._detect_or_validate(val)
+        self._ref_graph = None
+        if index >= len(self._row):
+            if self._index is not None:
+                self._index.append(value)
+            if self._tag_index is not None:
+                self._tag_index.append(value)
+        else:
+            # The next positions change
+            self._index = None
+            self._tag_index = None
         self._row.insert(index, value)
-        if "id" in value:
-            if not self._index:
-                self.reindex()
-            self._index[value["id"]] = value  # type: ignore
+        if "id" in value and self._index is None:
+            self.reindex()
         return self
 
     def reindex(self) -> 'Grid':
-        """Reindex the grid if the user, update directly an id of a row.
+        """Reindex the grid if the user, update directly an id or a tag of a row.
         Returns
             `self`
         """
-        self._index = {}
-        for item in self._row:
-            if "id" in item:
-                assert isinstance(item["id"], Ref), "The 'id' tag must be a reference"
-                self._index[item["id"]] = item
+        self._index = PositionIndex(row.get("id") for row in self._row)
+        self._tag_index = None
+        self._ref_graph = None
         return self
 
     def pack_columns(self) -> 'Grid':
@@ -503,35 +612,193 @@ class Grid(MutableSequence):  # pytlint: disable=too-many-ancestors
         Returns:
             `self`
         """
-        super().extend(values)
-        for item in self._row:
-            if "id" in item:
-                self._index[item["id"]] = item  # type: ignore
+        super().extend(values)  # The indexes are updated by `insert()`
+        return self
+
+    @classmethod
+    def from_rows(cls,
+                  version: Union[str, Version, None],
+                  metadata: Union[None, Entity, MetadataObject, SortableDict],
+                  columns: Union[SortableDict, Entity, Iterable[Union[Tuple[str, Any], str]], None],
+                  rows: Iterable[Entity],
+                  validate: bool = False) -> 'Grid':
+        """Build a grid with all the entities.
+
+        See `bulk_extend()`.
+
+        Args:
+            version: The haystack version (See VERSION_...)
+            metadata: A dictionary with the metadata associated with the grid.
+            columns: A list of columns, or a dictionary with columns name and corresponding metadata
+            rows: The entities
+            validate: `True` to check the entities and the version
+        Returns:
+            The new grid
+        """
+        return cls(version=version, metadata=metadata, columns=columns).bulk_extend(rows, validate)
+
+    def bulk_extend(self, rows: Iterable[Entity], validate: bool = False) -> 'Grid':
+        """Add a list of entities at the end of the grid, in one pass.
+
+        Unlike `extend()`, the values are not validated one by one: the entities are trusted
+        (parsers, providers). With `validate`, the entities must be dicts, and the version
+        is detected (or validated) once, with the distinct classes of the values.
+
+        Args:
+            rows: The entities to add
+            validate: `True` to check the entities and the version
+        Returns:
+            `self`
+        Raises:
+            TypeError if an entity is not a dict, or ValueError if a value requires another
+            version (only with `validate`)
+        """
+        if not isinstance(rows, list):
+            rows = list(rows)
+        if validate:
+            self._validate_rows(rows)
+        self._ref_graph = None
+        position_index = self._index
+        tag_index = self._tag_index
+        self._row.extend(rows)
+        if tag_index is not None:
+            for row in rows:
+                tag_index.append(row)
+        if position_index is not None:
+            for row in rows:
+                position_index.append(row)
+        elif any("id" in row for row in rows):
+            self.reindex()
         return self
 
-    def sort(self, tag: str) -> 'Grid':
+    def save_snapshot(self, path: str) -> None:
+        """Save the grid in a binary snapshot file, to restore it quickly with `load_snapshot()`.
+
+        Args:
+            path: The path of the file
+        """
+        from .snapshot import save_snapshot  # pylint: disable=import-outside-toplevel
+        save_snapshot(self, path)
+
+    @staticmethod
+    def load_snapshot(path: str) -> 'Grid':
+        """Load a grid saved with `save_snapshot()`.
+
+        Args:
+            path: The path of the file
+        Returns:
+            The grid
+        Raises:
+            ValueError if the file is not a snapshot, or is saved with another version of the format.
         """
-        Sort the entity by a specific tag
+        from .snapshot import load_snapshot  # pylint: disable=import-outside-toplevel
+        return load_snapshot(path)
+
+    def _validate_rows(self, rows: List[Entity]) -> None:
+        """Check the entities, and detect or validate the version with the classes of the values."""
+        classes = set()
+        for row in rows:
+            if not isinstance(row, _ENTITY_TYPES):
+                raise TypeError('value must be a dict')
+            classes.update(map(type, row.values()))
+        if self.nearest_version >= VER_3_0:
+            return  # All the types are accepted
+        if any(issubclass(value_class, (_NAType, list, dict, SortableDict, Grid)) for value_class in classes):
+            self._assert_version(VER_3_0)
+
+    def sort(self, keys: Union[str, List[str]], reverse: bool = False, missing: str = 'last') -> 'Grid':
+        """
+        Sort the entities by some tags.
+
+        The values of different types can be compared: the booleans, then the numbers (the
+        quantities by magnitude), the strings, the datetimes, the dates, the times, the
+        references (by name) and the other values. The sort is stable.
+
         Args:
-            tag: The tag to use to sort the entity
+            keys: The tag, or the tags, to use to sort the entities
+            reverse: `True` for a descending order
+            missing: 'last' or 'first', the place of the entities without a tag
         Returns:
             `self`
         """
-        self._row = sorted(self._row, key=lambda row: row[tag])  # type: ignore
+        self._row = sorted(self._row, key=_row_key(keys, reverse, missing), reverse=reverse)
+        self._index = None  # The positions change
+        self._tag_index = None
+        self._ref_graph = None
         return self
 
+    def top_k(self, keys: Union[str, List[str]], k: int,
+              reverse: bool = False, missing: str = 'last') -> 'Grid':
+        """
+        Return the first `k` entities, in the order of `sort()`, without sorting all the entities.
+
+        Args:
+            keys: The tag, or the tags, to use to sort the entities
+            k: The number of entities
+            reverse: `True` for a descending order (the `k` largest)
+            missing: 'last' or 'first', the place of the entities without a tag
+        Returns:
+            A new grid with the selected entities, with the same metadata and columns
+        """
+        assert k >= 0
+        key = _row_key(keys, reverse, missing)
+        select = heapq.nlargest if reverse else heapq.nsmallest
+        positions = select(k, range(len(self._row)), key=lambda position: key(self._row[position]))
+        result = Grid(version=self.version, metadata=self.metadata, columns=self.column)
+        result._row = [self._row[position] for position in positions]
+        return result
+
     def copy(self) -> 'Grid':
         """ Create a copy of current grid.
 
-        The corresponding entities were duplicate
+        The metadata, the columns and the entities are duplicated, so the updates of the
+        entities are never visible in the other grid. Only the mutable values of the entities
+        (lists, dicts and grids) are deep-copied: the other values are immutable, and are shared.
 
         Returns:
             A copy of the current grid.
         """
-        a_copy = copy.deepcopy(self)
+        a_copy = copy.copy(self)
+        # The metadata must validate the values with the copy
+        memo: Dict[int, Any] = {id(self): a_copy}
+        a_copy.metadata = copy.deepcopy(self.metadata, memo)
+        a_copy.column = copy.deepcopy(self.column, memo)
+        a_copy._row = [_copy_entity(row) for row in self._row]  # pylint: disable=protected-access
         a_copy._index = None  # Remove index pylint: disable=protected-access
+        a_copy._tag_index = None  # pylint: disable=protected-access
+        a_copy._indexed = False  # pylint: disable=protected-access
+        a_copy._ref_graph = None  # pylint: disable=protected-access
         return a_copy
 
+    def tag_index(self) -> TagIndex:
+        """ Return the inverted index of tags, built the first time.
+
+        From this call, `filter()` selects the entities with the index and the graph of
+        references (see `ref_graph()`). The index is updated with the methods of the grid.
+        If an entity is updated directly, call `reindex()`.
+
+        Returns:
+            The index of the positions of entities, by tag
+        """
+        self._indexed = True
+        if self._tag_index is None:
+            self._tag_index = TagIndex(self._row)
+        return self._tag_index
+
+    def ref_graph(self) -> RefGraph:
+        """ Return the graph of references between the entities, built once for each version
+        of the grid.
+
+        The graph is removed by the methods updating the grid. If an entity is updated directly,
+        call `reindex()`.
+
+        Returns:
+            The graph of references, with the positions of entities
+        """
+        if self._ref_graph is None:
+            self._ref_graph = RefGraph(self._row)
+        return self._ref_graph
+
     def filter(self, grid_filter: str, limit: int = 0) -> 'Grid':
         """Return a filter version of this grid.
 
@@ -547,7 +814,7 @@ class Grid(MutableSequence):  # pytlint: disable=too-many-ancestors
             A new grid with only the selected entities.
         """
         assert limit >= 0
-        from .grid_filter import filter_function  # pylint: disable: import-outside-toplevel
+        from .grid_filter import filter_function, plan_filter  # pylint: disable: import-outside-toplevel
         if grid_filter is None or grid_filter.strip() == '':
             if limit == 0:
                 return self
@@ -556,12 +823,23 @@ class Grid(MutableSequence):  # pytlint: disable=too-many-ancestors
             return result
 
         result = Grid(version=self.version, metadata=self.metadata, columns=self.column)
+        candidates, exact = None, False
+        if self._indexed:
+            candidates, exact = plan_filter(grid_filter, self)
+        if candidates is None:
+            rows: Iterable[Entity] = self._row
+        elif exact:
+            positions = heapq.nsmallest(limit, candidates) if limit else sorted(candidates)
+            result._row = [self._row[position] for position in positions]
+            return result
+        else:
+            rows = (self._row[position] for position in sorted(candidates))
         a_filter = filter_function(grid_filter)
-        for row in self._row:
+        for row in rows:
             if a_filter(self, row):
-                result.append(row)
-            if limit and len(result) == limit:
-                break
+                result._row.append(row)
+                if limit and len(result._row) == limit:
+                    break
         return result
 
     def select(self, select: Optional[str]) -> 'Grid':
@@ -576,16 +854,16 @@ class Grid(MutableSequence):  # pytlint: disable=too-many-ancestors
             select = select.strip()
             if select not in ["*", '']:
                 if '!' in select:
-                    new_cols = copy.deepcopy(self.column)
-                    new_grid = Grid(version=self.version, metadata=self.metadata, columns=new_cols)
+                    excluded_cols = set()
                     for col in re.split('[, ]', select):
                         col = col.strip()
                         if not col.startswith('!'):
                             raise ValueError("Impossible to merge positive and negative selection")
-                        if col[1:] in new_cols:
-                            del new_cols[col[1:]]
-                    new_grid.column = new_cols
-                    return new_grid
+                        excluded_cols.add(col[1:])
+                    # The metadata of the columns are duplicated by the new grid
+                    return Grid(version=self.version, metadata=self.metadata,
+                                columns=[(col, col_meta) for col, col_meta in self.column.items()
+                                         if col not in excluded_cols])
                 new_cols = SortableDict()
                 new_grid = cast(Grid, self[:])
                 for col in re.split('[, ]', select):
@@ -632,3 +910,63 @@ class Grid(MutableSequence):  # pytlint: disable=too-many-ancestors
                 raise ValueError(
                     'Data type requires version %s' % version)
             self._version = version
+
+
+def _value_key(value: Any) -> Tuple[Any, ...]:
+    """Return a key to compare the values of different types."""
+    if isinstance(value, bool):
+        return 0, value
+    if isinstance(value, Quantity):
+        magnitude = float(value.m)
+        return 1, magnitude != magnitude, 0.0 if magnitude != magnitude else magnitude, str(value.symbol)
+    if isinstance(value, numbers.Number) and not isinstance(value, complex):
+        number = float(value)  # type: ignore
+        return 1, number != number, 0.0 if number != number else number, ''  # NaN after the numbers
+    if isinstance(value, str):
+        return 2, value
+    if isinstance(value, datetime.datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=pytz.utc)
+        return 3, value.timestamp()
+    if isinstance(value, datetime.date):
+        return 4, value
+    if isinstance(value, datetime.time):
+        return 5, value.replace(tzinfo=None)
+    if isinstance(value, Ref):
+        return 6, value.name
+    return 7, type(value).__name__, str(value)
+
+
+def _row_key(keys: Union[str, List[str]], reverse: bool, missing: str) -> Any:
+    """Return the function to compute the sort key of an entity.
+
+    Args:
+        keys: The tag, or the tags
+        reverse: `True` for a descending order
+        missing: 'last' or 'first', the place of the entities without a tag
+    Returns:
+        The key function
+    """
+    if missing not in ('last', 'first'):
+        raise ValueError("missing must be 'last' or 'first'")
+    tags = [keys] if isinstance(keys, str) else list(keys)
+    # With a reverse order, the missing values must be the smallest to be the last
+    missing_key = (1 if (missing == 'last') != reverse else -1, ())
+
+    def key(entity: Entity) -> Tuple[Any, ...]:
+        values = []
+        for tag in tags:
+            value = entity.get(tag)
+            values.append(missing_key if value is None else (0, _value_key(value)))
+        return tuple(values)
+
+    return key
+
+
+def _copy_entity(entity: Entity) -> Entity:
+    """Copy an entity. Only the mutable values (lists, dicts and grids) are duplicated."""
+    a_copy = entity.copy()
+    for key, value in a_copy.items():
+        if isinstance(value, (list, dict, SortableDict, Grid)):
+            a_copy[key] = copy.deepcopy(value)
+    return a_copy
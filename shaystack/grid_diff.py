@@ -10,21 +10,79 @@ Calculate a new with only the differences.
 A removed tag must be set to REMOVE.
 A removed entity must have a tag `remove_'
 """
-from copy import deepcopy
+import datetime
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
 
-from .datatypes import REMOVE, MARKER
+from .datatypes import REMOVE, MARKER, Quantity, Coordinate, Ref, Uri, Bin, _MarkerType, _NAType, \
+    _RemoveType
 from .grid import Grid
 from .metadata import MetadataObject
 from .sortabledict import SortableDict
+from .type import Entity
 
+LOG = logging.getLogger(__name__)
 
-def grid_diff(left: Grid, right: Grid) -> Grid:  # pylint: disable=too-many-nested-blocks,too-many-locals
+# Minimum number of entities in a chunk. Under this size, the cost of the processes is greater
+# than the gain.
+MIN_CHUNK_ENTITIES = 10_000
+# Number of chunks for each worker, to balance the load
+_CHUNKS_BY_WORKER = 4
+
+# The grids to compare, in a worker process
+_WORKER_GRIDS: Optional[Tuple[Grid, Grid]] = None
+
+# The types with a hash compatible with the `==` operator of each other
+_HASHABLE_TYPES = frozenset((str, int, float, bool, type(None), datetime.date, datetime.datetime,
+                             datetime.time, Ref, Coordinate, _MarkerType, _NAType, _RemoveType))
+
+
+def _row_key(row: Entity, columns: List[str]) -> Optional[Tuple[Any, ...]]:
+    """
+    Return a key of the values of an entity. The entities with the same values
+    in `columns` have the same key.
+
+    Args:
+        row: The entity
+        columns: The columns to compare
+    Returns:
+        The key, or `None` if a value can not be hashed.
+    """
+    key = []
+    for col in columns:
+        value = row.get(col, None)
+        if value.__class__ in _HASHABLE_TYPES:
+            key.append(value)
+        elif isinstance(value, (Uri, Bin)):
+            key.append((value.__class__, str(value)))
+        elif isinstance(value, Quantity):
+            # The quantities with different units can be equal
+            key.append((Quantity, value.dimensionality))
+        else:
+            return None
+    return tuple(key)
+
+
+def _same_values(left_row: Entity, right_row: Entity, columns: List[str]) -> bool:
+    for col in columns:
+        if left_row.get(col, None) != right_row.get(col, None):
+            return False
+    return True
+
+
+def grid_diff(left: Grid, right: Grid,  # pylint: disable=too-many-locals
+              workers: int = 1) -> Grid:
     """
     Calculate the difference between grids.
 
+    The entities with `id` can be compared with a pool of `workers` processes. Each process
+    compares a chunk of the entities of left.
+
     Args:
         left: Left version
         right: Right version
+        workers: The number of processes to compare huge grids
     Returns:
         A grid with only the differences.
         For a specific entity, with same `id` or without `id`,
@@ -83,97 +141,155 @@ def grid_diff(left: Grid, right: Grid) -> Grid:  # pylint: disable=too-many-nest
             columns[left_col] = {'remove_': REMOVE}
 
     # Calculate diff of row
-    pending_right_row = [id(row) for row in right if 'id' not in row]
-    managed_right_row = []
-    for left_row in left:
+    # The rows with id are compared in chunks of positions, maybe in parallel
+    diff_rows = _diff_rows_with_id(left, right, workers)
+
+    # The rows without id are identified by their positions in right,
+    # and indexed by their values in the columns of left
+    columns = list(left.column)
+    right_rows = list(right)
+    pending_right_row = {i for i, row in enumerate(right_rows) if 'id' not in row}
+    right_keys: Dict[int, Optional[Tuple[Any, ...]]] = {}
+    right_positions: Dict[Optional[Tuple[Any, ...]], List[int]] = {}
+    for i in sorted(pending_right_row):
+        right_keys[i] = key = _row_key(right_rows[i], columns)
+        right_positions.setdefault(key, []).append(i)
+    for left_position, left_row in enumerate(left):
         if 'id' in left_row:
-            left_id = left_row['id']
-            if left_id in right:
-                # row with same id in left and right
-                right_row = right[left_id]
-                diff_row = {}
-                for col in left.column:
-                    if col in left_row:
-                        # Left has col
-                        val_left = left_row[col]
-                        if col in right_row:
-                            # col is in left and right
-                            val_right = right_row[col]
-                            if val_left != val_right:
-                                if col not in diff.column:
-                                    diff.column[col] = right.column[col]
-                                diff_row[col] = val_right
-                        else:
-                            # col is not in right
-                            if col not in diff.column:
-                                diff.column[col] = deepcopy(left.column[col])
-                                diff.column[col] = {"des": "Removed column"}
-                            diff_row[col] = REMOVE
-                    else:
-                        # Left has not col
-                        if col in right_row:
-                            if col not in diff.column:
-                                diff.column[col] = right.column[col]
-                            diff_row[col] = right_row[col]
-                # Check add cols in right
-                for col in right.column:
-                    if col not in left.column and col in right_row:
-                        diff_row[col] = right_row[col]
-                if diff_row:
-                    diff_row["id"] = left_id
-                    diff.append(diff_row)
-            else:
-                # left id is not in right. row is deleted
-                if 'id' not in diff.column:
-                    diff.column['id'] = left.column['id']
-                diff.append({"id": left_id, "remove_": REMOVE})
-                if 'remove_' not in diff.column:
-                    diff.column.add_item("remove_", {})
+            continue
+        # Manage row without id
+        # Search the first record in right, with the same values
+        key = _row_key(left_row, columns)
+        if key is None:
+            candidates = list(right_positions.values())
+        else:
+            candidates = [right_positions.get(key, []), right_positions.get(None, [])]
+        same_position = None
+        for positions in candidates:
+            for i in positions:
+                if same_position is not None and i > same_position:
+                    break
+                if _same_values(left_row, right_rows[i], columns):
+                    same_position = i
+                    break
+        if same_position is not None:
+            # Found record with same value if left and right
+            right_positions[right_keys[same_position]].remove(same_position)
+            pending_right_row.remove(same_position)
         else:
-            same_values = False
-            # Manage row without id
-            # Search record in right, with the same values
-            for right_row in right:
-                if 'id' not in right_row:
-                    if id(right_row) in managed_right_row:
-                        continue
-                    same_values = True
-                    for col in left.column:
-                        # Right have the same col
-                        if left_row.get(col, None) != right_row.get(col, None):
-                            same_values = False
-                            break
-                    if same_values:
-                        # Found record with same value if left and right
-                        if id(right_row) in pending_right_row:
-                            pending_right_row.remove(id(right_row))
-                            managed_right_row.append(id(right_row))
-                        break
-            # remove left row ?
-            if not same_values:
-                diff_row = left_row.copy()
-                diff_row['remove_'] = REMOVE
-                if 'remove_' not in diff.column:
-                    diff.column.add_item("remove_", {})
-                diff.append(diff_row)
+            # remove left row
+            diff_row = left_row.copy()
+            diff_row['remove_'] = REMOVE
+            diff_rows.append((left_position, diff_row))
+
+    # In the order of left
+    diff_rows.sort(key=lambda position_and_row: position_and_row[0])
+    for _, diff_row in diff_rows:
+        if 'remove_' in diff_row:
+            if 'id' in diff_row and 'id' not in diff.column:
+                diff.column['id'] = left.column['id']
+            if 'remove_' not in diff.column:
+                diff.column.add_item("remove_", {})
+        diff.append(diff_row)
 
     # Add the row with id, if it's only in right
-    for key in right.keys():
-        if key not in left:
-            pending_right_row.append(id(right[key]))
+    for i, right_row in enumerate(right_rows):
+        if 'id' in right_row and right_row['id'] not in left:
+            pending_right_row.add(i)
 
     # Now, the pending_right_row have the not associated row
-    for right_row in right:
-        if id(right_row) in pending_right_row:
+    for i, right_row in enumerate(right_rows):
+        if i in pending_right_row:
             diff.append(right_row)
     return diff
 
 
+def _diff_rows_with_id(left: Grid, right: Grid, workers: int) -> List[Tuple[int, Entity]]:
+    """
+    Compare the entities with the same `id` in left and right, and the entities with an `id`
+    only in left.
+
+    Args:
+        left: Left version
+        right: Right version
+        workers: The number of processes
+    Returns:
+        The rows of the difference, with the positions of the entities in left
+    """
+    chunk_count = min(workers * _CHUNKS_BY_WORKER, len(left) // MIN_CHUNK_ENTITIES)
+    if workers <= 1 or chunk_count < 2:
+        return _diff_chunk_with_id(left, right, 0, len(left))
+
+    # Build the indexes before the copy of the grids in the workers
+    left.keys()
+    right.keys()
+    chunk_size = -(-len(left) // chunk_count)
+    starts = range(0, len(left), chunk_size)
+    LOG.debug("Compare %d chunks with %d workers", len(starts), workers)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(left, right)) as executor:
+        chunks = executor.map(_diff_worker_chunk, starts,
+                              (min(start + chunk_size, len(left)) for start in starts))
+        return [diff_row for chunk in chunks for diff_row in chunk]
+
+
+def _init_worker(left: Grid, right: Grid) -> None:
+    """Save the grids in a worker process (without serialization if the process is forked)."""
+    global _WORKER_GRIDS  # pylint: disable=global-statement
+    _WORKER_GRIDS = (left, right)
+
+
+def _diff_worker_chunk(start: int, end: int) -> List[Tuple[int, Entity]]:
+    return _diff_chunk_with_id(*_WORKER_GRIDS, start, end)  # type: ignore
+
+
+def _diff_chunk_with_id(left: Grid, right: Grid, start: int, end: int) -> List[Tuple[int, Entity]]:
+    """Compare the entities with `id` of left, from the position `start` to `end`."""
+    left_columns = list(left.column)
+    right_columns = [col for col in right.column if col not in left.column]
+    diff_rows = []
+    for left_position in range(start, end):
+        left_row = left[left_position]
+        if 'id' not in left_row:
+            continue
+        left_id = left_row['id']
+        right_row = right.get(left_id)
+        if right_row is None:
+            # left id is not in right. row is deleted
+            diff_rows.append((left_position, {"id": left_id, "remove_": REMOVE}))
+            continue
+        # row with same id in left and right
+        diff_row = {}
+        for col in left_columns:
+            if col in left_row:
+                # Left has col
+                if col in right_row:
+                    # col is in left and right
+                    val_right = right_row[col]
+                    if left_row[col] != val_right:
+                        diff_row[col] = val_right
+                else:
+                    # col is not in right
+                    diff_row[col] = REMOVE
+            elif col in right_row:
+                # Left has not col
+                diff_row[col] = right_row[col]
+        # Check add cols in right
+        for col in right_columns:
+            if col in right_row:
+                diff_row[col] = right_row[col]
+        if diff_row:
+            diff_row["id"] = left_id
+            diff_rows.append((left_position, diff_row))
+    return diff_rows
+
+
 def grid_merge(orig_grid: Grid, diff: Grid) -> Grid:  # pylint: disable=too-many-nested-blocks
     """
     Merge two grid.
 
-    Apply the difference describe in `diff` to t71he `original_grid` and produce a new grid.
+    Apply the difference describe in `diff` to the `original_grid`. The original grid is updated:
+    use `orig_grid.copy()` to keep it.
 
     Args:
         orig_grid: The original grid
@@ -196,6 +312,7 @@ def grid_merge(orig_grid: Grid, diff: Grid) -> Grid:  # pylint: disable=too-many
     orig_grid.column = _merge_cols(diff.column, orig_grid.column)
 
     # Apply diff of rows
+    updated = False
     for diff_row in diff:
         if 'id' in diff_row:
             id_diff = diff_row['id']
@@ -211,6 +328,11 @@ def grid_merge(orig_grid: Grid, diff: Grid) -> Grid:  # pylint: disable=too-many
                                 del left_row[col]
                             else:
                                 left_row[col] = val
+                    if left_row is not orig_grid[id_diff]:
+                        # The grid does not save the entities (see `ColumnarGrid`)
+                        orig_grid[id_diff] = left_row
+                    else:
+                        updated = True
             else:
                 # New row with id
                 orig_grid.append(diff_row)
@@ -219,13 +341,17 @@ def grid_merge(orig_grid: Grid, diff: Grid) -> Grid:  # pylint: disable=too-many
                 copy_diff_row = diff_row.copy()
                 del copy_diff_row['remove_']
                 # Search same record
-                for pos, grid_row in enumerate(orig_grid):
-                    if grid_row == copy_diff_row:
-                        orig_grid.pop(pos)
-                        break
+                try:
+                    orig_grid.pop(orig_grid._row.index(copy_diff_row))  # pylint: disable=protected-access
+                except ValueError:
+                    pass
             else:
                 # Add a new record
                 orig_grid.append(diff_row)
+    if updated:
+        # The entities are updated directly: the tag index and the graph of references must be rebuilt
+        orig_grid._tag_index = None  # pylint: disable=protected-access
+        orig_grid._ref_graph = None  # pylint: disable=protected-access
     if "remove_" in orig_grid.column:
         orig_grid.column.pop("remove_")
     return orig_grid
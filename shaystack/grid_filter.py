@@ -9,24 +9,21 @@
 Parse the filter syntax to produce a FilterAST.
 See https://project-haystack.org/doc/docHaystack/Filters
 """
+import operator
 from datetime import datetime, date, time, timedelta, tzinfo
 from functools import lru_cache
-from typing import Any, List, Callable, Tuple
+from threading import local
+from typing import Any, List, Callable, Tuple, Dict, Optional, Set
 
-from pyparsing import ZeroOrMore, Literal, Forward, Suppress
+from pyparsing import ZeroOrMore, Literal, Forward, Suppress, ParserElement
 
 from . import Grid
-from .datatypes import Ref, XStr, MARKER, NA, REMOVE
+from .datatypes import Ref
 from .filter_ast import FilterPath, FilterBinary, FilterUnary, FilterAST, FilterNode
+from .filter_fastparser import parse_filter as fast_parse_filter
+from .grid_index import TagIndex
 from .type import Entity
-from .zincparser import hs_scalar_3_0, hs_id, hs_all_date, hs_date, \
-    hs_time, pyparser_lock
-
-# Necessary for generated code
-_ = XStr
-_ = MARKER  # type: ignore
-_ = NA  # type: ignore
-_ = REMOVE  # type: ignore
+from .zincparser import zinc_grammar
 
 
 def _merge_and_or(key: str, toks: List[FilterBinary]) -> FilterBinary:
@@ -35,59 +32,110 @@ def _merge_and_or(key: str, toks: List[FilterBinary]) -> FilterBinary:
     return FilterBinary(key, _merge_and_or(key, toks[:-2]), toks[-1])
 
 
-hs_filter = Forward()
-hs_bool = (Literal("true") | "false").setParseAction(
-    lambda toks: toks[0] == "true"
-)  # Extension to accept T or F
-hs_val = hs_scalar_3_0 ^ hs_bool
-
-hs_path = (hs_id + ZeroOrMore(Suppress("->") + hs_id)).setParseAction(
-    lambda toks: FilterPath(list(toks))
-)
-hs_cmpOp = Literal("==") | "!=" | "<=" | ">=" | "<" | ">"
-hs_cmp = (hs_path + hs_cmpOp + hs_val).setParseAction(
-    lambda toks: FilterBinary(toks[1], toks[0], toks[2])
-)
-hs_missing = (Suppress("not") + hs_path).setParseAction(
-    lambda toks: FilterUnary("not", toks[0])
-)
-hs_has = hs_path.copy().setParseAction(
-    lambda toks: FilterUnary("has", FilterPath(list(toks)))
-)
-
-hs_parens = (Suppress("(") + hs_filter + Suppress(")")).setParseAction(
-    lambda toks: toks[0]
-)
-hs_term = hs_parens | hs_missing | hs_cmp | hs_has
-
-hs_condAnd = (hs_term + ZeroOrMore("and" + hs_term)).setParseAction(
-    lambda toks: _merge_and_or("and", toks)
-)
-hs_condOr = (hs_condAnd + ZeroOrMore("or" + hs_condAnd)).setParseAction(
-    lambda toks: _merge_and_or("or", toks)
-)
-hs_filter <<= hs_condOr
+def _build_grammar() -> ParserElement:
+    """Build a new instance of the filter grammar, with the Zinc grammar of the current thread."""
+    zinc = zinc_grammar()
+    hs_filter = Forward()
+    hs_bool = (Literal("true") | "false").setParseAction(
+        lambda toks: toks[0] == "true"
+    )  # Extension to accept T or F
+    hs_val = zinc.hs_scalar_3_0 ^ hs_bool
+
+    hs_path = (zinc.hs_id + ZeroOrMore(Suppress("->") + zinc.hs_id)).setParseAction(
+        lambda toks: FilterPath(list(toks))
+    )
+    hs_cmpOp = Literal("==") | "!=" | "<=" | ">=" | "<" | ">"
+    hs_cmp = (hs_path + hs_cmpOp + hs_val).setParseAction(
+        lambda toks: FilterBinary(toks[1], toks[0], toks[2])
+    )
+    hs_missing = (Suppress("not") + hs_path).setParseAction(
+        lambda toks: FilterUnary("not", toks[0])
+    )
+    hs_has = hs_path.copy().setParseAction(
+        lambda toks: FilterUnary("has", FilterPath(list(toks)))
+    )
+
+    hs_parens = (Suppress("(") + hs_filter + Suppress(")")).setParseAction(
+        lambda toks: toks[0]
+    )
+    hs_term = hs_parens | hs_missing | hs_cmp | hs_has
+
+    hs_condAnd = (hs_term + ZeroOrMore("and" + hs_term)).setParseAction(
+        lambda toks: _merge_and_or("and", toks)
+    )
+    hs_condOr = (hs_condAnd + ZeroOrMore("or" + hs_condAnd)).setParseAction(
+        lambda toks: _merge_and_or("or", toks)
+    )
+    hs_filter <<= hs_condOr
+    return hs_filter
+
+
+# Grammar instances, by thread
+_thread_grammar = local()
+
+
+def filter_grammar() -> ParserElement:
+    """Return the filter grammar of the current thread. The grammar is built at the first call.
+
+    Returns:
+        The filter grammar, to use without lock.
+    """
+    grammar = getattr(_thread_grammar, "grammar", None)
+    if grammar is None:
+        grammar = _build_grammar()
+        _thread_grammar.grammar = grammar
+    return grammar
+
+
+def __getattr__(name: str) -> Any:
+    # The grammar, for compatibility. The grammar is built at the first access.
+    if name == "hs_filter":
+        return filter_grammar()
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
+
+
+# Maximum number of parsed filters
+_FILTER_AST_CACHE_LRU_SIZE = 500
+
+
+@lru_cache(maxsize=_FILTER_AST_CACHE_LRU_SIZE)
+def _parse_filter(grid_filter: str) -> FilterAST:
+    return fast_parse_filter(grid_filter)
 
 
 def parse_filter(grid_filter: str) -> FilterAST:
     """Return an AST tree of filter. Can be used to generate other language
     (Python, SQL, etc.)
 
+    The AST are cached, and shared between the calls. They must not be modified.
+
     Args:
         grid_filter: A filter request
     Returns:
         A `FilterAST`
+    Raises:
+        `pyparsing.ParseException` if the filter does not conform
     """
-    with pyparser_lock:
-        return FilterAST(hs_filter.parseString(grid_filter, parseAll=True)[0])
+    return _parse_filter(grid_filter)
 
 
-# --- Generate python to apply filter
-# Maximum number of generated python function
+# --- Compile the filter to python closures
+# Maximum number of compiled filter functions
 _FILTER_CACHE_LRU_SIZE = 500
-# Id of next generated function
+# Id of next generated function (only to show the equivalent python code)
 _ID_FUNCTION = 0  # pylint: disable=C0103
 
+_COMPARATORS: Dict[str, Callable[[Any, Any], bool]] = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+
+_FilterFunction = Callable[[Grid, Entity], Any]
+
 
 class _NotFoundValue:
     """ Hack to easely manage the 'not found' value.
@@ -147,9 +195,118 @@ def _get_path(grid: Grid, obj: Any, paths: List[str]) -> Any:
         return NOT_FOUND
 
 
+def _compile_path(node: FilterPath) -> _FilterFunction:
+    """Return a function to read the value of a path, or `NOT_FOUND`."""
+    paths = list(node.paths)
+    if len(paths) == 1:
+        tag = paths[0]
+
+        def _get_tag(_grid: Grid, entity: Entity) -> Any:
+            try:
+                value = entity[tag]
+            except (KeyError, TypeError):
+                return NOT_FOUND
+            return NOT_FOUND if value is None else value
+
+        return _get_tag
+
+    def _get_paths(grid: Grid, entity: Entity) -> Any:
+        return _get_path(grid, entity, paths)
+
+    return _get_paths
+
+
+def _compile_has(node: FilterPath, negate: bool) -> _FilterFunction:
+    """Return a function to check the presence (or the absence if `negate`) of a path."""
+    if len(node.paths) == 1:
+        tag = node.paths[0]
+        if negate:
+            def _not_tag(_grid: Grid, entity: Entity) -> bool:
+                return entity.get(tag) is None
+
+            return _not_tag
+
+        def _has_tag(_grid: Grid, entity: Entity) -> bool:
+            return entity.get(tag) is not None
+
+        return _has_tag
+
+    get_path = _compile_path(node)
+    if negate:
+        def _not_path(grid: Grid, entity: Entity) -> bool:
+            return get_path(grid, entity) is NOT_FOUND
+
+        return _not_path
+
+    def _has_path(grid: Grid, entity: Entity) -> bool:
+        return get_path(grid, entity) is not NOT_FOUND
+
+    return _has_path
+
+
+def _compile_compare(node: FilterBinary) -> _FilterFunction:
+    """Return a function to compare a path with a constant."""
+    compare = _COMPARATORS[node.operator]
+    left, right = node.left, node.right
+    if isinstance(left, FilterPath) and len(left.paths) == 1 \
+            and not isinstance(right, FilterNode):
+        tag = left.paths[0]
+
+        def _compare_tag(_grid: Grid, entity: Entity) -> bool:
+            value = entity.get(tag)
+            return value is not None and compare(value, right)
+
+        return _compare_tag
+
+    get_left = _compile_node(left)
+    get_right = _compile_node(right)
+
+    def _compare(grid: Grid, entity: Entity) -> bool:
+        return compare(get_left(grid, entity), get_right(grid, entity))
+
+    return _compare
+
+
+def _compile_node(node: FilterNode) -> _FilterFunction:
+    """
+    Compile a node of the AST to a python closure.
+    Args:
+        node: Node to compile
+    Returns:
+        A function `(grid, entity)` returning the value of the node
+    """
+    if isinstance(node, FilterPath):
+        return _compile_path(node)
+    if isinstance(node, FilterUnary):
+        assert node.operator in ("has", "not")
+        return _compile_has(node.right, node.operator == "not")  # type: ignore
+    if isinstance(node, FilterBinary):
+        if node.operator == "and":
+            left_and, right_and = _compile_node(node.left), _compile_node(node.right)
+
+            def _and(grid: Grid, entity: Entity) -> Any:
+                return left_and(grid, entity) and right_and(grid, entity)
+
+            return _and
+        if node.operator == "or":
+            left_or, right_or = _compile_node(node.left), _compile_node(node.right)
+
+            def _or(grid: Grid, entity: Entity) -> Any:
+                return left_or(grid, entity) or right_or(grid, entity)
+
+            return _or
+        return _compile_compare(node)
+
+    def _constant(_grid: Grid, _entity: Entity) -> Any:
+        return node
+
+    return _constant
+
+
 def _generate_filter_in_python(node: FilterNode, def_filter: List[str]) -> List[str]:
     """
     Generate a partial python code to represent the current node.
+    Only used to show the filter in python.
     Args:
         node: Node to convert to python
         def_filter: Current generated code.
@@ -180,31 +337,14 @@ def _generate_filter_in_python(node: FilterNode, def_filter: List[str]) -> List[
     return def_filter
 
 
-class _FnWrapper:
+def _filter_to_python(grid_filter: str) -> Tuple[str, str]:
     """
-    A wrapper to manage the lifecycle of generated python methods.
-    Can be used with @lru to remove the generated method if this wrapper is deleted.
+    Return the python code equivalent to the filter (to debug).
     Args:
-        fun_name: The function name to manage.
-        function_template: The body of the function.
+        grid_filter: The filter request
+    Returns:
+        The function name and the python code
     """
-    __slots__ = ("fun_name",)
-
-    def __init__(self, fun_name: str, function_template: str):
-        self.fun_name = fun_name
-        # Import the function inside Python engine
-        exec(function_template, globals(), globals())  # pylint: disable=W0122
-
-    def __del__(self) -> None:  # pragma: no cover
-        # Remove the corresponding python function from Python engine
-        del globals()[self.fun_name]  # Remove generated function if the LRU ask that
-
-    def get(self) -> Callable[[Grid, Entity], bool]:
-        # Gest the python function.
-        return globals()[self.fun_name]
-
-
-def _filter_to_python(grid_filter: str) -> Tuple[str, str]:
     global _ID_FUNCTION  # pylint: disable=global-statement
     def_filter = _generate_filter_in_python(
         parse_filter(grid_filter).head, [])   # type: ignore
@@ -215,16 +355,17 @@ def _filter_to_python(grid_filter: str) -> Tuple[str, str]:
 
 
 @lru_cache(maxsize=_FILTER_CACHE_LRU_SIZE)
-def _filter_function(grid_filter: str) -> _FnWrapper:
+def _filter_function(grid_filter: str) -> _FilterFunction:
     """
-    Generate and manage the life cycle of generation python function.
+    Compile a filter to a python closure.
+    The `lru_cache` is thread safe and bounded. The functions are released by the garbage
+    collector when they leave the cache.
     Args:
         grid_filter: The filter request
     Returns:
-        A wrapper to manage the life cycle of generated function
+        The compiled function
     """
-    func_name, function_template = _filter_to_python(grid_filter)
-    return _FnWrapper(func_name, function_template)
+    return _compile_node(parse_filter(grid_filter).head)
 
 
 def filter_set_lru_size(lru_size: int) -> None:
@@ -237,7 +378,16 @@ def filter_set_lru_size(lru_size: int) -> None:
     global _filter_function  # pylint: disable=W0601, C0103
     # noinspection PyUnresolvedReferences
     original_function = _filter_function.__wrapped__  # pylint: disable=E1101
-    _filter_function = lru_cache(lru_size, original_function)  # type: ignore
+    _filter_function = lru_cache(maxsize=lru_size)(original_function)  # type: ignore
+
+
+def filter_cache_info() -> Any:
+    """Return the statistics of the cache of compiled filter functions.
+
+    Returns:
+        A named tuple `(hits, misses, maxsize, currsize)`, like `functools.lru_cache`
+    """
+    return _filter_function.cache_info()  # pylint: disable=E1101
 
 
 def filter_function(grid_filter: str) -> Callable[[Grid, Entity], bool]:
@@ -249,7 +399,134 @@ def filter_function(grid_filter: str) -> Callable[[Grid, Entity], bool]:
     Returns:
         The corresponding python function to apply to the grid
     """
-    return _filter_function(grid_filter).get()
+    return _filter_function(grid_filter)
+
+
+# --- Select the candidate entities with the tag index and the graph of references
+_Plan = Tuple[Optional[Set[int]], bool]
+
+
+def _compare_positions(grid: Grid, index: TagIndex,  # pylint: disable=too-many-arguments
+                       tag: str, operator_name: str, value: Any,
+                       candidates: Optional[Set[int]] = None) -> Optional[Set[int]]:
+    """Return the positions of entities with `entity[tag] <operator> value`, only in
+    `candidates` if set, or `None` if the values can not be compared."""
+    positions = index.positions(tag)
+    if candidates is not None:
+        positions = positions & candidates
+    if operator_name in ("==", "!="):
+        value_positions = index.value_positions(tag, value)
+        if value_positions is not None:
+            if operator_name == "==":
+                return value_positions if candidates is None else value_positions & candidates
+            return positions - value_positions
+    compare = _COMPARATORS[operator_name]
+    try:
+        return {position for position in positions
+                if compare(grid[position][tag], value)}  # type: ignore
+    except Exception:  # pylint: disable=broad-except
+        # The filter function is applied on the candidates, like without index
+        return None
+
+
+def _reach_path(grid: Grid, paths: List[str], positions: Set[int]) -> Optional[Set[int]]:
+    """Return the positions of entities reached by the path from the entities of `positions`,
+    or `None` if a tag of the path has some values other than `Ref`."""
+    graph = grid.ref_graph()
+    for tag in paths[:-1]:
+        targets = graph.targets(tag)
+        if targets is None:
+            return None
+        positions = {targets[position] for position in positions if position in targets}
+    return positions
+
+
+def _join_path(grid: Grid, paths: List[str], positions: Set[int]) -> Optional[Set[int]]:
+    """Return the positions of entities where the path reaches an entity of `positions`,
+    or `None` if a tag of the path has some values other than `Ref`."""
+    graph = grid.ref_graph()
+    for tag in reversed(paths[:-1]):
+        referrers = graph.referrers(tag)
+        if referrers is None:
+            return None
+        sources: Set[int] = set()
+        if len(positions) < len(referrers):
+            for position in positions:
+                sources.update(referrers.get(position, ()))
+        else:
+            for target, referrer_positions in referrers.items():
+                if target in positions:
+                    sources.update(referrer_positions)
+        positions = sources
+    return positions
+
+
+def _plan_node(node: FilterNode, grid: Grid, index: TagIndex) -> _Plan:
+    """
+    Select the candidate positions of a node with the tag index and the graph of references.
+    Args:
+        node: Node to plan
+        grid: The grid
+        index: The tag index of the grid
+    Returns:
+        The candidate positions (`None` for all the positions), and `True` if all the
+        candidates match the node.
+    """
+    if isinstance(node, FilterUnary):
+        paths = node.right.paths  # type: ignore
+        has_positions: Optional[Set[int]] = index.positions(paths[-1])
+        if len(paths) > 1:
+            has_positions = _join_path(grid, paths, has_positions)  # type: ignore
+            if has_positions is None:
+                return (index.positions(paths[0]) if node.operator == "has" else None), False
+        if node.operator == "has":
+            return has_positions, True
+        return set(range(index.size)).difference(has_positions), True  # type: ignore
+    assert isinstance(node, FilterBinary)
+    if node.operator in ("and", "or"):
+        left, left_exact = _plan_node(node.left, grid, index)
+        right, right_exact = _plan_node(node.right, grid, index)
+        if node.operator == "and":
+            if left is None or right is None:
+                return (right if left is None else left), False
+            return left & right, left_exact and right_exact
+        if left is None or right is None:
+            return None, False
+        return left | right, left_exact and right_exact
+
+    paths = node.left.paths  # type: ignore
+    if len(paths) == 1:
+        if node.operator in ("==", "!=") and index.value_positions(paths[0], node.right) is not None:
+            return _compare_positions(grid, index, paths[0], node.operator, node.right), True
+        # The filter function is applied on the entities with the tag
+        return index.positions(paths[0]), False
+    # Compare only the entities reached by the path
+    positions = _reach_path(grid, paths, index.positions(paths[0]))
+    if positions is not None:
+        positions = _compare_positions(grid, index, paths[-1], node.operator, node.right, positions)
+    if positions is not None:
+        positions = _join_path(grid, paths, positions)
+    if positions is None:
+        # The first tag of the path must be present
+        return index.positions(paths[0]), False
+    return positions, True
+
+
+def plan_filter(grid_filter: str, grid: Grid) -> _Plan:
+    """
+    Select the candidate entities of a filter, with the tag index (see `Grid.tag_index()`)
+    and the graph of references (see `Grid.ref_graph()`) of a grid.
+    The paths with `->` are evaluated as joins on the graph of references.
+
+    Args:
+        grid_filter: The request filter.
+        grid: The grid
+    Returns:
+        The set of candidate positions (`None` for all the positions, do not modify the set),
+        and `True` if all the candidates match the filter. Else, the filter function must be
+        applied on each candidate.
+    """
+    return _plan_node(parse_filter(grid_filter).head, grid, grid.tag_index())
 
 
 def parse_hs_datetime_format(datetime_str: str, timezone: tzinfo) -> datetime:
@@ -270,7 +547,7 @@ def parse_hs_datetime_format(datetime_str: str, timezone: tzinfo) -> datetime:
         return datetime.combine(date.today() - timedelta(days=1), datetime.min.time()) \
             .replace(tzinfo=timezone)
 
-    return hs_all_date.parseString(datetime_str, parseAll=True)[0]
+    return zinc_grammar().hs_all_date.parseString(datetime_str, parseAll=True)[0]
 
 
 def parse_hs_date_format(date_str) -> date:
@@ -283,7 +560,7 @@ def parse_hs_date_format(date_str) -> date:
     Raises:
         `pyparsing.ParseException` if the string does not conform
     """
-    return hs_date.parseString(date_str, parseAll=True)[0]
+    return zinc_grammar().hs_date.parseString(date_str, parseAll=True)[0]
 
 
 def parse_hs_time_format(time_str) -> time:
@@ -296,4 +573,4 @@ def parse_hs_time_format(time_str) -> time:
     Raises:
         `pyparsing.ParseException` if the string does not conform
     """
-    return hs_time.parseString(time_str, parseAll=True)[0]
+    return zinc_grammar().hs_time.parseString(time_str, parseAll=True)[0]
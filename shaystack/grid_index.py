@@ -0,0 +1,336 @@
+# -*- coding: utf-8 -*-
+# Grid indexes
+# See the accompanying LICENSE file.
+# (C) 2021 Engie Digital
+#
+# vim: set ts=4 sts=4 et tw=78 sw=4 si:
+
+"""
+Indexes on the entities of a grid: the positions of the entities by id, and to accelerate
+the filters, an inverted index of tags and the graph of references.
+"""
+from bisect import bisect_left, bisect_right, insort
+from typing import Dict, Set, Optional, Any, Iterable, Sequence, KeysView, Iterator, List
+
+from .datatypes import Ref
+from .type import Entity
+
+# Over this number of different values, a tag is not indexed by value
+MAX_VALUE_CARDINALITY = 256
+# Minimum number of removed positions before a compaction of the `PositionIndex`
+MIN_COMPACTION = 64
+# Only these types have a hash compatible with the `==` operator of each other
+_INDEXED_VALUE_TYPES = frozenset((str, bool, Ref))
+
+
+class PositionIndex:
+    """The position of the entities, by id.
+
+    The positions are saved when the index is built, or when an entity is appended.
+    When an entity is removed, its position is saved in a sorted list of removed positions,
+    and the next positions are shifted when they are read. When the list is too large,
+    the positions are updated. So, the entities can be appended, replaced or removed in
+    `O(log n)` (amortized). Like the index of a grid, the last entity wins if an id is duplicated.
+
+    Args:
+        ids: The ids of the entities (`None` for an entity without id)
+    """
+
+    __slots__ = "_positions", "_removed", "_size"
+
+    def __init__(self, ids: Iterable[Any] = ()):
+        self._positions: Dict[Any, int] = {}
+        # The removed positions, before the shift of the next positions
+        self._removed: List[int] = []
+        self._size = 0
+        for entity_id in ids:
+            if entity_id is not None:
+                assert isinstance(entity_id, Ref), "The 'id' tag must be a reference"
+                self._positions[entity_id] = self._size
+            self._size += 1
+
+    def __contains__(self, key: Any) -> bool:
+        return key in self._positions
+
+    def __iter__(self) -> Iterator[Ref]:
+        return iter(self._positions)
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def keys(self) -> KeysView[Ref]:
+        """Return the ids."""
+        return self._positions.keys()
+
+    def position(self, key: Any) -> Optional[int]:
+        """Return the position of the entity with an id.
+
+        Args:
+            key: The id
+        Returns:
+            The position, or `None` if the id is not indexed
+        """
+        position = self._positions.get(key)
+        if position is None or not self._removed:
+            return position
+        return position - bisect_left(self._removed, position)
+
+    def append(self, entity: Entity) -> None:
+        """Add an entity after the last position.
+
+        Args:
+            entity: The new entity
+        """
+        entity_id = entity.get("id")
+        if entity_id is not None:
+            self._positions[entity_id] = self._size + len(self._removed)
+        self._size += 1
+
+    def replace(self, position: int, old_entity: Entity, new_entity: Entity) -> None:
+        """Replace the entity at a position.
+
+        Args:
+            position: The position of the entity
+            old_entity: The previous entity
+            new_entity: The new entity
+        """
+        saved_position = self._saved_position(position)
+        old_id = old_entity.get("id")
+        if old_id is not None and self._positions.get(old_id) == saved_position:
+            del self._positions[old_id]
+        new_id = new_entity.get("id")
+        if new_id is not None:
+            self._positions[new_id] = saved_position
+
+    def remove(self, position: int, entity: Entity) -> None:
+        """Remove the entity at a position. The next positions are shifted.
+
+        Args:
+            position: The position of the entity
+            entity: The entity
+        """
+        saved_position = self._saved_position(position)
+        entity_id = entity.get("id")
+        if entity_id is not None and self._positions.get(entity_id) == saved_position:
+            del self._positions[entity_id]
+        self._size -= 1
+        if position == self._size and (not self._removed or self._removed[-1] < saved_position):
+            return  # The last entity: no shift
+        insort(self._removed, saved_position)
+        if len(self._removed) > max(MIN_COMPACTION, self._size // 8):
+            self._compact()
+
+    def _saved_position(self, position: int) -> int:
+        """Return the saved position of the entity at a position."""
+        removed = self._removed
+        saved_position = position
+        while True:
+            next_position = position + bisect_right(removed, saved_position)
+            if next_position == saved_position:
+                return saved_position
+            saved_position = next_position
+
+    def _compact(self) -> None:
+        removed = self._removed
+        self._positions = {key: position - bisect_left(removed, position)
+                           for key, position in self._positions.items()}
+        self._removed = []
+
+
+class TagIndex:
+    """An inverted index of the tags of a list of entities.
+
+    For each tag, the index saves the positions of the entities with this tag (and a value
+    not `None`). For the tags with a low cardinality, the positions are saved by value too.
+    A tag with more than `MAX_VALUE_CARDINALITY` values, or with a value other than
+    `str`, `bool` or `Ref`, is not indexed by value.
+
+    Args:
+        entities: The initial entities
+    """
+
+    __slots__ = "size", "tags", "values"
+
+    def __init__(self, entities: Iterable[Entity] = ()):
+        self.size = 0
+        self.tags: Dict[str, Set[int]] = {}
+        # `None` for a tag not indexed by value
+        self.values: Dict[str, Optional[Dict[Any, Set[int]]]] = {}
+        for entity in entities:
+            self.append(entity)
+
+    def append(self, entity: Entity) -> None:
+        """Add an entity after the last position.
+
+        Args:
+            entity: The new entity
+        """
+        self.size += 1
+        self._add(self.size - 1, entity)
+
+    def pop(self, entity: Entity) -> None:
+        """Remove the entity at the last position.
+
+        Args:
+            entity: The last entity
+        """
+        self.size -= 1
+        self._discard(self.size, entity)
+
+    def replace(self, position: int, old_entity: Entity, new_entity: Entity) -> None:
+        """Replace the entity at a position.
+
+        Args:
+            position: The position of the entity
+            old_entity: The previous entity
+            new_entity: The new entity
+        """
+        self._discard(position, old_entity)
+        self._add(position, new_entity)
+
+    def positions(self, tag: str) -> Set[int]:
+        """Return the positions of entities with the tag. Do not modify the result.
+
+        Args:
+            tag: The tag
+        Returns:
+            The set of positions
+        """
+        return self.tags.get(tag, _EMPTY)
+
+    def value_positions(self, tag: str, value: Any) -> Optional[Set[int]]:
+        """Return the positions of entities with `entity[tag] == value`. Do not modify the result.
+
+        Args:
+            tag: The tag
+            value: The value
+        Returns:
+            The set of positions, or `None` if the tag or the value is not indexed.
+        """
+        if value.__class__ not in _INDEXED_VALUE_TYPES:
+            return None
+        if tag not in self.tags:
+            return _EMPTY
+        values = self.values.get(tag)
+        if values is None:
+            return None
+        return values.get(value, _EMPTY)
+
+    def _add(self, position: int, entity: Entity) -> None:
+        tags = self.tags
+        all_values = self.values
+        for tag, value in entity.items():
+            if value is None:
+                continue
+            positions = tags.get(tag)
+            if positions is None:
+                positions = tags[tag] = set()
+                all_values[tag] = {}
+            positions.add(position)
+
+            values = all_values[tag]
+            if values is None:
+                continue
+            if value.__class__ not in _INDEXED_VALUE_TYPES:
+                all_values[tag] = None
+                continue
+            value_positions = values.get(value)
+            if value_positions is None:
+                if len(values) >= MAX_VALUE_CARDINALITY:
+                    all_values[tag] = None
+                    continue
+                value_positions = values[value] = set()
+            value_positions.add(position)
+
+    def _discard(self, position: int, entity: Entity) -> None:
+        for tag, value in entity.items():
+            if value is None:
+                continue
+            positions = self.tags.get(tag)
+            if positions is None:
+                continue
+            positions.discard(position)
+            values = self.values[tag]
+            if values is not None:
+                value_positions = values.get(value)
+                if value_positions is not None:
+                    value_positions.discard(position)
+                    if not value_positions:
+                        del values[value]
+
+
+class RefGraph:
+    """The graph of references between a list of entities.
+
+    For each tag, the edges are computed the first time they are used: from the position of
+    an entity to the position of the referenced entity (`targets()`), and from the position of
+    an entity to the positions of the entities referencing it (`referrers()`).
+    The references to an unknown id have no edge.
+
+    Args:
+        entities: The entities. The list must not be updated.
+    """
+
+    __slots__ = "_entities", "_positions", "_targets", "_referrers"
+
+    def __init__(self, entities: Sequence[Entity]):
+        self._entities = entities
+        self._positions: Optional[Dict[Ref, int]] = None
+        # `None` for a tag with values other than `Ref`
+        self._targets: Dict[str, Optional[Dict[int, int]]] = {}
+        self._referrers: Dict[str, Optional[Dict[int, Set[int]]]] = {}
+
+    def targets(self, tag: str) -> Optional[Dict[int, int]]:
+        """Return the forward edges of a tag. Do not modify the result.
+
+        Args:
+            tag: The tag with references
+        Returns:
+            The position of the referenced entity, by position of entity, or `None` if the tag
+            has some values other than `Ref`.
+        """
+        if tag not in self._targets:
+            self._build(tag)
+        return self._targets[tag]
+
+    def referrers(self, tag: str) -> Optional[Dict[int, Set[int]]]:
+        """Return the reverse edges of a tag (the children of an entity). Do not modify the result.
+
+        Args:
+            tag: The tag with references
+        Returns:
+            The positions of the entities referencing an entity, by position of this entity,
+            or `None` if the tag has some values other than `Ref`.
+        """
+        if tag not in self._referrers:
+            self._build(tag)
+        return self._referrers[tag]
+
+    def _build(self, tag: str) -> None:
+        positions = self._positions
+        if positions is None:
+            # Like the index of the grid, the last entity wins if an id is duplicated
+            positions = self._positions = {entity["id"]: position  # type: ignore
+                                           for position, entity in enumerate(self._entities)
+                                           if entity.get("id") is not None}
+        targets: Optional[Dict[int, int]] = {}
+        referrers: Optional[Dict[int, Set[int]]] = {}
+        for position, entity in enumerate(self._entities):
+            value = entity.get(tag)
+            if value is None:
+                continue
+            if not isinstance(value, Ref):
+                targets = referrers = None
+                break
+            target = positions.get(value)
+            if target is not None:
+                targets[position] = target  # type: ignore
+                sources = referrers.get(target)  # type: ignore
+                if sources is None:
+                    sources = referrers[target] = set()  # type: ignore
+                sources.add(position)
+        self._targets[tag] = targets
+        self._referrers[tag] = referrers
+
+
+_EMPTY: Set[int] = frozenset()  # type: ignore
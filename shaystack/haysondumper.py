@@ -15,14 +15,15 @@ from __future__ import unicode_literals
 import datetime
 import functools
 import json
-from typing import Dict, Optional, Tuple, List, Any, Union
+from typing import Dict, Optional, Tuple, List, Any, Union, Callable, Iterator
 
 from .datatypes import Quantity, Coordinate, Ref, Bin, Uri, \
-    MARKER, NA, REMOVE, XStr
+    XStr, _MarkerType, _NAType, _RemoveType
 from .grid import Grid
 from .haysonparser import MARKER_STR, REMOVE_STR
 from .metadata import MetadataObject
 from .sortabledict import SortableDict
+from .tools import find_encoder
 from .type import Entity
 from .version import LATEST_VER, VER_3_0, Version
 from .zoneinfo import timezone_name
@@ -39,6 +40,24 @@ def dump_grid(grid: Grid) -> str:
     return json.dumps(_dump_grid_to_hayson(grid))
 
 
+def dump_grid_iter(grid: Grid) -> Iterator[str]:
+    """
+    Dump a grid to JSON, row by row. The result is the same as `dump_grid()`.
+    Args:
+        grid: The grid.
+    Returns:
+        The parts of the json string
+    """
+    yield '{"meta": %s, "cols": %s, "rows": [' % (
+        json.dumps(_dump_meta(grid.metadata, version=grid.version, for_grid=True)),
+        json.dumps(_dump_columns(grid.column, version=grid.version)))
+    separator = ''
+    for row in map(_row_dumper(grid), grid):
+        yield separator + json.dumps(row)
+        separator = ', '
+    yield ']}'
+
+
 def _dump_grid_to_hayson(grid: Grid) -> Dict[str, Union[List[str], Dict[str, str]]]:
     """
     Convert a grid to JSON object
@@ -90,60 +109,37 @@ def _dump_column(col: str, col_meta: MetadataObject, version: Version = LATEST_V
 
 
 def _dump_rows(grid: Grid) -> List[str]:
-    return list(map(functools.partial(_dump_row, grid), grid))  # type: ignore
+    return list(map(_row_dumper(grid), grid))  # type: ignore
+
+
+def _row_dumper(grid: Grid) -> Callable[[Entity], Dict[str, Any]]:
+    """Return a function to dump the rows of a grid, specialized for its columns and its version."""
+    columns = tuple(grid.column.keys())
+    version = grid.version
+    encoders = _ENCODERS
+
+    def _dump_row(row: Entity) -> Dict[str, Any]:
+        json_row = {}
+        for column in columns:
+            if column in row:
+                value = row[column]
+                encoder = encoders.get(type(value))
+                json_row[column] = encoder(value, version) if encoder else _dump_scalar(value, version)
+        return json_row
+
+    return _dump_row
 
 
 def _dump_row(grid: Grid, row: Entity) -> Dict[str, str]:
-    return {
-        c: _dump_scalar(row.get(c), version=grid.version)  # type: ignore
-        for c in list(grid.column.keys()) if c in row
-    }
+    return _row_dumper(grid)(row)
 
 
 def _dump_scalar(scalar: Any, version: Version = LATEST_VER) \
         -> Union[None, str, bool, float, List[str], Entity]:
-    if scalar is None:
-        return None
-    if scalar is MARKER:
-        return _dump_marker()
-    if scalar is REMOVE:
-        return _dump_remove()
-    if scalar is NA:
-        if version < VER_3_0:
-            raise ValueError('Project Haystack %s '
-                             'does not support NA' % version)
-        return _dump_na()
-    if isinstance(scalar, list):
-        return _dump_list(scalar, version=version)
-    if isinstance(scalar, dict):
-        return _dump_dict(scalar, version=version)  # type: ignore
-    if isinstance(scalar, bool):
-        return _dump_bool(scalar)
-    if isinstance(scalar, Ref):
-        return _dump_ref(scalar)
-    if isinstance(scalar, Bin):
-        return _dump_bin(scalar)
-    if isinstance(scalar, XStr):
-        return _dump_xstr(scalar)
-    if isinstance(scalar, Uri):
-        return _dump_uri(scalar)
-    if isinstance(scalar, str):
-        return _dump_str(scalar)
-    if isinstance(scalar, datetime.datetime):
-        return _dump_date_time(scalar)
-    if isinstance(scalar, datetime.time):
-        return _dump_time(scalar)
-    if isinstance(scalar, datetime.date):
-        return _dump_date(scalar)
-    if isinstance(scalar, Coordinate):
-        return _dump_coord(scalar)
-    if isinstance(scalar, Quantity):
-        return _dump_quantity(scalar)
-    if isinstance(scalar, (float, int)):
-        return _dump_decimal(scalar)
-    if isinstance(scalar, Grid):
-        return _dump_grid_to_hayson(scalar)  # type: ignore
-    raise NotImplementedError('Unhandled case: %r' % scalar)
+    encoder = _ENCODERS.get(type(scalar)) or find_encoder(_ENCODERS, type(scalar))
+    if encoder is None:
+        raise NotImplementedError('Unhandled case: %r' % scalar)
+    return encoder(scalar, version)
 
 
 def _dump_id(id_str: str) -> str:
@@ -263,6 +259,38 @@ def _dump_dict(dic: Dict[str, Any], version: Version = LATEST_VER) -> Dict[str,
     return {k: _dump_scalar(v, version=version) for (k, v) in dic.items()}  # type: ignore
 
 
+def _dump_na_for_version(_: Any, version: Version) -> Dict:
+    if version < VER_3_0:
+        raise ValueError('Project Haystack %s '
+                         'does not support NA' % version)
+    return _dump_na()
+
+
+# The encoder of each type. The subclasses are added at the first use (see `find_encoder()`).
+_ENCODERS: Dict[type, Callable[[Any, Version], Any]] = {
+    type(None): lambda _, __: None,
+    _MarkerType: lambda _, __: _dump_marker(),
+    _NAType: _dump_na_for_version,
+    _RemoveType: lambda _, __: _dump_remove(),
+    list: _dump_list,
+    dict: _dump_dict,
+    bool: lambda value, _: _dump_bool(value),
+    Ref: lambda value, _: _dump_ref(value),
+    Bin: lambda value, _: _dump_bin(value),
+    XStr: lambda value, _: _dump_xstr(value),
+    Uri: lambda value, _: _dump_uri(value),
+    str: lambda value, _: _dump_str(value),
+    datetime.datetime: lambda value, _: _dump_date_time(value),
+    datetime.time: lambda value, _: _dump_time(value),
+    datetime.date: lambda value, _: _dump_date(value),
+    Coordinate: lambda value, _: _dump_coord(value),
+    Quantity: lambda value, _: _dump_quantity(value),
+    float: lambda value, _: _dump_decimal(value),
+    int: lambda value, _: _dump_decimal(value),
+    Grid: lambda value, _: _dump_grid_to_hayson(value),
+}
+
+
 def dump_scalar(scalar: Any, version: Version = LATEST_VER) -> str:
     """
     Dump a scalar to JSON
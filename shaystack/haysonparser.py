@@ -23,7 +23,7 @@ from typing import Any, List, Dict, Union
 import iso8601
 
 from .datatypes import Quantity, Coordinate, Ref, Bin, Uri, \
-    MARKER, NA, REMOVE, XStr
+    MARKER, NA, REMOVE, XStr, intern_ref
 from .grid import Grid
 from .metadata import MetadataObject
 from .type import Entity
@@ -122,7 +122,7 @@ def _parse_embedded_scalar(scalar: Union[None, List, Dict, str],
 
             # Is it a reference?
             if kind == REF:
-                return Ref(scalar.get('val'), scalar.get('dis'))  # type: ignore
+                return intern_ref(scalar.get('val'), scalar.get('dis'))  # type: ignore
 
             # Is it a date?
             if kind == DATE:
@@ -234,8 +234,7 @@ def parse_grid(grid_str: Union[str, Dict[str, Any]]) -> Grid:
     _parse_cols(grid, parsed.pop('cols'), version)
 
     # Parse the rows
-    for row in (parsed.pop('rows', []) or []):
-        parsed_row = _parse_row(row, version)
-        grid.append(parsed_row)
+    grid.bulk_extend((_parse_row(row, version) for row in (parsed.pop('rows', []) or [])),
+                     validate=True)
 
     return grid
@@ -22,8 +22,8 @@ from typing import Any, List, Dict, Union
 
 import iso8601
 
-from .datatypes import Quantity, Coordinate, Ref, Bin, Uri, \
-    MARKER, NA, REMOVE, XStr
+from .datatypes import Quantity, Coordinate, Bin, Uri, \
+    MARKER, NA, REMOVE, XStr, intern_ref
 from .grid import Grid
 from .metadata import MetadataObject
 from .tools import unescape_str
@@ -152,8 +152,8 @@ def _parse_embedded_scalar(scalar: Union[None, List, Dict, str],
     if match:
         matched = match.groups()
         if matched[-1] is not None:
-            return Ref(matched[0], matched[-1])
-        return Ref(matched[0])
+            return intern_ref(matched[0], matched[-1])
+        return intern_ref(matched[0])
 
     # Is it a date?
     match = DATE_RE.match(scalar)
@@ -263,8 +263,7 @@ def parse_grid(grid_str: Union[str, Dict[str, Any]]) -> Grid:
     _parse_cols(grid, parsed.pop('cols'), version)
 
     # Parse the rows
-    for row in (parsed.pop('rows', []) or []):
-        parsed_row = _parse_row(row, version)
-        grid.append(parsed_row)
+    grid.bulk_extend((_parse_row(row, version) for row in (parsed.pop('rows', []) or [])),
+                     validate=True)
 
     return grid
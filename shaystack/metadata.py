@@ -8,8 +8,7 @@
 """
 A support of metadata of a grid or column.
 """
-import copy
-from typing import Any, Iterable
+from typing import Any, Iterable, cast
 
 from .datatypes import MARKER
 from .sortabledict import SortableDict
@@ -50,10 +49,12 @@ class MetadataObject(SortableDict):  # pylint: disable=too-many-ancestors
             self.append(key, value, replace=replace)
         return self
 
-    def copy(self) -> 'MetadataObject':
+    def copy(self, deep: bool = False) -> 'MetadataObject':
         """
-        Deep copy of metadata
+        Copy of metadata
+        Args:
+            deep: `True` to duplicate the values too
         Returns:
             A new metadata object
         """
-        return copy.deepcopy(self)
+        return cast(MetadataObject, super().copy(deep))
@@ -21,14 +21,12 @@ from typing import Optional, Any, List, cast
 from typing import Tuple, Dict, Union
 
 from accept_types import get_best_match
-from pyparsing import ParseException
 
 from .datatypes import Ref, Quantity, MARKER, MODE_TRIO, MODE
 from .dumper import dump
 from .empty_grid import EmptyGrid
 from .exception import HaystackException
 from .grid import Grid, VER_3_0
-from .grid_filter import parse_hs_datetime_format
 from .parser import MODE_ZINC, MODE_HAYSON, MODE_CSV, MODE_JSON, parse_scalar, parse, mode_to_suffix
 from .providers.haystack_interface import (
     HttpError, parse_date_range, HaystackInterface,
@@ -205,6 +203,18 @@ def _parse_body(request: HaystackHttpRequest) -> Grid:
     return grid
 
 
+def _split_tags(tags: str) -> List[str]:
+    """
+    Split a list of tags, separated with comma or space.
+    Args:
+        tags: The tags
+
+    Returns:
+        The list of tags
+    """
+    return [tag for tag in re.split('[, ]', tags) if tag]
+
+
 def _format_response(
         headers: Dict[str, str],
         grid_response: Grid,
@@ -323,6 +333,7 @@ def _manage_exception(
         ex_http = cast(HttpError, ex)
         status_code = ex_http.error
         status_msg = ex_http.msg
+    from pyparsing import ParseException  # pylint: disable=import-outside-toplevel
     if isinstance(ex, ParseException):
         status_code = 200
         status_msg = f"Parsing error with '{ex.line}'"  # type: ignore
@@ -477,12 +488,15 @@ def read(envs: Dict[str, str], request: HaystackHttpRequest, stage: str,
     Returns:
         The HTTP Response
     """
+    from .grid_filter import parse_hs_datetime_format  # pylint: disable=import-outside-toplevel
     headers, args = (request.headers, request.args)
     try:
         grid_request = _parse_body(request)
         read_ids: Optional[List[Ref]] = None
         select = read_filter = date_version = None
         limit = 0
+        sort: Optional[List[str]] = None
+        reverse = False
         default_tz = provider.get_tz()
         if grid_request:
             if "id" in grid_request.column:
@@ -496,6 +510,10 @@ def read(envs: Dict[str, str], request: HaystackHttpRequest, stage: str,
                     limit = int(grid_request[0].get("limit", 0))  # type: ignore
             if "select" in grid_request.column:
                 select = grid_request[0].get("select", "*")  # type: ignore
+            if "sort" in grid_request.column:
+                sort = _split_tags(grid_request[0].get("sort", ""))  # type: ignore
+            if "reverse" in grid_request.column:
+                reverse = bool(grid_request[0].get("reverse", False))  # type: ignore
             date_version = (
                 grid_request[0].get("version", None) if grid_request else None  # type: ignore
             )
@@ -510,6 +528,10 @@ def read(envs: Dict[str, str], request: HaystackHttpRequest, stage: str,
                     limit = int(args["limit"])
             if "select" in args:
                 select = args["select"]
+            if "sort" in args:
+                sort = _split_tags(args["sort"])
+            if "reverse" in args:
+                reverse = args["reverse"].lower() in ("true", "1")
             if "version" in args:
                 date_version = parse_hs_datetime_format(args["version"], default_tz)
                 date_version = convert_version(date_version)
@@ -518,14 +540,20 @@ def read(envs: Dict[str, str], request: HaystackHttpRequest, stage: str,
         if read_ids is None and read_filter is None:
             raise ValueError("'id' or 'filter' must be set")
         log.debug(
-            "id=%s select='%s' filter='%s' limit=%s, date_version=%s",
+            "id=%s select='%s' filter='%s' limit=%s, date_version=%s, sort=%s, reverse=%s",
             read_ids,
             select,
             read_filter,
             limit,
             date_version,
+            sort,
+            reverse,
         )
-        grid_response = provider.read(limit, select, read_ids, read_filter, date_version)  # type: ignore
+        if sort:
+            grid_response = provider.read_sorted(limit, select, read_ids, read_filter,  # type: ignore
+                                                 date_version, sort, reverse)
+        else:
+            grid_response = provider.read(limit, select, read_ids, read_filter, date_version)  # type: ignore
         assert grid_response is not None
         response = _format_response(headers, grid_response, 200, "OK")
     except Exception as ex:  # pylint: disable=broad-except
@@ -702,6 +730,7 @@ def point_write(envs: Dict[str, str], request: HaystackHttpRequest,
     Returns:
         The HTTP Response
     """
+    from .grid_filter import parse_hs_datetime_format  # pylint: disable=import-outside-toplevel
     headers, args = (request.headers, request.args)
     try:
         grid_request = _parse_body(request)
@@ -768,6 +797,7 @@ def his_read(envs: Dict[str, str], request: HaystackHttpRequest,
     Returns:
         The HTTP Response
     """
+    from .grid_filter import parse_hs_datetime_format  # pylint: disable=import-outside-toplevel
     headers, args = (request.headers, request.args)
     try:
         grid_request = _parse_body(request)
@@ -824,6 +854,7 @@ def his_write(envs: Dict[str, str], request: HaystackHttpRequest,
     Returns:
         The HTTP Response
     """
+    from .grid_filter import parse_hs_datetime_format  # pylint: disable=import-outside-toplevel
     headers, args = (request.headers, request.args)
     try:
         grid_request = _parse_body(request)
@@ -838,7 +869,7 @@ def his_write(envs: Dict[str, str], request: HaystackHttpRequest,
                 entity_id = Ref(args["id"][1:])
             if "ts" in args:  # Array of tuple
                 time_serie_grid = Grid(version=VER_3_0, columns=["date", "val"])
-                time_serie_grid.extend(
+                time_serie_grid.bulk_extend(
                     [
                         {"date": parse_hs_datetime_format(d, default_tz), "val": v}
                         for d, v in literal_eval(args["ts"])
@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+# Parallel parser
+# See the accompanying LICENSE file.
+# (C) 2021 Engie Digital
+#
+# vim: set ts=4 sts=4 et tw=78 sw=4 si:
+
+"""
+Parse huge Zinc, CSV or Trio files with a pool of processes.
+
+The rows are split in chunks, at the end of a line outside of a string or an inner grid.
+Each chunk is parsed in a different process, with a copy of the header, and the
+entities are merged in the original order.
+"""
+import logging
+import re
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import List, Tuple, Callable, Optional, Any, Iterator
+
+from .csvparser import parse_grid as parse_csv_grid
+from .datatypes import MODE, MODE_ZINC, MODE_CSV, MODE_TRIO
+from .grid import Grid
+from .trioparser import parse_grid as parse_trio_grid, TrioParseException
+from .version import LATEST_VER
+from .zincparser import parse_grid as parse_zinc_grid, ZincParseException
+
+LOG = logging.getLogger(__name__)
+
+# Minimum size of a chunk. Under this size, the cost of the processes is greater than the gain.
+MIN_CHUNK_SIZE = 64 * 1024
+# Number of chunks for each worker, to balance the load
+_CHUNKS_BY_WORKER = 4
+
+_ZINC_NESTED_RE = re.compile(r'"(?:[^"\\]|\\.)*"|`(?:[^`\\]|\\.)*`|<<|>>')
+_TRIO_SEPARATOR_RE = re.compile(r'-+[ \t]*\r?\n')
+_LINE_RE = re.compile(r'line:\d+')
+
+
+def _zinc_state(depth: int, line: str) -> int:
+    """Return the depth of inner grids (`<<...>>`) at the end of the line."""
+    if '<<' not in line and '>>' not in line:
+        return depth
+    for token in _ZINC_NESTED_RE.findall(line):
+        if token == '<<':
+            depth += 1
+        elif token == '>>':
+            depth -= 1
+    return depth
+
+
+def _csv_state(in_quote: int, line: str) -> int:
+    """Return 1 if the end of the line is inside a quoted value."""
+    return in_quote ^ (line.count('"') & 1)
+
+
+def _trio_state(_: int, line: str) -> int:
+    """Return 0 only after a separator of records."""
+    return 0 if _TRIO_SEPARATOR_RE.fullmatch(line) else 1
+
+
+def _iter_safe_line_ends(text: str, start: int,
+                         state_fn: Callable[[int, str], int]) -> Iterator[int]:
+    """Yield the positions after each line where the state is 0."""
+    state = 0
+    length = len(text)
+    pos = start
+    while pos < length:
+        end = text.find('\n', pos) + 1 or length
+        state = state_fn(state, text[pos:end])
+        if not state:
+            yield end
+        pos = end
+
+
+def _split(text: str, start: int, chunk_count: int,
+           state_fn: Callable[[int, str], int]) -> List[Tuple[int, int]]:
+    """Split `text[start:]` in `chunk_count` chunks with roughly the same size.
+
+    Returns:
+        A list of `(start, end)` positions
+    """
+    chunk_size = max((len(text) - start) // chunk_count, MIN_CHUNK_SIZE)
+    chunks = []
+    cut = start
+    for end in _iter_safe_line_ends(text, start, state_fn):
+        if end - cut >= chunk_size:
+            chunks.append((cut, end))
+            cut = end
+    if cut < len(text):
+        chunks.append((cut, len(text)))
+    return chunks
+
+
+def _split_grid(grid_str: str, mode: MODE, chunk_count: int) -> Tuple[str, List[Tuple[int, int]]]:
+    """Split the grid in a header, and chunks of rows.
+
+    Returns:
+        The header, and a list of `(start, end)` positions for each chunk
+    """
+    if mode == MODE_ZINC:
+        state_fn = _zinc_state
+    elif mode == MODE_CSV:
+        state_fn = _csv_state
+    else:
+        state_fn = _trio_state
+    header_end = 0
+    if mode != MODE_TRIO:
+        # The header is the first line for CSV, and the two first lines for Zinc
+        safe_ends = _iter_safe_line_ends(grid_str, 0, state_fn)
+        for _ in range(2 if mode == MODE_ZINC else 1):
+            header_end = next(safe_ends, len(grid_str))
+    return grid_str[:header_end], _split(grid_str, header_end, chunk_count, state_fn)
+
+
+def _parse_chunk(mode: MODE, engine: Optional[str], compact: bool, chunk: str) -> Tuple[Optional[Grid], Any]:
+    """Parse a chunk in a worker process.
+
+    The parse exceptions can not be pickled, so the error is returned with the grid.
+    Returns:
+        The grid, or `None` and a tuple with the message, the line and the column of the error.
+    """
+    try:
+        if mode == MODE_ZINC:
+            return parse_zinc_grid(chunk, engine=engine, compact=compact), None
+        if mode == MODE_CSV:
+            return parse_csv_grid(chunk, compact), None
+        return parse_trio_grid(chunk), None
+    except (ZincParseException, TrioParseException) as ex:
+        return None, (str(ex).split('\n', 1)[0], getattr(ex, 'line', None), getattr(ex, 'col', None))
+
+
+def parse_grid(grid_str: str, mode: MODE, workers: int,
+               engine: Optional[str] = None, compact: bool = False) -> Grid:
+    """Parse a Zinc, CSV or Trio grid, with a pool of `workers` processes.
+
+    Args:
+        grid_str: The text to parse
+        mode: The format (`MODE_ZINC`, `MODE_CSV` or `MODE_TRIO`)
+        workers: The number of processes
+        engine: The Zinc parser engine
+        compact: `True` to save the entities with most of the columns as `CompactEntity`
+            (`MODE_ZINC` and `MODE_CSV`)
+    Returns:
+        The grid, with the entities in the original order
+    """
+    assert mode in (MODE_ZINC, MODE_CSV, MODE_TRIO), "Format not supported in parallel: %s" % mode
+    header, chunks = _split_grid(grid_str, mode, workers * _CHUNKS_BY_WORKER)
+    if len(chunks) < 2:
+        return _parse_serial(grid_str, mode, engine, compact)
+    LOG.debug("Parse %d chunks with %d workers", len(chunks), workers)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(_parse_chunk,
+                                    repeat(mode), repeat(engine), repeat(compact),
+                                    (header + grid_str[start:end] for start, end in chunks)))
+
+    for (start, _), (_, error) in zip(chunks, results):
+        if error:
+            _raise_error(grid_str, mode, header, start, *error)
+
+    grids = [chunk_grid for chunk_grid, _ in results]
+    if mode == MODE_TRIO:
+        # Like the trio parser, the columns are the union of all tags
+        grid = Grid.from_rows(LATEST_VER, None, None,
+                              (row for chunk_grid in grids for row in chunk_grid))  # type: ignore
+        return grid.extends_columns()
+    grid = grids[0]  # type: ignore
+    return grid.bulk_extend(row for chunk_grid in grids[1:] for row in chunk_grid)  # type: ignore
+
+
+def _parse_serial(grid_str: str, mode: MODE, engine: Optional[str], compact: bool) -> Grid:
+    if mode == MODE_ZINC:
+        return parse_zinc_grid(grid_str, engine=engine, compact=compact)
+    if mode == MODE_CSV:
+        return parse_csv_grid(grid_str, compact)
+    return parse_trio_grid(grid_str)
+
+
+def _raise_error(grid_str: str, mode: MODE, header: str, start: int,  # pylint: disable=too-many-arguments
+                 message: str, line: Optional[int], col: Optional[int]) -> None:
+    """Raise the error of a chunk, with the line number in the full text."""
+    if line and mode != MODE_CSV:
+        line = grid_str.count('\n', 0, start) + line - header.count('\n')
+        message = _LINE_RE.sub('line:%d' % line, message)
+    if mode == MODE_TRIO:
+        raise TrioParseException(message, grid_str, line, col)  # type: ignore
+    raise ZincParseException(message, grid_str, line, col)
@@ -8,25 +8,28 @@
 """
 Generic parser from file to `Grid`. The mode can be `MODE_ZINC`, `MODE_JSON` or `MODE_CSV`
 """
+import importlib
 import logging
-from typing import Optional, Any, Union, cast
+from types import ModuleType
+from typing import Optional, Any, Union, cast, IO, Iterable, Iterator, Tuple
 
-from .csvparser import parse_grid as parse_csv_grid, parse_scalar as parse_csv_scalar
-from .datatypes import MODE_ZINC, MODE_JSON, MODE_CSV, MODE, MODE_TRIO, MODE_HAYSON
+from .datatypes import MODE_ZINC, MODE_JSON, MODE_CSV, MODE, MODE_TRIO, MODE_HAYSON, \
+    ENGINE_FAST, ENGINE_PYPARSING
 from .grid import Grid
-from .jsonparser import parse_grid as parse_json_grid, \
-    parse_scalar as parse_json_scalar
-from .haysonparser import parse_grid as parse_hayson_grid, \
-    parse_scalar as parse_hayson_scalar
-
-from .trioparser import parse_grid as parse_trio_grid, parse_scalar as parse_trio_scalar
+from .type import Entity
 # Bring in version handling
 from .version import Version, LATEST_VER
-from .zincparser import parse_grid as parse_zinc_grid, \
-    parse_scalar as parse_zinc_scalar
 
 LOG = logging.getLogger(__name__)
 
+# The parser of each mode. The modules are imported only when a grid is parsed with this mode.
+_mode_to_parser = {MODE_ZINC: "zincparser",
+                   MODE_HAYSON: "haysonparser",
+                   MODE_JSON: "jsonparser",
+                   MODE_TRIO: "trioparser",
+                   MODE_CSV: "csvparser"
+                   }
+
 _suffix_to_mode = {".zinc": MODE_ZINC,
                    ".hayson.json": MODE_HAYSON,
                    ".json": MODE_JSON,
@@ -64,13 +67,46 @@ def mode_to_suffix(mode: MODE) -> Optional[str]:
     return _mode_to_suffix.get(mode, None)
 
 
-def parse(grid_str: str, mode: MODE = MODE_ZINC) -> Grid:
+def _parser(mode: MODE) -> ModuleType:
+    """Import the parser of a mode.
+
+    Args:
+        mode: The haystack mode (`MODE_...`)
+    Returns:
+        The parser module, with `parse_grid()` and `parse_scalar()`
+    Raises:
+        NotImplementedError if the mode is unknown
+    """
+    if mode not in _mode_to_parser:
+        raise NotImplementedError('Format not implemented: %s' % mode)
+    return importlib.import_module("." + _mode_to_parser[mode], __package__)
+
+
+def iter_zinc_rows(source: Union[IO, Iterable[Union[str, bytes]]]) -> Tuple[Grid, Iterator[Entity]]:
+    """Parse a Zinc grid from a stream, row by row, without loading all the text in memory.
+
+    See `shaystack.zinc_fastparser.iter_zinc_rows()`.
+
+    Args:
+        source: A file object (text or binary), or an iterable of `str` or `bytes` chunks
+    Returns:
+        An empty grid with the version, the metadata and the columns, and an iterator of entities
+    """
+    return importlib.import_module(".zinc_fastparser", __package__).iter_zinc_rows(source)
+
+
+def parse(grid_str: str, mode: MODE = MODE_ZINC, engine: Optional[str] = None,
+          workers: int = 1, compact: bool = False) -> Grid:
     # Decode incoming text
     """
     Parse a grid.
     Args:
         grid_str: The string to parse
         mode: The format (`MODE_...`)
+        engine: The Zinc parser engine (`ENGINE_FAST` or `ENGINE_PYPARSING`). Only for `MODE_ZINC`
+        workers: The number of processes to parse a huge `MODE_ZINC`, `MODE_CSV` or `MODE_TRIO` grid
+        compact: `True` to save the entities with at least half of the columns as `CompactEntity`,
+            with a layout shared by all the entities. Only for `MODE_ZINC` and `MODE_CSV`
     Returns:
         a grid
     """
@@ -85,21 +121,20 @@ def parse(grid_str: str, mode: MODE = MODE_ZINC) -> Grid:
     if grid_str and grid_str[-1] not in ['\n', '\r']:
         grid_str += '\n'
 
+    if workers > 1 and mode in (MODE_ZINC, MODE_CSV, MODE_TRIO):
+        parallel_parser = importlib.import_module(".parallelparser", __package__)
+        return parallel_parser.parse_grid(grid_str, mode, workers, engine=engine, compact=compact)
+    parser = _parser(mode)
     if mode == MODE_ZINC:
-        return parse_zinc_grid(grid_str)
-    if mode == MODE_TRIO:
-        return parse_trio_grid(grid_str)
-    if mode == MODE_JSON:
-        return parse_json_grid(grid_str)
-    if mode == MODE_HAYSON:
-        return parse_hayson_grid(grid_str)
+        return parser.parse_grid(grid_str, engine=engine, compact=compact)
     if mode == MODE_CSV:
-        return parse_csv_grid(grid_str)
-    raise NotImplementedError('Format not implemented: %s' % mode)
+        return parser.parse_grid(grid_str, compact)
+    return parser.parse_grid(grid_str)
 
 
 def parse_scalar(scalar: Union[bytes, str, dict], mode: MODE = MODE_ZINC,
-                 version: Union[Version, str] = LATEST_VER) -> Any:
+                 version: Union[Version, str] = LATEST_VER,
+                 engine: Optional[str] = None) -> Any:
     # Decode version string
     """
     Parse a scalar value
@@ -107,6 +142,7 @@ def parse_scalar(scalar: Union[bytes, str, dict], mode: MODE = MODE_ZINC,
         scalar: The scalar data to parse
         mode: The haystack mode
         version: The haystack version
+        engine: The Zinc parser engine (`ENGINE_FAST` or `ENGINE_PYPARSING`). Only for `MODE_ZINC`
     Returns:
         a value
     """
@@ -118,15 +154,7 @@ def parse_scalar(scalar: Union[bytes, str, dict], mode: MODE = MODE_ZINC,
     if isinstance(scalar, bytes):
         scalar = scalar.decode(encoding=charset)
 
+    parser = _parser(mode)
     if mode == MODE_ZINC:
-        return parse_zinc_scalar(scalar, version=version)  # type: ignore
-    if mode == MODE_TRIO:
-        return parse_trio_scalar(scalar, version=version)  # type: ignore
-    if mode == MODE_JSON:
-        return parse_json_scalar(scalar, version=version)
-    if mode == MODE_CSV:
-        return parse_csv_scalar(scalar, version=version)  # type: ignore
-    if mode == MODE_HAYSON:
-        return parse_hayson_scalar(scalar, version=version)
-
-    raise NotImplementedError('Format not implemented: %s' % mode)
+        return parser.parse_scalar(scalar, version=version, engine=engine)
+    return parser.parse_scalar(scalar, version=version)
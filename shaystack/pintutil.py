@@ -7,13 +7,39 @@
 """
 Tools to convert haystack unit to pint unit.
 """
+import functools
+import getpass
+import hashlib
 import importlib.resources as pkg_resources
+import logging
 import os
-from typing import Dict
+import pickle
+import stat
+import tempfile
+import types
+import weakref
+from typing import Dict, Optional, Any
 
+import pint
 from pint import UnitRegistry
+from pint.context import _expression_to_function
 from pint.converters import ScaleConverter
 from pint.definitions import UnitDefinition
+from pint.util import UnitsContainer
+
+log = logging.getLogger(__name__)
+
+# The maximum number of haystack units in the cache
+MAX_UNITS = 1024
+
+# Change this version when `_build_pint_units()` changes, to invalidate the caches
+_UNITS_CACHE_VERSION = 1
+
+# The classes generated by pint for each registry
+_DYNAMIC_CLASSES = ("Unit", "Quantity", "Measurement", "Group", "System")
+
+# The name of the functions generated by pint for the transformations of the contexts
+_EXPRESSION_FUNCTION = _expression_to_function(None).__qualname__
 
 
 def _load_haystack_alias() -> Dict[str, str]:
@@ -58,7 +84,7 @@ def _to_pint_unit(unit: str) -> str:
     return unit
 
 
-def _load_pint_units() -> UnitRegistry:
+def _build_pint_units() -> UnitRegistry:
     """Missing units found in project-haystack Added to the registry"""
     unit_ureg = UnitRegistry(on_redefinition='ignore')
     unit_ureg.load_definitions(os.path.join(os.path.dirname(__file__),
@@ -67,4 +93,163 @@ def _load_pint_units() -> UnitRegistry:
     return unit_ureg
 
 
+class _RegistryPickler(pickle.Pickler):
+    """Save a unit registry, without the classes generated by pint, the functions of the contexts
+    and the weak dictionaries. These objects are saved by reference, and generated again by
+    `_RegistryUnpickler`. The hash of the units containers is not saved, because the hash of
+    the strings changes with each process.
+    """
+
+    def __init__(self, file: Any, registry: UnitRegistry):
+        super().__init__(file, pickle.HIGHEST_PROTOCOL)
+        self._registry = registry
+        self._classes = {id(getattr(registry, name)): name for name in _DYNAMIC_CLASSES}
+
+    def persistent_id(self, obj: Any) -> Any:  # pylint: disable=too-many-return-statements
+        if obj is self._registry:
+            return ("registry",)
+        if isinstance(obj, type) and id(obj) in self._classes:
+            return ("class", self._classes[id(obj)])
+        if isinstance(obj, types.FunctionType) and obj.__qualname__ == _EXPRESSION_FUNCTION:
+            return ("expression", obj.__closure__[0].cell_contents)  # type: ignore
+        if isinstance(obj, weakref.WeakValueDictionary):
+            return ("weak values", dict(obj))
+        if isinstance(obj, UnitsContainer):
+            state = obj.__getstate__()
+            return ("units", type(obj), state[:1] + (None,) + state[2:])
+        return None
+
+
+class _RegistryUnpickler(pickle.Unpickler):
+    """Load a unit registry saved by `_RegistryPickler`."""
+
+    def __init__(self, file: Any, registry: UnitRegistry):
+        super().__init__(file)
+        self._registry = registry
+
+    def persistent_load(self, pid: Any) -> Any:
+        kind = pid[0]
+        if kind == "registry":
+            return self._registry
+        if kind == "class":
+            return getattr(self._registry, pid[1])
+        if kind == "expression":
+            return _expression_to_function(pid[1])
+        if kind == "weak values":
+            return weakref.WeakValueDictionary(pid[1])
+        if kind == "units":
+            units = object.__new__(pid[1])
+            units.__setstate__(pid[2])
+            return units
+        raise pickle.UnpicklingError("Unknown persistent id %r" % (pid,))
+
+
+def _is_private_directory(directory: str) -> bool:
+    """Return `True` if the directory is not a symbolic link, belongs to the current user
+    and only this user can use it."""
+    if not hasattr(os, "getuid"):
+        return os.path.isdir(directory)  # No owner and mode to check
+    try:
+        status = os.lstat(directory)
+    except OSError:
+        return False
+    return stat.S_ISDIR(status.st_mode) and status.st_uid == os.getuid() \
+        and not stat.S_IMODE(status.st_mode) & 0o077
+
+
+def _units_cache_path() -> Optional[str]:
+    """Return the file of the cache of the unit registry, or `None` if the cache is disabled.
+
+    The directory is `HAYSTACK_UNITS_CACHE` (a `shaystack-units-<uid>` directory in the temp directory
+    by default: the name can not be imported as a package, and is different for each user).
+    If this default directory is not private (created by another user), the directory is
+    `shaystack-units` in the cache directory of the user (`XDG_CACHE_HOME` or `~/.cache`).
+    The name of the file changes with the content of `haystack_units.pint` and the version of pint,
+    so an old cache is never used.
+    """
+    directory = os.environ.get("HAYSTACK_UNITS_CACHE")
+    if directory is None:
+        user = os.getuid() if hasattr(os, "getuid") else getpass.getuser()
+        directory = os.path.join(tempfile.gettempdir(), "shaystack-units-%s" % user)
+        if os.path.lexists(directory) and not _is_private_directory(directory):
+            cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+            directory = os.path.join(cache_home, "shaystack-units")
+    if not directory:
+        return None
+    digest = hashlib.md5()
+    digest.update(("%s|%s|" % (_UNITS_CACHE_VERSION, pint.__version__)).encode("utf-8"))
+    with open(os.path.join(os.path.dirname(__file__), 'haystack_units.pint'), "rb") as file:
+        digest.update(file.read())
+    return os.path.join(directory, "units-%s.pickle" % digest.hexdigest())
+
+
+def _read_units_cache(path: str) -> Optional[UnitRegistry]:
+    """Load the unit registry from the cache, if the cache is present and belongs to the current user,
+    in a private directory (another user can not replace the file)."""
+    if os.path.lexists(os.path.dirname(path)) and not _is_private_directory(os.path.dirname(path)):
+        log.warning("Ignore the cache of units %s: the directory is not private", path)
+        return None
+    try:
+        with open(path, "rb") as file:
+            if hasattr(os, "getuid") and os.fstat(file.fileno()).st_uid != os.getuid():
+                return None
+            registry = object.__new__(UnitRegistry)
+            registry._init_dynamic_classes()  # pylint: disable=protected-access
+            registry.__dict__.update(_RegistryUnpickler(file, registry).load())
+            return registry
+    except FileNotFoundError:
+        return None
+    except Exception as ex:  # pylint: disable=broad-except
+        log.warning("Ignore the cache of units %s: %s", path, ex)
+        return None
+
+
+def _write_units_cache(path: str, registry: UnitRegistry) -> None:
+    """Save the unit registry in the cache. The errors are ignored."""
+    tmp_path = "%s.%d.tmp" % (path, os.getpid())
+    try:
+        os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+        if not _is_private_directory(os.path.dirname(path)):  # `mode` is ignored if it exists
+            log.debug("Do not save the cache of units %s: the directory is not private", path)
+            return
+        with open(tmp_path, "wb") as file:
+            _RegistryPickler(file, registry).dump({name: value for name, value in vars(registry).items()
+                                                   if name not in _DYNAMIC_CLASSES})
+        os.replace(tmp_path, path)
+    except Exception as ex:  # pylint: disable=broad-except
+        log.debug("Impossible to save the cache of units %s: %s", path, ex)
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _load_pint_units() -> UnitRegistry:
+    """Load the unit registry from the cache, or build it and save it in the cache.
+
+    Building the registry parses all the definitions of pint and project-haystack, and takes a long time
+    (a problem for the cold start of a AWS Lambda).
+    """
+    path = _units_cache_path()
+    registry = _read_units_cache(path) if path else None
+    if registry is None:
+        registry = _build_pint_units()
+        if path:
+            _write_units_cache(path, registry)
+    return registry
+
+
 unit_reg = _load_pint_units()
+
+
+@functools.lru_cache(maxsize=MAX_UNITS)
+def _pint_units(unit: str) -> UnitsContainer:
+    """
+    Convert haystack unit to pint units, parsed only once for each unit
+    Args:
+        unit: haystack unit
+
+    Returns:
+        pint units
+    Raises:
+        UndefinedUnitError if the unit is unknown
+    """
+    return unit_reg.parse_units(_to_pint_unit(unit))._units  # pylint: disable=protected-access
@@ -26,7 +26,7 @@ from overrides import overrides
 
 from .db import Provider as DBProvider
 from .db import log
-from ..datatypes import Ref, MARKER, REMOVE, Coordinate, Quantity, NA, XStr
+from ..datatypes import Ref, MARKER, REMOVE, Coordinate, Quantity, NA, XStr, intern_ref
 from ..grid import Grid
 from ..period import Period
 
@@ -103,7 +103,7 @@ class Provider(DBProvider):
             if python_type == "_NAType":
                 return NA if val else None
             if python_type == "Ref":
-                return Ref(val)
+                return intern_ref(val)
             if python_type == "datetime":
                 return datetime.fromtimestamp(int(val))
             if python_type == "date":
@@ -283,12 +283,13 @@ class Provider(DBProvider):
         if not hs_type:
             hs_type = "float"
         if reader:
+            rows = []
             for row in reader:
                 date_format = his_uri["hs_date_column"][hs_date_column_name]  # "%Y-%m-%d %H:%M:%S.%f"
                 date_val = self.put_date_format(row[hs_date_column_name], date_format)
                 hs_values = {key: row[key] for key in hs_value_column_names}
                 if len(hs_values) == 1:
-                    history.append({
+                    rows.append({
                         "ts": datetime.fromisoformat(date_val).replace(tzinfo=pytz.UTC),
                         "val": Provider._cast_timeserie_to_hs(str(list(hs_values.values())[0]), hs_type)
                     })
@@ -298,8 +299,9 @@ class Provider(DBProvider):
                         [Provider._cast_timeserie_to_hs(hs_values[hs_col], his_uri['hs_value_column'][hs_col])
                          for hs_col in hs_values.keys()]
                     ))
-                    history.append({"ts": datetime.fromisoformat(date_val).replace(tzinfo=pytz.UTC),
-                                    "val": val})  # ,unit
+                    rows.append({"ts": datetime.fromisoformat(date_val).replace(tzinfo=pytz.UTC),
+                                 "val": val})  # ,unit
+            history.bulk_extend(rows)
         return history
 
     def run_query(self, his_uri: dict, dates_range: tuple, date_version):
@@ -8,6 +8,7 @@
 """
 Tools to convert haystack filter to mongo request
 """
+import re
 from datetime import datetime, date, time
 from typing import Optional, Dict, Any, List, Union, cast
 
@@ -15,6 +16,9 @@ from shaystack import parse_filter, HaystackType, Quantity, Ref
 from shaystack.filter_ast import FilterNode, FilterUnary, FilterPath, FilterBinary
 from ..jsondumper import dump_scalar as json_dump_scalar
 
+# The syntax of a tag name, to sort the entities
+_TAG_RE = re.compile(r'[a-z_][a-zA-Z0-9_]*')
+
 _simple_ops = {
     "==": "$eq",
     "!=": "$ne",
@@ -265,10 +269,56 @@ def _to_ref(path, var):
     return to_ref
 
 
+def _sort_stages(sort: List[str], reverse: bool = False, limit: int = 0) -> List[Dict[str, Any]]:
+    """Return the stages to sort the entities.
+
+    The numbers are sorted by magnitude. The other values, by their json encoding.
+    The entities without a tag are the last.
+
+    Args:
+        sort: The tags to use to sort the entities
+        reverse: `True` for a descending order
+        limit: The maximum number of entities, or zero
+    Returns:
+        The stages
+    """
+    direction = -1 if reverse else 1
+    values: Dict[str, Any] = {}
+    keys: Dict[str, Any] = {}
+    order: Dict[str, int] = {}
+    for position, tag in enumerate(sort):
+        if not _TAG_RE.fullmatch(tag):
+            raise ValueError(f"Invalid tag '{tag}'")
+        value = f"_sort_{position}"
+        values[value] = {"$convert": {"input": f"${tag}", "to": "string", "onError": None, "onNull": None}}
+        keys[f"_missing_{position}"] = {"$eq": [f"${value}", None]}
+        keys[f"_number_{position}"] = {
+            "$cond": [
+                {"$eq": [{"$substrCP": [{"$ifNull": [f"${value}", ""]}, 0, 2]}, "n:"]},
+                {"$convert": {
+                    "input": {"$arrayElemAt": [{"$split": [{"$substrCP": [f"${value}", 2, 64]}, " "]}, 0]},
+                    "to": "double",
+                    "onError": None}},
+                None]
+        }
+        order.update({f"_missing_{position}": 1, f"_number_{position}": direction, value: direction})
+    stages: List[Dict[str, Any]] = [
+        {"$addFields": values},
+        {"$addFields": keys},
+        {"$sort": order},
+    ]
+    if limit:
+        stages.append({"$limit": limit})
+    stages.append({"$unset": list(values) + list(keys)})
+    return stages
+
+
 def _mongo_filter(grid_filter: Optional[str],
                   version: datetime,
                   limit: int = 0,
-                  customer_id: str = '') -> List[Dict[str, Any]]:
+                  customer_id: str = '',
+                  sort: Optional[List[str]] = None,
+                  reverse: bool = False) -> List[Dict[str, Any]]:
     assert version is not None
     if not grid_filter:
         return [
@@ -281,7 +331,7 @@ def _mongo_filter(grid_filter: Optional[str],
                     }
             },
             {"$replaceRoot": {"newRoot": "$entity"}},
-        ]
+        ] + (_sort_stages(sort, reverse, limit) if sort else [])
     haystack_filter = parse_filter(grid_filter)
 
     # 1. Init stages
@@ -319,8 +369,10 @@ def _mongo_filter(grid_filter: Optional[str],
             {"$replaceRoot": {'newRoot': '$$ROOT'}},
         )
 
-    # 5. Add limit_original_entity
-    if limit:
+    # 5. Sort the entities, then limit
+    if sort:
+        stages.extend(_sort_stages(sort, reverse, limit))
+    elif limit:
         stages.append(
             {"$limit": limit}
         )
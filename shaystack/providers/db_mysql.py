@@ -11,6 +11,7 @@ Convert the haystack filter to sqlite SQL equivalent syntax.
 import itertools
 import json
 import logging
+import re
 import textwrap
 from dataclasses import dataclass
 from datetime import datetime, date, time
@@ -24,6 +25,9 @@ from ..filter_ast import FilterNode, FilterUnary, FilterBinary, FilterPath
 
 log = logging.getLogger("db.Provider")
 
+# The syntax of a tag name, to sort the entities
+_TAG_RE = re.compile(r'[a-z_][a-zA-Z0-9_]*')
+
 _map_operator = \
     {"==": "=",
      "!=": "!="
@@ -336,23 +340,62 @@ def _sql_filter(table_name: str,
     return sql_request
 
 
+def _sort_sql(sql_request: str,
+              sort: List[str],
+              reverse: bool = False,
+              limit: int = 0) -> str:
+    """Sort the entities selected by a request, in the database.
+
+    The numbers are sorted by magnitude. The other values, by their json encoding.
+    The entities without a tag are the last.
+
+    Args:
+        sql_request: The request selecting the entities
+        sort: The tags to use to sort the entities
+        reverse: `True` for a descending order
+        limit: The maximum number of entities, or zero
+    Returns:
+        The new request
+    """
+    direction = " DESC" if reverse else ""
+    order = []
+    for tag in sort:
+        if not _TAG_RE.fullmatch(tag):
+            raise ValueError(f"Invalid tag '{tag}'")
+        value = f"entity->>'$.{tag}'"
+        number = (f"CASE WHEN LEFT({value},2) = 'n:' "
+                  f"THEN CAST(SUBSTRING_INDEX(SUBSTR({value},3),' ',1) AS REAL) END")
+        order.extend((f"{value} IS NULL", number + direction, value + direction))
+    sql_request = f"SELECT entity FROM (\n{sql_request}) AS sorted\nORDER BY {', '.join(order)}\n"
+    if limit > 0:
+        sql_request += f"LIMIT {limit}\n"
+    return sql_request
+
+
 def _exec_sql_filter(params: Dict[str, Any],
                      cursor,
                      table_name: str,
                      grid_filter: Optional[str],
                      version: datetime,
                      limit: int = 0,
-                     customer_id: Optional[str] = None) -> DBCursor:
+                     customer_id: Optional[str] = None,
+                     sort: Optional[List[str]] = None,
+                     reverse: bool = False) -> DBCursor:
     if grid_filter is None or grid_filter == '':
-        cursor.execute(params["SELECT_ENTITY"], (version, customer_id))
+        sql_request = params["SELECT_ENTITY"]
+        if sort:
+            sql_request = _sort_sql(sql_request, sort, reverse, limit)
+        cursor.execute(sql_request, (version, customer_id))
         return cursor
 
     sql_request = _sql_filter(
         table_name,
         grid_filter,
         version,
-        limit,
+        0 if sort else limit,
         customer_id)  # type: ignore
+    if sort:
+        sql_request = _sort_sql(sql_request, sort, reverse, limit)
     cursor.execute(sql_request)
     return cursor
 
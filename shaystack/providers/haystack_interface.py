@@ -20,7 +20,6 @@ from tzlocal import get_localzone
 
 from ..datatypes import Ref, Quantity, Uri
 from ..grid import Grid, VER_3_0
-from ..grid_filter import parse_hs_datetime_format
 
 log = logging.getLogger("shaystack")
 
@@ -201,7 +200,7 @@ class HaystackInterface(ABC):
             all_haystack_ops.pop("point_write", None)
         all_haystack_ops = {_to_camel(k): v for k, v in all_haystack_ops.items()}
 
-        grid.extend(
+        grid.bulk_extend(
             [
                 {"name": name, "summary": summary}
                 for name, summary in all_haystack_ops.items()
@@ -243,6 +242,41 @@ class HaystackInterface(ABC):
         """
         raise NotImplementedError()
 
+    def read_sorted(
+            self,
+            limit: int,
+            select: Optional[str],
+            entity_ids: Optional[List[Ref]],
+            grid_filter: Optional[str],
+            date_version: Optional[datetime],
+            sort: List[str],
+            reverse: bool = False,
+    ) -> Grid:
+        """
+        Implement the Haystack 'read' ops, with the entities sorted by some tags.
+
+        By default, read all the selected entities, then keep the first `limit` entities
+        (see `Grid.top_k()`). Implement this method to sort the entities in the database.
+
+        Args:
+            limit: The number of record to return or zero
+            select: The selected tag separated with comma, else '' or '*'
+            entity_ids: A list en ids. If set, grid_filter and limit are ignored.
+            grid_filter: A filter to apply. Ignored if entity_ids is set.
+            date_version: The date of the ontology version.
+            sort: The tags to use to sort the entities
+            reverse: `True` for a descending order
+
+        Returns:
+            The requested Grid
+        """
+        grid = self.read(0, None, entity_ids, grid_filter, date_version)
+        if limit and entity_ids is None:
+            grid = grid.top_k(sort, limit, reverse)
+        else:
+            grid = cast(Grid, grid[:]).sort(sort, reverse)  # The grid of the provider is not updated
+        return grid.select(select)
+
     @abstractmethod
     def nav(self, nav_id: str) -> Any:  # pylint: disable=no-self-use
         """ Implement the Haystack 'nav' ops.
@@ -554,6 +588,7 @@ def parse_date_range(date_range: str, timezone: tzinfo) -> Tuple[datetime, datet
     Returns:
         A tuple with the begin (inclusive) and end datetime (exclusive).
     """
+    from ..grid_filter import parse_hs_datetime_format  # pylint: disable=import-outside-toplevel
     if not date_range:
         return datetime.min.replace(tzinfo=pytz.UTC), \
                datetime.max.replace(tzinfo=pytz.UTC)
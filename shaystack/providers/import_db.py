@@ -34,7 +34,8 @@ def import_in_db(source_uri: str,  # pylint: disable=too-many-arguments
                  import_time_series: bool,
                  reset: bool,
                  version: Optional[datetime],
-                 envs: Dict[str, str]  # pylint: disable=protected-access
+                 envs: Dict[str, str],  # pylint: disable=protected-access
+                 workers: int = 1
                  ) -> None:
     """
     Import source URI to database.
@@ -47,8 +48,11 @@ def import_in_db(source_uri: str,  # pylint: disable=too-many-arguments
             reset: Remove all the current data before import the grid.
             version: The associated version time.
             envs: Environment (like os.environ)
+            workers: The number of processes to parse the source, and compare it with the database
     """
     envs["HAYSTACK_DB"] = destination_uri
+    if workers > 1:
+        envs["HAYSTACK_PARSE_WORKERS"] = str(workers)
     provider_name = "shaystack.providers.db"
     if ts_uri:
         envs["HAYSTACK_TS"] = ts_uri
@@ -91,11 +95,17 @@ def import_in_db(source_uri: str,  # pylint: disable=too-many-arguments
 @click.option("--reset",
               help='Clean the database before import',
               is_flag=True)
-def main(source_uri: str,
+@click.option("--workers",
+              help='Number of processes to parse the source file, and compare it with the database',
+              type=int,
+              default=1
+              )
+def main(source_uri: str,  # pylint: disable=too-many-arguments
          target_uris: List[str],
          customer: Optional[str],
          reset: bool,
-         time_series: bool) -> int:
+         time_series: bool,
+         workers: int) -> int:
     """
     Import haystack file for file or URL, to database, to be used with sql provider.
     Only the difference was imported, with a new version of ontology.
@@ -116,7 +126,8 @@ def main(source_uri: str,
                      import_time_series=time_series,
                      reset=reset,
                      version=None,
-                     envs=cast(Dict[str, str], os.environ))
+                     envs=cast(Dict[str, str], os.environ),
+                     workers=workers)
         if ts_uri:
             print(f"{source_uri} imported in {database_uri} and {ts_uri}")
         else:
@@ -17,7 +17,7 @@ Each entity was save in one Mongo document. A column save the JSON version of en
 import logging
 from datetime import datetime, timedelta
 from os.path import dirname
-from typing import Optional, List, Any, Tuple, Dict, cast
+from typing import Optional, List, Any, Tuple, Dict, Iterable, cast
 from urllib.parse import urlparse, urlunparse
 
 import pytz
@@ -29,10 +29,11 @@ from pymongo.database import Database
 from .db_haystack_interface import DBHaystackInterface
 from .db_mongo import _mongo_filter as mongo_filter
 from .tools import _BOTO3_AVAILABLE, get_secret_manager_secret
-from .url import read_grid_from_uri
+from .url import read_grid_from_uri, iter_grid_from_uri, time_series_batches
 from .. import Entity, LATEST_VER, re
 from ..datatypes import Ref
 from ..grid import Grid
+from ..grid_diff import grid_diff
 from ..jsondumper import dump_scalar as json_dump_scalar, _dump_meta, _dump_columns
 from ..jsonparser import parse_scalar as json_parse_scalar, _parse_metadata, _parse_cols
 
@@ -152,14 +153,7 @@ class Provider(DBHaystackInterface):
             date_version = datetime.now().replace(tzinfo=pytz.UTC)
 
         if entity_ids is None:
-            cursor = self.get_collection().aggregate(
-                mongo_filter(grid_filter, date_version, limit, self.get_customer_id())  # type: ignore
-            )
-
-            grid = self._init_grid_from_db(date_version)
-            for row in cursor:
-                grid.append(_conv_row_to_entity(row))
-            return grid.select(select)
+            return self._read_filter(limit, select, grid_filter, date_version)
 
         customer_id = self.get_customer_id()
         cursor = self.get_collection().aggregate(
@@ -194,8 +188,40 @@ class Provider(DBHaystackInterface):
         )
 
         grid = self._init_grid_from_db(date_version)
-        for row in cursor:
-            grid.append(_conv_row_to_entity(row))
+        grid.bulk_extend(_conv_row_to_entity(row) for row in cursor)
+        return grid.select(select)
+
+    @overrides
+    def read_sorted(
+            self,
+            limit: int,
+            select: Optional[str],
+            entity_ids: Optional[List[Ref]],
+            grid_filter: Optional[str],
+            date_version: Optional[datetime],
+            sort: List[str],
+            reverse: bool = False,
+    ) -> Grid:
+        """ Implement Haystack 'read', with the sort and the limit in the database """
+        if entity_ids is not None:
+            return super().read_sorted(limit, select, entity_ids, grid_filter, date_version, sort, reverse)
+        return self._read_filter(limit, select, grid_filter, date_version, sort, reverse)
+
+    def _read_filter(self,
+                     limit: int,
+                     select: Optional[str],
+                     grid_filter: Optional[str],
+                     date_version: Optional[datetime],
+                     sort: Optional[List[str]] = None,
+                     reverse: bool = False) -> Grid:
+        if date_version is None:
+            date_version = datetime.now().replace(tzinfo=pytz.UTC)
+        cursor = self.get_collection().aggregate(
+            mongo_filter(grid_filter, date_version, limit, self.get_customer_id(),  # type: ignore
+                         sort, reverse)
+        )
+        grid = self._init_grid_from_db(date_version)
+        grid.bulk_extend(_conv_row_to_entity(row) for row in cursor)
         return grid.select(select)
 
     @overrides
@@ -232,13 +258,10 @@ class Provider(DBHaystackInterface):
                         "$lt": dates_range[1]  # type: ignore
                     }
             }).sort("ts")
-        for row in cursor:
-            history.append(
-                {
-                    "ts": row['ts'].replace(tzinfo=pytz.UTC),
-                    "val": json_parse_scalar(row['val'])
-                }
-            )
+        history.bulk_extend({
+            "ts": row['ts'].replace(tzinfo=pytz.UTC),
+            "val": json_parse_scalar(row['val'])
+        } for row in cursor)
 
         if history:
             min_date = datetime.max.replace(tzinfo=pytz.UTC)
@@ -326,15 +349,14 @@ class Provider(DBHaystackInterface):
         if version is None:
             version = datetime.now().replace(tzinfo=pytz.UTC)
         grid = self._init_grid_from_db(version)
-        for row in self.get_collection().find(
-                {
-                    'customer_id': customer_id,
-                    'start_datetime': {'$lte': version},
-                    'end_datetime': {'$gt': version},
-                },
-                {"entity": True}):
-            grid.append(_conv_row_to_entity(row["entity"]))
-        return grid
+        cursor = self.get_collection().find(
+            {
+                'customer_id': customer_id,
+                'start_datetime': {'$lte': version},
+                'end_datetime': {'$gt': version},
+            },
+            {"entity": True})
+        return grid.bulk_extend(_conv_row_to_entity(row["entity"]) for row in cursor)
 
     def _read_partial_grid(self,
                            ids: List[Ref],
@@ -349,18 +371,17 @@ class Provider(DBHaystackInterface):
             A grid with all data for a customer
         """
         grid = self._init_grid_from_db(version)
-        for row in self.get_collection().find(
-                {
-                    'customer_id': customer_id,
-                    'start_datetime': {'$lte': version},
-                    'end_datetime': {'$gt': version},
-                    'entity.id': {
-                        "$in": [json_dump_scalar(id_entity)[1:-1] for id_entity in ids]
-                    }
-                },
-                {"entity": True}):
-            grid.append(_conv_row_to_entity(row["entity"]))
-        return grid
+        cursor = self.get_collection().find(
+            {
+                'customer_id': customer_id,
+                'start_datetime': {'$lte': version},
+                'end_datetime': {'$gt': version},
+                'entity.id': {
+                    "$in": [json_dump_scalar(id_entity)[1:-1] for id_entity in ids]
+                }
+            },
+            {"entity": True})
+        return grid.bulk_extend(_conv_row_to_entity(row["entity"]) for row in cursor)
 
     # noinspection PyPep8
     def _init_grid_from_db(self, version: Optional[datetime]) -> Grid:
@@ -486,7 +507,8 @@ class Provider(DBHaystackInterface):
 
         original_grid = self.read_grid(customer_id, version)
         target_grid = read_grid_from_uri(source_uri, envs=self._envs)
-        self.update_grid(target_grid - original_grid, version, customer_id)
+        workers = int(self._envs.get("HAYSTACK_PARSE_WORKERS", "1"))
+        self.update_grid(grid_diff(original_grid, target_grid, workers), version, customer_id)
 
     # PPR: add transaction ?
     @overrides
@@ -501,8 +523,8 @@ class Provider(DBHaystackInterface):
             if "hisURI" in row:
                 assert "id" in row, "TS must have an id"
                 uri = dir_name + '/' + row['hisURI']
-                ts_grid = read_grid_from_uri(uri, envs=self._envs)
-                self._import_ts_in_db(ts_grid, row["id"], customer_id)
+                ts_grid, ts_rows = iter_grid_from_uri(uri, envs=self._envs)
+                self._import_ts_in_db(ts_grid, row["id"], customer_id, rows=ts_rows)
                 log.debug("%s imported", uri)
             elif "history" in row:
                 ts_grid = row["history"]
@@ -510,55 +532,48 @@ class Provider(DBHaystackInterface):
                 log.debug("%s imported", uri)
 
     # noinspection PyUnusedLocal
-    def _import_ts_in_db(self,
+    def _import_ts_in_db(self,  # pylint: disable=too-many-arguments
                          time_series: Grid,
                          entity_id: Ref,
                          customer_id: Optional[str],
-                         now: Optional[datetime] = None
+                         now: Optional[datetime] = None,
+                         rows: Optional[Iterable[Entity]] = None
                          ) -> None:
         assert 'ts' in time_series.column, "TS must have a column 'ts'"
         if not customer_id:
             customer_id = ""
         ts_collection = self._get_ts_collection()
-        begin_datetime = time_series.metadata.get("hisStart")
-        end_datetime = time_series.metadata.get("hisStart")
-        if time_series and not begin_datetime:
-            begin_datetime = time_series[0]['ts']  # type: ignore
-        if time_series and not end_datetime:
-            end_datetime = time_series[-1]['ts']  # type: ignore
-        if not begin_datetime:
-            begin_datetime = datetime.min
-        if not end_datetime:
-            end_datetime = datetime.max
 
         #                 id TEXT NOT NULL,
         #                 customer_id TEXT NOT NULL,
         #                 date_time TIMESTAMP WITH TIME ZONE NOT NULL,
         #                 val JSONB NOT NULL
-        # Clean only the period
-        ts_collection.delete_many(
-            {
-                "customer_id": customer_id,
-                "id": entity_id.name,
-                "ts":
-                    {
-                        "$gte": begin_datetime,
-                        "$lt": end_datetime
-                    }
-            })
-
-        # Add add new values
-        ts_collection.insert_many(
-            [
+        for (begin_datetime, end_datetime), batch in time_series_batches(time_series, rows):
+            # Clean only the period
+            ts_collection.delete_many(
                 {
                     "customer_id": customer_id,
                     "id": entity_id.name,
-                    "ts": row['ts'],
-                    "val": json_dump_scalar(row['val'])
-                }
-                for row in time_series
-            ]
-        )
+                    "ts":
+                        {
+                            "$gte": begin_datetime,
+                            "$lt": end_datetime
+                        }
+                })
+
+            # Add add new values
+            if batch:
+                ts_collection.insert_many(
+                    [
+                        {
+                            "customer_id": customer_id,
+                            "id": entity_id.name,
+                            "ts": row['ts'],
+                            "val": json_dump_scalar(row['val'])
+                        }
+                        for row in batch
+                    ]
+                )
 
     def get_db(self) -> Database:
         if not self._connect:  # Lazy connection
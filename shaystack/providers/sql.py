@@ -24,7 +24,7 @@ from datetime import datetime, timedelta
 from os.path import dirname
 from threading import local
 from types import ModuleType
-from typing import Optional, Tuple, Dict, Any, List, Callable, Set, cast
+from typing import Optional, Tuple, Dict, Any, List, Callable, Set, Iterable, cast
 from urllib.parse import urlparse, ParseResult
 
 import pytz
@@ -33,9 +33,10 @@ from overrides import overrides
 from .db_haystack_interface import DBHaystackInterface
 from .sqldb_protocol import DBConnection
 from .tools import get_secret_manager_secret, _BOTO3_AVAILABLE
-from .url import read_grid_from_uri
+from .url import read_grid_from_uri, iter_grid_from_uri, time_series_batches
 from ..datatypes import Ref
 from ..grid import Grid
+from ..grid_diff import grid_diff
 from ..jsondumper import dump_scalar, _dump_meta, _dump_columns, _dump_row
 from ..jsonparser import parse_scalar, _parse_row, _parse_metadata, _parse_cols
 from ..type import Entity
@@ -208,6 +209,8 @@ class Provider(DBHaystackInterface):
             repr(grid_filter),
             repr(date_version),
         )
+        if entity_ids is None:
+            return self._read_filter(limit, select, grid_filter, date_version)
         conn = self.get_connect()
         # with conn.cursor() as cursor:
         cursor = conn.cursor()
@@ -215,21 +218,6 @@ class Provider(DBHaystackInterface):
             sql_type_to_json = self._sql_type_to_json
             if date_version is None:
                 date_version = datetime.now().replace(tzinfo=pytz.UTC)
-            exec_sql_filter: Callable = self._sql["exec_sql_filter"]
-            if entity_ids is None:
-                cursor = exec_sql_filter(self._sql,
-                                         cursor,
-                                         self._parsed_db.fragment,
-                                         grid_filter,
-                                         date_version,
-                                         limit,
-                                         self.get_customer_id(),
-                                         )
-                grid = self._init_grid_from_db(date_version)
-                for row in cursor:
-                    grid.append(_parse_row(sql_type_to_json(row[0]), LATEST_VER))
-                conn.commit()
-                return grid.select(select)
             customer_id = self.get_customer_id()
             sql_ids = "('" + "','".join([entity_id.name
                                          for entity_id in entity_ids]) + "')"
@@ -237,8 +225,54 @@ class Provider(DBHaystackInterface):
                            (date_version, customer_id))
 
             grid = self._init_grid_from_db(date_version)
-            for row in cursor:
-                grid.append(_parse_row(sql_type_to_json(row[0]), LATEST_VER))
+            grid.bulk_extend(_parse_row(sql_type_to_json(row[0]), LATEST_VER) for row in cursor)
+            conn.commit()
+            return grid.select(select)
+        finally:
+            cursor.close()
+
+    @overrides
+    def read_sorted(
+            self,
+            limit: int,
+            select: Optional[str],
+            entity_ids: Optional[List[Ref]],
+            grid_filter: Optional[str],
+            date_version: Optional[datetime],
+            sort: List[str],
+            reverse: bool = False,
+    ) -> Grid:
+        """ Implement Haystack 'read', with the sort and the limit in the database """
+        if entity_ids is not None:
+            return super().read_sorted(limit, select, entity_ids, grid_filter, date_version, sort, reverse)
+        return self._read_filter(limit, select, grid_filter, date_version, sort, reverse)
+
+    def _read_filter(self,
+                     limit: int,
+                     select: Optional[str],
+                     grid_filter: Optional[str],
+                     date_version: Optional[datetime],
+                     sort: Optional[List[str]] = None,
+                     reverse: bool = False) -> Grid:
+        conn = self.get_connect()
+        # with conn.cursor() as cursor:
+        cursor = conn.cursor()
+        try:
+            if date_version is None:
+                date_version = datetime.now().replace(tzinfo=pytz.UTC)
+            exec_sql_filter: Callable = self._sql["exec_sql_filter"]
+            cursor = exec_sql_filter(self._sql,
+                                     cursor,
+                                     self._parsed_db.fragment,
+                                     grid_filter,
+                                     date_version,
+                                     limit,
+                                     self.get_customer_id(),
+                                     sort,
+                                     reverse,
+                                     )
+            grid = self._init_grid_from_db(date_version)
+            grid.bulk_extend(_parse_row(self._sql_type_to_json(row[0]), LATEST_VER) for row in cursor)
             conn.commit()
             return grid.select(select)
         finally:
@@ -274,13 +308,10 @@ class Provider(DBHaystackInterface):
                                                     dates_range[0],  # type: ignore
                                                     dates_range[1] +  # type: ignore
                                                     timedelta(microseconds=-1)))
-            for row in cursor:
-                history.append(
-                    {
-                        "ts": field_to_datetime_tz(row[0]),
-                        "val": parse_scalar(row[1])
-                    }
-                )
+            history.bulk_extend({
+                "ts": field_to_datetime_tz(row[0]),
+                "val": parse_scalar(row[1])
+            } for row in cursor)
             if history:
                 min_date = datetime.max.replace(tzinfo=pytz.UTC)
                 max_date = datetime.min.replace(tzinfo=pytz.UTC)
@@ -438,8 +469,7 @@ class Provider(DBHaystackInterface):
             cursor.execute(self._sql["SELECT_ENTITY"],
                            (version, customer_id))
 
-            for row in cursor:
-                grid.append(_parse_row(sql_type_to_json(row[0]), LATEST_VER))
+            grid.bulk_extend(_parse_row(sql_type_to_json(row[0]), LATEST_VER) for row in cursor)
             conn.commit()
             assert _validate_grid(grid), "Error in grid"
             return grid
@@ -562,7 +592,8 @@ class Provider(DBHaystackInterface):
             self.create_db()
             original_grid = self.read_grid(customer_id, version)
             target_grid = read_grid_from_uri(source_uri, envs=self._envs)
-            self.update_grid(target_grid - original_grid, version, customer_id)
+            workers = int(self._envs.get("HAYSTACK_PARSE_WORKERS", "1"))
+            self.update_grid(grid_diff(original_grid, target_grid, workers), version, customer_id)
             log.debug("%s imported", source_uri)
 
         except ModuleNotFoundError as ex:
@@ -582,8 +613,8 @@ class Provider(DBHaystackInterface):
             if "hisURI" in row:
                 assert "id" in row, "TS must have an id"
                 uri = dir_name + '/' + row['hisURI']
-                ts_grid = read_grid_from_uri(uri, envs=self._envs)
-                self._import_ts_in_db(ts_grid, row["id"], customer_id)
+                ts_grid, ts_rows = iter_grid_from_uri(uri, envs=self._envs)
+                self._import_ts_in_db(ts_grid, row["id"], customer_id, rows=ts_rows)
                 log.debug("%s imported", uri)
             elif "history" in row:
                 ts_grid = row["history"]
@@ -591,54 +622,52 @@ class Provider(DBHaystackInterface):
                 log.debug("%s imported", uri)
 
     # noinspection PyUnusedLocal
-    def _import_ts_in_db(self,
+    def _import_ts_in_db(self,  # pylint: disable=too-many-arguments
                          time_series: Grid,
                          entity_id: Ref,
                          customer_id: Optional[str],
-                         now: Optional[datetime] = None
+                         now: Optional[datetime] = None,
+                         rows: Optional[Iterable[Entity]] = None
                          ) -> None:
         """
-        Import the Time series inside the database.
+        Import the Time series inside the database, by batches of values.
 
         Args:
-            time_series: The time-serie grid.
+            time_series: The time-serie grid, or only its header if the values are in `rows`.
             entity_id: The corresponding entity.
             customer_id: The current customer id.
             now: The pseudo 'now' datetime.
+            rows: The values of the time series, read only once (see `iter_grid_from_uri()`).
         """
         assert 'ts' in time_series.column, "TS must have a column 'ts'"
         if not customer_id:
             customer_id = ""
         conn = self.get_connect()
-        begin_datetime = time_series.metadata.get("hisStart")
-        end_datetime = time_series.metadata.get("hisStart")
-        if time_series and not begin_datetime:
-            begin_datetime = time_series[0]['ts']  # type: ignore
-        if time_series and not end_datetime:
-            end_datetime = time_series[-1]['ts']  # type: ignore
-        if not begin_datetime:
-            begin_datetime = datetime.min
-        if not end_datetime:
-            end_datetime = datetime.max
         # with conn.cursor() as cursor:
         cursor = conn.cursor()
         datetime_tz_to_field = self._sql["datetime_tz_to_field"]
-        # Clean only the period
-        cursor.execute(self._sql["CLEAN_TS"],
-                       (
-                           customer_id,
-                           entity_id.name,
-                           datetime_tz_to_field(begin_datetime),
-                           datetime_tz_to_field(end_datetime)
-                       )
-                       )
-
-        # Add add new values
-        cursor.executemany(self._sql["INSERT_TS"],
-                           [(entity_id.name,
-                             customer_id,
-                             datetime_tz_to_field(row['ts']),
-                             dump_scalar(row['val'])) for row in time_series]
-                           )
-        cursor.close()
+        try:
+            for (begin_datetime, end_datetime), batch in time_series_batches(time_series, rows):
+                # Clean only the period
+                cursor.execute(self._sql["CLEAN_TS"],
+                               (
+                                   customer_id,
+                                   entity_id.name,
+                                   datetime_tz_to_field(begin_datetime),
+                                   datetime_tz_to_field(end_datetime)
+                               )
+                               )
+
+                # Add add new values
+                cursor.executemany(self._sql["INSERT_TS"],
+                                   [(entity_id.name,
+                                     customer_id,
+                                     datetime_tz_to_field(row['ts']),
+                                     dump_scalar(row['val'])) for row in batch]
+                                   )
+        except ValueError:
+            conn.rollback()  # The time series is not sorted: keep the previous values
+            raise
+        finally:
+            cursor.close()
         conn.commit()
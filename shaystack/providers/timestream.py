@@ -26,7 +26,7 @@ from overrides import overrides
 from .db import Provider as DBProvider
 from .db import log
 from .url import read_grid_from_uri
-from ..datatypes import Ref, MARKER, REMOVE, Coordinate, Quantity, NA, XStr
+from ..datatypes import Ref, MARKER, REMOVE, Coordinate, Quantity, NA, XStr, intern_ref
 from ..grid import Grid
 
 _MAX_ROWS_BY_WRITE = 100
@@ -260,7 +260,7 @@ class Provider(DBProvider):
         if python_type == "_NAType":
             return NA if val else None
         if python_type == "Ref":
-            return Ref(val)
+            return intern_ref(val)
         if python_type == "datetime":
             return datetime.fromtimestamp(int(val))
         if python_type == "date":
@@ -337,6 +337,7 @@ class Provider(DBProvider):
                 select_all += f"AND time BETWEEN from_iso8601_timestamp('{dates_range[0].isoformat()}') " \
                               f"AND from_iso8601_timestamp('{dates_range[1].isoformat()}')"
             page_iterator = paginator.paginate(QueryString=select_all)
+            rows = []
             for page in page_iterator:
 
                 for row in page['Rows']:
@@ -350,8 +351,9 @@ class Provider(DBProvider):
                     str_val = datas[3]['ScalarValue']
                     if not hs_type:
                         hs_type = "float"
-                    history.append({"ts": scalar_value,
-                                    "val": Provider._cast_timeserie_to_hs(str_val, hs_type, unit)})
+                    rows.append({"ts": scalar_value,
+                                 "val": Provider._cast_timeserie_to_hs(str_val, hs_type, unit)})
+            history.bulk_extend(rows)
 
             if history:
                 min_date = datetime.max.replace(tzinfo=pytz.UTC)
@@ -17,6 +17,11 @@ The file must be referenced with the environment variable HAYSTACK_DB and may be
 
 If the suffix is .gz, the body is unzipped.
 
+Set HAYSTACK_PARSE_WORKERS to parse a huge Zinc, CSV or Trio file with a pool of processes.
+
+Set HAYSTACK_SNAPSHOT_DIR to save each parsed version of the file in a binary snapshot, in this
+directory. After a restart, the grid is loaded from the snapshot, without download and parsing.
+
 If the AWS bucket use the versioning, the correct version are return, to correspond to
 the version of the file at the `version_date`.
 
@@ -41,7 +46,7 @@ from multiprocessing.pool import ThreadPool
 from os.path import dirname
 from pathlib import Path
 from threading import Lock
-from typing import Optional, Tuple, Any, List, cast, Dict
+from typing import Optional, Tuple, Any, List, cast, Dict, Iterable, Iterator, Union
 from urllib.error import URLError
 from urllib.parse import urlparse, ParseResult
 
@@ -50,10 +55,10 @@ from overrides import overrides
 
 from .db_haystack_interface import DBHaystackInterface
 from .. import dump, EmptyGrid
-from ..datatypes import Ref
+from ..datatypes import Ref, MODE_ZINC
 from ..exception import HaystackException
 from ..grid import Grid
-from ..parser import parse
+from ..parser import parse, iter_zinc_rows
 from ..parser import suffix_to_mode
 from ..sortabledict import SortableDict
 from ..type import Entity
@@ -78,6 +83,7 @@ log = logging.getLogger("url.Provider")
 _VERIFY = True  # See https://tinyurl.com/y5tap6ys
 _LRU_SIZE = 15
 _POOL_SIZE = 20
+TS_BATCH_SIZE = 10_000  # The number of values of a time series inserted at once in a database
 
 lock = Lock()
 
@@ -161,7 +167,7 @@ def _get_hash_of_s3_file(s3_client, parsed: ParseResult) -> str:
         raise
 
 
-def merge_timeseries(source_grid: Grid,
+def merge_timeseries(source_grid: Union[Grid, Iterable[Entity]],
                      destination_grid: Grid,
                      ) -> Grid:
     """ Merge different time series.
@@ -171,49 +177,127 @@ def merge_timeseries(source_grid: Grid,
         It is not to forget values.
         destination_grid += source_grid
         Args:
-            source_grid: Source TS grid
+            source_grid: Source TS grid, or the entities of the source TS (see `iter_grid_from_uri()`).
+                The entities are read once, and only the older values are kept.
             destination_grid: Target TS grid with
     """
-    assert 'ts' in source_grid.column, "The source grid must have ts,value columns"
+    assert not isinstance(source_grid, Grid) or 'ts' in source_grid.column, \
+        "The source grid must have ts,value columns"
     assert 'ts' in destination_grid.column
     if id(destination_grid) != id(source_grid):
         destination_grid.sort('ts')
-        source_grid.sort('ts')
         result_grid = destination_grid.copy()
         if destination_grid:
             start_destination = destination_grid[0]['ts']  # type: ignore
-            result_grid.extend(filter(lambda row: row['ts'] < start_destination, source_grid))  # type: ignore
+            result_grid.bulk_extend(row for row in source_grid
+                                    if row['ts'] < start_destination)  # type: ignore
         else:
-            result_grid.extend(source_grid)
+            result_grid.bulk_extend(source_grid)
         result_grid.sort('ts')
         return result_grid
 
     return destination_grid
 
 
-def read_grid_from_uri(uri: str, envs: Dict[str, str]) -> Grid:
+def iter_grid_from_uri(uri: str, envs: Dict[str, str]) -> Tuple[Grid, Iterator[Entity]]:
     """
-    Read a grid from uri.
+    Read a grid from uri, entity by entity.
+
+    A Zinc file is parsed while the entities are consumed, so only the downloaded data is in
+    memory, not all the entities. The other formats are parsed before returning.
     Args:
         uri: The URI to reference the datas (accept classical url or s3 url).
         envs: The environment variables
 
     Returns:
-        The grid.
+        An empty grid with the version, the metadata and the columns, and an iterator of entities
     """
     parsed_uri = urlparse(uri, allow_fragments=False)
     parsed_uri = parsed_uri._replace(path=_absolute_path(parsed_uri.path))
 
     data = _download_uri(parsed_uri, envs)
-    if parsed_uri.path.endswith(".gz"):
-        data = gzip.decompress(data)
     suffix = Path(parsed_uri.path).suffix
     if suffix == ".gz":
         suffix = Path(parsed_uri.path).suffixes[-2]
 
     input_mode = suffix_to_mode(suffix)
-    grid = parse(data.decode("utf-8-sig"), input_mode)  # type: ignore
-    return grid
+    workers = int(envs.get("HAYSTACK_PARSE_WORKERS", "1"))
+    if input_mode == MODE_ZINC and workers <= 1:
+        # Stream the rows, to avoid a copy of the unzipped and decoded data
+        stream = BytesIO(data)
+        if parsed_uri.path.endswith(".gz"):
+            stream = gzip.GzipFile(fileobj=stream)  # type: ignore
+        return iter_zinc_rows(stream)
+    if parsed_uri.path.endswith(".gz"):
+        data = gzip.decompress(data)
+    grid = parse(data.decode("utf-8-sig"), input_mode, workers=workers)  # type: ignore
+    rows = iter(grid)
+    grid = Grid(version=grid.version, metadata=grid.metadata, columns=grid.column)
+    return grid, rows
+
+
+def read_grid_from_uri(uri: str, envs: Dict[str, str]) -> Grid:
+    """
+    Read a grid from uri.
+    Args:
+        uri: The URI to reference the datas (accept classical url or s3 url).
+        envs: The environment variables
+
+    Returns:
+        The grid.
+    """
+    grid, rows = iter_grid_from_uri(uri, envs)
+    return grid.bulk_extend(rows)
+
+
+def time_series_batches(time_series: Grid,
+                        rows: Optional[Iterable[Entity]] = None,
+                        batch_size: int = TS_BATCH_SIZE
+                        ) -> Iterator[Tuple[Tuple[datetime, datetime], List[Entity]]]:
+    """
+    Split a time series, sorted by `ts`, in batches to import in a database.
+
+    Each batch comes with the period to clean in the database before inserting its entities.
+    All the periods cover the period of the time series: from the `hisStart` of the metadata
+    (or the first `ts`) to the `hisEnd` of the metadata (or the last `ts`). The entities with
+    the last `ts` of a batch are moved to the next batch, so a period never removes the entities
+    of the previous batches. Only one batch of entities is kept in memory, and sorted.
+    Args:
+        time_series: The time series grid, or only its header if the entities are in `rows`
+        rows: The entities of the time series (see `iter_grid_from_uri()`). Default is `time_series`.
+        batch_size: The number of entities of a batch
+
+    Returns:
+        The period to clean, and the entities to insert, for each batch
+    Raises:
+        ValueError if an entity is older than the period of a previous batch (the time series
+        is not sorted), before removing the entities of this batch.
+    """
+    begin = time_series.metadata.get("hisStart")
+    cleaned_until = None  # The end of the period of the previous batches
+    pending: List[Entity] = []
+    for row in (time_series if rows is None else rows):
+        if cleaned_until is not None and row['ts'] < cleaned_until:
+            raise ValueError("The time series must be sorted by 'ts' (%s after %s)"
+                             % (row['ts'], cleaned_until))
+        pending.append(row)
+        if len(pending) >= batch_size:
+            pending.sort(key=lambda entity: entity['ts'])
+            if begin is None:
+                begin = pending[0]['ts']
+            last_ts = pending[-1]['ts']
+            split = len(pending)
+            while split and pending[split - 1]['ts'] == last_ts:
+                split -= 1
+            if split:
+                yield (begin, last_ts), pending[:split]
+                begin = cleaned_until = last_ts
+                pending = pending[split:]
+    pending.sort(key=lambda entity: entity['ts'])
+    if begin is None and pending:
+        begin = pending[0]['ts']
+    end = time_series.metadata.get("hisEnd") or (pending[-1]['ts'] if pending else None)
+    yield (begin or datetime.min, end or datetime.max), pending
 
 
 def _update_grid_on_file(parsed_source: ParseResult,  # pylint: disable=too-many-locals,too-many-arguments
@@ -236,27 +320,31 @@ def _update_grid_on_file(parsed_source: ParseResult,  # pylint: disable=too-many
     if suffix == ".gz":
         use_gzip = True
     if update_time_series or compare_grid or merge_ts:
-        unzipped_source_data = source_data
-        if use_gzip:
-            unzipped_source_data = gzip.decompress(source_data)
-
-        source_grid = parse(unzipped_source_data.decode("utf-8-sig"),
-                            suffix_to_mode(suffix))  # type: ignore
-
-        try:
-            destination_data = _download_uri(parsed_destination, envs)
-            if parsed_source.path.endswith(".gz"):
-                destination_data = gzip.decompress(destination_data)
-            destination_grid = parse(destination_data.decode("utf-8-sig"),
-                                     suffix_to_mode(suffix))  # type: ignore
-        except URLError:
-            log.warning("URLError file not found under %s", (parsed_destination.geturl()))
-            destination_grid = EmptyGrid.copy()
-
-        except ZincParseException:
-            # Ignore. Override target
-            log.warning("Zinc parser exception with %s", (parsed_destination.geturl()))
-            destination_grid = EmptyGrid
+        # With `force`, the grids are parsed only to import the time series
+        if update_time_series or not force:
+            unzipped_source_data = source_data
+            if use_gzip:
+                unzipped_source_data = gzip.decompress(source_data)
+
+            source_grid = parse(unzipped_source_data.decode("utf-8-sig"),
+                                suffix_to_mode(suffix))  # type: ignore
+
+        destination_grid = EmptyGrid
+        if not force:
+            try:
+                destination_data = _download_uri(parsed_destination, envs)
+                if parsed_source.path.endswith(".gz"):
+                    destination_data = gzip.decompress(destination_data)
+                destination_grid = parse(destination_data.decode("utf-8-sig"),
+                                         suffix_to_mode(suffix))  # type: ignore
+            except URLError:
+                log.warning("URLError file not found under %s", (parsed_destination.geturl()))
+                destination_grid = EmptyGrid.copy()
+
+            except ZincParseException:
+                # Ignore. Override target
+                log.warning("Zinc parser exception with %s", (parsed_destination.geturl()))
+                destination_grid = EmptyGrid
 
         if force or not compare_grid or (destination_grid - source_grid):
             if use_gzip:
@@ -349,7 +437,8 @@ def _update_grid_on_s3(parsed_source: ParseResult,  # pylint: disable=too-many-l
         source_grid = None  # type: ignore
         if not force:
             source_etag = md5_digest.hexdigest()
-        if update_time_series or compare_grid or merge_ts:
+        # With `force`, the grids are parsed only to import the time series
+        if update_time_series or (not force and (compare_grid or merge_ts)):
             unzipped_source_data = source_data
             if suffix.endswith('.gz'):
                 use_gzip = True
@@ -590,7 +679,7 @@ class Provider(DBHaystackInterface):  # pylint: disable=too-many-instance-attrib
                 filter_history = [row for row in history if
                                   dates_range[0] <= cast(datetime, cast(Entity, row)['ts']) < dates_range[1]]
                 history.clear()
-                history.extend(filter_history)
+                history.bulk_extend(filter_history)
 
                 if history:
                     min_date = datetime(MAXYEAR, 1, 3, tzinfo=pytz.utc)
@@ -775,6 +864,22 @@ class Provider(DBHaystackInterface):  # pylint: disable=too-many-instance-attrib
     def _download_grid_effective_version(self, uri: str,  # pylint: disable=method-hidden
                                          effective_version: datetime) -> Grid:
         log.info("_download_grid(%s,%s)", uri, effective_version)
+        snapshot_dir = self._envs.get("HAYSTACK_SNAPSHOT_DIR")
+        if not snapshot_dir:
+            return self._parse_grid(uri, effective_version)
+        key = md5(f"{uri}|{effective_version.isoformat()}".encode("utf-8")).hexdigest()
+        snapshot_path = os.path.join(snapshot_dir, f"{key}.snapshot")
+        if os.path.exists(snapshot_path):
+            try:
+                return Grid.load_snapshot(snapshot_path)
+            except ValueError as ex:  # A snapshot of another version of the format
+                log.warning("Ignore the snapshot '%s' (%s)", snapshot_path, ex)
+        grid = self._parse_grid(uri, effective_version)
+        os.makedirs(snapshot_dir, exist_ok=True)
+        grid.save_snapshot(snapshot_path)
+        return grid
+
+    def _parse_grid(self, uri: str, effective_version: datetime) -> Grid:
         parsed_uri = urlparse(uri, allow_fragments=False)
         byte_array = self._download_uri(parsed_uri, effective_version)
         if byte_array[:2] == b'\xef\xbb':
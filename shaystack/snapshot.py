@@ -0,0 +1,389 @@
+# -*- coding: utf-8 -*-
+# Binary snapshot of a grid
+# See the accompanying LICENSE file.
+# (C) 2021 Engie Digital
+#
+# vim: set ts=4 sts=4 et tw=78 sw=4 si:
+
+"""
+A binary snapshot of a grid, to save a parsed grid and restore it quickly.
+
+The layout is versioned (`SNAPSHOT_VERSION`). After the header, a table of the strings and a
+table of the references are saved. The tags, the strings and the references are saved only
+once, and shared by all the entities after a load. Each value is saved with a type code,
+followed by its binary encoding. A value of an unknown type is saved with `pickle`.
+
+A snapshot is not a portable exchange format: use it only to cache the grids of a trusted source.
+"""
+import datetime
+import mmap
+import os
+import pickle
+import struct
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+import pytz
+
+from .datatypes import Quantity, Coordinate, Uri, Bin, XStr, Ref, MARKER, NA, REMOVE, \
+    _MarkerType, _NAType, _RemoveType, intern_ref
+from .grid import Grid
+from .metadata import MetadataObject
+from .sortabledict import SortableDict
+
+SNAPSHOT_MAGIC = b'HSNP'
+SNAPSHOT_VERSION = 1
+
+_HEADER = struct.Struct('<4sH')
+_U32 = struct.Struct('<I')
+_CODE_U32 = struct.Struct('<BI')
+_CODE_I64 = struct.Struct('<Bq')
+_CODE_F64 = struct.Struct('<Bd')
+_CODE_I32 = struct.Struct('<Bi')
+_CODE_2F64 = struct.Struct('<Bdd')
+_CODE_TIME = struct.Struct('<BBBBI')
+_CODE_DATETIME = struct.Struct('<Bqi')
+_REF = struct.Struct('<Ii')
+
+# The type codes of the values
+(_NONE, _MARKER, _NA, _REMOVE, _TRUE, _FALSE, _INT, _FLOAT, _QUANTITY, _STR, _URI, _BIN, _XSTR,
+ _REF_CODE, _DATE, _TIME, _DATETIME, _COORDINATE, _LIST, _DICT, _GRID, _PICKLE) = range(22)
+
+_NO_INDEX = 0xFFFFFFFF
+_EPOCH = datetime.datetime(1970, 1, 1, tzinfo=pytz.utc)
+_NAIVE_EPOCH = datetime.datetime(1970, 1, 1)
+_MICROSECOND = datetime.timedelta(microseconds=1)
+
+
+class _Writer:
+    """Encode a grid, with the tables of strings and references."""
+
+    __slots__ = "_strings", "_refs", "_body", "_encoders"
+
+    def __init__(self):
+        self._strings: Dict[str, int] = {}
+        self._refs: Dict[Tuple[str, Optional[str]], int] = {}
+        self._body = bytearray()
+        self._encoders: Dict[type, Callable[[Any], None]] = {
+            type(None): lambda value: self._body.append(_NONE),
+            _MarkerType: lambda value: self._body.append(_MARKER),
+            _NAType: lambda value: self._body.append(_NA),
+            _RemoveType: lambda value: self._body.append(_REMOVE),
+            bool: lambda value: self._body.append(_TRUE if value else _FALSE),
+            int: self._int,
+            float: lambda value: self._body.extend(_CODE_F64.pack(_FLOAT, value)),
+            Quantity: self._quantity,
+            str: lambda value: self._body.extend(_CODE_U32.pack(_STR, self._string(value))),
+            Uri: lambda value: self._body.extend(_CODE_U32.pack(_URI, self._string(str(value)))),
+            Bin: lambda value: self._body.extend(_CODE_U32.pack(_BIN, self._string(str(value)))),
+            XStr: self._xstr,
+            Ref: self._ref,
+            datetime.date: lambda value: self._body.extend(_CODE_I32.pack(_DATE, value.toordinal())),
+            datetime.time: self._time,
+            datetime.datetime: self._datetime,
+            Coordinate: lambda value: self._body.extend(
+                _CODE_2F64.pack(_COORDINATE, value.latitude, value.longitude)),
+            list: self._list,
+            dict: self._dict,
+            SortableDict: self._dict,
+            MetadataObject: self._dict,
+            Grid: self._grid,
+        }
+
+    def dump(self, grid: Grid) -> bytes:
+        self._grid(grid)
+        head = bytearray(_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION))
+        head.extend(_U32.pack(len(self._strings)))
+        for string in self._strings:
+            encoded = string.encode('utf-8', 'surrogatepass')
+            head.extend(_U32.pack(len(encoded)))
+            head.extend(encoded)
+        head.extend(_U32.pack(len(self._refs)))
+        for name, value in self._refs:
+            head.extend(_REF.pack(self._string(name), -1 if value is None else self._string(value)))
+        return bytes(head + self._body)
+
+    def _string(self, string: str) -> int:
+        index = self._strings.get(string)
+        if index is None:
+            index = self._strings[string] = len(self._strings)
+        return index
+
+    def value(self, value: Any) -> None:
+        encoder = self._encoders.get(type(value))
+        if encoder is None:
+            self._pickle(value)
+        else:
+            encoder(value)
+
+    def _int(self, value: int) -> None:
+        if -2 ** 63 <= value < 2 ** 63:
+            self._body.extend(_CODE_I64.pack(_INT, value))
+        else:
+            self._pickle(value)
+
+    def _quantity(self, value: Quantity) -> None:
+        self._body.extend(_CODE_U32.pack(
+            _QUANTITY, _NO_INDEX if value.symbol is None else self._string(value.symbol)))
+        self.value(value.m)
+
+    def _xstr(self, value: XStr) -> None:
+        self._body.extend(_CODE_U32.pack(_XSTR, self._string(value.encoding)))
+        self._body.extend(_U32.pack(len(value.data)))
+        self._body.extend(value.data)
+
+    def _ref(self, value: Ref) -> None:
+        key = (value.name, value.value)
+        index = self._refs.get(key)
+        if index is None:
+            index = self._refs[key] = len(self._refs)
+            # The strings are saved before the references
+            self._string(value.name)
+            if value.value is not None:
+                self._string(value.value)
+        self._body.extend(_CODE_U32.pack(_REF_CODE, index))
+
+    def _time(self, value: datetime.time) -> None:
+        if value.tzinfo is not None:
+            self._pickle(value)
+            return
+        self._body.extend(_CODE_TIME.pack(_TIME, value.hour, value.minute, value.second,
+                                          value.microsecond))
+
+    def _datetime(self, value: datetime.datetime) -> None:
+        tzinfo = value.tzinfo
+        if tzinfo is None:
+            self._body.extend(_CODE_DATETIME.pack(_DATETIME, (value - _NAIVE_EPOCH) // _MICROSECOND, -1))
+            return
+        zone = getattr(tzinfo, 'zone', None)
+        if zone is None:  # Not a pytz timezone
+            self._pickle(value)
+            return
+        self._body.extend(_CODE_DATETIME.pack(_DATETIME, (value - _EPOCH) // _MICROSECOND,
+                                              self._string(zone)))
+
+    def _list(self, value: list) -> None:
+        self._body.extend(_CODE_U32.pack(_LIST, len(value)))
+        for item in value:
+            self.value(item)
+
+    def _dict(self, value: Any) -> None:
+        self._body.extend(_CODE_U32.pack(_DICT, len(value)))
+        self._items(value)
+
+    def _items(self, value: Any) -> None:
+        body = self._body
+        for key, item in value.items():
+            body.extend(_U32.pack(self._string(key)))
+            self.value(item)
+
+    def _grid(self, grid: Grid) -> None:
+        body = self._body
+        body.extend(_CODE_U32.pack(_GRID, self._string(str(grid.version))))
+        body.extend(_U32.pack(len(grid.metadata)))
+        self._items(grid.metadata)
+        body.extend(_U32.pack(len(grid.column)))
+        for name, meta in grid.column.items():
+            body.extend(_U32.pack(self._string(name)))
+            body.extend(_U32.pack(len(meta)))
+            self._items(meta)
+        body.extend(_U32.pack(len(grid)))
+        for entity in grid._row:  # Without a copy of the shared entities pylint: disable=protected-access
+            body.extend(_U32.pack(len(entity)))
+            self._items(entity)
+
+    def _pickle(self, value: Any) -> None:
+        data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        self._body.extend(_CODE_U32.pack(_PICKLE, len(data)))
+        self._body.extend(data)
+
+
+class _Reader:
+    """Decode a grid, with the tables of strings and references."""
+
+    __slots__ = "_buffer", "_pos", "_strings", "_refs", "_zones", "_decoders"
+
+    def __init__(self, buffer: Union[bytes, memoryview, mmap.mmap]):
+        self._buffer = buffer
+        magic, version = _HEADER.unpack_from(buffer, 0)
+        if magic != SNAPSHOT_MAGIC:
+            raise ValueError("Not a grid snapshot")
+        if version != SNAPSHOT_VERSION:
+            raise ValueError(f"Unsupported snapshot version {version}")
+        self._pos = _HEADER.size
+        self._strings: List[str] = []
+        for _ in range(self._u32()):
+            size = self._u32()
+            self._strings.append(str(buffer[self._pos:self._pos + size], 'utf-8', 'surrogatepass'))
+            self._pos += size
+        strings = self._strings
+        self._refs: List[Ref] = []
+        for _ in range(self._u32()):
+            name, value = _REF.unpack_from(buffer, self._pos)
+            self._pos += _REF.size
+            self._refs.append(intern_ref(strings[name], None if value < 0 else strings[value]))
+        self._zones: Dict[int, Any] = {}
+        self._decoders: List[Callable[[], Any]] = [
+            self._constant(None),
+            self._constant(MARKER),
+            self._constant(NA),
+            self._constant(REMOVE),
+            self._constant(True),
+            self._constant(False),
+            lambda: self._unpack(_CODE_I64),
+            lambda: self._unpack(_CODE_F64),
+            self._quantity,
+            lambda: strings[self._unpack(_CODE_U32)],
+            lambda: Uri(strings[self._unpack(_CODE_U32)]),
+            lambda: Bin(strings[self._unpack(_CODE_U32)]),
+            self._xstr,
+            lambda: self._refs[self._unpack(_CODE_U32)],
+            lambda: datetime.date.fromordinal(self._unpack(_CODE_I32)),
+            self._time,
+            self._datetime,
+            self._coordinate,
+            self._list,
+            self._dict,
+            self._grid,
+            self._pickle,
+        ]
+
+    def _constant(self, value: Any) -> Callable[[], Any]:
+        def decode() -> Any:
+            self._pos += 1
+            return value
+
+        return decode
+
+    def _u32(self) -> int:
+        value = _U32.unpack_from(self._buffer, self._pos)[0]
+        self._pos += _U32.size
+        return value
+
+    def _unpack(self, code_struct: struct.Struct) -> Any:
+        value = code_struct.unpack_from(self._buffer, self._pos)[1]
+        self._pos += code_struct.size
+        return value
+
+    def value(self) -> Any:
+        return self._decoders[self._buffer[self._pos]]()
+
+    def _quantity(self) -> Quantity:
+        symbol = self._unpack(_CODE_U32)
+        magnitude = self.value()
+        return Quantity(magnitude, None if symbol == _NO_INDEX else self._strings[symbol])
+
+    def _xstr(self) -> XStr:
+        encoding = self._strings[self._unpack(_CODE_U32)]
+        size = self._u32()
+        xstr = XStr.__new__(XStr)
+        xstr.encoding = encoding
+        data = bytes(self._buffer[self._pos:self._pos + size])
+        xstr.data = bytearray(data) if encoding == "hex" else data  # type: ignore
+        self._pos += size
+        return xstr
+
+    def _time(self) -> datetime.time:
+        _, hour, minute, second, microsecond = _CODE_TIME.unpack_from(self._buffer, self._pos)
+        self._pos += _CODE_TIME.size
+        return datetime.time(hour, minute, second, microsecond)
+
+    def _datetime(self) -> datetime.datetime:
+        _, microseconds, zone = _CODE_DATETIME.unpack_from(self._buffer, self._pos)
+        self._pos += _CODE_DATETIME.size
+        if zone < 0:
+            return _NAIVE_EPOCH + datetime.timedelta(microseconds=microseconds)
+        tzinfo = self._zones.get(zone)
+        if tzinfo is None:
+            tzinfo = self._zones[zone] = pytz.timezone(self._strings[zone])
+        return (_EPOCH + datetime.timedelta(microseconds=microseconds)).astimezone(tzinfo)
+
+    def _coordinate(self) -> Coordinate:
+        _, latitude, longitude = _CODE_2F64.unpack_from(self._buffer, self._pos)
+        self._pos += _CODE_2F64.size
+        return Coordinate(latitude, longitude)
+
+    def _list(self) -> list:
+        return [self.value() for _ in range(self._unpack(_CODE_U32))]
+
+    def _dict(self) -> Dict[str, Any]:
+        return self._items(self._unpack(_CODE_U32))
+
+    def _items(self, size: int) -> Dict[str, Any]:
+        strings = self._strings
+        buffer = self._buffer
+        decoders = self._decoders
+        items = {}
+        for _ in range(size):
+            key = strings[_U32.unpack_from(buffer, self._pos)[0]]
+            self._pos += _U32.size
+            items[key] = decoders[buffer[self._pos]]()
+        return items
+
+    def grid(self) -> Grid:
+        return self._grid()
+
+    def _grid(self) -> Grid:
+        version = self._strings[self._unpack(_CODE_U32)]
+        metadata = self._items(self._u32())
+        columns = [(self._strings[self._u32()], self._items(self._u32())) for _ in range(self._u32())]
+        return Grid.from_rows(version, metadata, columns,
+                              [self._items(self._u32()) for _ in range(self._u32())])
+
+    def _pickle(self) -> Any:
+        size = self._unpack(_CODE_U32)
+        value = pickle.loads(self._buffer[self._pos:self._pos + size])
+        self._pos += size
+        return value
+
+
+def dump_snapshot(grid: Grid) -> bytes:
+    """Encode a grid to a binary snapshot.
+
+    Args:
+        grid: The grid
+    Returns:
+        The snapshot
+    """
+    return _Writer().dump(grid)
+
+
+def parse_snapshot(data: Union[bytes, memoryview, mmap.mmap]) -> Grid:
+    """Decode a binary snapshot.
+
+    Args:
+        data: The snapshot
+    Returns:
+        The grid
+    Raises:
+        ValueError if the data is not a snapshot, or is saved with another version of the format.
+    """
+    return _Reader(data).grid()
+
+
+def save_snapshot(grid: Grid, path: str) -> None:
+    """Save a grid in a snapshot file.
+
+    The file is replaced atomically, so a process loading the snapshot never reads a
+    partial file.
+
+    Args:
+        grid: The grid
+        path: The path of the file
+    """
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as file:
+        file.write(dump_snapshot(grid))
+    os.replace(tmp_path, path)
+
+
+def load_snapshot(path: str) -> Grid:
+    """Load a grid from a snapshot file. The file is mapped in memory.
+
+    Args:
+        path: The path of the file
+    Returns:
+        The grid
+    """
+    with open(path, 'rb') as file:
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            return parse_snapshot(data)
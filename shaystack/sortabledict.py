@@ -12,15 +12,30 @@ A sortable dictionary
 import collections.abc as col
 import copy
 import sys
-from typing import Callable, Any, Optional, Dict, Iterator, Union, List, Tuple
+from bisect import bisect_left, bisect_right, insort
+from typing import Callable, Any, Optional, Dict, Iterator, Union, List, Tuple, KeysView, ValuesView, \
+    ItemsView, Iterable
 
 import six
 
+# Minimum number of holes before a rebuild of the list of the keys
+MIN_COMPACTION = 64
+# A deleted key in the list of the keys
+_HOLE = object()
+
 
 class SortableDict(col.MutableMapping):
-    """A dict-like object that permits value ordering/re-ordering."""
+    """A dict-like object that permits value ordering/re-ordering.
+
+    The items are saved in an insertion-ordered `dict`. The list of the keys and the position
+    of each key are built by the first method with a position. Then, like the `PositionIndex`
+    of a grid, a deleted key leaves a hole in the list, and its position is saved in a sorted
+    list to shift the next positions. So, the deletions, the additions at the end, `index()`
+    and `at()` are `O(log n)` (amortized). The insertion at a position, `sort()` and `reverse()`
+    update the `dict` in `O(n)`.
+    """
 
-    __slots__ = "_values", "_order", "_validate_fn"
+    __slots__ = "_values", "_order", "_positions", "_removed", "_validate_fn"
 
     def __init__(self,
                  initial: Union[None, List[Tuple[str, Any]], Dict[str, Any]] = None,
@@ -32,7 +47,11 @@ class SortableDict(col.MutableMapping):
             validate_fn: A validated function
         """
         self._values = {}  # type: ignore
-        self._order = []  # type: ignore
+        # The keys (with holes), the position of each key in this list, and the sorted
+        # positions of the holes. `None` if the order was updated.
+        self._order: Optional[List[Any]] = None
+        self._positions: Optional[Dict[Any, int]] = None
+        self._removed: List[int] = []
         self._validate_fn = validate_fn
         super().__init__()
 
@@ -59,13 +78,49 @@ class SortableDict(col.MutableMapping):
 
     def __delitem__(self, key: Union[str, int]) -> None:
         del self._values[key]
-        self._order.remove(key)
+        order = self._order
+        if order is None:
+            return
+        saved_position = self._positions.pop(key)  # type: ignore
+        if saved_position == len(order) - 1:
+            order.pop()  # The last key: the other positions are unchanged
+            return
+        order[saved_position] = _HOLE
+        insort(self._removed, saved_position)
+        if len(self._removed) > max(MIN_COMPACTION, len(order) // 8):
+            self._order = self._positions = None
+
+    def __contains__(self, key: Any) -> bool:
+        return key in self._values
 
     def __iter__(self) -> Iterator[Any]:
-        return iter(self._order)
+        return iter(self._values)
 
     def __len__(self) -> int:
-        return len(self._order)
+        return len(self._values)
+
+    def keys(self) -> KeysView[Any]:
+        return self._values.keys()
+
+    def values(self) -> ValuesView[Any]:
+        return self._values.values()
+
+    def items(self) -> ItemsView[Any, Any]:
+        return self._values.items()
+
+    def _keys(self) -> List[Any]:
+        """Return the list of the keys with holes, built once for each order."""
+        if self._order is None:
+            self._order = list(self._values)
+            self._positions = {key: position for position, key in enumerate(self._order)}
+            self._removed = []
+        return self._order
+
+    def _reorder(self, order: Iterable[Any]) -> None:
+        """Save the items in a new order."""
+        values = self._values
+        self._values = {key: values[key] for key in order}
+        self._order = self._positions = None
 
     def add_item(self,
                  key: Union[str, int],
@@ -127,13 +182,18 @@ class SortableDict(col.MutableMapping):
                 self._values[key] = value
                 return self
 
-        if index is not None:
+        if index is not None and index < len(self._values):
             # Place at given position
-            self._order.insert(index, key)
-        else:
-            # Place at end
-            self._order.append(key)
+            order = list(self._values)
+            order.insert(index, key)
+            self._values[key] = value
+            self._reorder(order)
+            return self
+        # Place at end
         self._values[key] = value
+        if self._order is not None:
+            self._positions[key] = len(self._order)  # type: ignore
+            self._order.append(key)
         return self
 
     def at(self, index: int) -> Any:  # pylint: disable=C0103
@@ -144,7 +204,21 @@ class SortableDict(col.MutableMapping):
         Returns
             key at position
         """
-        return self._order[index]
+        order = self._keys()
+        removed = self._removed
+        if not removed:
+            return order[index]
+        size = len(self._values)
+        if not -size <= index < size:
+            raise IndexError('list index out of range')
+        index %= size
+        # Skip the holes before the position
+        saved_position = index
+        while True:
+            next_position = index + bisect_right(removed, saved_position)
+            if next_position == saved_position:
+                return order[saved_position]
+            saved_position = next_position
 
     def value_at(self, index: int) -> Any:
         """Return the value at the given index.
@@ -154,15 +228,22 @@ class SortableDict(col.MutableMapping):
         Returns:
             Value at position
         """
-        return self[self.at(index)]
+        return self._values[self.at(index)]
 
     def index(self, *args, **kwargs):
-        """
+        """Return the position of a key, like `list.index()`.
+
         Args:
             *args:
             **kwargs:
         """
-        return self._order.index(*args, **kwargs)
+        if len(args) != 1 or kwargs:
+            return list(self._values).index(*args, **kwargs)
+        self._keys()
+        saved_position = self._positions.get(args[0])  # type: ignore
+        if saved_position is None:
+            raise ValueError('%r is not in list' % (args[0],))
+        return saved_position - bisect_left(self._removed, saved_position)
 
     def reverse(self) -> 'SortableDict':
         """
@@ -170,7 +251,7 @@ class SortableDict(col.MutableMapping):
         Returns:
             `self`
         """
-        self._order.reverse()
+        self._reorder(reversed(list(self._values)))
         return self
 
     def sort(self, *args, **kwargs) -> 'SortableDict':
@@ -182,7 +263,9 @@ class SortableDict(col.MutableMapping):
         Returns:
             `self`
         """
-        self._order.sort(*args, **kwargs)
+        order = list(self._values)
+        order.sort(*args, **kwargs)
+        self._reorder(order)
         return self
 
     def pop_at(self, index: int) -> Any:
@@ -195,10 +278,20 @@ class SortableDict(col.MutableMapping):
         """
         return self.pop(self.at(index))
 
-    def copy(self) -> 'SortableDict':
+    def copy(self, deep: bool = False) -> 'SortableDict':
         """
-        Deep copy.
+        Copy the dictionary. The validation function is shared.
+
+        Args:
+            deep: `True` to duplicate the values too
         Returns:
             a new instance
         """
-        return copy.deepcopy(self)
+        if deep:
+            # The validation function (of a grid) is shared, not duplicated
+            return copy.deepcopy(self, {id(self._validate_fn): self._validate_fn})
+        a_copy = copy.copy(self)
+        a_copy._values = dict(self._values)  # pylint: disable=protected-access
+        a_copy._order = a_copy._positions = None  # pylint: disable=protected-access
+        a_copy._removed = []  # pylint: disable=protected-access
+        return a_copy
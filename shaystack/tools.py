@@ -9,7 +9,9 @@
 Tools for all parser and dumper
 """
 import re
-from typing import cast
+from typing import cast, Dict, Callable, Optional, TypeVar
+
+_Encoder = TypeVar('_Encoder', bound=Callable)
 
 _SPECIAL_CHAR = re.compile(r'([\a\b\f\n\r\t\v\"\\\u0080-\uffff])')
 _MAP_CHAR = \
@@ -44,6 +46,24 @@ def escape_str(str_value: str) -> str:
     return _SPECIAL_CHAR.sub(_str_sub, str_value)
 
 
+def find_encoder(encoders: Dict[type, _Encoder], value_type: type) -> Optional[_Encoder]:
+    """Find the encoder of a type in a dispatch table, with the nearest parent class in the MRO.
+    The encoder is saved in the table for this type, so the MRO is walked only for the first value.
+
+    Args:
+        encoders: The encoder of each type
+        value_type: The type of the value to encode
+    Returns:
+        The encoder, or `None` if the type is not supported
+    """
+    for parent in value_type.__mro__:
+        encoder = encoders.get(parent)
+        if encoder is not None:
+            encoders[value_type] = encoder
+            return encoder
+    return None
+
+
 def unescape_str(a_string: str, uri: bool = False) -> str:
     """Iterative parser for string escapes.
     """
@@ -12,22 +12,38 @@ here (https://www.project-haystack.org/doc/Zinc)
 """
 from __future__ import unicode_literals
 
-import functools
 import re
-from typing import Any
+from typing import Any, Callable, Dict, Iterator
 
-from .datatypes import Uri
+from .datatypes import Bin
 from .grid import Grid
-from .tools import escape_str
+from .tools import escape_str, find_encoder
 from .type import Entity
 from .version import LATEST_VER, Version
 from .zincdumper import dump_grid as dump_zinc_grid, \
-    dump_scalar as dump_zinc_scalar
+    dump_scalar as dump_zinc_scalar, _ENCODERS as _ZINC_ENCODERS
+
+
+def _row_dumper(grid: Grid) -> Callable[[Entity], str]:
+    """Return a function to dump the rows of a grid, specialized for its columns."""
+    columns = tuple(grid.column.keys())
+    encoders = _ENCODERS
+
+    def _dump_row(row: Entity) -> str:
+        lines = []
+        for column in columns:
+            if column in row:
+                value = row[column]
+                encoder = encoders.get(type(value))
+                lines.append(column + ': ' + (encoder(value, LATEST_VER) if encoder
+                                              else dump_scalar(value, version=LATEST_VER)))
+        return '\n'.join(lines)
+
+    return _dump_row
 
 
 def _dump_row(grid: Grid, row: Entity) -> str:
-    return '\n'.join([c + ': ' + dump_scalar(row.get(c, None), version=LATEST_VER) for
-                      c in grid.column.keys() if c in row])
+    return _row_dumper(grid)(row)
 
 
 _REGULAR_STR = re.compile(r'^[^\x00-\x1F\t°\\]*$')
@@ -55,15 +71,48 @@ def dump_grid(grid: Grid) -> str:
     Returns:
         a Zinc string
     """
-    str_grid = "\n---\n".join(list(map(functools.partial(_dump_row, grid), grid)))
+    str_grid = "\n---\n".join(list(map(_row_dumper(grid), grid)))
     if str_grid:
         str_grid += '\n'
     return str_grid
 
 
+def dump_grid_iter(grid: Grid) -> Iterator[str]:
+    """Dump a single grid to its TRIO representation, entity by entity.
+
+    Args:
+        grid: The grid to dump
+    Returns:
+        The parts of the Trio string
+    """
+    separator = ''
+    empty = True
+    for entity in map(_row_dumper(grid), grid):
+        part = separator + entity
+        empty = empty and not part
+        yield part
+        separator = '\n---\n'
+    if not empty:
+        yield '\n'
+
+
 _INDENT = re.compile(r"^", flags=re.MULTILINE)
 
 
+def _dump_grid(grid: Grid, _: Version) -> str:
+    return 'Zinc:\n' + _INDENT.sub("  ", dump_zinc_grid(grid)[:-1])
+
+
+# The encoder of each type: the Zinc encoders, except for the strings and the grids.
+# The subclasses are added at the first use (see `find_encoder()`).
+_ENCODERS: Dict[type, Callable[[Any, Version], str]] = {
+    **_ZINC_ENCODERS,
+    str: lambda value, _: _dump_str(value),
+    Bin: lambda value, _: _dump_str(value),
+    Grid: _dump_grid,
+}
+
+
 def dump_scalar(scalar: Any, version: Version = LATEST_VER) -> str:
     """
     Dump a scalar to Trio
@@ -73,8 +122,7 @@ def dump_scalar(scalar: Any, version: Version = LATEST_VER) -> str:
     Returns:
         The trio string
     """
-    if not isinstance(scalar, Uri) and isinstance(scalar, str):
-        return _dump_str(scalar)
-    if isinstance(scalar, Grid):
-        return 'Zinc:\n' + _INDENT.sub("  ", dump_zinc_grid(scalar)[:-1])
-    return dump_zinc_scalar(scalar, version)
+    encoder = _ENCODERS.get(type(scalar)) or find_encoder(_ENCODERS, type(scalar))
+    if encoder is None:
+        return dump_zinc_scalar(scalar, version)
+    return encoder(scalar, version)
@@ -14,18 +14,19 @@ and produce a `Grid` instance.
 import logging
 import sys
 import textwrap
-from typing import Any, Iterable
+from threading import local
+from typing import Any, Iterable, Tuple
 
 from pyparsing import Suppress, ParseException, Literal, StringEnd, \
-    LineStart, ZeroOrMore, Regex, LineEnd, Optional
+    LineStart, ZeroOrMore, Regex, LineEnd, Optional, ParserElement
 
 from .grid import Grid
 from .tools import unescape_str
 from .type import Entity
 from .version import Version, LATEST_VER
-from .zincparser import hs_nl, pyparser_lock, _reformat_exception, \
+from .zincparser import _reformat_exception, \
     parse_grid as parse_zinc_grid, \
-    hs_id, toks_to_dict, hs_scalar
+    toks_to_dict, zinc_grammar
 
 # Logging instance for reporting debug info
 LOG = logging.getLogger(__name__)
@@ -77,47 +78,80 @@ class TrioParseException(ValueError):
         super().__init__(message)
 
 
-trio_multiline_string = Suppress(hs_nl) + Regex(
-    r'([ \t]+.*[\n\r]+)*[ \t]+.*(?=[\n\r]+)').leaveWhitespace().setParseAction(
-    lambda toks: unescape_str(textwrap.dedent(toks[0])) + "\n"
-)
+def _gen_grid(toks: Iterable[Entity]):
+    grid = Grid.from_rows(LATEST_VER, None, None, toks)
+    grid.extends_columns()
+    return grid
+
+
+def _build_grammar() -> Tuple[ParserElement, ParserElement]:
+    """Build a new instance of the Trio grammar, with the Zinc grammar of the current thread.
 
-trio_zinc_nested = Suppress(Literal("Zinc:") + hs_nl) + Regex(
-    r'([ \t]+.*[\n\r]+)*[ \t]+.*(?=[\n\r]+)').leaveWhitespace().setParseAction(
-    lambda toks: parse_zinc_grid(textwrap.dedent(toks[0]) + '\n')
-)
+    Returns:
+        The grammar of a Trio grid, and the grammar of a Trio scalar
+    """
+    zinc = zinc_grammar()
+    trio_multiline_string = Suppress(zinc.hs_nl) + Regex(
+        r'([ \t]+.*[\n\r]+)*[ \t]+.*(?=[\n\r]+)').leaveWhitespace().setParseAction(
+        lambda toks: unescape_str(textwrap.dedent(toks[0])) + "\n"
+    )
 
-trio_safe_string = Regex('[^\x00-\x7F]|[A-Za-z_-].*(?=[\n\r]+)').setParseAction(
-    lambda toks: unescape_str(toks[0])
-)
+    trio_zinc_nested = Suppress(Literal("Zinc:") + zinc.hs_nl) + Regex(
+        r'([ \t]+.*[\n\r]+)*[ \t]+.*(?=[\n\r]+)').leaveWhitespace().setParseAction(
+        lambda toks: parse_zinc_grid(textwrap.dedent(toks[0]) + '\n')
+    )
 
-hs_trio_scalar = (trio_multiline_string ^ trio_zinc_nested ^
-                  hs_scalar[LATEST_VER] ^
-                  trio_safe_string ^
-                  Suppress(LineEnd()))
+    trio_safe_string = Regex('[^\x00-\x7F]|[A-Za-z_-].*(?=[\n\r]+)').setParseAction(
+        lambda toks: unescape_str(toks[0])
+    )
 
-hs_trio_tagpair = (hs_id +
-                   Suppress(':') +
-                   (hs_trio_scalar + Suppress(hs_nl) ^ Suppress(hs_nl))
-                   ).setParseAction(lambda toks: tuple(toks[:2])).setName('tagPair')
+    hs_trio_scalar = (trio_multiline_string ^ trio_zinc_nested ^
+                      zinc.hs_scalar[LATEST_VER] ^
+                      trio_safe_string ^
+                      Suppress(LineEnd()))
 
-hs_trio_tag = ((Optional(hs_id) + Suppress(hs_nl)) ^ hs_trio_tagpair).setName('tag')
+    hs_trio_tagpair = (zinc.hs_id +
+                       Suppress(':') +
+                       (hs_trio_scalar + Suppress(zinc.hs_nl) ^ Suppress(zinc.hs_nl))
+                       ).setParseAction(lambda toks: tuple(toks[:2])).setName('tagPair')
 
-hs_row = hs_trio_tag | Suppress(Regex("//.*[\n\r]+").leaveWhitespace())
+    hs_trio_tag = ((Optional(zinc.hs_id) + Suppress(zinc.hs_nl)) ^ hs_trio_tagpair).setName('tag')
 
-hs_record = (hs_row[...] + Suppress((LineStart() + Literal('-')[1, ...] + hs_nl) |
-                                    StringEnd())).setParseAction(
-    toks_to_dict)
+    hs_row = hs_trio_tag | Suppress(Regex("//.*[\n\r]+").leaveWhitespace())
 
+    hs_record = (hs_row[...] + Suppress((LineStart() + Literal('-')[1, ...] + zinc.hs_nl) |
+                                        StringEnd())).setParseAction(
+        toks_to_dict)
 
-def _gen_grid(toks: Iterable[Entity]):
-    grid = Grid(LATEST_VER)
-    grid.extend(toks)
-    grid.extends_columns()
-    return grid
+    hs_trio = ZeroOrMore(hs_record, stopOn=StringEnd()).setParseAction(_gen_grid)
+    return hs_trio, hs_trio_scalar
 
 
-hs_trio = ZeroOrMore(hs_record, stopOn=StringEnd()).setParseAction(_gen_grid)
+# Grammar instances, by thread
+_thread_grammar = local()
+
+
+def trio_grammar() -> Tuple[ParserElement, ParserElement]:
+    """Return the Trio grammar of the current thread. The grammar is built at the first call.
+
+    Returns:
+        The grammar of a Trio grid, and the grammar of a Trio scalar
+    """
+    grammar = getattr(_thread_grammar, "grammar", None)
+    if grammar is None:
+        grammar = _build_grammar()
+        _thread_grammar.grammar = grammar
+    return grammar
+
+
+# The elements of the grammar, for compatibility. The grammar is built at the first access.
+_GRAMMAR_ELEMENTS = ("hs_trio", "hs_trio_scalar")
+
+
+def __getattr__(name: str) -> Any:
+    if name in _GRAMMAR_ELEMENTS:
+        return trio_grammar()[_GRAMMAR_ELEMENTS.index(name)]
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
 
 
 def parse_grid(grid_data: str, parse_all: bool = True) -> Grid:
@@ -130,11 +164,9 @@ def parse_grid(grid_data: str, parse_all: bool = True) -> Grid:
         The grid
     """
     try:
-        with pyparser_lock:
-
-            # Now parse the grid of the grid accordingly
-            grid = hs_trio.parseString(grid_data, parseAll=parse_all)[0]
-            return grid
+        # Now parse the grid of the grid accordingly
+        grid = trio_grammar()[0].parseString(grid_data, parseAll=parse_all)[0]
+        return grid
     except ParseException as parse_exception:
         raise TrioParseException(
             'Failed to parse: %s' % _reformat_exception(parse_exception, parse_exception.lineno),
@@ -156,7 +188,7 @@ def parse_scalar(scalar_data: str, version: Version = LATEST_VER) -> Any:
     """
     try:
         assert version == LATEST_VER
-        return hs_trio_scalar.parseString(scalar_data, parseAll=True)[0]
+        return trio_grammar()[1].parseString(scalar_data, parseAll=True)[0]
     except ParseException as parse_exception:
         # Raise a new exception with the appropriate line number.
         raise TrioParseException(
@@ -0,0 +1,650 @@
+# -*- coding: utf-8 -*-
+# Zinc hand-written parser.
+# See the accompanying LICENSE file.
+# (C) 2021 Engie Digital
+#
+# vim: set ts=4 sts=4 et tw=78 sw=4 si:
+
+"""
+Hand-written, single pass, Zinc parser (https://www.project-haystack.org/doc/Zinc).
+
+It produces exactly the same `Grid` as the pyparsing grammar in `zincparser`, but
+the scalar type is selected with the first character, and no global lock is necessary.
+All the states are kept in a `ZincScanner` instance, so it's possible to use it in parallel
+in different threads.
+"""
+
+import codecs
+import datetime
+import logging
+import re
+import sys
+from typing import Any, List, Tuple, Dict, Iterator, Iterable, Union, IO, Callable, Optional, Type
+
+import iso8601
+from pint import UndefinedUnitError
+
+from .compact_entity import CompactEntity, entity_layout
+from .datatypes import Quantity, Coordinate, Uri, Bin, MARKER, NA, REMOVE, Ref, XStr, intern_ref
+from .grid import Grid
+from .sortabledict import SortableDict
+from .tools import unescape_str
+from .type import Entity
+from .version import Version, VER_3_0, LATEST_VER
+from .zincparser import ZincParseException, _VERSION_RE, _NEWLINE_RE
+from .zoneinfo import timezone
+
+LOG = logging.getLogger(__name__)
+
+# Size of the chunks read from a stream
+_STREAM_CHUNK_SIZE = 64 * 1024
+
+_ID_RE = re.compile(r'[a-z_][a-zA-Z0-9_]*')
+_WORD_RE = re.compile(r'[a-zA-Z0-9_]+')
+_NUMBER_RE = re.compile(r'-?[0-9_]+(?:\.[0-9_]+)?(?:[eE][+\-]?[0-9_]+)?')
+_UNIT_RE = re.compile('[a-zA-Z%_/$\u0080-\ufffe]+')
+_DATE_RE = re.compile(r'(\d\d\d\d)-(\d\d)-(\d\d)')
+_TIME_RE = re.compile(r'(\d\d):(\d\d)(?::(\d\d)(?:\.(\d+))?)?')
+_DATETIME_RE = re.compile(r'\d\d\d\d-\d\d-\d\d[Tt]\d\d:\d\d(?::\d\d(?:\.\d+)?)?(?:[zZ]|[+\-]\d\d:\d\d)?')
+_TZ_NAME_RE = re.compile(r'[A-Z][a-zA-Z0-9_\-]*')
+_TZ_UTC_RE = re.compile(r'(?:UTC|GMT)(?:[+\-]\d+|0)?')
+_SIMPLE_STR_RE = re.compile(r'"([^\x00-\x1f\\"]*)"')
+_STR_RE = re.compile(r'"((?:[^\x00-\x1f\\"]|\\[bfnrt\\"$]|\\[uU][0-9a-fA-F]{4})*)"')
+_SIMPLE_URI_RE = re.compile(r'`([^\x00-\x1f\\`]*)`')
+_URI_RE = re.compile(r"`((?:[^\x00-\x1f\\`]|\\[bfnrt\\:/?#\[\]@&=;`]|\\[uU][0-9a-fA-F]{4})*)`")
+_REF_RE = re.compile(r'@[ \t]*([a-zA-Z\d_:\-.~]*)')
+_BIN_RE = re.compile(r'Bin\(([\x20-\x27\x2a-\x7f]*)\)')
+_COORD_RE = re.compile(r'C\([ \t]*(-?[0-9_]*(?:\.[0-9_]+)?)[ \t]*,[ \t]*(-?[0-9_]*(?:\.[0-9_]+)?)[ \t]*\)')
+
+# Singleton values, by name.
+_KEYWORDS_2_0 = {
+    'T': True,
+    'F': False,
+    'M': MARKER,
+    'R': REMOVE,
+    'N': None,
+    'NaN': float('nan'),
+    'INF': float('inf'),
+}
+_KEYWORDS_3_0 = dict(_KEYWORDS_2_0, NA=NA)
+
+_NUMBER_FIRST_CHARS = frozenset('0123456789_')
+
+
+class ZincSyntaxError(Exception):
+    """Raised by the `ZincScanner` when the text does not conform to the grammar.
+
+    Args:
+        message: The description of the problem
+        pos: The position of the problem in the text
+    """
+    __slots__ = "message", "pos"
+
+    def __init__(self, message: str, pos: int):
+        super().__init__(message)
+        self.message = message
+        self.pos = pos
+
+
+class ZincScanner:
+    """A scanner on a Zinc text.
+
+    Each `parse_...` method start at a position in the text, and return the value
+    and the position just after the value.
+
+    Args:
+        text: The Zinc text
+        version: The Haystack version to apply to the scalars
+    """
+    __slots__ = "text", "version", "_keywords", "_is_v3"
+
+    def __init__(self, text: str, version: Version = LATEST_VER):
+        self.text = text
+        self.version = Version.nearest(version)
+        self._is_v3 = self.version >= VER_3_0
+        self._keywords = _KEYWORDS_3_0 if self._is_v3 else _KEYWORDS_2_0
+
+    def skip_ws(self, pos: int) -> int:
+        """Skip the spaces and tabs.
+
+        Args:
+            pos: The current position
+        Returns:
+            The position of the next significant character
+        """
+        text = self.text
+        length = len(text)
+        while pos < length and text[pos] in ' \t':
+            pos += 1
+        return pos
+
+    def expect(self, token: str, pos: int) -> int:
+        """Check the presence of `token` at `pos`, and return the position after it."""
+        if not self.text.startswith(token, pos):
+            raise ZincSyntaxError('Expected %r' % token, pos)
+        return pos + len(token)
+
+    def parse_nl(self, pos: int) -> int:
+        """Parse an optional white space, following by a new line."""
+        pos = self.skip_ws(pos)
+        text = self.text
+        if text.startswith('\n', pos):
+            return pos + 1
+        if text.startswith('\r\n', pos):
+            return pos + 2
+        raise ZincSyntaxError('Expected new line', pos)
+
+    def parse_id(self, pos: int) -> Tuple[str, int]:
+        """Parse a tag name."""
+        match = _ID_RE.match(self.text, pos)
+        if not match:
+            raise ZincSyntaxError('Expected id', pos)
+        return match.group(), match.end()
+
+    def parse_str(self, pos: int) -> Tuple[str, int]:
+        """Parse a quoted string."""
+        text = self.text
+        match = _SIMPLE_STR_RE.match(text, pos)
+        if match:
+            return match.group(1), match.end()
+        match = _STR_RE.match(text, pos)
+        if not match:
+            raise ZincSyntaxError('Expected string', pos)
+        return unescape_str(match.group(1), uri=False), match.end()
+
+    def parse_scalar(self, pos: int) -> Tuple[Any, int]:  # pylint: disable=too-many-return-statements
+        """Parse a scalar value. The type is selected with the first character.
+
+        Args:
+            pos: The position of the first character of the value
+        Returns:
+            The value and the next position
+        """
+        text = self.text
+        char = text[pos:pos + 1]
+        if char in _NUMBER_FIRST_CHARS:
+            return self._parse_digits(pos)
+        if char == '"':
+            return self.parse_str(pos)
+        if char == '@':
+            return self._parse_ref(pos)
+        if char == '-':
+            if text.startswith('-INF', pos):
+                return -float('inf'), pos + 4
+            return self._parse_number(pos)
+        if char == '`':
+            return self._parse_uri(pos)
+        if self._is_v3:
+            if char == '[':
+                return self._parse_list(pos)
+            if char == '{':
+                return self._parse_dict(pos)
+            if char == '<' and text.startswith('<<', pos):
+                return self._parse_inner_grid(pos)
+        if char.isalpha():
+            return self._parse_word(pos)
+        raise ZincSyntaxError('Expected scalar', pos)
+
+    def _parse_digits(self, pos: int) -> Tuple[Any, int]:
+        text = self.text
+        if self._is_v3:
+            # A XStr type may start with a digit
+            end = _WORD_RE.match(text, pos).end()  # type: ignore
+            if text[end:end + 1] in ('(', ' ') and text.startswith('(', self.skip_ws(end)):
+                return self._parse_xstr(text[pos:end], self.skip_ws(end))
+        if text[pos + 2:pos + 3] == ':':
+            match = _TIME_RE.match(text, pos)
+            if match:
+                return self._to_time(match), match.end()
+        elif text[pos + 4:pos + 5] == '-':
+            match = _DATETIME_RE.match(text, pos)
+            if match:
+                return self._parse_datetime(match.group(), match.end())
+            match = _DATE_RE.match(text, pos)
+            if match:
+                (year, month, day) = match.groups()
+                return datetime.date(int(year), int(month), int(day)), match.end()
+        return self._parse_number(pos)
+
+    def _parse_number(self, pos: int) -> Tuple[Any, int]:
+        text = self.text
+        match = _NUMBER_RE.match(text, pos)
+        if not match:
+            raise ZincSyntaxError('Expected number', pos)
+        value = float(match.group().replace('_', ''))
+        end = match.end()
+        unit_match = _UNIT_RE.match(text, end)
+        if unit_match:
+            try:
+                return Quantity(value, unit_match.group()), unit_match.end()
+            except UndefinedUnitError as ex:
+                raise ZincParseException("Invalide unit", None, 0, 0) from ex
+        return value, end
+
+    @staticmethod
+    def _to_time(match: 're.Match') -> datetime.time:
+        (hour, minute, second, fraction) = match.groups()
+        microsecond = 0
+        if fraction is not None:
+            if len(fraction) > 6:
+                raise ValueError('unconverted data remains: %s' % fraction[6:])
+            microsecond = int(fraction.ljust(6, '0'))
+        return datetime.time(int(hour), int(minute),
+                             int(second) if second is not None else 0,
+                             microsecond)
+
+    def _parse_datetime(self, iso_str: str, pos: int) -> Tuple[datetime.datetime, int]:
+        text = self.text
+        isodt = iso8601.parse_date(iso_str.upper())
+        tz_pos = self.skip_ws(pos)
+        tz_match = _TZ_NAME_RE.match(text, tz_pos)
+        if tz_match:
+            utc_match = _TZ_UTC_RE.match(text, tz_pos)
+            if utc_match and utc_match.end() > tz_match.end():
+                tz_match = utc_match
+            return isodt.astimezone(timezone(tz_match.group())), tz_match.end()
+        if isodt.tzname():
+            return isodt, pos
+        return isodt.astimezone(timezone("UTC")), pos
+
+    def _parse_ref(self, pos: int) -> Tuple[Ref, int]:
+        match = _REF_RE.match(self.text, pos)
+        name = match.group(1)  # type: ignore
+        if not name:
+            raise ZincSyntaxError('Expected ref', pos)
+        end = match.end()  # type: ignore
+        str_pos = self.skip_ws(end)
+        if self.text.startswith('"', str_pos):
+            value, end = self.parse_str(str_pos)
+            return intern_ref(name, value), end
+        return intern_ref(name), end
+
+    def _parse_uri(self, pos: int) -> Tuple[Uri, int]:
+        text = self.text
+        match = _SIMPLE_URI_RE.match(text, pos)
+        if match:
+            return Uri(match.group(1)), match.end()
+        match = _URI_RE.match(text, pos)
+        if not match:
+            raise ZincSyntaxError('Expected uri', pos)
+        return Uri(unescape_str(match.group(1), uri=True)), match.end()
+
+    def _parse_word(self, pos: int) -> Tuple[Any, int]:
+        text = self.text
+        match = _WORD_RE.match(text, pos)
+        if not match:
+            raise ZincSyntaxError('Expected scalar', pos)
+        word = match.group()
+        end = match.end()
+        if text.startswith('(', end):
+            if word == 'C':
+                coord_match = _COORD_RE.match(text, pos)
+                if coord_match:
+                    (lat, lng) = coord_match.groups()
+                    return Coordinate(float(lat.replace('_', '') or '0'),
+                                      float(lng.replace('_', '') or '0')), coord_match.end()
+            elif word == 'Bin' and not self._is_v3:
+                bin_match = _BIN_RE.match(text, pos)
+                if bin_match:
+                    return Bin(bin_match.group(1)), bin_match.end()
+        if self._is_v3:
+            paren_pos = self.skip_ws(end)
+            if text.startswith('(', paren_pos):
+                return self._parse_xstr(word, paren_pos)
+        if word in self._keywords:
+            return self._keywords[word], end
+        raise ZincSyntaxError('Expected scalar', pos)
+
+    def _parse_xstr(self, encoding: str, pos: int) -> Tuple[XStr, int]:
+        pos = self.skip_ws(pos + 1)
+        data, pos = self.parse_str(pos)
+        pos = self.expect(')', self.skip_ws(pos))
+        return XStr(encoding, data), pos
+
+    def _parse_list(self, pos: int) -> Tuple[List[Any], int]:
+        values = []
+        pos = self.skip_ws(pos + 1)
+        if self.text.startswith(',', pos):
+            pos = self.skip_ws(pos + 1)
+        elif not self.text.startswith(']', pos):
+            while True:
+                value, pos = self.parse_scalar(pos)
+                values.append(value)
+                pos = self.skip_ws(pos)
+                if not self.text.startswith(',', pos):
+                    break
+                pos = self.skip_ws(pos + 1)
+                if self.text.startswith(']', pos):
+                    break
+        return values, self.expect(']', pos)
+
+    def _parse_dict(self, pos: int) -> Tuple[Dict[str, Any], int]:
+        result = {}
+        pos = self.skip_ws(pos + 1)
+        while not self.text.startswith('}', pos):
+            name, pos = self.parse_id(pos)
+            pos = self.skip_ws(pos)
+            if self.text.startswith(':', pos):
+                value, pos = self.parse_scalar(self.skip_ws(pos + 1))
+                if value is not None:
+                    result[name] = value
+                pos = self.skip_ws(pos)
+            else:
+                result[name] = MARKER
+        return result, pos + 1
+
+    def _parse_inner_grid(self, pos: int) -> Tuple[Grid, int]:
+        grid, pos = self.parse_grid(self.skip_ws(pos + 2), inner=True)
+        return grid, self.expect('>>', self.skip_ws(pos))
+
+    def parse_meta(self, pos: int) -> Tuple[SortableDict, int]:
+        """Parse a list of metadata (marker or `id:value`), before a comma or a new line.
+
+        Args:
+            pos: The current position
+        Returns:
+            The metadata and the position at the end of the metadata
+        """
+        text = self.text
+        meta = SortableDict()
+        while True:
+            match = _ID_RE.match(text, pos)
+            if not match:
+                return meta, pos
+            name = match.group()
+            pos = self.skip_ws(match.end())
+            if text.startswith(':', pos):
+                value, pos = self.parse_scalar(self.skip_ws(pos + 1))
+                meta[name] = value
+                pos = self.skip_ws(pos)
+            else:
+                meta[name] = MARKER
+
+    def parse_header(self, pos: int) -> Tuple[Version, SortableDict, SortableDict, int]:
+        """Parse the version line and the columns line of a grid.
+
+        Args:
+            pos: The position of the `ver:` keyword
+        Returns:
+            The version, the metadata of the grid, the columns with metadata and
+            the position of the first row
+        """
+        pos = self.expect('ver:', pos)
+        ver_str, pos = self.parse_str(pos)
+        grid_meta, pos = self.parse_meta(self.skip_ws(pos))
+        pos = self.parse_nl(pos)
+
+        columns = SortableDict()
+        pos = self.skip_ws(pos)
+        while True:
+            col_name, pos = self.parse_id(pos)
+            col_meta, pos = self.parse_meta(self.skip_ws(pos))
+            columns[col_name] = col_meta if col_meta else {}
+            if not self.text.startswith(',', pos):
+                break
+            pos = self.skip_ws(pos + 1)
+        pos = self.parse_nl(pos)
+        return Version(ver_str), grid_meta, columns, pos
+
+    def parse_row(self, pos: int, col_names: List[str],
+                  layout: Optional[Type[CompactEntity]] = None) -> Tuple[Entity, int]:
+        """Parse a row of cells.
+
+        Args:
+            pos: The position of the beginning of the line
+            col_names: The names of the columns
+            layout: The layout of the columns, to return a `CompactEntity` if the row has at least
+                half of the cells
+        Returns:
+            The entity and the position of the next line
+        """
+        text = self.text
+        cells = []
+        while True:
+            pos = self.skip_ws(pos)
+            char = text[pos:pos + 1]
+            if char in (',', '\n', '\r'):
+                cells.append(None)
+            else:
+                value, pos = self.parse_scalar(pos)
+                cells.append(value)
+                pos = self.skip_ws(pos)
+            if not text.startswith(',', pos):
+                break
+            pos += 1
+        pos = self.parse_nl(pos)
+        if len(cells) < len(col_names):
+            raise ValueError('Expected %d cells' % len(col_names))
+        if layout is not None and len(cells) - cells.count(None) >= len(col_names) / 2:
+            return layout.from_values(cells), pos
+        return {name: value for name, value in zip(col_names, cells) if value is not None}, pos
+
+    def parse_grid(self, pos: int = 0, inner: bool = False,
+                   parse_all: bool = True, compact: bool = False) -> Tuple[Grid, int]:
+        """Parse a full grid.
+
+        Args:
+            pos: The position of the `ver:` keyword
+            inner: `True` if the grid is inside an other grid (`<<...>>`)
+            parse_all: If `False`, stop at the first row with an error
+            compact: `True` to save the entities with most of the columns as `CompactEntity`
+        Returns:
+            The grid, and the position after the last row
+        """
+        text = self.text
+        length = len(text)
+        version, grid_meta, columns, pos = self.parse_header(pos)
+        grid = Grid(version=version,
+                    metadata=grid_meta,
+                    columns=list(columns.items()))
+        col_names = list(columns.keys())
+        layout = entity_layout(col_names) if compact else None
+        rows: List[Entity] = []
+        while True:
+            start = self.skip_ws(pos)
+            if start >= length or (inner and text.startswith('>>', start)):
+                return grid.bulk_extend(rows), start
+            try:
+                row, pos = self.parse_row(pos, col_names, layout)
+            except ZincSyntaxError as syntax_error:
+                if not parse_all:
+                    return grid.bulk_extend(rows), start
+                # Like pyparsing, report the error at the beginning of the row
+                raise ZincSyntaxError('Invalid row, %s at char %d' % (syntax_error.message, syntax_error.pos),
+                                      start) from syntax_error
+            rows.append(row)
+
+
+def _line_col(text: str, pos: int) -> Tuple[int, int]:
+    line = text.count('\n', 0, pos) + 1
+    col = pos - text.rfind('\n', 0, pos)
+    return line, col
+
+
+def parse_grid(grid_data: str, parse_all: bool = True, compact: bool = False) -> Grid:
+    """Parse the incoming grid, without pyparsing.
+
+    Args:
+        grid_data: The Zinc string
+        parse_all: Parse all the string ?
+        compact: `True` to save the entities with most of the columns as `CompactEntity`
+    Returns:
+        The grid
+    """
+    ver_match = _VERSION_RE.match(grid_data)
+    if ver_match is None:
+        raise ZincParseException(
+            'Could not determine version from %r' % _NEWLINE_RE.split(grid_data)[0],
+            grid_data, 1, 1)
+    if '\t' in grid_data:
+        # Like pyparsing, the tabulations are expanded before parsing
+        grid_data = grid_data.expandtabs()
+    try:
+        scanner = ZincScanner(grid_data, Version(ver_match.group(1)))
+        grid, pos = scanner.parse_grid(0, parse_all=parse_all, compact=compact)
+        if parse_all and scanner.skip_ws(pos) != len(grid_data):
+            raise ZincSyntaxError('Expected end of text', pos)
+        return grid
+    except ZincSyntaxError as syntax_error:
+        LOG.debug('Failing grid: %r', grid_data)
+        line, col = _line_col(grid_data, syntax_error.pos)
+        raise ZincParseException(
+            'Failed to parse: %s (line:%d, col:%d)' % (syntax_error.message, line, col),
+            grid_data, line, col) from syntax_error
+    except ValueError as ex:
+        LOG.debug('Failing grid: %r', grid_data)
+        raise ZincParseException(
+            'Failed to parse: %s' % sys.exc_info()[0], grid_data, 0, 0) from ex
+
+
+def parse_scalar(scalar_data: str, version: Version = LATEST_VER) -> Any:
+    """Parse a Project Haystack scalar in ZINC format, without pyparsing.
+
+    Args:
+        scalar_data: The zinc string scalar
+        version: The Haystack version
+    Returns:
+        The scalar value
+    """
+    if not isinstance(scalar_data, str) or scalar_data != scalar_data.strip():
+        raise ZincParseException('Failed to parse scalar: %s' % scalar_data, None, None, None)
+    if '\t' in scalar_data:
+        scalar_data = scalar_data.expandtabs()
+    scanner = ZincScanner(scalar_data, version)
+    try:
+        value, pos = scanner.parse_scalar(0)
+        if pos != len(scalar_data):
+            raise ZincSyntaxError('Expected end of text', pos)
+        return value
+    except ZincSyntaxError as syntax_error:
+        raise ZincParseException(
+            'Failed to parse scalar: %s (line:1, col:%d)' % (syntax_error.message, syntax_error.pos + 1),
+            scalar_data, 1, syntax_error.pos + 1) from syntax_error
+
+
+def _read_chunks(stream: IO) -> Iterator[Union[str, bytes]]:
+    while True:
+        chunk = stream.read(_STREAM_CHUNK_SIZE)
+        if not chunk:
+            return
+        yield chunk
+
+
+def _iter_lines(source: Union[IO, Iterable[Union[str, bytes]]]) -> Iterator[str]:
+    """Split a stream in lines, with the final new line.
+
+    Args:
+        source: A file object (text or binary), or an iterable of `str` or `bytes` chunks.
+            The `bytes` are decoded in `utf-8` (with an optional BOM).
+    Returns:
+        The lines. Like `parse()`, a new line is added to the last line if necessary.
+    """
+    chunks = _read_chunks(source) if hasattr(source, 'read') else source  # type: ignore
+    decoder = codecs.getincrementaldecoder('utf-8-sig')()
+    pending = ''
+    for chunk in chunks:
+        if isinstance(chunk, (bytes, bytearray)):
+            chunk = decoder.decode(chunk)
+        lines = (pending + chunk).split('\n')
+        pending = lines.pop()
+        for line in lines:
+            yield line + '\n'
+    pending += decoder.decode(b'', final=True)
+    if pending:
+        yield pending + '\n'
+
+
+def _is_truncated(syntax_error: BaseException, length: int) -> bool:
+    """Return `True` if the error, or one of its causes, is at the end of the text."""
+    while isinstance(syntax_error, ZincSyntaxError):
+        if syntax_error.pos >= length:
+            return True
+        syntax_error = syntax_error.__cause__  # type: ignore
+    return False
+
+
+def _scan_lines(scanner: ZincScanner, text: str, lines: Iterator[str],
+                parse: Callable[[], Tuple[Any, ...]]) -> Tuple[Any, ...]:
+    """Apply `parse` on the text, and add the next lines while the text is truncated
+    (a grid in a grid, for example). At the end, `scanner.text` is the parsed text.
+
+    Returns:
+        The result of `parse`
+    """
+    while True:
+        scanner.text = text
+        try:
+            return parse()
+        except ZincSyntaxError as syntax_error:
+            if not _is_truncated(syntax_error, len(text)):
+                raise
+            next_line = next(lines, None)
+            if next_line is None:
+                raise
+            text += next_line
+
+
+def iter_zinc_rows(source: Union[IO, Iterable[Union[str, bytes]]]) -> Tuple[Grid, Iterator[Entity]]:
+    """Parse a Zinc grid from a stream, row by row, without loading all the text in memory.
+
+    The header (version, metadata and columns) is parsed immediately, and the entities are parsed
+    only when the returned iterator is consumed.
+        header, rows = iter_zinc_rows(open("ontology.zinc", "rb"))
+        for entity in rows:
+            ...
+
+    Args:
+        source: A file object (text or binary), or an iterable of `str` or `bytes` chunks
+    Returns:
+        An empty grid with the version, the metadata and the columns, and an iterator of entities
+    """
+    lines = (line.expandtabs() if '\t' in line else line for line in _iter_lines(source))
+    first_line = next(lines, '')
+    ver_match = _VERSION_RE.match(first_line)
+    if ver_match is None:
+        raise ZincParseException(
+            'Could not determine version from %r' % _NEWLINE_RE.split(first_line)[0],
+            first_line, 1, 1)
+    text = first_line
+    try:
+        scanner = ZincScanner(text, Version(ver_match.group(1)))
+        version, grid_meta, columns, pos = _scan_lines(scanner, text, lines,
+                                                       lambda: scanner.parse_header(0))
+    except ZincSyntaxError as syntax_error:
+        line, col = _line_col(scanner.text, syntax_error.pos)
+        raise ZincParseException(
+            'Failed to parse: %s (line:%d, col:%d)' % (syntax_error.message, line, col),
+            scanner.text, line, col) from syntax_error
+    except ValueError as ex:
+        raise ZincParseException(
+            'Failed to parse: %s' % sys.exc_info()[0], text, 0, 0) from ex
+    header = Grid(version=version,
+                  metadata=grid_meta,
+                  columns=list(columns.items()))
+    return header, _iter_rows(scanner, scanner.text[pos:], lines, list(columns.keys()),
+                              scanner.text.count('\n', 0, pos) + 1)
+
+
+def _iter_rows(scanner: ZincScanner, text: str, lines: Iterator[str],
+               col_names: List[str], line_no: int) -> Iterator[Entity]:
+    while True:
+        if not text:
+            text = next(lines, '')
+            if not text:
+                return
+        try:
+            row, pos = _scan_lines(scanner, text, lines,
+                                   lambda: scanner.parse_row(0, col_names))
+        except ZincSyntaxError as syntax_error:
+            LOG.debug('Failing row: %r', scanner.text)
+            raise ZincParseException(
+                'Failed to parse: Invalid row, %s at char %d (line:%d, col:1)' %
+                (syntax_error.message, syntax_error.pos, line_no),
+                scanner.text, line_no, 1) from syntax_error
+        except ValueError as ex:
+            LOG.debug('Failing row: %r', scanner.text)
+            raise ZincParseException(
+                'Failed to parse: %s' % sys.exc_info()[0], scanner.text, line_no, 1) from ex
+        line_no += scanner.text.count('\n', 0, pos)
+        text = scanner.text[pos:]
+        yield row
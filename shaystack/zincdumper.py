@@ -14,14 +14,14 @@ from __future__ import unicode_literals
 
 import datetime
 import functools
-from typing import Tuple, Any, List
+from typing import Tuple, Any, List, Dict, Callable, Iterator
 
 from .datatypes import Quantity, Coordinate, Ref, Bin, Uri, \
-    MARKER, NA, REMOVE, XStr
+    MARKER, XStr, _MarkerType, _NAType, _RemoveType
 from .grid import Grid
 from .metadata import MetadataObject
 from .sortabledict import SortableDict
-from .tools import escape_str
+from .tools import escape_str, find_encoder
 from .type import Entity
 from .version import LATEST_VER, VER_3_0, Version
 from .zoneinfo import timezone_name
@@ -58,15 +58,32 @@ def _dump_column(col: str, col_meta: MetadataObject, version: Version = LATEST_V
 
 
 def _dump_rows(grid: Grid) -> List[str]:
-    return list(map(functools.partial(_dump_row, grid), grid))
+    return list(map(_row_dumper(grid), grid))
+
+
+def _row_dumper(grid: Grid) -> Callable[[Entity], str]:
+    """Return a function to dump the rows of a grid, specialized for its columns and its version."""
+    columns = tuple(grid.column.keys())
+    version = grid.version
+    missing = '' if len(columns) > 1 else 'N'
+    encoders = _ENCODERS
+
+    def _dump_row(row: Entity) -> str:
+        cells = []
+        for column in columns:
+            value = row.get(column, _EMPTY)
+            if value is _EMPTY:
+                cells.append(missing)
+                continue
+            encoder = encoders.get(type(value))
+            cells.append(encoder(value, version) if encoder else dump_scalar(value, version))
+        return ','.join(cells)
+
+    return _dump_row
 
 
 def _dump_row(grid: Grid, row: Entity) -> str:
-    if len(grid.column.keys()) > 1:
-        return ','.join([dump_scalar(row.get(c, _EMPTY), version=grid.version) for
-                         c in grid.column.keys()])
-    return ','.join([dump_scalar(row.get(c, None), version=grid.version) for
-                     c in grid.column.keys()])
+    return _row_dumper(grid)(row)
 
 
 def _dump_id(id_str: str) -> str:
@@ -130,6 +147,13 @@ def _dump_hs_date_time(date_time: datetime.datetime) -> str:
     return '%s %s' % (date_time.isoformat(), tz_name)
 
 
+def _dump_header(grid: Grid) -> str:
+    header = 'ver:%s' % _dump_str(str(grid.version))
+    if bool(grid.metadata):
+        header += ' ' + _dump_meta(grid.metadata, version=grid.version)
+    return header
+
+
 def dump_grid(grid: Grid) -> str:
     """Dump a single grid to its ZINC representation.
 
@@ -138,12 +162,76 @@ def dump_grid(grid: Grid) -> str:
     Returns:
         a Zinc string
     """
-    header = 'ver:%s' % _dump_str(str(grid.version))
-    if bool(grid.metadata):
-        header += ' ' + _dump_meta(grid.metadata, version=grid.version)
     columns = _dump_columns(grid.column, version=grid.version)
     rows = _dump_rows(grid)
-    return '\n'.join([header, columns] + rows + [''])
+    return '\n'.join([_dump_header(grid), columns] + rows + [''])
+
+
+def dump_grid_iter(grid: Grid) -> Iterator[str]:
+    """Dump a single grid to its ZINC representation, line by line.
+
+    Args:
+        grid: The grid to dump
+    Returns:
+        The lines of the Zinc string, with the end of line
+    """
+    yield _dump_header(grid) + '\n'
+    yield _dump_columns(grid.column, version=grid.version) + '\n'
+    for line in map(_row_dumper(grid), grid):
+        yield line + '\n'
+
+
+def _dump_na(_: Any, version: Version) -> str:
+    if version < VER_3_0:
+        raise ValueError('Project Haystack version %s '
+                         'does not support NA'
+                         % version)
+    return 'NA'
+
+
+def _dump_list(lst: List[Any], version: Version) -> str:
+    # Forbid version 2.0 and earlier.
+    if version < VER_3_0:
+        raise ValueError('Project Haystack version %s '
+                         'does not support lists'
+                         % version)
+    return '[%s]' % ','.join(map(
+        functools.partial(dump_scalar, version=version),
+        lst))
+
+
+def _dump_dict(dic: Dict[str, Any], version: Version) -> str:
+    # Forbid version 2.0 and earlier.
+    if version < VER_3_0:
+        raise ValueError('Project Haystack version %s '
+                         'does not support dicts'
+                         % version)
+    return '{' + ' '.join([k + ':' + dump_scalar(v, version=version) for (k, v) in dic.items()]) + '}'
+
+
+# The encoder of each type. The subclasses are added at the first use (see `find_encoder()`).
+_ENCODERS: Dict[type, Callable[[Any, Version], str]] = {
+    type(None): lambda _, __: 'N',
+    _NAType: _dump_na,
+    _MarkerType: lambda _, __: 'M',
+    _RemoveType: lambda _, __: 'R',
+    list: _dump_list,
+    dict: _dump_dict,
+    bool: lambda value, _: _dump_bool(value),
+    Ref: lambda value, _: _dump_ref(value),
+    Bin: lambda value, _: _dump_bin(value),
+    XStr: lambda value, _: _dump_xstr(value),
+    Uri: lambda value, _: _dump_uri(value),
+    str: lambda value, _: _dump_str(value),
+    datetime.datetime: lambda value, _: _dump_hs_date_time(value),
+    datetime.time: lambda value, _: _dump_hs_time(value),
+    datetime.date: lambda value, _: _dump_hs_date(value),
+    Coordinate: lambda value, _: _dump_coord(value),
+    Quantity: lambda value, _: _dump_quantity(value),
+    float: lambda value, _: _dump_decimal(value),
+    int: lambda value, _: _dump_decimal(value),
+    Grid: lambda value, _: "<<" + dump_grid(value) + ">>",
+}
 
 
 def dump_scalar(scalar: Any, version: Version = LATEST_VER) -> str:
@@ -157,58 +245,7 @@ def dump_scalar(scalar: Any, version: Version = LATEST_VER) -> str:
     """
     if scalar is _EMPTY:
         return ""
-    if scalar is None:
-        return 'N'
-    if scalar is NA:
-        if version < VER_3_0:
-            raise ValueError('Project Haystack version %s '
-                             'does not support NA'
-                             % version)
-        return 'NA'
-    if scalar is MARKER:
-        return 'M'
-    if scalar is REMOVE:
-        return 'R'
-    if isinstance(scalar, list):
-        # Forbid version 2.0 and earlier.
-        if version < VER_3_0:
-            raise ValueError('Project Haystack version %s '
-                             'does not support lists'
-                             % version)
-        return '[%s]' % ','.join(map(
-            functools.partial(dump_scalar, version=version),
-            scalar))
-    if isinstance(scalar, dict):
-        # Forbid version 2.0 and earlier.
-        if version < VER_3_0:
-            raise ValueError('Project Haystack version %s '
-                             'does not support dicts'
-                             % version)
-        return '{' + ' '.join([k + ':' + dump_scalar(v, version=version) for (k, v) in scalar.items()]) + '}'
-    if isinstance(scalar, bool):
-        return _dump_bool(scalar)
-    if isinstance(scalar, Ref):
-        return _dump_ref(scalar)
-    if isinstance(scalar, Bin):
-        return _dump_bin(scalar)
-    if isinstance(scalar, XStr):
-        return _dump_xstr(scalar)
-    if isinstance(scalar, Uri):
-        return _dump_uri(scalar)
-    if isinstance(scalar, str):
-        return _dump_str(scalar)
-    if isinstance(scalar, datetime.datetime):
-        return _dump_hs_date_time(scalar)
-    if isinstance(scalar, datetime.time):
-        return _dump_hs_time(scalar)
-    if isinstance(scalar, datetime.date):
-        return _dump_hs_date(scalar)
-    if isinstance(scalar, Coordinate):
-        return _dump_coord(scalar)
-    if isinstance(scalar, Quantity):
-        return _dump_quantity(scalar)
-    if isinstance(scalar, (float, int)):
-        return _dump_decimal(scalar)
-    if isinstance(scalar, Grid):
-        return "<<" + dump_grid(scalar) + ">>"
-    raise NotImplementedError('Unhandled case: %r' % scalar)
+    encoder = _ENCODERS.get(type(scalar)) or find_encoder(_ENCODERS, type(scalar))
+    if encoder is None:
+        raise NotImplementedError('Unhandled case: %r' % scalar)
+    return encoder(scalar, version)
@@ -15,7 +15,7 @@ import datetime
 import logging
 import re
 import sys
-from threading import RLock
+from threading import RLock, local
 from typing import Dict, Any, Callable, List, Tuple
 from typing import Optional as Typing_Optional
 
@@ -24,7 +24,9 @@ from pint import UndefinedUnitError
 from pyparsing import Regex, Forward, Combine, Suppress, CaselessLiteral, Literal, Optional, ParseException, \
     Word, Group, Empty, delimitedList, ParserElement
 
-from .datatypes import Quantity, Coordinate, Uri, Bin, MARKER, NA, REMOVE, Ref, XStr
+from .compact_entity import compact_entities
+from .datatypes import Quantity, Coordinate, Uri, Bin, MARKER, NA, REMOVE, XStr, intern_ref, \
+    ENGINE_FAST, ENGINE_PYPARSING
 from .grid import Grid
 # Bring in our sortable dict class to preserve order
 from .sortabledict import SortableDict
@@ -40,6 +42,9 @@ LOG = logging.getLogger(__name__)
 _VERSION_RE = re.compile(r'^ver:"(([^"\\]|\\[\\"bfnrt$])+)"')
 _NEWLINE_RE = re.compile(r'\r?\n')
 
+# Parser engine
+DEFAULT_ENGINE = ENGINE_FAST
+
 # Character number regex; for exceptions
 _CHAR_NUM_RE = re.compile(r' *\(at char \d+\),')
 
@@ -105,12 +110,10 @@ def _gen_grid(toks: List[Any]) -> Grid:
     (grid_meta, col_meta, rows) = toks
     if len(rows) == 1 and rows[0] is None:
         rows = []
-    grid = Grid(version=grid_meta.pop('ver'),
-                metadata=grid_meta,
-                columns=list(col_meta.items()))
-    for row in rows:
-        grid.append({k: row[p] for p, k in enumerate(col_meta.keys()) if row[p] is not None})
-    return grid
+    col_names = list(col_meta.keys())
+    return Grid.from_rows(grid_meta.pop('ver'), grid_meta, list(col_meta.items()),
+                          ({k: row[p] for p, k in enumerate(col_names) if row[p] is not None}
+                           for row in rows))
 
 
 def toks_to_dict(toks: List[Any]) -> Dict[str, Any]:
@@ -237,113 +240,14 @@ class _GenerateMatch:
 #   "3.0":  https://web.archive.org/web/20160805064015/http://project-haystack.org:80/doc/Zinc
 
 ParserElement.setDefaultWhitespaceChars(' \t')
-# Rudimentary elements
-hs_digit = Regex(r'\d')
-hs_digits = Regex(r'[0-9_]+').setParseAction(
-    lambda toks: [''.join([t.replace('_', '') for t in toks[0]])])
-hs_alpha = Regex(r'[a-zA-Z]')
-hs_plusMinus = Literal('+') ^ '-'
-
-# Forward declaration of data types.
-hs_scalar_2_0 = Forward()
-hs_scalar_3_0 = Forward()
-hs_scalar = _NearestMatch({
-    VER_2_0: hs_scalar_2_0,
-    VER_3_0: hs_scalar_3_0
-})
-
-hs_grid_2_0 = Forward()
-hs_grid_3_0 = Forward()
-hs_grid = _NearestMatch({
-    VER_2_0: hs_grid_2_0,
-    VER_3_0: hs_grid_3_0
-})
-
-# Co-ordinates
-hs_coordDeg = Combine(
-    Optional('-') +
-    Optional(hs_digits) +
-    Optional('.' + hs_digits)
-).setParseAction(lambda toks: [float(toks[0] or '0')])
-hs_coord = (Suppress('C(') +
-            hs_coordDeg +
-            Suppress(',') +
-            hs_coordDeg +
-            Suppress(')')).setParseAction(
-    lambda toks: [Coordinate(toks[0], toks[1])])
-
-# Dates and times
-hs_tzHHMMOffset = Combine(
-    CaselessLiteral('z') ^
-    hs_plusMinus + Regex(r'\d\d:\d\d')
-)
-hs_tzName = Regex(r'[A-Z][a-zA-Z0-9_\-]*')
-hs_tz_UTC_GMT = Literal('UTC') ^ 'GMT'
-hs_tzUTCOffset = Combine(
-    hs_tz_UTC_GMT + Optional(
-        hs_plusMinus + hs_digit[1, ...] ^
-        '0'
-    ))
-hs_timeZoneName = hs_tzUTCOffset ^ hs_tzName
-hs_dateSep = CaselessLiteral('T')
-hs_date_str = Combine(
-    hs_digit + hs_digit + hs_digit + hs_digit +
-    '-' +
-    hs_digit + hs_digit +
-    '-' +
-    hs_digit + hs_digit)
-hs_date = hs_date_str.copy().setParseAction(
-    lambda toks: [datetime.datetime.strptime(toks[0], '%Y-%m-%d').date()])
-
-hs_time_str = Combine(
-    hs_digit + hs_digit +
-    ':' +
-    hs_digit + hs_digit +
-    Optional(
-        ':' +
-        hs_digit + hs_digit +
-        Optional(
-            '.' +
-            hs_digit[1, ...])
-    )
-)
-
-hs_time = hs_time_str.copy().setParseAction(_parse_time)
-hs_isoDateTime = Combine(
-    hs_date_str +
-    hs_dateSep +
-    hs_time_str +
-    Optional(hs_tzHHMMOffset)
-).setParseAction(lambda toks: [iso8601.parse_date(toks[0].upper())])
-
-hs_dateTime = (
-        hs_isoDateTime +
-        Optional(hs_timeZoneName)
-).setParseAction(_parse_datetime)
-
-hs_all_date = hs_dateTime | hs_date | hs_time
-
-# Quantities and raw numeric values
-hs_unitChar = hs_alpha ^ Word('%_/$' + ''.join([
-    chr(c)
-    for c in range(0x0080, 0xffff)
-]), exact=1)
-
-hs_unit = Combine(hs_unitChar[1, ...])
-hs_exp = Combine(
-    CaselessLiteral('e') +
-    Optional(hs_plusMinus) +
-    hs_digits
-)
-hs_decimal = Combine(
-    Optional('-') +
-    hs_digits +
-    Optional(
-        '.' +
-        hs_digits
-    ) +
-    Optional(hs_exp)
-).setParseAction(lambda toks: [float(toks[0])])
+
+
+def _unit_chars() -> str:
+    """The characters of a unit, in addition to the letters. Computed only when a grammar is built."""
+    return '%_/$' + ''.join([
+        chr(c)
+        for c in range(0x0080, 0xffff)
+    ])
 
 
 def _quantity(toks):
@@ -353,228 +257,404 @@ def _quantity(toks):
         raise ZincParseException("Invalide unit", None, 0, 0) from ex
 
 
-hs_quantity = (hs_decimal + hs_unit).leaveWhitespace() \
-    .setParseAction(_quantity)
-hs_number = hs_quantity ^ hs_decimal ^ (
-        Literal('INF') ^
-        '-INF' ^
-        'NaN'
-).setParseAction(lambda toks: [float(toks[0])])
-
-# URIs
-hs_uriChar = Regex(r"([^\x00-\x1f\\`]|\\[bfnrt\\:/?"
-                   + r"#\[\]@&=;`]|\\[uU][0-9a-fA-F]{4})")
-hs_uri = Combine(
-    Suppress('`') +
-    hs_uriChar[...] +
-    Suppress('`')
-).setParseAction(lambda toks: [Uri(unescape_str(toks[0], uri=True))])
-
-# Strings
-hs_strChar = Regex(r"([^\x00-\x1f\\\"]|\\[bfnrt\\\"$]|\\[uU][0-9a-fA-F]{4})")
-hs_str = Combine(
-    Suppress('"') +
-    hs_strChar[...] +
-    Suppress('"')
-).setParseAction(lambda toks: [unescape_str(toks[0], uri=False)])
-
-# References
-hs_refChar = hs_alpha ^ hs_digit ^ Word('_:-.~', exact=1)
-hs_ref = (
-        Suppress('@') +
-        Combine(hs_refChar[...]) +
-        Optional(hs_str)
-).setParseAction(lambda toks: [
-    Ref(toks[0], toks[1] if len(toks) > 1 else None)
-])
-
-# Bins
-hs_binChar = Regex(r"[\x20-\x27\x2a-\x7f]")
-hs_bin = Combine(
-    Suppress('Bin(') +
-    Combine(hs_binChar[...]) +
-    Suppress(')')
-).setParseAction(lambda toks: [Bin(toks[0])])
-
-# Haystack 3.0 XStr(...)
-hs_xstr = (
-        Regex(r"[a-zA-Z0-9_]+") +
-        Suppress('(') +
-        hs_str +
-        Suppress(')')
-).setParseAction(lambda toks: [XStr(toks[0], toks[1])])
-
-# Booleans
-hs_bool = Word('TF', min=1, max=1, exact=1).setParseAction(
-    lambda toks: [toks[0] == 'T'])
-
-# Singleton values
-hs_remove = Literal('R').setParseAction(
-    lambda toks: [REMOVE]).setName('remove')
-hs_marker = Literal('M').setParseAction(
-    lambda toks: [MARKER]).setName('marker')
-hs_null = Literal('N').setParseAction(
-    lambda toks: [None]).setName('null')
-hs_na = Literal('NA').setParseAction(
-    lambda toks: [NA]).setName('na')
-# Lists, these will probably be in Haystack 4.0, so let's not
-# assume a version.  There are three cases:
-# - Empty list: [ {optional whitespace} ]
-# - List *with* trailing comma: [ 1, 2, 3, ]
-# - List without trailing comma: [ 1, 2, 3 ]
-#
-# We need to handle this trailing separator case.  That for now means
-# that a NULL within a list *MUST* be explicitly given using the 'N'
-# literal: we cannot support implicit NULLs as they are ambiguous.
-hs_list = _GenerateMatch(
-    lambda ver: Group(
-        Suppress('[') +
-        Optional(delimitedList(
-            hs_scalar[ver],
-            delim=',')) +
-        Suppress(Optional(',')) +
-        Suppress(']')
-    ).setParseAction(lambda toks: toks.asList()))
-# Tag IDs
-hs_id = Regex(r'[a-z_][a-zA-Z0-9_]*').setName('id')
-
-# Grid building blocks
-hs_cell = _GenerateMatch(
-    lambda ver: (Empty().copy().setParseAction(lambda toks: [None]) ^
-                 hs_scalar[ver]).setName('cell'))
-
-# Dict
-# There are three cases:
-# - Empty dict: { {optional whitespace} }
-# - map with marker: { m }
-# - dics: { k:1  ]
-#
-hs_tagmarker = hs_id
-
-hs_tagpair = _GenerateMatch(
-    lambda ver: (hs_id +
-                 Suppress(':') +
-                 hs_scalar[ver]
-                 ).setParseAction(lambda toks: tuple(toks[:2])).setName('tagPair'))
-
-hs_tag = _GenerateMatch(
-    lambda ver: (hs_tagmarker ^ hs_tagpair[ver]).setName('tag'))
-
-hs_tags = _GenerateMatch(
-    lambda ver: hs_tag[ver][...].setName('tags'))
-
-hs_dict = _GenerateMatch(
-    lambda ver:
-    (Suppress('{') +
-     hs_tags[ver] +
-     Suppress('}')
-     ).setName("dict").setParseAction(toks_to_dict)
-)
-
-hs_inner_grid = _GenerateMatch(
-    lambda ver:
-    Suppress('<<') +
-    hs_grid[ver] +
-    Suppress('>>')
-)
-
-# All possible scalar values, by Haystack version
-hs_scalar_2_0 <<= (hs_ref ^ hs_bin ^ hs_str ^ hs_uri ^ hs_all_date ^
-                   hs_coord ^ hs_number ^ hs_null ^ hs_marker ^
-                   hs_remove ^ hs_bool).setName('scalar')
-hs_scalar_3_0 <<= (hs_ref ^ hs_xstr ^ hs_str ^ hs_uri ^ hs_all_date ^
-                   hs_coord ^ hs_number ^ hs_na ^ hs_null ^ hs_marker ^
-                   hs_remove ^ hs_bool ^ hs_list[VER_3_0] ^ hs_dict[VER_3_0] ^
-                   hs_inner_grid[VER_3_0]).setName('scalar')
-
-hs_nl = Combine(Optional('\r') + '\n')
-
-hs_row = _GenerateMatch(
-    lambda ver: Group(delimitedList(hs_cell[ver], delim=',') +
-                      Suppress(hs_nl)
-                      ).setName('row'))
-
-hs_rows = _GenerateMatch(
-    lambda ver: Group(hs_row[ver][...]).setName("rows"))
-
-hs_metaPair = _GenerateMatch(
-    lambda ver: (
-            hs_id +
-            Suppress(':') +
-            hs_scalar[ver]
-    ).setParseAction(lambda toks: [tuple(toks[:2])]).setName('metaPair'))
-hs_metaMarker = hs_id.copy().setParseAction(
-    lambda toks: [(toks[0], MARKER)]).setName('metaMarker')
-hs_metaItem = _GenerateMatch(
-    lambda ver: (
-            hs_metaMarker ^
-            hs_metaPair[ver]
-    ).setName('metaItem'))
-hs_meta = _GenerateMatch(
-    lambda ver: hs_metaItem[ver][1, ...].setParseAction(
-        lambda toks: [SortableDict(toks.asList())]
-    ).setName('meta'))
-
-hs_col = _GenerateMatch(
-    lambda ver: (
-            hs_id +
-            Optional(hs_meta[ver]).setName('colMeta')
+class _ZincGrammar:  # pylint: disable=too-few-public-methods,too-many-instance-attributes
+    """The root elements of a Zinc grammar.
+
+    pyparsing elements are not thread safe, so each thread uses its own instance (see `zinc_grammar()`).
+    """
+    __slots__ = ("hs_scalar", "hs_scalar_2_0", "hs_scalar_3_0",
+                 "hs_grid", "hs_grid_2_0", "hs_grid_3_0",
+                 "hs_id", "hs_nl", "hs_all_date", "hs_date", "hs_time")
+
+    def __init__(self, **elements: Any):
+        for name, element in elements.items():
+            setattr(self, name, element)
+
+
+def _build_grammar() -> _ZincGrammar:  # pylint: disable=too-many-locals,too-many-statements
+    """Build a new instance of the Zinc grammar. Each version of the sub-grammars
+    are generated lazily by `_GenerateMatch` and `_NearestMatch`.
+    """
+    # Rudimentary elements
+    hs_digit = Regex(r'\d')
+    hs_digits = Regex(r'[0-9_]+').setParseAction(
+        lambda toks: [''.join([t.replace('_', '') for t in toks[0]])])
+    hs_alpha = Regex(r'[a-zA-Z]')
+    hs_plusMinus = Literal('+') ^ '-'
+
+    # Forward declaration of data types.
+    hs_scalar_2_0 = Forward()
+    hs_scalar_3_0 = Forward()
+    hs_scalar = _NearestMatch({
+        VER_2_0: hs_scalar_2_0,
+        VER_3_0: hs_scalar_3_0
+    })
+
+    hs_grid_2_0 = Forward()
+    hs_grid_3_0 = Forward()
+    hs_grid = _NearestMatch({
+        VER_2_0: hs_grid_2_0,
+        VER_3_0: hs_grid_3_0
+    })
+
+    # Co-ordinates
+    hs_coordDeg = Combine(
+        Optional('-') +
+        Optional(hs_digits) +
+        Optional('.' + hs_digits)
+    ).setParseAction(lambda toks: [float(toks[0] or '0')])
+    hs_coord = (Suppress('C(') +
+                hs_coordDeg +
+                Suppress(',') +
+                hs_coordDeg +
+                Suppress(')')).setParseAction(
+        lambda toks: [Coordinate(toks[0], toks[1])])
+
+    # Dates and times
+    hs_tzHHMMOffset = Combine(
+        CaselessLiteral('z') ^
+        hs_plusMinus + Regex(r'\d\d:\d\d')
+    )
+    hs_tzName = Regex(r'[A-Z][a-zA-Z0-9_\-]*')
+    hs_tz_UTC_GMT = Literal('UTC') ^ 'GMT'
+    hs_tzUTCOffset = Combine(
+        hs_tz_UTC_GMT + Optional(
+            hs_plusMinus + hs_digit[1, ...] ^
+            '0'
+        ))
+    hs_timeZoneName = hs_tzUTCOffset ^ hs_tzName
+    hs_dateSep = CaselessLiteral('T')
+    hs_date_str = Combine(
+        hs_digit + hs_digit + hs_digit + hs_digit +
+        '-' +
+        hs_digit + hs_digit +
+        '-' +
+        hs_digit + hs_digit)
+    hs_date = hs_date_str.copy().setParseAction(
+        lambda toks: [datetime.datetime.strptime(toks[0], '%Y-%m-%d').date()])
+
+    hs_time_str = Combine(
+        hs_digit + hs_digit +
+        ':' +
+        hs_digit + hs_digit +
+        Optional(
+            ':' +
+            hs_digit + hs_digit +
+            Optional(
+                '.' +
+                hs_digit[1, ...])
+        )
+    )
+
+    hs_time = hs_time_str.copy().setParseAction(_parse_time)
+    hs_isoDateTime = Combine(
+        hs_date_str +
+        hs_dateSep +
+        hs_time_str +
+        Optional(hs_tzHHMMOffset)
+    ).setParseAction(lambda toks: [iso8601.parse_date(toks[0].upper())])
+
+    hs_dateTime = (
+            hs_isoDateTime +
+            Optional(hs_timeZoneName)
+    ).setParseAction(_parse_datetime)
+
+    hs_all_date = hs_dateTime | hs_date | hs_time
+
+    # Quantities and raw numeric values
+    hs_unitChar = hs_alpha ^ Word(_unit_chars(), exact=1)
+
+    hs_unit = Combine(hs_unitChar[1, ...])
+    hs_exp = Combine(
+        CaselessLiteral('e') +
+        Optional(hs_plusMinus) +
+        hs_digits
+    )
+    hs_decimal = Combine(
+        Optional('-') +
+        hs_digits +
+        Optional(
+            '.' +
+            hs_digits
+        ) +
+        Optional(hs_exp)
+    ).setParseAction(lambda toks: [float(toks[0])])
+
+
+    hs_quantity = (hs_decimal + hs_unit).leaveWhitespace() \
+        .setParseAction(_quantity)
+    hs_number = hs_quantity ^ hs_decimal ^ (
+            Literal('INF') ^
+            '-INF' ^
+            'NaN'
+    ).setParseAction(lambda toks: [float(toks[0])])
+
+    # URIs
+    hs_uriChar = Regex(r"([^\x00-\x1f\\`]|\\[bfnrt\\:/?"
+                       + r"#\[\]@&=;`]|\\[uU][0-9a-fA-F]{4})")
+    hs_uri = Combine(
+        Suppress('`') +
+        hs_uriChar[...] +
+        Suppress('`')
+    ).setParseAction(lambda toks: [Uri(unescape_str(toks[0], uri=True))])
+
+    # Strings
+    hs_strChar = Regex(r"([^\x00-\x1f\\\"]|\\[bfnrt\\\"$]|\\[uU][0-9a-fA-F]{4})")
+    hs_str = Combine(
+        Suppress('"') +
+        hs_strChar[...] +
+        Suppress('"')
+    ).setParseAction(lambda toks: [unescape_str(toks[0], uri=False)])
+
+    # References
+    hs_refChar = hs_alpha ^ hs_digit ^ Word('_:-.~', exact=1)
+    hs_ref = (
+            Suppress('@') +
+            Combine(hs_refChar[...]) +
+            Optional(hs_str)
     ).setParseAction(lambda toks: [
-        (toks[0], toks[1] if len(toks) > 1 else {})]))
-
-hs_cols = _GenerateMatch(
-    lambda ver:
-    delimitedList(
-        hs_col[ver], delim=',')
-        .setParseAction(lambda toks: [SortableDict(toks.asList())]) +
-    Suppress(hs_nl)
-)
-
-hs_gridVer = Combine(Suppress('ver:') + hs_str)
-
-hs_gridMeta = _GenerateMatch(
-    lambda ver: (
-            hs_gridVer +
-            Optional(hs_meta[ver]).setName('gridMeta') +
-            Suppress(hs_nl)
-    ).setParseAction(_assign_ver))
-
-hs_grid_2_0 <<= (
-        hs_gridMeta[VER_2_0] +
-        hs_cols[VER_2_0] +
-        hs_rows[VER_2_0]
-).setParseAction(_gen_grid)
-
-hs_grid_3_0 <<= (
-        hs_gridMeta[VER_3_0] +
-        hs_cols[VER_3_0] +
-        hs_rows[VER_3_0]
-).setParseAction(_gen_grid)
+        intern_ref(toks[0], toks[1] if len(toks) > 1 else None)
+    ])
+
+    # Bins
+    hs_binChar = Regex(r"[\x20-\x27\x2a-\x7f]")
+    hs_bin = Combine(
+        Suppress('Bin(') +
+        Combine(hs_binChar[...]) +
+        Suppress(')')
+    ).setParseAction(lambda toks: [Bin(toks[0])])
+
+    # Haystack 3.0 XStr(...)
+    hs_xstr = (
+            Regex(r"[a-zA-Z0-9_]+") +
+            Suppress('(') +
+            hs_str +
+            Suppress(')')
+    ).setParseAction(lambda toks: [XStr(toks[0], toks[1])])
+
+    # Booleans
+    hs_bool = Word('TF', min=1, max=1, exact=1).setParseAction(
+        lambda toks: [toks[0] == 'T'])
+
+    # Singleton values
+    hs_remove = Literal('R').setParseAction(
+        lambda toks: [REMOVE]).setName('remove')
+    hs_marker = Literal('M').setParseAction(
+        lambda toks: [MARKER]).setName('marker')
+    hs_null = Literal('N').setParseAction(
+        lambda toks: [None]).setName('null')
+    hs_na = Literal('NA').setParseAction(
+        lambda toks: [NA]).setName('na')
+    # Lists, these will probably be in Haystack 4.0, so let's not
+    # assume a version.  There are three cases:
+    # - Empty list: [ {optional whitespace} ]
+    # - List *with* trailing comma: [ 1, 2, 3, ]
+    # - List without trailing comma: [ 1, 2, 3 ]
+    #
+    # We need to handle this trailing separator case.  That for now means
+    # that a NULL within a list *MUST* be explicitly given using the 'N'
+    # literal: we cannot support implicit NULLs as they are ambiguous.
+    hs_list = _GenerateMatch(
+        lambda ver: Group(
+            Suppress('[') +
+            Optional(delimitedList(
+                hs_scalar[ver],
+                delim=',')) +
+            Suppress(Optional(',')) +
+            Suppress(']')
+        ).setParseAction(lambda toks: toks.asList()))
+    # Tag IDs
+    hs_id = Regex(r'[a-z_][a-zA-Z0-9_]*').setName('id')
+
+    # Grid building blocks
+    hs_cell = _GenerateMatch(
+        lambda ver: (Empty().copy().setParseAction(lambda toks: [None]) ^
+                     hs_scalar[ver]).setName('cell'))
+
+    # Dict
+    # There are three cases:
+    # - Empty dict: { {optional whitespace} }
+    # - map with marker: { m }
+    # - dics: { k:1  ]
+    #
+    hs_tagmarker = hs_id
+
+    hs_tagpair = _GenerateMatch(
+        lambda ver: (hs_id +
+                     Suppress(':') +
+                     hs_scalar[ver]
+                     ).setParseAction(lambda toks: tuple(toks[:2])).setName('tagPair'))
+
+    hs_tag = _GenerateMatch(
+        lambda ver: (hs_tagmarker ^ hs_tagpair[ver]).setName('tag'))
+
+    hs_tags = _GenerateMatch(
+        lambda ver: hs_tag[ver][...].setName('tags'))
+
+    hs_dict = _GenerateMatch(
+        lambda ver:
+        (Suppress('{') +
+         hs_tags[ver] +
+         Suppress('}')
+         ).setName("dict").setParseAction(toks_to_dict)
+    )
+
+    hs_inner_grid = _GenerateMatch(
+        lambda ver:
+        Suppress('<<') +
+        hs_grid[ver] +
+        Suppress('>>')
+    )
+
+    # All possible scalar values, by Haystack version
+    hs_scalar_2_0 <<= (hs_ref ^ hs_bin ^ hs_str ^ hs_uri ^ hs_all_date ^
+                       hs_coord ^ hs_number ^ hs_null ^ hs_marker ^
+                       hs_remove ^ hs_bool).setName('scalar')
+    hs_scalar_3_0 <<= (hs_ref ^ hs_xstr ^ hs_str ^ hs_uri ^ hs_all_date ^
+                       hs_coord ^ hs_number ^ hs_na ^ hs_null ^ hs_marker ^
+                       hs_remove ^ hs_bool ^ hs_list[VER_3_0] ^ hs_dict[VER_3_0] ^
+                       hs_inner_grid[VER_3_0]).setName('scalar')
+
+    hs_nl = Combine(Optional('\r') + '\n')
+
+    hs_row = _GenerateMatch(
+        lambda ver: Group(delimitedList(hs_cell[ver], delim=',') +
+                          Suppress(hs_nl)
+                          ).setName('row'))
+
+    hs_rows = _GenerateMatch(
+        lambda ver: Group(hs_row[ver][...]).setName("rows"))
+
+    hs_metaPair = _GenerateMatch(
+        lambda ver: (
+                hs_id +
+                Suppress(':') +
+                hs_scalar[ver]
+        ).setParseAction(lambda toks: [tuple(toks[:2])]).setName('metaPair'))
+    hs_metaMarker = hs_id.copy().setParseAction(
+        lambda toks: [(toks[0], MARKER)]).setName('metaMarker')
+    hs_metaItem = _GenerateMatch(
+        lambda ver: (
+                hs_metaMarker ^
+                hs_metaPair[ver]
+        ).setName('metaItem'))
+    hs_meta = _GenerateMatch(
+        lambda ver: hs_metaItem[ver][1, ...].setParseAction(
+            lambda toks: [SortableDict(toks.asList())]
+        ).setName('meta'))
+
+    hs_col = _GenerateMatch(
+        lambda ver: (
+                hs_id +
+                Optional(hs_meta[ver]).setName('colMeta')
+        ).setParseAction(lambda toks: [
+            (toks[0], toks[1] if len(toks) > 1 else {})]))
+
+    hs_cols = _GenerateMatch(
+        lambda ver:
+        delimitedList(
+            hs_col[ver], delim=',')
+            .setParseAction(lambda toks: [SortableDict(toks.asList())]) +
+        Suppress(hs_nl)
+    )
+
+    hs_gridVer = Combine(Suppress('ver:') + hs_str)
+
+    hs_gridMeta = _GenerateMatch(
+        lambda ver: (
+                hs_gridVer +
+                Optional(hs_meta[ver]).setName('gridMeta') +
+                Suppress(hs_nl)
+        ).setParseAction(_assign_ver))
+
+    hs_grid_2_0 <<= (
+            hs_gridMeta[VER_2_0] +
+            hs_cols[VER_2_0] +
+            hs_rows[VER_2_0]
+    ).setParseAction(_gen_grid)
+
+    hs_grid_3_0 <<= (
+            hs_gridMeta[VER_3_0] +
+            hs_cols[VER_3_0] +
+            hs_rows[VER_3_0]
+    ).setParseAction(_gen_grid)
+
+    return _ZincGrammar(hs_scalar=hs_scalar,
+                        hs_scalar_2_0=hs_scalar_2_0,
+                        hs_scalar_3_0=hs_scalar_3_0,
+                        hs_grid=hs_grid,
+                        hs_grid_2_0=hs_grid_2_0,
+                        hs_grid_3_0=hs_grid_3_0,
+                        hs_id=hs_id,
+                        hs_nl=hs_nl,
+                        hs_all_date=hs_all_date,
+                        hs_date=hs_date,
+                        hs_time=hs_time)
+
+
+# Grammar instances, by thread
+_thread_grammar = local()
+
+
+def zinc_grammar() -> _ZincGrammar:
+    """Return the Zinc grammar of the current thread. The grammar is built at the first call.
+
+    Returns:
+        The Zinc grammar, to use without lock.
+    """
+    grammar = getattr(_thread_grammar, "grammar", None)
+    if grammar is None:
+        grammar = _build_grammar()
+        _thread_grammar.grammar = grammar
+    return grammar
+
+
+# The elements of the grammar, for compatibility. The grammar is built at the first access.
+_GRAMMAR_ELEMENTS = frozenset(_ZincGrammar.__slots__)
+
+
+def __getattr__(name: str) -> Any:
+    if name in _GRAMMAR_ELEMENTS:
+        return getattr(zinc_grammar(), name)
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
+
 
+# Not used by the parsers now, because each thread has its own grammar. Kept for compatibility.
 pyparser_lock = RLock()
 
 
-def parse_grid(grid_data: str, parse_all: bool = True) -> Grid:
+def parse_grid(grid_data: str, parse_all: bool = True, engine: Typing_Optional[str] = None,
+               compact: bool = False) -> Grid:
     """Parse the incoming grid.
 
     Args:
         grid_data: The Zinc string
         parse_all: Parse all the string ?
+        engine: The parser engine (`ENGINE_FAST` or `ENGINE_PYPARSING`). Default is `DEFAULT_ENGINE`
+        compact: `True` to save the entities with most of the columns as `CompactEntity`
     Returns:
         The grid
     """
+    if (engine or DEFAULT_ENGINE) == ENGINE_FAST:
+        from .zinc_fastparser import parse_grid as fast_parse_grid  # pylint: disable=import-outside-toplevel
+        return fast_parse_grid(grid_data, parse_all, compact)
+    if engine not in (None, ENGINE_PYPARSING):
+        raise NotImplementedError('Engine not implemented: %s' % engine)
     try:
-        with pyparser_lock:
-            # First element is the grid metadata
-            ver_match = _VERSION_RE.match(grid_data)
-            if ver_match is None:
-                raise ZincParseException(
-                    'Could not determine version from %r' % _NEWLINE_RE.split(grid_data)[0],
-                    grid_data, 1, 1)
-            version = Version(ver_match.group(1))
-
-            # Now parse the grid of the grid accordingly
-            return hs_grid[version].parseString(grid_data, parseAll=parse_all)[0]
+        # First element is the grid metadata
+        ver_match = _VERSION_RE.match(grid_data)
+        if ver_match is None:
+            raise ZincParseException(
+                'Could not determine version from %r' % _NEWLINE_RE.split(grid_data)[0],
+                grid_data, 1, 1)
+        version = Version(ver_match.group(1))
+
+        # Now parse the grid of the grid accordingly
+        grid = zinc_grammar().hs_grid[version].parseString(grid_data, parseAll=parse_all)[0]
+        if compact:
+            grid = Grid.from_rows(grid.version, grid.metadata, grid.column,
+                                  compact_entities(grid, grid.column.keys()))
+        return grid
     except ParseException as parse_exception:
         LOG.debug('Failing grid: %r', grid_data)
         raise ZincParseException(
@@ -587,19 +667,25 @@ def parse_grid(grid_data: str, parse_all: bool = True) -> Grid:
             'Failed to parse: %s' % sys.exc_info()[0], grid_data, 0, 0) from ex
 
 
-def parse_scalar(scalar_data: str, version: Version = LATEST_VER) -> Any:
+def parse_scalar(scalar_data: str, version: Version = LATEST_VER, engine: Typing_Optional[str] = None) -> Any:
     """Parse a Project Haystack scalar in ZINC format.
 
     Args:
         scalar_data: The zinc string scalar
         version: The Haystack version
+        engine: The parser engine (`ENGINE_FAST` or `ENGINE_PYPARSING`). Default is `DEFAULT_ENGINE`
     Returns:
         The scala value
     """
+    if (engine or DEFAULT_ENGINE) == ENGINE_FAST:
+        from . import zinc_fastparser  # pylint: disable=import-outside-toplevel
+        return zinc_fastparser.parse_scalar(scalar_data, version)
+    if engine not in (None, ENGINE_PYPARSING):
+        raise NotImplementedError('Engine not implemented: %s' % engine)
     if not isinstance(scalar_data, str) or scalar_data != scalar_data.strip():
         raise ZincParseException('Failed to parse scalar: %s' % scalar_data, None, None, None)
     try:
-        return hs_scalar[version].parseString(scalar_data, parseAll=True)[0]
+        return zinc_grammar().hs_scalar[version].parseString(scalar_data, parseAll=True)[0]
     except ParseException as parse_exception:
         # Raise a new exception with the appropriate line number.
         raise ZincParseException(
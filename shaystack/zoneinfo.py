@@ -7,10 +7,17 @@
 # vim: set ts=4 sts=4 et tw=78 sw=4 si:
 
 """
-A support of Haystack timezone
+A support of Haystack timezone.
+
+The mapping between the Haystack and the Olson timezones is precomputed in `haystack_timezones.txt`.
+To generate this file again, after an update of the list or of pytz:
+    make timezones
 """
 import datetime
-from typing import Any
+import functools
+import importlib.resources as pkg_resources
+import sys
+from typing import Any, Dict, Optional, TextIO
 
 import pytz
 
@@ -403,10 +410,23 @@ Zaporozhye
 Zurich""".split('\n')
 _HAYSTACK_TIMEZONES_SET = set(_HAYSTACK_TIMEZONES)
 
+# The precomputed mapping of Haystack timezones to pytz timezones
+_TIMEZONES_FILE = 'haystack_timezones.txt'
+
 # Mapping of pytz-recognised timezones to Haystack timezones.
 _TZ_MAP = None
 _TZ_RMAP = None
 
+# The timezones, by Haystack name
+_TZ_CACHE: Dict[str, Any] = {}
+
+# The Haystack timezones with a fixed offset (`Etc/GMT+5` is `UTC-05:00`)
+_OFFSET_TO_TZ = {datetime.timedelta(hours=-hours): 'GMT%+d' % hours for hours in range(-14, 13) if hours}
+_OFFSET_TO_TZ[datetime.timedelta(0)] = 'UTC'
+
+# The maximum number of offsets and hours in the cache of `timezone_name()`
+_OFFSET_CACHE_SIZE = 1024
+
 
 def _map_timezones():
     """Map the official Haystack timezone list to those recognised by pytz."""
@@ -441,11 +461,36 @@ def _map_timezones():
     return tz_map
 
 
+def _load_timezones() -> Optional[Dict[str, str]]:
+    """Load the precomputed mapping of the Haystack timezones, to avoid the scan of all the pytz timezones.
+
+    Returns:
+        The mapping, or `None` if the file is not present
+    """
+    try:
+        with pkg_resources.open_text(str(__package__),
+                                     _TIMEZONES_FILE,
+                                     encoding='UTF-8') as file:  # type: ignore
+            return dict(line.rstrip().split(',', 1) for line in file if line.strip())
+    except FileNotFoundError:
+        return None
+
+
+def _dump_timezones(file: TextIO = sys.stdout) -> None:
+    """Generate the precomputed mapping of the Haystack timezones.
+
+    Args:
+        file: The destination
+    """
+    for haystack_name, olson_name in sorted(_map_timezones().items()):
+        file.write('%s,%s\n' % (haystack_name, olson_name))
+
+
 def _gen_map():
     global _TZ_MAP  # pylint: disable=global-statement
     global _TZ_RMAP  # pylint: disable=global-statement
     if (_TZ_MAP is None) or (_TZ_RMAP is None):
-        _TZ_MAP = _map_timezones()
+        _TZ_MAP = _load_timezones() or _map_timezones()
         _TZ_RMAP = {z: n for (n, z) in list(_TZ_MAP.items())}
     return _TZ_MAP, _TZ_RMAP
 
@@ -470,13 +515,35 @@ def timezone(haystack_tz: str) -> Any:
     Returns:
         Time zone
     """
+    try:
+        return _TZ_CACHE[haystack_tz]
+    except KeyError:
+        pass
     tz_map = _get_tz_map()
     try:
-        tz_name = tz_map[haystack_tz]
-        return pytz.timezone(tz_name)
-    except KeyError as ex:
+        time_zone = pytz.timezone(tz_map[haystack_tz])
+    except (KeyError, pytz.UnknownTimeZoneError) as ex:
         raise ValueError('%s is not a recognised timezone on this host'
                          % haystack_tz) from ex
+    _TZ_CACHE[haystack_tz] = time_zone
+    return time_zone
+
+
+@functools.lru_cache(maxsize=_OFFSET_CACHE_SIZE)
+def _search_timezone_name(offset: datetime.timedelta, dt_hour: datetime.datetime) -> Optional[str]:
+    """Find a timezone with the offset at this local time. The offset of a timezone changes only
+    at a full hour, so the result is the same for all the local times of an hour.
+
+    Args:
+        offset: The offset of the date/time
+        dt_hour: The naive local date/time, truncated to the hour
+    Returns:
+        An haystack timezone, or `None`
+    """
+    for olson_name, haystack_name in list(_get_tz_rmap().items()):
+        if pytz.timezone(olson_name).utcoffset(dt_hour) == offset:
+            return haystack_name
+    return None
 
 
 def timezone_name(date_time: datetime.datetime) -> str:
@@ -487,34 +554,22 @@ def timezone_name(date_time: datetime.datetime) -> str:
     Returns:
         An haystack timezone
     """
-    tz_rmap = _get_tz_rmap()
     if date_time.tzinfo is None:
         raise ValueError('%r has no timezone' % date_time)
 
     # Easy case: pytz timezone.
-    try:
-        # noinspection PyUnresolvedReferences
-        tz_name = date_time.tzinfo.zone  # type: ignore
-        return tz_rmap[tz_name]
-    except KeyError:
-        # Not in timezone map
-        pass
-    except AttributeError:
-        # Not a pytz-compatible tzinfo
-        pass
+    tz_name = _get_tz_rmap().get(getattr(date_time.tzinfo, 'zone', None))
+    if tz_name is not None:
+        return tz_name
 
-    # Hard case, try to find one that's equivalent.  Hopefully we don't get
-    # many of these.  Start by getting the current timezone offset, and a
-    # timezone-naïve copy of the timestamp.
+    # Not a pytz-compatible tzinfo, or not in timezone map. Use a timezone with a fixed offset if
+    # possible, else try to find one that's equivalent at this date.
     offset = date_time.utcoffset()
-    dt_notz = date_time.replace(tzinfo=None)
-
-    if offset == datetime.timedelta(0):
-        # UTC?
-        return 'UTC'
-
-    for olson_name, haystack_name in list(tz_rmap.items()):
-        if pytz.timezone(olson_name).utcoffset(dt_notz) == offset:
-            return haystack_name
+    tz_name = _OFFSET_TO_TZ.get(offset)
+    if tz_name is None:
+        tz_name = _search_timezone_name(offset, date_time.replace(tzinfo=None, minute=0, second=0,
+                                                                  microsecond=0))
+    if tz_name is None:
+        raise ValueError('Unable to get timezone of %r' % date_time)
+    return tz_name
 
-    raise ValueError('Unable to get timezone of %r' % date_time)
@@ -0,0 +1,544 @@
+# -*- coding: utf-8 -*-
+# Benchmarks
+# See the accompanying LICENSE file.
+# (C) 2021 Engie Digital
+#
+# vim: set ts=4 sts=4 et tw=78 sw=4 si:
+"""
+Micro benchmarks to compare the different implementations.
+Use `HAYSTACK_BENCHMARK_SCALE` to change the size of the data set
+(number of copies of the `carytown` ontology).
+    HAYSTACK_BENCHMARK_SCALE=50 pytest -m benchmark -s tests/test_benchmark.py
+"""
+import copy
+import datetime
+import functools
+import gc
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from threading import Thread
+from typing import Callable, Any, Tuple, List
+
+import pytest
+
+import shaystack
+from shaystack import MODE_ZINC, Grid, Ref, MARKER, Quantity, grid_filter, zoneinfo
+from shaystack.datatypes import intern_ref
+from shaystack.filter_ast import FilterAST
+from shaystack.filter_fastparser import parse_filter as fast_parse_filter
+from shaystack.grid_diff import grid_diff
+from shaystack.grid_filter import filter_grammar
+from shaystack.sortabledict import SortableDict
+
+log = logging.getLogger(__name__)
+
+THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+BENCHMARK_SCALE = int(os.environ.get("HAYSTACK_BENCHMARK_SCALE", "2"))
+
+
+def _scaled_carytown_zinc(scale: int = BENCHMARK_SCALE) -> str:
+    """ Return the carytown ontology in zinc format, duplicated `scale` times with unique ids. """
+    with open(os.path.join(THIS_DIR, "..", "sample", "carytown.zinc"), encoding="utf-8") as file:
+        lines = file.read().splitlines()
+    header, rows = lines[:2], "\n".join(line for line in lines[2:] if line)
+    copies = [rows.replace("@p_demo_r_", "@p_%d_demo_r_" % i) for i in range(scale)]
+    return "\n".join(header + copies) + "\n"
+
+
+def _timeit(func: Callable[[], Any]) -> Tuple[float, Any]:
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+@pytest.mark.benchmark
+def test_benchmark_zinc_engines():
+    zinc = _scaled_carytown_zinc()
+    pyparsing_time, grid_pyparsing = _timeit(
+        lambda: shaystack.parse(zinc, MODE_ZINC, engine=shaystack.ENGINE_PYPARSING))
+    fast_time, grid_fast = _timeit(
+        lambda: shaystack.parse(zinc, MODE_ZINC, engine=shaystack.ENGINE_FAST))
+    log.info("Parse %d entities: pyparsing=%.3fs, fast=%.3fs (x%.1f)",
+             len(grid_fast), pyparsing_time, fast_time, pyparsing_time / fast_time)
+    assert grid_fast == grid_pyparsing
+    assert fast_time < pyparsing_time
+
+
+def _peak_memory(func: Callable[[], Any]) -> int:
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+@pytest.mark.benchmark
+def test_benchmark_zinc_streaming():
+    data = _scaled_carytown_zinc(BENCHMARK_SCALE * 10).encode("utf-8")
+
+    def _parse_all() -> None:
+        for _ in shaystack.parse(data.decode("utf-8"), MODE_ZINC):
+            pass
+
+    def _parse_stream() -> None:
+        for _ in shaystack.iter_zinc_rows(BytesIO(data))[1]:
+            pass
+
+    parse_peak = _peak_memory(_parse_all)
+    stream_peak = _peak_memory(_parse_stream)
+    log.info("Parse %d bytes: peak memory parse=%dKb, iter_zinc_rows=%dKb",
+             len(data), parse_peak // 1024, stream_peak // 1024)
+    assert stream_peak < parse_peak
+
+
+@pytest.mark.benchmark
+def test_benchmark_zinc_workers():
+    zinc = _scaled_carytown_zinc(BENCHMARK_SCALE * 100)
+    workers = max(os.cpu_count() or 1, 2)
+    serial_time, grid = _timeit(lambda: shaystack.parse(zinc, MODE_ZINC))
+    parallel_time, parallel_grid = _timeit(lambda: shaystack.parse(zinc, MODE_ZINC, workers=workers))
+    log.info("Parse %d entities: serial=%.3fs, %d workers=%.3fs (x%.1f)",
+             len(grid), serial_time, workers, parallel_time, serial_time / parallel_time)
+    assert parallel_grid == grid
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("threads", [1, 4, 16])
+def test_benchmark_pyparsing_threads(threads):
+    zinc = _scaled_carytown_zinc(1)
+    filters = ['site and geoCity == "Richmond"', 'point and his and curVal > 10',
+               'equip and siteRef->geoCity == "Richmond"', 'not zone or (temp and sensor)']
+
+    def _work(i: int) -> None:
+        if i % 8 == 0:
+            shaystack.parse(zinc, MODE_ZINC, engine=shaystack.ENGINE_PYPARSING)
+        else:
+            shaystack.parse_filter(filters[i % len(filters)])
+
+    requests = 32
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        executor.submit(_work, 1).result()  # Build the grammar in one thread before the measure
+        duration, _ = _timeit(lambda: list(executor.map(_work, range(requests))))
+    log.info("%d threads: %.1f requests/s", threads, requests / duration)
+
+
+@pytest.mark.benchmark
+def test_benchmark_filter_during_zinc_parsing():
+    zinc = _scaled_carytown_zinc()
+    parse_time = {}
+
+    def _parse() -> None:
+        parse_time["duration"] = _timeit(
+            lambda: shaystack.parse(zinc, MODE_ZINC, engine=shaystack.ENGINE_PYPARSING))[0]
+
+    shaystack.parse_filter("site")
+    thread = Thread(target=_parse)
+    thread.start()
+    time.sleep(0.05)
+    filter_time, _ = _timeit(lambda: shaystack.parse_filter('site and geoCity == "Richmond"'))
+    thread.join()
+    log.info("Filter parsed in %.3fs during a zinc parsing of %.3fs", filter_time, parse_time["duration"])
+    # Without lock, the filter is not waiting the end of the zinc parsing
+    assert filter_time < parse_time["duration"]
+
+
+@pytest.mark.benchmark
+def test_benchmark_filter_parser():
+    filters = ['site and geoCity == "Richmond"', 'point and his and curVal > 10kW',
+               'equip and siteRef->geoCity == "Richmond"', 'not zone or (temp and sensor)',
+               'ts >= 2021-01-01T00:00:00Z UTC and ts < 2021-02-01T00:00:00Z UTC'] * 10 * BENCHMARK_SCALE
+    grammar = filter_grammar()
+    pyparsing_time, _ = _timeit(
+        lambda: [FilterAST(grammar.parseString(a_filter, parseAll=True)[0]) for a_filter in filters])
+    fast_time, _ = _timeit(lambda: [fast_parse_filter(a_filter) for a_filter in filters])
+    cache_time, _ = _timeit(lambda: [shaystack.parse_filter(a_filter) for a_filter in filters])
+    log.info("Parse %d filters: pyparsing=%.1fus, fast=%.1fus, with cache=%.1fus by filter",
+             len(filters), pyparsing_time * 1e6 / len(filters), fast_time * 1e6 / len(filters),
+             cache_time * 1e6 / len(filters))
+    assert fast_time < pyparsing_time
+
+
+@pytest.mark.benchmark
+def test_benchmark_filter_compiler():
+    grid = shaystack.parse(_scaled_carytown_zinc(), MODE_ZINC)
+    # Without quantity: the generated code can not represent a `Quantity` with `repr()`
+    filters = ['site and geoCity == "Richmond"', 'point and his and area > 10',
+               'equip and siteRef->geoCity == "Richmond"', 'not zone or (temp and sensor)']
+
+    def _exec_function(a_filter: str) -> Callable[[Grid, Any], Any]:
+        func_name, code = grid_filter._filter_to_python(a_filter)  # pylint: disable=protected-access
+        scope = dict(vars(grid_filter))
+        exec(code, scope)  # pylint: disable=exec-used
+        return scope[func_name]
+
+    # pylint: disable=protected-access
+    exec_compile_time, exec_functions = _timeit(lambda: [_exec_function(a_filter) for a_filter in filters])
+    compile_time, functions = _timeit(
+        lambda: [grid_filter._compile_node(shaystack.parse_filter(a_filter).head) for a_filter in filters])
+    # pylint: enable=protected-access
+    exec_time, exec_results = _timeit(
+        lambda: [[bool(function(grid, row)) for row in grid] for function in exec_functions])
+    closure_time, results = _timeit(
+        lambda: [[bool(function(grid, row)) for row in grid] for function in functions])
+    log.info("Compile %d filters: exec=%.1fus, closures=%.1fus by filter. "
+             "Apply on %d entities: exec=%.3fs, closures=%.3fs (x%.1f)",
+             len(filters), exec_compile_time * 1e6 / len(filters), compile_time * 1e6 / len(filters),
+             len(grid), exec_time, closure_time, exec_time / closure_time)
+    assert results == exec_results
+    assert compile_time < exec_compile_time
+
+
+@pytest.mark.benchmark
+def test_benchmark_tag_index():
+    grid = shaystack.parse(_scaled_carytown_zinc(BENCHMARK_SCALE * 50), MODE_ZINC)
+    filters = ['site', 'point and his', 'equip and not ahu', 'point and kind == "Number"',
+               'point and his and curVal > 10']
+
+    def _scan(a_filter: str) -> List[Any]:
+        function = grid_filter.filter_function(a_filter)
+        return [row for row in grid if function(grid, row)]
+
+    build_time, _ = _timeit(grid.tag_index)
+    scan_time, scan_results = _timeit(lambda: [_scan(a_filter) for a_filter in filters])
+    index_time, index_results = _timeit(lambda: [grid.filter(a_filter) for a_filter in filters])
+    log.info("Filter %d entities: scan=%.1fms, tag index=%.1fms (x%.1f), build the index=%.1fms",
+             len(grid), scan_time * 1e3 / len(filters), index_time * 1e3 / len(filters),
+             scan_time / index_time, build_time * 1e3)
+    assert [list(result) for result in index_results] == scan_results
+    assert index_time < scan_time
+
+
+@pytest.mark.benchmark
+def test_benchmark_ref_graph():
+    grid = shaystack.parse(_scaled_carytown_zinc(BENCHMARK_SCALE * 50), MODE_ZINC)
+    filters = ['equip and siteRef->geoCity == "Richmond"', 'point and equipRef->siteRef->yearBuilt > 1990',
+               'point and siteRef->regionRef->dis', 'not equipRef->siteRef->site']
+
+    def _scan(a_filter: str) -> List[Any]:
+        function = grid_filter.filter_function(a_filter)
+        return [row for row in grid if function(grid, row)]
+
+    grid.tag_index()
+    scan_time, scan_results = _timeit(lambda: [_scan(a_filter) for a_filter in filters])
+    build_time, _ = _timeit(lambda: [grid.filter(a_filter) for a_filter in filters])
+    join_time, join_results = _timeit(lambda: [grid.filter(a_filter) for a_filter in filters])
+    log.info("Filter %d entities with paths: scan=%.1fms, ref graph=%.1fms (x%.1f), "
+             "with the build of the graph=%.1fms",
+             len(grid), scan_time * 1e3 / len(filters), join_time * 1e3 / len(filters),
+             scan_time / join_time, build_time * 1e3 / len(filters))
+    assert [list(result) for result in join_results] == scan_results
+    assert join_time < scan_time
+
+
+def _retained_memory(func: Callable[[], Any]) -> Tuple[int, Any]:
+    tracemalloc.start()
+    try:
+        result = func()
+        gc.collect()  # The temporary grids are in reference cycles
+        return tracemalloc.get_traced_memory()[0], result
+    finally:
+        tracemalloc.stop()
+
+
+@pytest.mark.benchmark
+def test_benchmark_columnar_grid():
+    zinc = _scaled_carytown_zinc(BENCHMARK_SCALE * 50)
+    grid_memory, grid = _retained_memory(lambda: shaystack.parse(zinc, MODE_ZINC))
+    columnar_memory, columnar_grid = _retained_memory(
+        lambda: shaystack.ColumnarGrid.from_grid(shaystack.parse(zinc, MODE_ZINC)))
+    read_time, _ = _timeit(lambda: list(columnar_grid))
+    log.info("Memory for %d entities: Grid=%dKb, ColumnarGrid=%dKb (x%.1f), read all entities=%.3fs",
+             len(grid), grid_memory // 1024, columnar_memory // 1024,
+             grid_memory / columnar_memory, read_time)
+    assert columnar_grid == grid
+    assert columnar_memory < grid_memory
+
+
+def _synthetic_columnar_grid(size: int) -> shaystack.ColumnarGrid:
+    grid = shaystack.ColumnarGrid(columns=['id', 'site', 'equip', 'point', 'kind', 'siteRef', 'curVal',
+                                           'power', 'date'])
+    for i in range(size):
+        entity = {'id': Ref('id%d' % i)}
+        if i % 1000 == 0:
+            entity['site'] = MARKER
+        elif i % 20 == 0:
+            entity.update({'equip': MARKER, 'siteRef': Ref('id%d' % (i // 1000 * 1000))})
+        else:
+            entity.update({'point': MARKER, 'kind': 'Number' if i % 3 else 'Bool',
+                           'siteRef': Ref('id%d' % (i // 1000 * 1000)), 'curVal': float(i % 100),
+                           'power': Quantity(float(i % 10), 'kW'),
+                           'date': datetime.date(2021, 1, 1 + i % 28)})
+        grid.append(entity)
+    return grid
+
+
+@pytest.mark.benchmark
+def test_benchmark_columnar_filter():
+    # HAYSTACK_BENCHMARK_SCALE=100 for 1M entities
+    grid = _synthetic_columnar_grid(10_000 * BENCHMARK_SCALE)
+    filters = ['point and kind == "Number"', 'point and curVal > 50 and power >= 5000W',
+               'equip or site', 'date >= 2021-01-10 and date < 2021-01-20 and not equip',
+               'siteRef == @id1000']
+
+    def _rows_filter(a_filter: str) -> List[Any]:
+        function = grid_filter.filter_function(a_filter)
+        return [row for row in grid if function(grid, row)]
+
+    rows_time, rows_results = _timeit(lambda: [_rows_filter(a_filter) for a_filter in filters])
+    columns_time, columns_results = _timeit(lambda: [grid.filter(a_filter) for a_filter in filters])
+    log.info("Filter %d entities: by entity=%.1fms, by column=%.1fms (x%.1f)",
+             len(grid), rows_time * 1e3 / len(filters), columns_time * 1e3 / len(filters),
+             rows_time / columns_time)
+    assert [list(result) for result in columns_results] == rows_results
+    assert columns_time < rows_time
+
+
+@pytest.mark.benchmark
+def test_benchmark_grid_copy():
+    grid = shaystack.parse(_scaled_carytown_zinc(BENCHMARK_SCALE * 10), MODE_ZINC)
+    diff = Grid(columns=["id", "dis"])
+    diff.extend({"id": row["id"], "dis": "Updated"} for row in grid[:10])
+    deepcopy_time, _ = _timeit(lambda: copy.deepcopy(grid))
+    copy_time, _ = _timeit(grid.copy)
+    merge_time, merged = _timeit(lambda: grid + diff)
+    log.info("Copy %d entities: deepcopy=%.1fms, copy=%.1fms (x%.1f), merge of %d entities=%.1fms",
+             len(grid), deepcopy_time * 1e3, copy_time * 1e3, deepcopy_time / copy_time,
+             len(diff), merge_time * 1e3)
+    assert merged[diff[0]["id"]]["dis"] == "Updated" and grid[diff[0]["id"]]["dis"] != "Updated"
+    assert copy_time < deepcopy_time
+
+
+def _time_series(size: int) -> Grid:
+    grid = Grid(columns=["ts", "val"])
+    start = datetime.datetime(2021, 1, 1, tzinfo=datetime.timezone.utc)
+    grid.extend({"ts": start + datetime.timedelta(minutes=i), "val": float(i % 97)}
+                for i in range(size))
+    return grid
+
+
+@pytest.mark.benchmark
+def test_benchmark_diff_without_id():
+    times = []
+    for size in (2_000 * BENCHMARK_SCALE, 8_000 * BENCHMARK_SCALE):
+        left = _time_series(size)
+        right = _time_series(size)
+        right.reverse()
+        right[0] = {"ts": right[0]["ts"], "val": -1.0}
+        diff_time, diff = _timeit(lambda: grid_diff(left, right))  # pylint: disable=cell-var-from-loop
+        equal_time, equal = _timeit(lambda: left == right[:])  # pylint: disable=cell-var-from-loop
+        log.info("Diff %d entities without id: diff=%.1fms, eq=%.1fms",
+                 size, diff_time * 1e3, equal_time * 1e3)
+        assert len(diff) == 2 and not equal
+        times.append(diff_time + equal_time)
+    # Linear, not quadratic (x16)
+    assert times[1] / times[0] < 10
+
+
+@pytest.mark.benchmark
+def test_benchmark_diff_with_workers():
+    # The processes are used from 20 000 entities
+    left = shaystack.parse(_scaled_carytown_zinc(BENCHMARK_SCALE * 500), MODE_ZINC)
+    right = copy.deepcopy(left)
+    for position in range(0, len(right), 10):
+        right[position]["dis"] = "Updated"
+    right.pop(*range(5, len(right), 100))
+    serial_time, serial_diff = _timeit(lambda: grid_diff(left, right))
+    parallel_time, parallel_diff = _timeit(lambda: grid_diff(left, right, workers=4))
+    log.info("Diff %d entities: 1 process=%.3fs, 4 processes=%.3fs (x%.1f, %d CPU)",
+             len(left), serial_time, parallel_time, serial_time / parallel_time, os.cpu_count())
+    assert list(parallel_diff) == list(serial_diff)
+
+
+@pytest.mark.benchmark
+def test_benchmark_grid_index():
+    # HAYSTACK_BENCHMARK_SCALE=20 for 1M entities
+    size = 50_000 * BENCHMARK_SCALE
+    chunk = 10_000
+    grid = Grid(columns=["id", "val"])
+    chunk_times = []
+    for start in range(0, size, chunk):
+        # pylint: disable=cell-var-from-loop
+        chunk_time, _ = _timeit(lambda: grid.extend(
+            {"id": Ref("id%d" % i), "val": i} for i in range(start, start + chunk)))
+        # pylint: enable=cell-var-from-loop
+        chunk_times.append(chunk_time)
+    ids = [Ref("id%d" % i) for i in range(0, size, 7)]
+    pop_time, _ = _timeit(lambda: [grid.pop(ref) for ref in ids])
+    log.info("Append %d entities by %d: first chunk=%.1fms, last chunk=%.1fms, pop %d by id=%.1fms",
+             size, chunk, chunk_times[0] * 1e3, chunk_times[-1] * 1e3, len(ids), pop_time * 1e3)
+    assert len(grid) == size - len(ids) and Ref("id1") in grid and Ref("id7") not in grid
+    # The cost of a chunk does not depend of the size of the grid
+    assert chunk_times[-1] < chunk_times[0] * 3
+
+
+@pytest.mark.benchmark
+def test_benchmark_bulk_extend():
+    rows = list(_time_series(100_000 * BENCHMARK_SCALE))
+    extend_time, extended = _timeit(lambda: Grid(columns=["ts", "val"]).extend(rows))
+    bulk_time, bulk = _timeit(lambda: Grid.from_rows(None, None, ["ts", "val"], rows))
+    validate_time, _ = _timeit(lambda: Grid.from_rows(None, None, ["ts", "val"], rows, validate=True))
+    log.info("Add %d entities: extend=%.1fms, bulk_extend=%.1fms (x%.1f), with validate=%.1fms",
+             len(rows), extend_time * 1e3, bulk_time * 1e3, extend_time / bulk_time, validate_time * 1e3)
+    assert len(bulk) == len(extended) == len(rows)
+    assert bulk_time < extend_time
+
+
+@pytest.mark.benchmark
+def test_benchmark_compact_entity():
+    zinc = shaystack.dump(_time_series(50_000 * BENCHMARK_SCALE), MODE_ZINC)
+    grid_memory, grid = _retained_memory(lambda: shaystack.parse(zinc, MODE_ZINC))
+    compact_memory, compact_grid = _retained_memory(lambda: shaystack.parse(zinc, MODE_ZINC, compact=True))
+    grid_time, _ = _timeit(lambda: [row["val"] for row in grid])
+    compact_time, _ = _timeit(lambda: [row["val"] for row in compact_grid])
+    log.info("ts,val history of %d entities: dict=%.1fMB, compact=%.1fMB (-%d%%), read dict=%.1fms, "
+             "read compact=%.1fms",
+             len(grid), grid_memory / 1e6, compact_memory / 1e6, 100 - compact_memory * 100 // grid_memory,
+             grid_time * 1e3, compact_time * 1e3)
+    assert list(compact_grid) == list(grid)
+    assert compact_memory < grid_memory * 0.8
+
+
+@pytest.mark.benchmark
+def test_benchmark_sortable_dict():
+    times = []
+    for size in (5_000 * BENCHMARK_SCALE, 20_000 * BENCHMARK_SCALE):
+        columns = SortableDict((("col%d" % i, {}) for i in range(size)))
+
+        def _update() -> None:
+            for i in range(0, size, 2):  # pylint: disable=cell-var-from-loop
+                del columns["col%d" % i]  # pylint: disable=cell-var-from-loop
+                columns.index("col%d" % (i + 1))  # pylint: disable=cell-var-from-loop
+
+        times.append(_timeit(_update)[0])
+        assert len(columns) == size // 2
+    log.info("Delete and search %d and %d columns: %.1fms, %.1fms",
+             5_000 * BENCHMARK_SCALE // 2, 20_000 * BENCHMARK_SCALE // 2, times[0] * 1e3, times[1] * 1e3)
+    # Not quadratic (x16)
+    assert times[1] < times[0] * 12
+
+
+@pytest.mark.benchmark
+def test_benchmark_top_k():
+    grid = _time_series(100_000 * BENCHMARK_SCALE)
+    sort_time, _ = _timeit(lambda: grid[:].sort(["val", "ts"], reverse=True))
+    top_time, top = _timeit(lambda: grid.top_k(["val", "ts"], 10, reverse=True))
+    log.info("Sort %d entities: %.1fms, top 10: %.1fms",
+             len(grid), sort_time * 1e3, top_time * 1e3)
+    assert [row["val"] for row in top] == [96.0] * 10
+    assert top[0]["ts"] > top[1]["ts"]
+    assert top_time < sort_time
+
+
+@pytest.mark.benchmark
+def test_benchmark_snapshot():
+    zinc = _scaled_carytown_zinc(BENCHMARK_SCALE * 50)
+    parse_time, grid = _timeit(lambda: shaystack.parse(zinc, MODE_ZINC, engine=shaystack.ENGINE_FAST))
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "carytown.snapshot")
+        save_time, _ = _timeit(lambda: grid.save_snapshot(path))
+        load_time, loaded = _timeit(lambda: Grid.load_snapshot(path))
+        size = os.path.getsize(path)
+    log.info("%d entities: parse=%.3fs, save snapshot=%.3fs, load snapshot=%.3fs (x%.1f), "
+             "zinc=%dKb, snapshot=%dKb",
+             len(grid), parse_time, save_time, load_time, parse_time / load_time,
+             len(zinc) // 1024, size // 1024)
+    assert loaded == grid
+    assert load_time < parse_time
+
+
+@pytest.mark.benchmark
+def test_benchmark_quantity():
+    size = 20_000 * BENCHMARK_SCALE
+    zinc = 'ver:"3.0"\nts,val\n' + "".join("2021-01-01T00:%02d:00Z UTC,%d.5kWh\n" % (i % 60, i)
+                                          for i in range(size))
+    parse_time, grid = _timeit(lambda: shaystack.parse(zinc, MODE_ZINC))
+    quantity_time, _ = _timeit(lambda: [Quantity(float(i), "kWh") for i in range(size)])
+    pint_time, _ = _timeit(lambda: [shaystack.unit_reg.Quantity(float(i), "kilowatt_hour")
+                                    for i in range(size)])
+    log.info("Parse %d quantities: %.3fs. Create %d quantities: haystack=%.3fs, pint=%.3fs (x%.1f)",
+             len(grid), parse_time, size, quantity_time, pint_time, pint_time / quantity_time)
+    assert grid[0]["val"] == Quantity(0.5, "kWh")
+    assert quantity_time < pint_time
+
+
+@pytest.mark.benchmark
+def test_benchmark_intern_ref():
+    size = 100_000 * BENCHMARK_SCALE
+    names = ["p_demo_r_equip%d" % (i % 2_000) for i in range(size)]
+    fresh_time, (fresh_memory, _) = _timeit(lambda: _retained_memory(lambda: [Ref(name) for name in names]))
+    intern_time, (intern_memory, _) = _timeit(
+        lambda: _retained_memory(lambda: [intern_ref(name) for name in names]))
+    log.info("%d references to 2000 entities: new=%.1fMB %.1fms, interned=%.1fMB %.1fms",
+             size, fresh_memory / 1e6, fresh_time * 1e3, intern_memory / 1e6, intern_time * 1e3)
+    assert intern_memory < fresh_memory / 4
+
+
+# The maximum duration of `import shaystack`, with the cache of units
+IMPORT_TIME_LIMIT = float(os.environ.get("HAYSTACK_IMPORT_TIME_LIMIT", "1.0"))
+
+
+def _import_time(envs: dict) -> float:
+    """ Return the duration of `import shaystack` in a new process. """
+    code = "import time\nstart = time.perf_counter()\nimport shaystack\nprint(time.perf_counter() - start)\n"
+    output = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True,
+                            cwd=os.path.join(THIS_DIR, ".."), env={**os.environ, **envs}).stdout
+    return float(output)
+
+
+@pytest.mark.benchmark
+def test_benchmark_import_time():
+    with tempfile.TemporaryDirectory() as directory:
+        envs = {"HAYSTACK_UNITS_CACHE": directory}
+        cold_time = _import_time(envs)
+        warm_time = min(_import_time(envs) for _ in range(3))
+    no_cache_time = _import_time({"HAYSTACK_UNITS_CACHE": ""})
+    log.info("import shaystack: first=%.3fs, with the cache of units=%.3fs, without cache=%.3fs",
+             cold_time, warm_time, no_cache_time)
+    assert warm_time < no_cache_time
+    assert warm_time < IMPORT_TIME_LIMIT
+
+
+@pytest.mark.benchmark
+def test_benchmark_timezone_name():
+    size = 1_000 * BENCHMARK_SCALE
+    fixed_offset = datetime.timezone(datetime.timedelta(hours=5, minutes=30))
+    date_times = [datetime.datetime(2021, 1, 1, tzinfo=fixed_offset) + datetime.timedelta(minutes=i)
+                  for i in range(size)]
+    search = zoneinfo._search_timezone_name.__wrapped__  # pylint: disable=protected-access
+    search_time, _ = _timeit(lambda: [search(date_time.utcoffset(), date_time.replace(tzinfo=None))
+                                      for date_time in date_times])
+    cached_time, names = _timeit(lambda: [zoneinfo.timezone_name(date_time) for date_time in date_times])
+    log.info("timezone_name() of %d date/times: scan=%.3fs, cached=%.3fs", size, search_time, cached_time)
+    assert names[0] == zoneinfo.timezone_name(date_times[0])
+    assert cached_time < search_time
+
+
+def _dump_cells(dumper: Any, grid: Grid) -> List[List[Any]]:
+    """ Dump all the cells of a grid, one by one, without the row dumper. """
+    return [[dumper.dump_scalar(row.get(column), version=grid.version) for column in grid.column]
+            for row in grid]
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("mode", [MODE_ZINC, shaystack.MODE_JSON, shaystack.MODE_HAYSON,
+                                  shaystack.MODE_CSV, shaystack.MODE_TRIO])
+def test_benchmark_dumpers(mode):
+    dumper = shaystack.dumper._dumper(mode)  # pylint: disable=protected-access
+    for name, grid in (("ontology", shaystack.parse(_scaled_carytown_zinc(), MODE_ZINC)),
+                       ("ts,val", _time_series(10_000 * BENCHMARK_SCALE))):
+        # The timings are too close to be compared on a shared machine: only logged
+        dump_time = min(_timeit(functools.partial(shaystack.dump, grid, mode))[0] for _ in range(5))
+        row_dumper = dumper._row_dumper(grid)  # pylint: disable=protected-access
+        rows_time = min(_timeit(lambda: list(map(row_dumper, grid)))[0]  # pylint: disable=cell-var-from-loop
+                        for _ in range(5))
+        cells_time = min(_timeit(functools.partial(_dump_cells, dumper, grid))[0] for _ in range(5))
+        log.info("%s %s: %.0f rows/s (rows=%.3fs, cells one by one=%.3fs, x%.1f)",
+                 mode, name, len(grid) / dump_time, rows_time, cells_time, cells_time / rows_time)
@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+# Columnar grid tests
+# See the accompanying LICENSE file.
+# (C) 2021 Engie Digital
+#
+# vim: set ts=4 sts=4 et tw=78 sw=4 si:
+import datetime
+import os
+import pickle
+
+import pytest
+
+import shaystack
+from shaystack import ColumnarGrid, Grid, Ref, MARKER, Quantity, Uri, XStr, MODE_ZINC, MODE_JSON
+from shaystack.grid_filter import filter_function
+
+THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def _carytown() -> Grid:
+    with open(os.path.join(THIS_DIR, "..", "sample", "carytown.zinc"), encoding="utf-8") as file:
+        return shaystack.parse(file.read(), MODE_ZINC)
+
+
+def test_columnar_grid_like_grid():
+    grid = _carytown()
+    columnar_grid = ColumnarGrid.from_grid(grid)
+    assert len(columnar_grid) == len(grid)
+    assert list(columnar_grid) == list(grid)
+    assert columnar_grid == grid
+    assert grid == columnar_grid
+    assert columnar_grid.to_grid() == grid
+    assert shaystack.dump(columnar_grid, MODE_ZINC) == shaystack.dump(grid, MODE_ZINC)
+    assert shaystack.dump(columnar_grid, MODE_JSON) == shaystack.dump(grid, MODE_JSON)
+
+
+def test_columnar_grid_values():
+    entity = {'id': Ref('a', 'A display'), 'site': MARKER, 'dis': 'A', 'uri': Uri('http://a'),
+              'bool': True, 'area': Quantity(3.5, 'ft²'), 'float': 1.5, 'int': 2,
+              'xstr': XStr('hex', 'deadbeef'), 'list': [1, 2]}
+    grid = ColumnarGrid(columns=list(entity))
+    grid.append(entity)
+    grid.append({'id': Ref('a', 'Other display'), 'float': Quantity(1.0, 'kW'), 'area': 3.0})
+    assert grid[0] == entity
+    assert [type(value) for value in grid[0].values()] == [type(value) for value in entity.values()]
+    assert grid[1] == {'id': Ref('a', 'Other display'), 'float': Quantity(1.0, 'kW'), 'area': 3.0}
+    assert grid[1]['id'].value == 'Other display'
+
+
+def test_columnar_grid_update():
+    grid = _carytown()
+    columnar_grid = ColumnarGrid.from_grid(grid)
+    for a_grid in (grid, columnar_grid):
+        a_grid.pop(0)
+        a_grid[0] = dict(a_grid[0], dis="New display")
+        a_grid.insert(3, {'id': Ref('new'), 'site': MARKER, 'area': Quantity(3.0, 'ft²')})
+        a_grid.append({'equip': MARKER, 'dis': 'Without id'})
+        a_grid[Ref('new')] = {'id': Ref('new'), 'equip': MARKER}
+        del a_grid[Ref('p_demo_r_23a44701-a89a6c66')]
+        a_grid[-1] = {'equip': MARKER, 'dis': 'Updated'}
+    assert list(columnar_grid) == list(grid)
+    assert columnar_grid[Ref('new')] == {'id': Ref('new'), 'equip': MARKER}
+    assert Ref('p_demo_r_23a44701-a89a6c66') not in columnar_grid
+    assert set(columnar_grid.keys()) == set(grid.keys())
+
+
+def test_columnar_grid_reindex_without_last_ids():
+    grid = ColumnarGrid(columns=['id', 'n'])
+    grid.append({'id': Ref('a'), 'n': 0})
+    grid.append({'n': 1})
+    grid.reindex()
+    grid.append({'id': Ref('b'), 'n': 2})
+    assert grid[Ref('b')]['n'] == 2
+    assert grid[Ref('a')]['n'] == 0
+    grid = ColumnarGrid(columns=['n'])
+    grid.append({'n': 1})
+    grid.reindex()
+    grid.append({'id': Ref('c'), 'n': 2})
+    assert grid[Ref('c')]['n'] == 2
+
+
+def test_columnar_grid_sort_and_top_k():
+    grid = _carytown()
+    columnar_grid = ColumnarGrid.from_grid(grid)
+    for keys, reverse in [('dis', False), (['siteRef', 'dis'], False), ('area', True)]:
+        expected = list(grid.top_k(keys, 5, reverse=reverse))
+        assert list(columnar_grid.top_k(keys, 5, reverse=reverse)) == expected
+        assert list(columnar_grid.sort(keys, reverse=reverse)) == list(grid.sort(keys, reverse=reverse))
+    assert columnar_grid[Ref('p_demo_r_23a44701-a89a6c66')] == grid[Ref('p_demo_r_23a44701-a89a6c66')]
+
+
+def test_columnar_grid_filter_diff_and_copy():
+    grid = _carytown()
+    columnar_grid = ColumnarGrid.from_grid(grid)
+    for a_filter in ['site', 'point and his', 'equip and siteRef->geoCity == "Richmond"']:
+        assert list(columnar_grid.filter(a_filter)) == list(grid.filter(a_filter))
+        assert list(columnar_grid.filter(a_filter)) == list(grid.filter(a_filter))
+    assert list(columnar_grid.select('id,dis').purge()) == list(grid.select('id,dis').purge())
+
+    new_grid = columnar_grid.copy()
+    assert isinstance(new_grid, ColumnarGrid)
+    new_grid.pop(0)
+    new_grid[0] = dict(new_grid[0], dis="New display")
+    new_grid.append({'site': MARKER})
+    assert len(columnar_grid) == len(grid)
+    diff = new_grid - columnar_grid
+    assert diff == new_grid.to_grid() - grid
+    assert columnar_grid + diff == new_grid
+
+    assert pickle.loads(pickle.dumps(new_grid)) == new_grid
+
+
+def _synthetic_grid(size: int) -> Grid:
+    grid = Grid(columns=['id', 'site', 'equip', 'point', 'kind', 'siteRef', 'curVal', 'power', 'dis',
+                         'area', 'mixed', 'date', 'unit'])
+    for i in range(size):
+        entity = {'id': Ref('id%d' % i), 'dis': 'Entity %d' % (i % 300), 'mixed': 'str' if i % 5 == 0 else i}
+        if i % 50 == 0:
+            entity.update({'site': MARKER, 'area': Quantity(float(i), 'ft²')})
+        elif i % 5 == 0:
+            entity.update({'equip': MARKER, 'siteRef': Ref('id%d' % (i // 50 * 50))})
+        else:
+            entity.update({'point': MARKER, 'kind': 'Number' if i % 3 else 'Bool',
+                           'siteRef': Ref('id%d' % (i // 50 * 50)), 'date': datetime.date(2021, 1, 1 + i % 28),
+                           'curVal': float(i % 100), 'power': Quantity(float(i % 10), 'kW')})
+        grid.append(entity)
+    return grid
+
+
+@pytest.mark.parametrize("request_filter", [
+    'site', 'not site', 'point and kind == "Number"', 'kind != "Bool"', 'point and curVal > 20',
+    'curVal <= 50 or site', 'power >= 5kW', 'power < 5000W', 'area > 1000ft²', 'siteRef == @id50',
+    'siteRef->area > 1000ft²', 'equip and siteRef->site', 'dis == "Entity 10"', 'dis >= "Entity 5"',
+    'date >= 2021-01-10 and date < 2021-01-20', 'not unknown and unknown == 1', 'curVal == 1kW',
+    'kind == "Bool" and (curVal > 30 or power < 2kW)', 'point and mixed > 10 or site',
+    'equip and mixed == "str"'])
+def test_columnar_filter_like_filter_function(request_filter):
+    grid = _synthetic_grid(1000)
+    columnar_grid = ColumnarGrid.from_grid(grid)
+    function = filter_function(request_filter)
+    expected = [row for row in grid if function(grid, row)]
+    assert list(columnar_grid.filter(request_filter)) == expected
+    assert list(columnar_grid.filter(request_filter, limit=5)) == expected[:5]
+
+
+def test_columnar_filter_ref_and_mixed_columns():
+    entities = [{'id': Ref('e1'), 'equip': MARKER},
+                {'id': Ref('p1'), 'point': MARKER, 'kind': 'Number', 'ref': Ref('e1')},
+                {'id': Ref('p2'), 'point': MARKER, 'kind': Ref('x'), 'ref': 'e1'}]
+    grid = Grid(columns=['id', 'equip', 'point', 'kind', 'ref'])
+    grid.extend(entities)
+    columnar_grid = ColumnarGrid(columns=['id', 'equip', 'point', 'kind', 'ref'])
+    columnar_grid.extend(entities)
+    for request_filter in ['equip and kind < @x', 'equip and ref > @a', 'point and kind == "Number"',
+                           'equip or ref == @e1']:
+        assert list(columnar_grid.filter(request_filter)) == list(grid.filter(request_filter))
+    with pytest.raises(AttributeError):  # Like a `Grid`
+        columnar_grid.filter('point and ref > @a')
+    # The values of an updated entity stay in the dictionary
+    columnar_grid[2] = {'id': Ref('p2'), 'point': MARKER, 'kind': 'Bool'}
+    grid[2] = {'id': Ref('p2'), 'point': MARKER, 'kind': 'Bool'}
+    assert list(columnar_grid.filter('kind > "A"')) == list(grid.filter('kind > "A"'))
+
+
+def test_columnar_filter_type_error():
+    grid = ColumnarGrid(columns=['kind', 'curVal'])
+    grid.extend([{'kind': 'Number', 'curVal': 12.0}, {'kind': 'Str', 'curVal': 'abc'}])
+    # Like the filter function, the right part is evaluated only if it's necessary
+    assert len(grid.filter('kind == "Number" and curVal > 10')) == 1
+    with pytest.raises(TypeError):
+        grid.filter('curVal > 10')
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+# Compact entity tests
+# See the accompanying LICENSE file.
+# (C) 2021 Engie Digital
+#
+# vim: set ts=4 sts=4 et tw=78 sw=4 si:
+import copy
+import pickle
+import sys
+import textwrap
+
+import shaystack
+from shaystack import Grid, Ref, MARKER, MODE_CSV, MODE_ZINC, ENGINE_FAST, ENGINE_PYPARSING
+from shaystack.compact_entity import CompactEntity, entity_layout, compact_entity
+
+HISTORY_ZINC = textwrap.dedent('''
+ver:"3.0"
+id,ts,val
+@h1,2021-01-01T00:00:00Z UTC,1
+,2021-01-01T00:01:00Z UTC,2
+,,
+''')[1:]
+
+
+def test_compact_entity_mapping():
+    layout = entity_layout(['id', 'ts', 'val'])
+    assert entity_layout(('id', 'ts', 'val')) is layout
+    entity = layout.from_values([Ref('a'), None, 1.0])
+    assert isinstance(entity, CompactEntity)
+    assert entity == {'id': Ref('a'), 'val': 1.0}
+    assert {'id': Ref('a'), 'val': 1.0} == entity
+    assert len(entity) == 2 and list(entity) == ['id', 'val']
+    assert 'ts' not in entity and entity.get('ts') is None and entity.get('ts', 0) == 0
+    try:
+        _ = entity['ts']
+        assert False, 'Absent tag'
+    except KeyError:
+        pass
+
+    entity['ts'] = 'now'
+    entity['site'] = MARKER  # Not in the layout
+    assert dict(entity) == {'id': Ref('a'), 'ts': 'now', 'val': 1.0, 'site': MARKER}
+    del entity['val']
+    del entity['site']
+    assert entity == {'id': Ref('a'), 'ts': 'now'}
+    assert entity.pop('ts') == 'now'
+    assert entity == {'id': Ref('a')}
+
+    a_copy = entity.copy()
+    a_copy['val'] = 2.0
+    assert 'val' not in entity and a_copy.__class__ is layout
+    assert pickle.loads(pickle.dumps(a_copy)) == a_copy
+    assert copy.deepcopy(a_copy) == a_copy
+
+
+def test_compact_entity_size():
+    layout = entity_layout(['ts', 'val'])
+    entity = layout({'ts': 1, 'val': 2.0})
+    assert sys.getsizeof(entity) < sys.getsizeof({'ts': 1, 'val': 2.0}) / 2
+    # A sparse entity stays a dict
+    sparse = {'tag0': 1}
+    assert compact_entity(sparse, entity_layout(['tag%d' % i for i in range(10)])) is sparse
+
+
+def test_grid_with_compact_entities():
+    layout = entity_layout(['id', 'val'])
+    grid = Grid(columns=['id', 'val'])
+    grid.append(layout({'id': Ref('a'), 'val': 1.0}))
+    grid.extend([layout({'id': Ref('b'), 'val': 2.0}), {'id': Ref('c')}])
+    grid[2] = layout({'id': Ref('c'), 'val': 3.0})
+    assert grid[Ref('b')]['val'] == 2.0
+    assert grid == Grid(columns=['id', 'val']).extend([{'id': Ref('a'), 'val': 1.0},
+                                                       {'id': Ref('b'), 'val': 2.0},
+                                                       {'id': Ref('c'), 'val': 3.0}])
+    assert len(grid.filter('val > 1.5')) == 2
+    a_copy = grid.copy()
+    a_copy[0]['val'] = 10.0
+    assert grid[0]['val'] == 1.0
+    assert shaystack.parse(shaystack.dump(grid, MODE_ZINC)) == grid
+
+
+def test_parse_compact():
+    for engine in (ENGINE_FAST, ENGINE_PYPARSING):
+        grid = shaystack.parse(HISTORY_ZINC, MODE_ZINC, engine=engine, compact=True)
+        assert grid == shaystack.parse(HISTORY_ZINC, MODE_ZINC, engine=engine)
+        assert [isinstance(row, CompactEntity) for row in grid] == [True, True, False]
+        assert grid[Ref('h1')]['val'] == 1.0
+
+    csv = shaystack.dump(shaystack.parse(HISTORY_ZINC), MODE_CSV)
+    grid = shaystack.parse(csv, MODE_CSV, compact=True)
+    assert grid == shaystack.parse(csv, MODE_CSV)
+    assert isinstance(grid[0], CompactEntity)
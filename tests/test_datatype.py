@@ -10,6 +10,8 @@
 from __future__ import unicode_literals
 
 import binascii
+import gc
+import pickle
 import random
 from copy import copy, deepcopy
 from typing import Dict, Any
@@ -17,7 +19,7 @@ from typing import Dict, Any
 import pytest
 
 import shaystack
-from shaystack.datatypes import XStr, Uri, Bin, MARKER, NA, REMOVE, Quantity
+from shaystack.datatypes import XStr, Uri, Bin, MARKER, NA, REMOVE, Quantity, intern_ref, _refs
 
 
 def check_singleton_deepcopy(a_singleton):
@@ -62,6 +64,17 @@ def test_remove_copy():
     check_singleton_copy(shaystack.REMOVE)
 
 
+@pytest.mark.parametrize("a_singleton", [MARKER, NA, REMOVE])
+def test_singleton_pickle(a_singleton):
+    assert pickle.loads(pickle.dumps(a_singleton)) is a_singleton
+
+
+def test_qty_pickle():
+    qty = pickle.loads(pickle.dumps(Quantity(12.5, '$')))
+    assert qty == Quantity(12.5, '$')
+    assert qty.symbol == '$'
+
+
 def test_ref_not_ref_eq():
     try:
         ref_1 = shaystack.Ref(name='a.ref')
@@ -133,6 +146,29 @@ def test_ref_std_method():
     assert str(shaystack.Ref(name='a.ref', value='display text')) == '@a.ref \'display text\''
 
 
+def test_intern_ref():
+    ref = intern_ref('a.ref', 'display text')
+    assert intern_ref('a.ref', 'display text') is ref
+    assert intern_ref('a.ref') is not ref
+    assert intern_ref('a.ref') == ref
+    assert pickle.loads(pickle.dumps(ref)) is ref
+    assert deepcopy(ref) is ref
+    assert shaystack.parse_scalar('@a.ref "display text"', shaystack.MODE_ZINC) is ref
+    # The shared references can not be updated
+    with pytest.raises(AttributeError):
+        ref.value = 'other text'
+    with pytest.raises(AttributeError):
+        del ref.name
+    assert ref.name == 'a.ref' and ref.value == 'display text'
+    # Only the references in use are kept
+    key = ('not.used', None)
+    intern_ref(*key)
+    gc.collect()
+    assert key not in _refs
+    with pytest.raises(AssertionError):
+        intern_ref('invalid ref')
+
+
 
 def _check_qty_op(_fn, *vals):
     print(_fn)
@@ -935,3 +935,14 @@ def test_4path():
                {'$match': {'$expr': {'$ne': [{'$type': '$equipRef_entity_.siteRef_entity_.a_entity_.b'}, 'missing']}}},
                {'$replaceRoot': {'newRoot': '$$ROOT'}},
                {'$limit': 10}]
+
+
+def test_sort():
+    hs_filter = 'site'
+    mongo_request = mongo_filter(hs_filter, FAKE_NOW, 1, "customer", ['area'], True)
+    _check_mongodb(hs_filter, mongo_request)
+    assert mongo_request[3] == {'$addFields': {'_sort_0': {'$convert': {'input': '$area', 'to': 'string',
+                                                                          'onError': None, 'onNull': None}}}}
+    assert mongo_request[5:] == [{'$sort': {'_missing_0': 1, '_number_0': -1, '_sort_0': -1}},
+                                 {'$limit': 1},
+                                 {'$unset': ['_sort_0', '_missing_0', '_number_0']}]
@@ -10,7 +10,7 @@ import pytz
 
 from shaystack.providers import get_provider
 # noinspection PyProtectedMember
-from shaystack.providers.db_sqlite import _sql_filter as sql_filter
+from shaystack.providers.db_sqlite import _sql_filter as sql_filter, _sort_sql
 from shaystack.providers.sql import Provider as SQLProvider
 
 logging.basicConfig(level=os.environ.get("LOG_LEVEL", "WARNING"))
@@ -1056,3 +1056,31 @@ def test_select_with_id():
         )
         LIMIT 1
         """)
+
+
+def test_sort():
+    hs_filter = 'site'
+    sql_request = _sort_sql(sql_filter('haystack', hs_filter, FAKE_NOW, 0, "customer"), ['area'], True, 10)
+    _check_sqlite(sql_request)
+    assert sql_request == textwrap.dedent("""\
+        SELECT entity FROM (
+        -- site
+        SELECT t1.entity
+        FROM haystack as t1
+        WHERE
+        ((datetime('2020-10-01T00:00:00+00:00') BETWEEN datetime(t1.start_datetime) AND datetime(t1.end_datetime)
+        AND t1.customer_id='customer')
+        AND json_extract(json(t1.entity),'$.site') IS NOT NULL
+        )
+        ) AS sorted
+        ORDER BY json_extract(json(entity),'$.area') IS NULL, \
+CASE WHEN substr(json_extract(json(entity),'$.area'),1,2) = 'n:' \
+THEN CAST(substr(json_extract(json(entity),'$.area'),3) AS REAL) END DESC, \
+json_extract(json(entity),'$.area') DESC
+        LIMIT 10
+        """)
+    try:
+        _sort_sql(sql_request, ["area'"])
+        assert False, 'Accepted invalid tag'
+    except ValueError:
+        pass
@@ -3,7 +3,10 @@
 # vim: set ts=4 sts=4 et tw=78 sw=4 si:
 # pylint: skip-file
 
-from shaystack import Grid, REMOVE, VER_2_0, VER_3_0, Ref
+from decimal import Decimal
+
+import shaystack.grid_diff
+from shaystack import Grid, REMOVE, VER_2_0, VER_3_0, Ref, Quantity, Uri
 from shaystack.grid_diff import grid_diff, grid_merge
 
 def test_diff_version():
@@ -409,3 +412,40 @@ def test_diff_with_no_column():
     assert len(diff) == 4
 
     assert grid_merge(left.copy(), diff) == right
+
+
+def test_diff_records_without_id_with_other_types():
+    left = Grid(columns={"a": {}, "b": {}})
+    left.append({"a": Quantity(1, "km"), "b": Uri("http://a")})
+    left.append({"a": [1, 2], "b": 2})
+    left.append({"a": 1, "b": 2})
+    left.append({"a": 1.0, "b": 2})
+
+    right = Grid(columns={"a": {}, "b": {}})
+    right.append({"a": 1, "b": 2})
+    right.append({"a": Decimal(1), "b": 2})
+    right.append({"a": [1, 2], "b": 2})
+    right.append({"a": Quantity(1000, "m"), "b": Uri("http://a")})
+
+    diff = grid_diff(left, right)
+    assert len(diff) == 0
+
+
+def test_diff_with_workers(monkeypatch):
+    monkeypatch.setattr(shaystack.grid_diff, "MIN_CHUNK_ENTITIES", 10)
+    left = Grid(columns={"id": {}, "a": {}, "b": {}})
+    right = Grid(columns={"id": {}, "a": {}, "c": {}})
+    for i in range(100):
+        left.append({"id": Ref("id%d" % i), "a": i, "b": i})
+        if i % 10:
+            right.append({"id": Ref("id%d" % i), "a": i if i % 3 else -i, "c": i})
+        if i % 20 == 0:
+            left.append({"a": i})
+            right.append({"a": i + i % 40})
+    right.append({"id": Ref("new"), "a": 1})
+
+    diff = grid_diff(left, right, workers=2)
+    assert list(diff) == list(grid_diff(left, right))
+    assert diff.column == grid_diff(left, right).column
+    assert diff[0] == {"id": Ref("id0"), "remove_": REMOVE}
+    assert grid_merge(left.copy(), diff) == right
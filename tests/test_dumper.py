@@ -6,11 +6,14 @@
 #
 # vim: set ts=4 sts=4 et tw=78 sw=4 si:
 import datetime
+import io
 import json
+import os
 import textwrap
 from csv import reader
 from typing import cast, List
 
+import pytest
 import pytz
 
 import shaystack
@@ -1341,3 +1344,40 @@ def test_dump_invalide_scalar():
 def test_dump_ambiguous_scalar():
     assert dump_scalar("F", MODE_CSV) == '"""F"""'
     assert dump_scalar("°F", MODE_TRIO) == '"°F"'
+
+
+def test_dump_scalar_subclass():
+    class Name(str):
+        pass
+
+    class Value(float):
+        pass
+
+    for mode in (MODE_ZINC, shaystack.MODE_JSON, shaystack.MODE_HAYSON, MODE_CSV, MODE_TRIO):
+        assert dump_scalar(Name("text"), mode) == dump_scalar("text", mode)
+        assert dump_scalar(Value(1.5), mode) == dump_scalar(1.5, mode)
+        assert dump_scalar(shaystack.Uri("http://localhost"), mode) != dump_scalar("http://localhost", mode)
+        with pytest.raises(NotImplementedError):
+            dump_scalar(object(), mode)
+
+
+def test_dump_iter():
+    carytown_path = os.path.join(os.path.dirname(__file__), '..', 'sample', 'carytown.zinc')
+    with open(carytown_path, encoding='utf-8') as file:
+        carytown = shaystack.parse(file.read(), MODE_ZINC)
+    empty_entity = shaystack.Grid(columns=['a'])
+    empty_entity.append({})
+    no_rows = shaystack.Grid(columns=['a', 'b'])
+    inner_grid = shaystack.Grid(columns=['inner'])
+    inner_grid.append({'inner': make_simple_grid(shaystack.VER_3_0)})
+    grids = [carytown, make_simple_grid(), make_metadata_grid(), empty_entity, no_rows, inner_grid]
+    for mode in (MODE_ZINC, shaystack.MODE_JSON, shaystack.MODE_HAYSON, MODE_CSV, MODE_TRIO):
+        for grid in grids:
+            expected = shaystack.dump(grid, mode).encode('utf-8')
+            chunks = list(shaystack.dump_iter(grid, mode, chunk_size=100))
+            assert b''.join(chunks) == expected
+            assert all(len(chunk) == 100 for chunk in chunks[:-1])
+            assert all(0 < len(chunk) <= 100 for chunk in chunks)
+            stream = io.BytesIO()
+            assert shaystack.dump_to(grid, stream, mode) == len(expected)
+            assert stream.getvalue() == expected
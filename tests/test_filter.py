@@ -1,17 +1,20 @@
 # (C) 2020 Philippe PRADOS
 # -*- coding: utf-8 -*-
 # vim: set ts=4 sts=4 et tw=78 sw=4 si:
-import gc
+from threading import Thread
 from datetime import time, date, datetime
 from typing import cast
 
+import pytest
 from iso8601 import iso8601
+from pyparsing import ParseException
 
-from shaystack import Grid, Uri, Ref, Coordinate, MARKER, XStr, grid_filter
+from shaystack import Grid, Uri, Ref, Coordinate, MARKER, XStr, Quantity, grid_filter
 from shaystack.empty_grid import EmptyGrid
 from shaystack.filter_ast import FilterUnary, FilterBinary, FilterPath, FilterAST
 # noinspection PyProtectedMember
-from shaystack.grid_filter import hs_filter, _FnWrapper, filter_function
+from shaystack.grid_filter import hs_filter, filter_function, filter_set_lru_size, filter_cache_info, \
+    plan_filter
 from shaystack.zoneinfo import timezone
 
 
@@ -264,21 +267,81 @@ def test_grid_specification_filter_sample():
     assert result[0]['equip'] == 'Chicago'
 
 
-# noinspection PyUnresolvedReferences
-def test_if_generated_function_removed():
-    # Check if the generated function will be removed
-    wrapper = _FnWrapper("_acme", "def _acme(): pass")
-    # pylint: disable=no-member
-    assert grid_filter._acme  # type: ignore
-    # pylint: enable=no-member
-    if wrapper:
-        del wrapper
-    gc.collect()
+def test_compiled_filter_without_global():
+    # The compiled filters are closures, without python code injected in the module
+    names = set(vars(grid_filter))
+    assert filter_function('site and geoCity == "Chicago" and not acme')(
+        EmptyGrid, {"site": MARKER, "geoCity": "Chicago"})
+    assert set(vars(grid_filter)) == names
+
+
+def _reference_filter_function(a_filter: str):
+    func_name, code = grid_filter._filter_to_python(a_filter)  # pylint: disable=protected-access
+    scope = dict(vars(grid_filter))
+    exec(code, scope)  # pylint: disable=exec-used
+    return scope[func_name]
+
+
+def test_compiled_filter_like_generated_code():
+    grid = Grid(columns={'id': {}, 'site': {}, 'equip': {}, 'geoCity': {},
+                         'curVal': {}, 'siteRef': {}, 'equipRef': {}})
+    grid.append({'id': Ref('s1'), 'site': MARKER, 'geoCity': 'Chicago', 'curVal': 76})
+    grid.append({'id': Ref('e1'), 'equip': 'Chicago', 'siteRef': Ref('s1'), 'curVal': 74})
+    grid.append({'id': Ref('p1'), 'equipRef': Ref('e1'), 'curVal': None})
+    grid.append({'id': Ref('p2'), 'equipRef': Ref('unknown'), 'siteRef': "s1"})
+    filters = ['site', 'not site', 'curVal', 'not curVal', 'curVal > 75', 'curVal <= 75',
+               'curVal != 76', 'curVal == 74', 'geoCity == "Chicago"', 'siteRef->geoCity',
+               'not siteRef->geoCity', 'siteRef->geoCity == "Chicago"',
+               'equipRef->siteRef->curVal >= 76', 'not equipRef->siteRef->site',
+               'site or equip and curVal < 75', '(site or equip) and not geoCity',
+               'equipRef->curVal and siteRef']
+    for a_filter in filters:
+        compiled = filter_function(a_filter)
+        reference = _reference_filter_function(a_filter)
+        for row in grid:
+            assert bool(compiled(grid, row)) == bool(reference(grid, row)), a_filter
+
+
+def test_compiled_filter_with_constants():
+    # The constants are kept in the closures, not converted with `repr()`
+    row = {"power": Quantity(10, "kW"),
+           "ts": datetime(2021, 1, 1, 12, tzinfo=timezone("Paris"))}
+    assert filter_function('power == 10kW')(EmptyGrid, row)
+    assert not filter_function('power > 10kW')(EmptyGrid, row)
+    assert filter_function('ts >= 2021-01-01T00:00:00+01:00 Paris')(EmptyGrid, row)
+    assert not filter_function('ts < 2021-01-01T00:00:00+01:00 Paris')(EmptyGrid, row)
+
+
+def test_filter_cache():
+    filter_set_lru_size(2)
     try:
-        assert grid_filter._acme is not None  # type: ignore
-        assert False
-    except AttributeError:
-        pass
+        filter_function('site')
+        filter_function('site')
+        info = filter_cache_info()
+        assert (info.hits, info.misses, info.maxsize, info.currsize) == (1, 1, 2, 1)
+        for a_filter in ['equip', 'point', 'his']:
+            filter_function(a_filter)
+        assert filter_cache_info().currsize == 2
+        assert filter_cache_info().misses == 4
+    finally:
+        filter_set_lru_size(grid_filter._FILTER_CACHE_LRU_SIZE)  # pylint: disable=protected-access
+
+
+def test_filter_cache_in_threads():
+    filters = ['site', 'equip and curVal > %d', 'siteRef->geoCity == "City %d"']
+    results = []
+
+    def _work(i: int) -> None:
+        functions = [filter_function(a_filter % i if '%' in a_filter else a_filter)
+                     for a_filter in filters]
+        results.append(all(callable(function) for function in functions))
+
+    threads = [Thread(target=_work, args=(i % 4,)) for i in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == [True] * 16
 
 
 def test_slide_get():
@@ -349,3 +412,122 @@ def test_filter_with_null_value():
     grid.append({'id': Ref('id2'), 'hvac': MARKER, 'geoPostalCode': "23220", 'curVal': 75})
 
     assert len(grid.filter('curVal==0')) == 1
+
+
+def test_filter_grammar_by_thread():
+    main_grammar = grid_filter.filter_grammar()
+    results = {}
+
+    def _parse():
+        results['grammar'] = grid_filter.filter_grammar()
+        results['ast'] = grid_filter.parse_filter('site and geoCity == "Chicago"')
+
+    thread = Thread(target=_parse)
+    thread.start()
+    thread.join()
+    assert results['grammar'] is not main_grammar
+    assert grid_filter.filter_grammar() is main_grammar
+    assert repr(results['ast']) == repr(grid_filter.parse_filter('site and geoCity == "Chicago"'))
+
+
+@pytest.mark.parametrize("request_filter", [
+    'site', 'not site', 'site and equip', 'site or equip and point', '(site or equip) and point',
+    'a->b->c == "x"', 'a -> b == @ref', 'curVal > 10kW', 'curVal<=-1.5e3', 'x != true', 'x == false',
+    'x == 2021-01-02T10:00:00Z UTC', 'x == 10:20', 'x==`uri`', 'x == C(1,2)', 'x == hex("ab")',
+    'x == [1,2]', 'x == {a:1}', 'x == NA', 'not == 1', 'not', ' site ', 'site\tand\tx',
+    'a == 1 and b == 2 or c == 3 and not d', 'a and (b or (c and d))', 'not a->b'])
+def test_filter_parser_equivalence(request_filter):
+    expected = FilterAST(hs_filter.parseString(request_filter, parseAll=True)[0])
+    assert repr(grid_filter.parse_filter(request_filter)) == repr(expected)
+
+
+@pytest.mark.parametrize("request_filter", ['', 'site and', '(site', 'site)', 'x ==', 'X', 'a -> '])
+def test_filter_parser_invalid(request_filter):
+    with pytest.raises(ParseException):
+        grid_filter.parse_filter(request_filter)
+
+
+def test_filter_parser_keywords_in_tag_names():
+    assert repr(grid_filter.parse_filter('notify')) == 'AST:has notify'
+    assert repr(grid_filter.parse_filter('not notify')) == 'AST:not notify'
+    assert repr(grid_filter.parse_filter('android or oracle')) == 'AST:has android or has oracle'
+
+
+def test_filter_parser_cache():
+    assert grid_filter.parse_filter('site and equip') is grid_filter.parse_filter('site and equip')
+
+
+def _filter_grid() -> Grid:
+    grid = Grid(columns=['id', 'site', 'equip', 'point', 'kind', 'curVal', 'siteRef'])
+    for i in range(40):
+        entity = {'id': Ref('id%d' % i)}
+        if i % 10 == 0:
+            entity.update({'site': MARKER, 'geoCity': 'City %d' % (i % 20)})
+        elif i % 3 == 0:
+            entity.update({'equip': MARKER, 'siteRef': Ref('id%d' % (i // 10 * 10))})
+        else:
+            entity.update({'point': MARKER, 'kind': 'Number' if i % 2 else 'Bool', 'curVal': i,
+                           'siteRef': Ref('id%d' % (i // 10 * 10))})
+        grid.append(entity)
+    return grid
+
+
+@pytest.mark.parametrize("request_filter", [
+    'site', 'not site', 'point and kind == "Number"', 'kind != "Bool"', 'point and curVal > 20',
+    'site or equip', 'not point and not site', 'siteRef == @id10', 'siteRef->geoCity == "City 0"',
+    'equip or (point and not curVal)', 'siteRef->site and kind == "Bool" or site',
+    'not siteRef->geoCity', 'kind == "Other"', 'unknown', 'not unknown or curVal == 3',
+    'siteRef->geoCity != "City 0"', 'siteRef->id == @id10 and curVal >= 14', 'siteRef->unknown'])
+def test_filter_with_tag_index(request_filter):
+    grid = _filter_grid()
+    function = filter_function(request_filter)
+    expected = [row for row in grid if function(grid, row)]
+    assert list(grid.filter(request_filter)) == expected  # Without index
+    grid.tag_index()
+    assert list(grid.filter(request_filter)) == expected
+    assert list(grid.filter(request_filter, limit=3)) == expected[:3]
+
+
+def test_filter_path_with_mixed_target_tag():
+    grid = Grid(columns=['id', 'area', 'siteRef'])
+    grid.append({'id': Ref('s1'), 'area': 5})
+    grid.append({'id': Ref('p1'), 'siteRef': Ref('s1')})
+    grid.append({'id': Ref('other'), 'area': Ref('x')})  # Not referenced
+    expected = list(grid.filter('siteRef->area > 3'))  # Without index
+    assert [row['id'] for row in expected] == [Ref('p1')]
+    grid.tag_index()
+    assert list(grid.filter('siteRef->area > 3')) == expected
+    grid.append({'id': Ref('p2'), 'siteRef': Ref('other')})
+    with pytest.raises(AttributeError):  # Like without index
+        list(grid.filter('siteRef->area > 3'))
+
+
+def test_plan_filter():
+    grid = _filter_grid()
+    assert plan_filter('site', grid) == ({0, 10, 20, 30}, True)
+    assert plan_filter('siteRef == @id10', grid)[1]
+    assert not plan_filter('curVal > 20', grid)[1]
+
+
+def test_plan_filter_with_ref_graph():
+    grid = _filter_grid()
+    grid.append({'id': Ref('id40'), 'point': MARKER, 'equipRef': Ref('id3')})
+    grid.append({'id': Ref('id41'), 'point': MARKER, 'equipRef': Ref('unknown')})
+    assert plan_filter('siteRef->geoCity == "City 10"', grid) == (set(range(11, 20)) | set(range(31, 40)), True)
+    assert plan_filter('equipRef->siteRef->site', grid) == ({40}, True)
+    assert plan_filter('not equipRef->siteRef', grid) == (set(range(40)) | {41}, True)
+    assert plan_filter('site and siteRef->geoCity', grid) == (set(), True)
+    grid.append({'id': Ref('id42'), 'equipRef': 'id3'})
+    assert plan_filter('equipRef->siteRef', grid) == ({40, 41, 42}, False)  # Not only Ref
+    assert plan_filter('not equipRef->siteRef', grid) == (None, False)
+
+
+def test_ref_graph():
+    grid = _filter_grid()
+    graph = grid.ref_graph()
+    assert graph.targets('siteRef')[13] == 10
+    assert graph.referrers('siteRef')[10] == set(range(11, 20)) - {10}
+    assert graph.targets('site') is None
+    grid.append({'id': Ref('id40'), 'siteRef': Ref('id0')})
+    assert grid.ref_graph() is not graph
+    assert 40 in grid.ref_graph().referrers('siteRef')[0]
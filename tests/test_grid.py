@@ -9,9 +9,14 @@ from __future__ import unicode_literals
 
 import copy
 import datetime
+import random
+from concurrent.futures import ThreadPoolExecutor
 
-from shaystack import mode_to_suffix, suffix_to_mode, Ref
+import shaystack.grid_index
+from shaystack import mode_to_suffix, suffix_to_mode, Ref, MARKER, REMOVE
 from shaystack.grid import Grid, Version, VER_3_0, Quantity, Coordinate
+from shaystack.grid_diff import grid_diff, grid_merge
+from shaystack.grid_index import TagIndex
 from shaystack.sortabledict import SortableDict
 
 
@@ -265,6 +270,84 @@ def test_grid_copy():
     assert len(grid_2) == 3
 
 
+def test_grid_copy_isolation():
+    grid = Grid(metadata={'dis': 'Grid'}, columns={'id': {}, 'site': {}, 'list': {}})
+    grid.extend([
+        {'id': Ref('site1'), 'site': MARKER, 'list': [1, 2]},
+        {'id': Ref('site2'), 'site': MARKER, 'list': [3]},
+        {'id': Ref('site3'), 'site': MARKER, 'list': []},
+    ])
+    expected = copy.deepcopy(grid)
+    entity = grid[0]
+    grid_2 = grid.copy()
+    assert grid_2 == grid
+
+    # The references taken before the copy are the entities of the original grid
+    assert grid[0] is entity
+    entity['dis'] = 'Site 1'
+    assert 'dis' not in grid_2[0]
+    del entity['dis']
+
+    # Update the entities of the copy, by position, id, iteration and filter
+    grid_2[0]['dis'] = 'Site 1'
+    grid_2[Ref('site2')]['list'].append(4)
+    for row in grid_2:
+        row['geoCity'] = 'Paris'
+    grid_2.filter('id == @site3')[0]['site'] = REMOVE
+    grid_2.metadata['dis'] = 'Copy'
+    grid_2.column['id']['dis'] = 'Id'
+    assert grid == expected
+    assert grid_2[0]['dis'] == 'Site 1' and grid_2[1]['list'] == [3, 4]
+    assert grid_2.get(Ref('site3'))['site'] is REMOVE
+
+    # Update the entities of the original grid
+    grid[-1]['dis'] = 'Site 3'
+    grid[1:2][0]['dis'] = 'Site 2'
+    grid.pop(Ref('site1'))['dis'] = 'Site 1'
+    assert 'dis' not in grid_2[1] and 'dis' not in grid_2[2]
+    assert grid[Ref('site2')]['dis'] == 'Site 2'
+
+    # The entities read after a change of positions
+    grid_3 = grid_2.copy()
+    grid_3.insert(0, {'id': Ref('site0')})
+    grid_3.sort('id')
+    grid_3[Ref('site2')]['dis'] = 'Site 2'
+    assert 'dis' not in grid_2[1] and grid_3[2]['dis'] == 'Site 2'
+    assert grid_3[Ref('site2')] is grid_3[2]
+
+    # The metadata of the copy validates the values with the copy
+    grid_4 = grid.copy()
+    assert grid_4.metadata._validate_fn.__self__ is grid_4  # pylint: disable=protected-access
+    assert grid_4.column['id']._validate_fn.__self__ is grid_4  # pylint: disable=protected-access
+
+
+def test_grid_copy_shares_only_immutable_values():
+    grid = Grid(columns={'id': {}, 'dis': {}, 'list': {}, 'his': {}})
+    grid.append({'id': Ref('site1'), 'dis': 'Site 1', 'list': [1], 'his': Grid(columns=['ts'])})
+    grid_2 = grid.copy()
+    assert grid_2[0] is not grid[0]
+    assert grid_2[0]['id'] is grid[0]['id'] and grid_2[0]['dis'] is grid[0]['dis']
+    assert grid_2[0]['list'] is not grid[0]['list'] and grid_2[0]['his'] is not grid[0]['his']
+
+
+def test_grid_copy_concurrent_reads():
+    grid = Grid(columns={'id': {}, 'dis': {}})
+    grid.extend({'id': Ref('site%d' % i), 'dis': 'Site %d' % i} for i in range(1000))
+    grid_2 = grid.copy()
+    entities = list(grid_2)
+
+    def read(_):
+        for _ in range(5):
+            assert all(row is entity for row, entity in zip(grid_2, entities))
+            assert all(grid_2[Ref('site%d' % i)] is entities[i] for i in range(0, 1000, 10))
+        return True
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        assert all(executor.map(read, range(8)))
+    assert list(grid_2) == list(grid)
+    assert all(row is not entity for row, entity in zip(grid, grid_2))
+
+
 def test_grid_str():
     grid = Grid(version=VER_3_0)
     rows = [
@@ -349,6 +432,28 @@ def test_grid_equal_with_complex_datas():
     assert ref == similar
 
 
+def test_grid_equal_without_id():
+    ref = Grid(columns=['test', 'other'])
+    ref.extend([
+        {'test': 0.0000049999},
+        {'test': datetime.time(7, 23, 2, 600000)},
+        {'test': {'a': 1.0}, 'other': None},
+        {'test': 1},
+        {'test': 1},
+    ])
+    similar = Grid(columns=['test', 'other'])
+    similar.extend([
+        {'test': 1.000001},
+        {'test': {'a': 1}},
+        {'test': datetime.time(7, 23, 2)},
+        {'test': 0.0000050001},  # Approximately identical, but rounded differently
+        {'test': 1.0},
+    ])
+    assert ref == similar
+    similar[-1]['test'] = 1.1
+    assert ref != similar
+
+
 def test_grid_equal_with_complex_datas_and_ids():
     ref = Grid()
     ref.column['id'] = {}
@@ -628,3 +733,191 @@ def test_purge_grid():
     grid.append({"id": Ref("myid2"), "a": 1, "b": 2, "d": 4})
     assert grid.purge()[0] == {"id": Ref("myid1"), "a": 1, "b": 2}
     assert grid.purge()[1] == {"id": Ref("myid2"), "a": 1, "b": 2}
+
+
+def _check_tag_index(grid: Grid) -> None:
+    index = grid.tag_index()
+    expected = TagIndex(grid)
+    assert index.size == len(grid)
+    assert {tag: positions for tag, positions in index.tags.items() if positions} == \
+           {tag: positions for tag, positions in expected.tags.items() if positions}
+    for tag in expected.tags:
+        for value in ("a", "b", Ref("r1"), True):
+            assert index.value_positions(tag, value) == expected.value_positions(tag, value)
+
+
+def test_tag_index_updated():
+    grid = Grid(columns=['id', 'site', 'equip', 'kind'])
+    grid.extend([{'id': Ref('r%d' % i), 'site': MARKER, 'kind': 'a'} for i in range(3)])
+    _check_tag_index(grid)
+    grid.append({'id': Ref('r3'), 'equip': MARKER, 'kind': 'b'})
+    _check_tag_index(grid)
+    grid[1] = {'id': Ref('r1'), 'equip': MARKER, 'kind': 'b'}
+    _check_tag_index(grid)
+    grid[Ref('r0')] = {'id': Ref('r0'), 'site': MARKER, 'kind': None}
+    _check_tag_index(grid)
+    grid.pop(3)
+    _check_tag_index(grid)
+    del grid[Ref('r0')]
+    _check_tag_index(grid)
+    grid.insert(0, {'id': Ref('r4'), 'site': MARKER, 'kind': True})
+    _check_tag_index(grid)
+    grid.extend([{'site': MARKER, 'kind': Ref('r1')}])
+    _check_tag_index(grid)
+    grid[1:2] = [{'equip': MARKER}]
+    _check_tag_index(grid)
+    grid[0]['kind'] = 'a'
+    grid.reindex()
+    _check_tag_index(grid)
+
+
+def test_filter_after_update():
+    grid = Grid(columns=['id', 'site', 'dis'])
+    grid.extend([{'id': Ref('a'), 'site': MARKER, 'dis': 'A'}, {'id': Ref('b'), 'dis': 'B'}])
+    assert list(grid.filter('site')) == [grid[0]]
+    assert list(grid.filter('site')) == [grid[0]]
+    grid[1]['site'] = MARKER
+    assert list(grid.filter('site')) == [grid[0], grid[1]]  # Without index
+
+    # With the index, `reindex()` after a direct update
+    grid.tag_index()
+    grid[1]['dis'] = 'Bx'
+    grid.reindex()
+    assert list(grid.filter('dis == "Bx"')) == [grid[1]]
+
+
+def test_filter_after_merge():
+    grid = Grid(columns=['id', 'site', 'dis', 'siteRef'])
+    grid.extend([{'id': Ref('a'), 'site': MARKER, 'dis': 'A'},
+                 {'id': Ref('b'), 'site': MARKER, 'dis': 'B'},
+                 {'id': Ref('c'), 'dis': 'C', 'siteRef': Ref('b')}])
+    grid_2 = grid.copy()
+    grid_2[Ref('b')] = {'id': Ref('b'), 'dis': 'Bx'}
+    grid_2[Ref('c')] = {'id': Ref('c'), 'dis': 'C', 'siteRef': Ref('a')}
+    grid.tag_index()
+    assert list(grid.filter('site')) == [grid[0], grid[1]]
+    assert list(grid.filter('siteRef->dis == "B"')) == [grid[2]]
+    grid_merge(grid, grid_diff(grid, grid_2))
+    assert list(grid.filter('site')) == [grid[0]]
+    assert list(grid.filter('dis == "Bx"')) == [grid[1]]
+    assert list(grid.filter('siteRef->dis == "A"')) == [grid[2]]
+
+
+def test_tag_index_by_value():
+    grid = Grid(columns=['id', 'kind', 'dis'])
+    grid.extend([{'id': Ref('r%d' % i), 'kind': 'a', 'dis': 'Entity %d' % i} for i in range(300)])
+    grid.append({'kind': 1})
+    index = grid.tag_index()
+    assert index.value_positions('kind', 'a') is None  # Not only str, bool or Ref
+    assert index.value_positions('dis', 'Entity 10') is None  # Too many values
+    assert index.value_positions('id', Ref('r10')) is None
+    assert index.value_positions('unknown', 'a') == set()
+
+
+def test_position_index_updated(monkeypatch):
+    monkeypatch.setattr(shaystack.grid_index, "MIN_COMPACTION", 4)
+    grid = Grid(columns=['id', 'val'])
+    grid.extend([{'id': Ref('r%d' % i), 'val': i} for i in range(100)])
+    grid.append({'val': 'no id'})
+    random_generator = random.Random(1)
+    for i in range(300):
+        operation = random_generator.randrange(6)
+        position = random_generator.randrange(len(grid))
+        if operation == 0:
+            grid.pop(position)
+        elif operation == 1:
+            del grid[grid[position].get('id', Ref('unknown'))]
+        elif operation == 2:
+            grid[position] = {'id': Ref('n%d' % i)}
+        elif operation == 3:
+            grid[position:position + 2] = [{'id': Ref('s%d' % i)}, {'val': i}]
+        elif operation == 4:
+            grid.append({'id': Ref('a%d' % i)})
+        else:
+            grid.pop(len(grid) - 1)
+        expected = {row['id']: position for position, row in enumerate(grid) if 'id' in row}
+        assert {key: grid._index.position(key) for key in grid.keys()} == expected
+        assert all(grid[key] is grid[position] for key, position in expected.items())
+
+
+def test_grid_bulk_extend():
+    grid = Grid.from_rows(None, {'dis': 'bulk'}, ['id', 'val'],
+                          ({'id': Ref('r%d' % i), 'val': i} for i in range(10)))
+    assert len(grid) == 10
+    assert grid.metadata['dis'] == 'bulk'
+    assert grid[Ref('r3')]['val'] == 3
+
+    grid.tag_index()
+    grid.bulk_extend([{'id': Ref('n%d' % i), 'val': i, 'kind': 'new'} for i in range(5)] + [{'val': 5}])
+    assert len(grid) == 16
+    assert grid[Ref('n4')] is grid[14]
+    assert grid._tag_index.positions('val') == set(range(16))
+    assert grid._tag_index.value_positions('kind', 'new') == set(range(10, 15))
+    assert list(grid.filter('kind == "new"').keys()) == [Ref('n%d' % i) for i in range(5)]
+
+    grid = Grid(columns=['val'])
+    grid.bulk_extend([{'val': 1}])
+    assert grid._index is None
+    grid.bulk_extend([{'id': Ref('late')}])
+    assert grid[Ref('late')] is grid[1]
+
+
+def test_grid_bulk_extend_validate():
+    grid = Grid(version='2.0', columns=['test'])
+    grid.bulk_extend([{'test': 'text'}], validate=True)
+    try:
+        grid.bulk_extend([{'test': 'text'}, {'test': ['This should fail']}], validate=True)
+        assert False, 'Appended invalid data type'
+    except ValueError as exception:
+        assert str(exception) == 'Data type requires version 3.0'
+    assert len(grid) == 1
+    try:
+        grid.bulk_extend(['not a dict'], validate=True)
+        assert False, 'Appended invalid entity'
+    except TypeError:
+        pass
+
+    # The version is detected
+    grid = Grid(columns=['test'])
+    grid._version = Version('2.0')
+    grid.bulk_extend([{'test': ['list']}], validate=True)
+    assert grid.version == VER_3_0
+
+
+def test_grid_sort():
+    grid = Grid(columns=['id', 'val'])
+    grid.extend([{'id': Ref('a'), 'val': 3},
+                 {'id': Ref('b'), 'val': 'text'},
+                 {'id': Ref('c')},
+                 {'id': Ref('d'), 'val': Quantity(1.5, 'm')},
+                 {'id': Ref('e'), 'val': datetime.datetime(2020, 1, 1)},
+                 {'id': Ref('f'), 'val': 3, 'other': 1}])
+    assert grid[Ref('a')]['val'] == 3
+    grid.sort('val')
+    # The numbers, then the strings, then the datetimes, then the missing values
+    assert [row['id'].name for row in grid] == ['d', 'a', 'f', 'b', 'e', 'c']
+    # The positions of the ids are updated
+    assert grid[Ref('c')] is grid[5]
+    grid.sort('val', reverse=True)
+    assert [row['id'].name for row in grid] == ['e', 'b', 'a', 'f', 'd', 'c']
+    grid.sort(['val', 'other'], missing='first')
+    assert [row['id'].name for row in grid] == ['c', 'd', 'a', 'f', 'b', 'e']
+    try:
+        grid.sort('val', missing='middle')
+        assert False, 'Accepted invalid missing'
+    except ValueError:
+        pass
+
+
+def test_grid_top_k():
+    grid = Grid(columns=['id', 'val'])
+    grid.extend([{'id': Ref('id%d' % i), 'val': (i * 7) % 10} for i in range(10)])
+    grid.append({'id': Ref('none')})
+    top = grid.top_k('val', 3)
+    assert [row['val'] for row in top] == [0, 1, 2]
+    assert top.column == grid.column
+    assert [row['val'] for row in grid.top_k('val', 3, reverse=True)] == [9, 8, 7]
+    assert [row['id'].name for row in grid.top_k('val', 2, missing='first')] == ['none', 'id0']
+    # The grid is not sorted
+    assert grid[1]['val'] == 7
+    assert len(grid.top_k('val', 20)) == 11
@@ -161,3 +161,28 @@ def test_read_with_arg_and_select(mock) -> None:
     assert response.headers["Content-Type"].startswith(mime_type)
     read_grid = shaystack.parse(response.body, mime_type)
     assert not read_grid
+
+
+@patch.object(ping.Provider, 'read_sorted')
+def test_read_with_arg_and_sort(mock) -> None:
+    # GIVEN
+    """
+    Args:
+        mock:
+    """
+    envs = {'HAYSTACK_PROVIDER': 'shaystack.providers.ping'}
+    mock.return_value = ping._PingGrid
+    mime_type = DEFAULT_MIME_TYPE
+    request = HaystackHttpRequest()
+    request.args["filter"] = "site"
+    request.args["limit"] = "10"
+    request.args["sort"] = "area,dis"
+    request.args["reverse"] = "true"
+
+    # WHEN
+    response = shaystack.read(envs, request, "dev", ping.Provider(envs))
+
+    # THEN
+    mock.assert_called_once_with(10, None, None, 'site', None, ['area', 'dis'], True)
+    assert response.status_code == 200
+    assert response.headers["Content-Type"].startswith(mime_type)
@@ -1,10 +1,13 @@
-from datetime import datetime
+import os
+import random
+from datetime import datetime, timedelta
 from io import BytesIO
 
+import pytest
 import pytz
 
-from shaystack import Grid, MODE_ZINC, dump
-from shaystack.providers.url import merge_timeseries
+from shaystack import Grid, MODE_ZINC, dump, parse
+from shaystack.providers.url import merge_timeseries, time_series_batches, read_grid_from_uri
 
 
 def _get_mock_s3():
@@ -87,3 +90,58 @@ def test_merge_timeseries_olds_values():
     )
     result_grid = merge_timeseries(source, destination)
     assert result_grid == expected_grid
+
+
+def test_merge_timeseries_with_iterator():
+    source = Grid(columns=["ts", "value"])
+    source.extend(
+        [
+            {"ts": datetime(2020, 1, 1, 0, 0, 2, 0, tzinfo=pytz.UTC), "value": 100},
+            {"ts": datetime(2020, 2, 1, 0, 0, 2, 0, tzinfo=pytz.UTC), "value": 200},
+        ])
+    destination = Grid(columns=["ts", "value"])
+    destination.append({"ts": datetime(2020, 2, 1, 0, 0, 2, 0, tzinfo=pytz.UTC), "value": 100})
+    result_grid = merge_timeseries(iter(source), destination)
+    assert [row["value"] for row in result_grid] == [100, 100]
+
+
+def test_time_series_batches():
+    start = datetime(2020, 1, 1, tzinfo=pytz.UTC)
+    time_series = Grid(columns=["ts", "val"])
+    for i in range(20):
+        time_series.append({"ts": start + timedelta(minutes=i // 3), "val": i})
+    batches = list(time_series_batches(time_series, iter(time_series), batch_size=4))
+    assert len(batches) > 1
+    assert batches[0][0][0] == start
+    assert batches[-1][0][1] == time_series[-1]["ts"]
+    for ((_, end), _), ((begin, _), _) in zip(batches, batches[1:]):
+        assert end == begin
+    for (begin, end), batch in batches[:-1]:
+        assert all(begin <= row["ts"] < end for row in batch)
+    assert [row["val"] for _, batch in batches for row in batch] == list(range(20))
+
+
+def test_time_series_batches_unsorted():
+    start = datetime(2020, 1, 1, tzinfo=pytz.UTC)
+    time_series = Grid(columns=["ts", "val"])
+    time_series.extend({"ts": start + timedelta(minutes=i), "val": i} for i in range(20))
+    shuffled = list(time_series)
+    random.Random(1).shuffle(shuffled)
+    # Sorted in a batch
+    batches = list(time_series_batches(time_series, shuffled, batch_size=100))
+    assert batches == [((start, start + timedelta(minutes=19)), list(time_series))]
+    # Never clean the period of a previous batch
+    with pytest.raises(ValueError):
+        list(time_series_batches(time_series, shuffled, batch_size=4))
+
+
+def test_time_series_batches_empty():
+    time_series = Grid(columns=["ts", "val"])
+    assert list(time_series_batches(time_series)) == [((datetime.min, datetime.max), [])]
+
+
+def test_read_grid_from_uri():
+    path = os.path.abspath("sample/carytown.zinc")
+    with open(path, encoding="utf-8") as file:
+        expected_grid = parse(file.read(), MODE_ZINC)
+    assert read_grid_from_uri(path, envs={}) == expected_grid
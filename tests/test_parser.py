@@ -9,15 +9,22 @@
 from __future__ import unicode_literals
 
 import datetime
+import io
 import json
 import math
 import os
+import subprocess
+import sys
 import textwrap
 import warnings
+from concurrent.futures import ThreadPoolExecutor
+from glob import glob
 
+import pytest
 import pytz
 
 import shaystack
+import shaystack.parallelparser
 from shaystack import MARKER, Grid, MODE_JSON, XStr, MODE_CSV, MODE_TRIO, Quantity, Coordinate, MODE_ZINC
 from shaystack.tools import unescape_str
 from shaystack.zincparser import ZincParseException
@@ -2712,3 +2719,154 @@ def test_unescape():
 def test_string_without_crlf_at_end():
     shaystack.parse(SIMPLE_EXAMPLE_ZINC[0:-1], MODE_ZINC)
     assert True  # No exception
+
+
+@pytest.mark.parametrize("path", sorted(glob(os.path.join(THIS_DIR, "..", "sample", "*.zinc"))))
+def test_engines_equivalence_zinc(path):
+    with open(path, encoding="utf-8") as file:
+        zinc = file.read()
+    grid_pyparsing = shaystack.parse(zinc, MODE_ZINC, engine=shaystack.ENGINE_PYPARSING)
+    grid_fast = shaystack.parse(zinc, MODE_ZINC, engine=shaystack.ENGINE_FAST)
+    assert grid_fast == grid_pyparsing
+    assert grid_fast.version == grid_pyparsing.version
+    assert list(grid_fast.column.keys()) == list(grid_pyparsing.column.keys())
+
+
+@pytest.mark.parametrize("scalar", ['M', 'N', 'NA', 'R', 'T', 'F', 'INF', '-INF',
+                                    '-12.5e3kW', '50%', '"a\\n\\"b\\u00e9"', '@id "dis"',
+                                    '`http://a/b`', 'C(1.5,-2.25)', 'Span("today")',
+                                    '2021-03-04', '12:34:56.789',
+                                    '2021-03-04T12:34:56.789+01:00 Paris',
+                                    '2021-03-04T12:34:56Z UTC',
+                                    '[1, "b", M]', '{a:1 b c:"x"}'])
+def test_engines_equivalence_scalar_zinc(scalar):
+    assert shaystack.parse_scalar(scalar, MODE_ZINC, engine=shaystack.ENGINE_FAST) == \
+           shaystack.parse_scalar(scalar, MODE_ZINC, engine=shaystack.ENGINE_PYPARSING)
+
+
+def test_malformed_row_fast_engine_zinc():
+    with pytest.raises(ZincParseException) as excinfo:
+        shaystack.parse(textwrap.dedent('''
+        ver:"3.0"
+        c1, c2
+        1, "No problems here"
+        2, @
+        ''')[1:], MODE_ZINC, engine=shaystack.ENGINE_FAST)
+    assert excinfo.value.line == 4
+    assert excinfo.value.col == 1
+
+
+def test_unknown_engine_zinc():
+    with pytest.raises(NotImplementedError):
+        shaystack.parse(SIMPLE_EXAMPLE_ZINC, MODE_ZINC, engine="unknown")
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 4096])
+def test_iter_zinc_rows(chunk_size):
+    zinc = textwrap.dedent(u'''
+    ver:"3.0" database:"test"
+    id,dis,inner
+    @id1,"Été",
+    @id2,"Second",<<ver:"3.0"
+    comment
+    "A innergrid"
+    >>
+    @id3,"Third",
+    ''')[1:]
+    data = zinc.encode("utf-8")
+    header, rows = shaystack.iter_zinc_rows(data[i:i + chunk_size] for i in range(0, len(data), chunk_size))
+    assert len(header) == 0
+    assert header.metadata["database"] == "test"
+    assert list(header.column.keys()) == ["id", "dis", "inner"]
+    entities = list(rows)
+    assert len(entities) == 3
+    assert entities[0]["dis"] == "Été"
+    assert entities[1]["inner"][0]["comment"] == "A innergrid"
+    grid = header.copy()
+    grid.extend(entities)
+    assert grid == shaystack.parse(zinc, MODE_ZINC)
+
+
+def test_iter_zinc_rows_file():
+    with open(os.path.join(THIS_DIR, "..", "sample", "carytown.zinc"), "rb") as file:
+        header, rows = shaystack.iter_zinc_rows(file)
+        header.extend(rows)
+    with open(os.path.join(THIS_DIR, "..", "sample", "carytown.zinc"), encoding="utf-8") as file:
+        assert header == shaystack.parse(file.read(), MODE_ZINC)
+
+
+def test_iter_zinc_rows_malformed_row():
+    _, rows = shaystack.iter_zinc_rows(io.StringIO(textwrap.dedent('''
+    ver:"2.0"
+    c1, c2
+    1, "No problems here"
+    2, We should fail here
+    ''')[1:]))
+    assert next(rows) == {"c1": 1.0, "c2": "No problems here"}
+    with pytest.raises(ZincParseException) as excinfo:
+        next(rows)
+    assert excinfo.value.line == 4
+    assert excinfo.value.col == 1
+
+
+@pytest.mark.parametrize("mode,sample", [(MODE_ZINC, "carytown.zinc"),
+                                         (MODE_CSV, "carytown.csv"),
+                                         (MODE_TRIO, "carytown.trio")])
+def test_parse_with_workers(mode, sample, monkeypatch):
+    monkeypatch.setattr(shaystack.parallelparser, "MIN_CHUNK_SIZE", 256)
+    with open(os.path.join(THIS_DIR, "..", "sample", sample), encoding="utf-8") as file:
+        text = file.read()
+    grid = shaystack.parse(text, mode)
+    parallel_grid = shaystack.parse(text, mode, workers=2)
+    assert parallel_grid == grid
+    assert list(parallel_grid.column.keys()) == list(grid.column.keys())
+    assert parallel_grid[grid[5]['id']] is parallel_grid[5]  # Rebuilt index
+
+
+def test_parse_with_workers_inner_grids(monkeypatch):
+    monkeypatch.setattr(shaystack.parallelparser, "MIN_CHUNK_SIZE", 64)
+    zinc = 'ver:"3.0"\nid,inner\n' + ''.join('@id%d,<<ver:"3.0"\nx\n"<<%d"\n>>\n' % (i, i)
+                                             for i in range(40))
+    assert shaystack.parse(zinc, MODE_ZINC, workers=2) == shaystack.parse(zinc, MODE_ZINC)
+
+
+def test_parse_with_workers_malformed_row(monkeypatch):
+    monkeypatch.setattr(shaystack.parallelparser, "MIN_CHUNK_SIZE", 64)
+    zinc = 'ver:"3.0"\nid,val\n' + ''.join('@id%d,%d\n' % (i, i) for i in range(40)) + \
+           '@bad,oops here\n'
+    with pytest.raises(ZincParseException) as excinfo:
+        shaystack.parse(zinc, MODE_ZINC, workers=2)
+    assert excinfo.value.line == 43
+    assert excinfo.value.col == 1
+
+
+def test_parse_pyparsing_in_threads():
+    samples = sorted(glob(os.path.join(THIS_DIR, "..", "sample", "p_demo_r_*.zinc")))[:8]
+    texts = []
+    for path in samples:
+        with open(path, encoding="utf-8") as file:
+            texts.append(file.read())
+    expected = [shaystack.parse(text, MODE_ZINC, engine=shaystack.ENGINE_PYPARSING) for text in texts]
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(lambda text: shaystack.parse(text, MODE_ZINC,
+                                                                 engine=shaystack.ENGINE_PYPARSING),
+                                    texts * 2))
+    assert results == expected * 2
+
+
+def test_lazy_parsers():
+    code = ("import sys, shaystack\n"
+            "print(' '.join(name for name in ('shaystack.csvparser', 'shaystack.trioparser', "
+            "'shaystack.parallelparser', 'shaystack.csvdumper', 'shaystack.triodumper', "
+            "'shaystack.zincparser', 'shaystack.grid_filter', 'pyparsing') "
+            "if name in sys.modules))\n"
+            "shaystack.parse('a,b\\n1,2\\n', shaystack.MODE_CSV)\n"
+            "print('shaystack.csvparser' in sys.modules)\n"
+            "import shaystack.trioparser\n"
+            "print(hasattr(shaystack.trioparser._thread_grammar, 'grammar'), "
+            "hasattr(shaystack.zincparser._thread_grammar, 'grammar'))\n")
+    output = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True,
+                            cwd=os.path.join(THIS_DIR, "..")).stdout.splitlines()
+    assert output == ["", "True", "False False"]
+    with pytest.raises(NotImplementedError):
+        shaystack.parse("", "text/unknown")
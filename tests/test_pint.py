@@ -1,6 +1,12 @@
 import importlib.resources as pkg_resources
+import os
+import tempfile
+
+import pytest
+from pint import UndefinedUnitError
 
 import shaystack
+from shaystack import pintutil
 
 
 def _load_haystack_units():
@@ -31,3 +37,81 @@ def test_all_units():
                 not_defined.append(symbol)
                 print("***", error, symbol)
     assert (len(not_defined)) == 0
+
+
+def test_quantity_units_cache():
+    quantity = shaystack.Quantity(1.5, 'kW')
+    same_unit = shaystack.Quantity(2, 'kW')
+    assert quantity.units == same_unit.units
+    assert quantity == shaystack.unit_reg.Quantity(1.5, 'kilowatt')
+    assert quantity.to('W').m == 1500.0
+    assert (quantity + same_unit).m == 3.5
+    assert quantity.symbol == 'kW'
+    assert shaystack.Quantity(1.5, 'kW') == shaystack.Quantity(1.5, shaystack.unit_reg.Unit('kW'))
+    with pytest.raises(UndefinedUnitError):
+        shaystack.Quantity(1.5, 'not_a_unit')
+
+
+def test_units_cache(monkeypatch):
+    with tempfile.TemporaryDirectory() as directory:
+        monkeypatch.setenv("HAYSTACK_UNITS_CACHE", directory)
+        built = pintutil._load_pint_units()
+        assert len(os.listdir(directory)) == 1
+        cached = pintutil._load_pint_units()
+        assert cached is not built
+        # pylint: disable=protected-access
+        assert cached._cache.root_units == built._cache.root_units
+        assert cached._cache.dimensionality == built._cache.dimensionality
+        assert cached.Quantity(3, 'kW').to('W').m == 3000
+        assert cached.Quantity(500, 'nm').to('THz', 'sp') == built.Quantity(500, 'nm').to('THz', 'sp')
+        assert cached.get_system('imperial').name == 'imperial'
+
+        with open(os.path.join(directory, os.listdir(directory)[0]), 'wb') as file:
+            file.write(b'not a registry')
+        assert pintutil._load_pint_units().Quantity(1, 'kWh').to('J').m == 3600000
+
+        monkeypatch.setenv("HAYSTACK_UNITS_CACHE", "")
+        assert pintutil._units_cache_path() is None
+
+    # The default directory can not be imported as a package
+    monkeypatch.delenv("HAYSTACK_UNITS_CACHE")
+    default_directory = os.path.basename(os.path.dirname(pintutil._units_cache_path()))
+    assert default_directory.startswith("shaystack-units-") and not default_directory.isidentifier()
+
+
+def test_units_cache_in_not_private_directory(monkeypatch):
+    with tempfile.TemporaryDirectory() as directory:
+        cache = os.path.join(directory, "cache")
+        monkeypatch.setenv("HAYSTACK_UNITS_CACHE", cache)
+        registry = pintutil._load_pint_units()
+        path = pintutil._units_cache_path()
+        assert pintutil._read_units_cache(path) is not None
+
+        os.chmod(cache, 0o755)  # Lax directory
+        assert pintutil._read_units_cache(path) is None
+        os.remove(path)
+        pintutil._write_units_cache(path, registry)
+        assert not os.path.exists(path)
+
+        os.chmod(cache, 0o700)
+        pintutil._write_units_cache(path, registry)
+        link = os.path.join(directory, "link")
+        os.symlink(cache, link)
+        monkeypatch.setenv("HAYSTACK_UNITS_CACHE", link)  # Symbolic link
+        assert pintutil._read_units_cache(pintutil._units_cache_path()) is None
+
+        foreign_uid = os.lstat(cache).st_uid + 1
+        monkeypatch.setattr(os, "getuid", lambda: foreign_uid)  # Foreign directory
+        assert pintutil._read_units_cache(path) is None
+        monkeypatch.undo()
+
+    # The default directory, created by another user, is not used
+    with tempfile.TemporaryDirectory() as directory:
+        monkeypatch.delenv("HAYSTACK_UNITS_CACHE", raising=False)
+        monkeypatch.setenv("XDG_CACHE_HOME", os.path.join(directory, "home"))
+        monkeypatch.setattr(tempfile, "gettempdir", lambda: directory)
+        default_path = pintutil._units_cache_path()
+        os.makedirs(os.path.dirname(default_path), mode=0o777)
+        os.chmod(os.path.dirname(default_path), 0o777)
+        assert pintutil._units_cache_path() == os.path.join(directory, "home", "shaystack-units",
+                                                            os.path.basename(default_path))
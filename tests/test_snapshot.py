@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+# Binary snapshot tests
+# See the accompanying LICENSE file.
+# (C) 2021 Engie Digital
+#
+# vim: set ts=4 sts=4 et tw=78 sw=4 si:
+import datetime
+import glob
+import os
+import tempfile
+
+import pytz
+
+import shaystack
+from shaystack import Grid, Ref, Quantity, Coordinate, Uri, Bin, XStr, MARKER, NA, REMOVE
+from shaystack.providers import get_provider
+from shaystack.snapshot import dump_snapshot, parse_snapshot
+
+
+def _sample_files():
+    for path in sorted(glob.glob(os.path.join(os.path.dirname(__file__), '..', 'sample', '*.*'))):
+        suffix = '.hayson.json' if path.endswith('.hayson.json') else os.path.splitext(path)[1]
+        mode = shaystack.suffix_to_mode(suffix)
+        if mode:
+            yield path, mode
+
+
+def test_snapshot_sample_files():
+    for path, mode in _sample_files():
+        with open(path, encoding='utf-8-sig') as file:
+            grid = shaystack.parse(file.read(), mode)
+        restored = parse_snapshot(dump_snapshot(grid))
+        assert restored == grid, path
+        assert list(restored) == list(grid), path
+        assert restored.version == grid.version
+
+
+def test_snapshot_datatypes():
+    grid = Grid(metadata={'dis': 'all types', 'tz': 'Paris'},
+                columns=[('id', {'dis': 'id'}), ('val', {'unit': Quantity(1, 'kW')})])
+    paris = pytz.timezone('Europe/Paris')
+    values = [None, MARKER, NA, REMOVE, True, False, 0, -2 ** 63, 2 ** 80, 1.5, -1e300,
+              Quantity(3.5, 'kW'), Quantity(2), 'text', 'é☃', Uri('http://localhost'), Bin('text/plain'),
+              XStr('hex', 'deadbeef'), XStr('b64', 'aGVsbG8='), Ref('a', 'dis'), Ref('b'),
+              datetime.date(2021, 3, 1), datetime.time(10, 20, 30, 400),
+              datetime.datetime(2021, 3, 1, 10, 20, 30, 400),
+              paris.localize(datetime.datetime(2021, 7, 1, 10, 20)),
+              datetime.datetime(1900, 1, 1, tzinfo=pytz.utc),
+              datetime.datetime(2021, 1, 1, tzinfo=datetime.timezone.utc),
+              Coordinate(48.85, 2.35), [1, 'a', [MARKER]], {'a': 1, 'b': {'c': Ref('a', 'dis')}},
+              Grid(columns=['a'])]
+    grid.extend({'id': Ref('id%d' % i), 'val': value} for i, value in enumerate(values))
+    grid[-1]['val'].append({'a': 1})
+    restored = parse_snapshot(dump_snapshot(grid))
+    assert restored.metadata == grid.metadata
+    assert restored.column == grid.column
+    for entity, value in zip(restored, values):
+        assert type(entity['val']) is type(value)  # pylint: disable=unidiomatic-typecheck
+        if isinstance(value, datetime.datetime) and value.tzinfo:
+            assert entity['val'].tzinfo.zone == value.tzinfo.zone if hasattr(value.tzinfo, 'zone') \
+                else entity['val'].tzinfo == value.tzinfo
+            assert entity['val'].utcoffset() == value.utcoffset()
+        if isinstance(value, Quantity):
+            assert entity['val'].symbol == value.symbol
+        if isinstance(value, Ref):
+            assert entity['val'].value == value.value
+    assert restored == grid
+    # The references are shared
+    assert restored[19]['id'] is not restored[19]['val']
+    assert restored[19]['val'] is restored[29]['val']['b']['c']
+
+
+def test_snapshot_file():
+    grid = Grid(columns=['id', 'ts'])
+    grid.extend({'id': Ref('id%d' % i), 'ts': datetime.datetime(2021, 1, 1, i, tzinfo=pytz.utc)}
+                for i in range(10))
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'grid.snapshot')
+        grid.save_snapshot(path)
+        assert Grid.load_snapshot(path) == grid
+        with open(path, 'wb') as file:
+            file.write(b'not a snapshot')
+        try:
+            Grid.load_snapshot(path)
+            assert False, 'Loaded an invalid snapshot'
+        except ValueError:
+            pass
+
+
+def test_snapshot_url_provider():
+    with tempfile.TemporaryDirectory() as directory:
+        envs = {'HAYSTACK_DB': 'sample/carytown.zinc', 'HAYSTACK_SNAPSHOT_DIR': directory, 'REFRESH': '0'}
+        with get_provider('shaystack.providers.url', envs) as provider:
+            grid = provider.read(0, None, None, None, None)
+            assert len(os.listdir(directory)) == 1
+            provider.cache_clear()
+            assert provider.read(0, None, None, None, None) == grid
@@ -87,3 +87,32 @@ def test_oddball_iso8601_datetime():
         assert False, 'Matched an oddball timezone'
     except ValueError:
         pass
+
+
+def test_precomputed_tz_map():
+    # Run `make timezones` if this test fails
+    assert zoneinfo._load_timezones() == zoneinfo._map_timezones()
+
+
+def test_timezone_cache():
+    assert zoneinfo.timezone('Paris') is zoneinfo.timezone('Paris')
+    assert zoneinfo.timezone('Paris').zone == 'Europe/Paris'
+
+
+def test_fixed_offset_timezone_name():
+    for hours in range(-12, 15):
+        date_time = datetime.datetime(2021, 7, 1, tzinfo=datetime.timezone(datetime.timedelta(hours=hours)))
+        name = zoneinfo.timezone_name(date_time)
+        assert zoneinfo.timezone(name).utcoffset(date_time.replace(tzinfo=None)) == date_time.utcoffset()
+    assert zoneinfo.timezone_name(datetime.datetime(2021, 1, 1, tzinfo=datetime.timezone.utc)) == 'UTC'
+
+
+def test_search_timezone_name():
+    # Offsets without a fixed offset timezone
+    for date_time, minutes in ((datetime.datetime(2021, 1, 1, 10, 40), 5 * 60 + 30),
+                               (datetime.datetime(2021, 1, 1, 10, 50), 5 * 60 + 30),
+                               (datetime.datetime(2021, 7, 1, 23, 59), 9 * 60 + 30),
+                               (datetime.datetime(2021, 1, 1, 23, 59), 10 * 60 + 30)):
+        date_time = date_time.replace(tzinfo=datetime.timezone(datetime.timedelta(minutes=minutes)))
+        name = zoneinfo.timezone_name(date_time)
+        assert zoneinfo.timezone(name).utcoffset(date_time.replace(tzinfo=None)) == date_time.utcoffset()
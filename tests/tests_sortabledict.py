@@ -179,3 +179,46 @@ def test_pop_at():
     a_dict['c'] = 3
     assert a_dict.pop_at(1) == 2
     assert list(a_dict.items()) == [('a', 1), ('c', 3)]
+
+
+def test_positions_after_updates():
+    a_dict = SortableDict()
+    expected = []
+    for i in range(20):
+        a_dict['k%d' % i] = i
+        expected.append('k%d' % i)
+    assert a_dict.index('k5') == 5
+    del a_dict['k19']  # The last key
+    del a_dict['k3']
+    expected.remove('k19')
+    expected.remove('k3')
+    assert [a_dict.at(i) for i in range(len(a_dict))] == expected
+    assert a_dict.index('k5') == 4
+    a_dict.add_item('new', 0, index=2)
+    a_dict.add_item('k0', 0, after=True, pos_key='k10')
+    a_dict['end'] = 1
+    expected.insert(2, 'new')
+    # Like a list, the position is computed before the removal of the moved key
+    position = expected.index('k10') + 1
+    expected.remove('k0')
+    expected.insert(position, 'k0')
+    expected.append('end')
+    assert list(a_dict) == expected
+    assert [a_dict.index(key) for key in expected] == list(range(len(expected)))
+    assert a_dict.value_at(-1) == 1 and a_dict.pop_at(0) == 1
+    try:
+        a_dict.index('k3')
+        assert False, 'Removed key'
+    except ValueError:
+        pass
+
+
+def test_copy():
+    a_dict = SortableDict([('a', [1]), ('b', [2])])
+    shallow = a_dict.copy()
+    deep = a_dict.copy(deep=True)
+    del shallow['a']
+    shallow['c'] = 3
+    assert list(a_dict.items()) == [('a', [1]), ('b', [2])]
+    assert shallow['b'] is a_dict['b']
+    assert deep['b'] is not a_dict['b'] and deep == a_dict